@@ -92,6 +92,8 @@ class BaseEnv(gym.Env):
                 rendering_settings=self.rendering_settings,
                 vr_settings=self.vr_settings,
                 use_pb_gui=use_pb_gui,
+                use_incremental_state_updates=self.config.get("use_incremental_state_updates", False),
+                use_instanced_dirt_particles=self.config.get("use_instanced_dirt_particles", False),
             )
         else:
             self.simulator = Simulator(
@@ -104,6 +106,8 @@ class BaseEnv(gym.Env):
                 device_idx=device_idx,
                 rendering_settings=self.rendering_settings,
                 use_pb_gui=use_pb_gui,
+                use_incremental_state_updates=self.config.get("use_incremental_state_updates", False),
+                use_instanced_dirt_particles=self.config.get("use_instanced_dirt_particles", False),
             )
         self.load()
 
@@ -222,9 +226,13 @@ class BaseEnv(gym.Env):
 
                 robot.set_position_orientation(pos, orn)
 
+                scene.update_spatial_index()
                 if any(
                     detect_closeness(
-                        bid, exclude_bodyB=scene.objects_by_category["floors"][0].get_body_ids(), distance=0.01
+                        bid,
+                        exclude_bodyB=scene.objects_by_category["floors"][0].get_body_ids(),
+                        distance=0.01,
+                        scene=scene,
                     )
                     for bid in robot.get_body_ids()
                 ):
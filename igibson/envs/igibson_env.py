@@ -11,6 +11,7 @@ from transforms3d.euler import euler2quat
 
 from igibson import object_states
 from igibson.envs.env_base import BaseEnv
+from igibson.envs.lazy_observation import LazyObservation
 from igibson.robots.robot_base import BaseRobot
 from igibson.sensors.bump_sensor import BumpSensor
 from igibson.sensors.scan_sensor import ScanSensor
@@ -241,6 +242,14 @@ class iGibsonEnv(BaseEnv):
         self.observation_space = gym.spaces.Dict(observation_space)
         self.sensors = sensors
 
+        # Whether get_state returns a LazyObservation, whose modalities are only computed when read, and the modalities
+        # read by the caller (all of them if None), e.g. declared with ObservationModalityWrapper. The modalities of a
+        # lazy observation returned by step are computed after the task step, so they include its side effects (e.g.
+        # the visualization markers of PointNav), which the eagerly computed observation does not.
+        self.lazy_observations = self.config.get("lazy_observations", False)
+        self.observation_modalities = None
+        self.last_lazy_state = None
+
     def load_action_space(self):
         """
         Load action space.
@@ -266,34 +275,64 @@ class iGibsonEnv(BaseEnv):
         self.load_action_space()
         self.load_miscellaneous_variables()
 
+    def get_scan_obs(self, modalities=None):
+        """
+        Get the observation of the front and rear scan sensors, cast in a single batch of ray tests.
+
+        :param modalities: unused, all the scan modalities are computed together
+        :return: scan observation as a dictionary
+        """
+        scan_sensors = [self.sensors[name] for name in ["scan_occ", "scan_occ_rear"] if name in self.sensors]
+        state = OrderedDict()
+        for scan_obs in ScanSensor.get_obs_batch(self, scan_sensors):
+            for modality in scan_obs:
+                state[modality] = scan_obs[modality]
+        return state
+
     def get_state(self):
         """
         Get the current observation.
 
-        :return: observation as a dictionary
+        :return: observation as a dictionary, or a LazyObservation if lazy_observations is set
         """
-        state = OrderedDict()
+        state = LazyObservation()
         if "task_obs" in self.output:
-            state["task_obs"] = self.task.get_task_obs(self)
+            state.add_provider(["task_obs"], lambda keys: {"task_obs": self.task.get_task_obs(self)})
         if "vision" in self.sensors:
-            vision_obs = self.sensors["vision"].get_obs(self)
-            for modality in vision_obs:
-                state[modality] = vision_obs[modality]
-        if "scan_occ" in self.sensors:
-            scan_obs = self.sensors["scan_occ"].get_obs(self)
-            for modality in scan_obs:
-                state[modality] = scan_obs[modality]
-        if "scan_occ_rear" in self.sensors:
-            scan_obs = self.sensors["scan_occ_rear"].get_obs(self)
-            for modality in scan_obs:
-                state[modality] = scan_obs[modality]
+            state.add_provider(
+                self.sensors["vision"].get_obs_keys(),
+                lambda keys: self.sensors["vision"].get_obs(self, modalities=keys),
+            )
+        scan_keys = [
+            key
+            for name in ["scan_occ", "scan_occ_rear"]
+            if name in self.sensors
+            for key in self.sensors[name].get_obs_keys()
+        ]
+        if scan_keys:
+            state.add_provider(list(OrderedDict.fromkeys(scan_keys)), self.get_scan_obs)
         if "bump" in self.sensors:
-            state["bump"] = self.sensors["bump"].get_obs(self)
+            state.add_provider(["bump"], lambda keys: {"bump": self.sensors["bump"].get_obs(self)})
         if "proprioception" in self.output:
-            state["proprioception"] = np.array(self.robots[0].get_proprioception())
+            state.add_provider(
+                ["proprioception"], lambda keys: {"proprioception": np.array(self.robots[0].get_proprioception())}
+            )
+
+        if not self.lazy_observations:
+            state.prefetch()
+            return state.copy()
 
+        self.last_lazy_state = state
         return state
 
+    def expire_lazy_state(self):
+        """
+        Expire the last lazy observation, before the simulation moves on.
+        """
+        if self.last_lazy_state is not None:
+            self.last_lazy_state.expire()
+            self.last_lazy_state = None
+
     def run_simulation(self):
         """
         Run simulation for one action timestep (same as one render timestep in Simulator class).
@@ -301,9 +340,7 @@ class iGibsonEnv(BaseEnv):
         :return: a list of collisions from the last physics timestep
         """
         self.simulator_step()
-        collision_links = [
-            collision for bid in self.robots[0].get_body_ids() for collision in p.getContactPoints(bodyA=bid)
-        ]
+        collision_links = self.simulator.contact_manager.get_contact_points_for_bodies(self.robots[0].get_body_ids())
         return self.filter_collision_links(collision_links)
 
     def filter_collision_links(self, collision_links):
@@ -350,6 +387,7 @@ class iGibsonEnv(BaseEnv):
         :return: done: whether the episode is terminated
         :return: info: info dictionary with any useful information
         """
+        self.expire_lazy_state()
         self.current_step += 1
         if action is not None:
             self.robots[0].apply_action(action)
@@ -357,6 +395,7 @@ class iGibsonEnv(BaseEnv):
         self.collision_links = collision_links
         self.collision_step += int(len(collision_links) > 0)
 
+        # A LazyObservation only computes its modalities when they are read, after the task step below
         state = self.get_state()
         info = {}
         reward, info = self.task.get_reward(self, collision_links, action, info)
@@ -365,6 +404,14 @@ class iGibsonEnv(BaseEnv):
         self.populate_info(info)
 
         if done and self.automatic_reset:
+            if isinstance(state, LazyObservation):
+                # Compute what the caller reads before the reset changes the simulation state
+                state.prefetch(self.observation_modalities)
+            if "vision" in self.sensors and self.sensors["vision"].fused_readback:
+                # The vision sensor reuses its arrays, which the reset would overwrite
+                for key in self.sensors["vision"].get_obs_keys():
+                    if not isinstance(state, LazyObservation) or state.is_computed(key):
+                        state[key] = np.copy(state[key])
             info["last_observation"] = state
             state = self.reset()
 
@@ -379,7 +426,9 @@ class iGibsonEnv(BaseEnv):
         :return: whether the given body_id has collision
         """
         self.simulator_step()
-        collisions = [x for x in p.getContactPoints(bodyA=body_id) if x[2] not in ignore_ids]
+        collisions = [
+            x for x in self.simulator.contact_manager.get_contact_points(body_a=body_id) if x[2] not in ignore_ids
+        ]
 
         if log.isEnabledFor(logging.INFO):  # Only going into this if it is for logging --> efficiency
             for item in collisions:
@@ -455,7 +504,7 @@ class iGibsonEnv(BaseEnv):
         max_simulator_step = int(1.0 / self.action_timestep)
         for _ in range(max_simulator_step):
             self.simulator_step()
-            if any(len(p.getContactPoints(bodyA=body_id)) > 0 for body_id in obj.get_body_ids()):
+            if len(self.simulator.contact_manager.get_contact_points_for_bodies(obj.get_body_ids())) > 0:
                 land_success = True
                 break
 
@@ -492,6 +541,7 @@ class iGibsonEnv(BaseEnv):
         """
         Reset episode.
         """
+        self.expire_lazy_state()
         self.randomize_domain()
         # Move robot away from the scene.
         self.robots[0].set_position([100.0, 100.0, 100.0])
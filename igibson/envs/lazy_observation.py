@@ -0,0 +1,168 @@
+from collections import OrderedDict
+from collections.abc import ItemsView, ValuesView
+
+import gym
+
+_NOT_COMPUTED = object()
+
+
+class LazyObservation(OrderedDict):
+    """
+    Observation whose modalities are computed on first access and memoized for the current step.
+
+    Every modality is registered with a provider: a function that takes a list of modalities and returns a dict with
+    their values, so that modalities produced together (e.g. the renders of the vision sensor) can be computed in a
+    single call with prefetch. The observation behaves like the OrderedDict returned by iGibsonEnv.get_state (same
+    keys in the same order, and it is pickled as a plain OrderedDict), but reading a value is what computes it.
+
+    Once the environment has moved on (next step or reset), the observation is expired: the modalities that were
+    never read cannot be computed anymore, since the simulation no longer is in the state they describe. Until then,
+    a modality describes the simulation when it is read: in iGibsonEnv.step, that is after the task step (e.g. with the
+    visualization markers already moved), while an eager observation is computed before it.
+    """
+
+    def __init__(self):
+        super(LazyObservation, self).__init__()
+        self._providers = {}
+        self._expired = False
+
+    def add_provider(self, keys, compute):
+        """
+        Register lazily computed modalities.
+
+        :param keys: modalities produced by the provider, in observation order
+        :param compute: function taking a list of modalities and returning a dict with (at least) their values
+        """
+        for key in keys:
+            OrderedDict.__setitem__(self, key, _NOT_COMPUTED)
+            self._providers[key] = compute
+
+    def is_computed(self, key):
+        """
+        :param key: modality
+        :return: whether the modality has already been computed
+        """
+        return OrderedDict.__getitem__(self, key) is not _NOT_COMPUTED
+
+    def prefetch(self, keys=None):
+        """
+        Compute modalities that have not been computed yet, with one call per provider.
+
+        :param keys: modalities to compute, all of them if None
+        """
+        if keys is None:
+            keys = list(self)
+        missing_keys = [key for key in keys if not self.is_computed(key)]
+        if missing_keys and self._expired:
+            raise ValueError("Cannot compute {} of an observation of a previous step.".format(missing_keys))
+        pending = OrderedDict()
+        for key in missing_keys:
+            pending.setdefault(self._providers[key], []).append(key)
+        for compute, provider_keys in pending.items():
+            values = compute(provider_keys)
+            for key in provider_keys:
+                OrderedDict.__setitem__(self, key, values[key])
+
+    def expire(self):
+        """
+        Forbid computing the modalities that were not read, called when the environment moves on.
+        """
+        self._expired = True
+        self._providers = {}
+
+    def __getitem__(self, key):
+        value = OrderedDict.__getitem__(self, key)
+        if value is _NOT_COMPUTED:
+            self.prefetch([key])
+            value = OrderedDict.__getitem__(self, key)
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def values(self):
+        return ValuesView(self)
+
+    def items(self):
+        return ItemsView(self)
+
+    def pop(self, key, *default):
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        value = self[key]
+        del self[key]
+        return value
+
+    def popitem(self, last=True):
+        key = next(reversed(self)) if last else next(iter(self))
+        return key, self.pop(key)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def copy(self):
+        return OrderedDict(self.items())
+
+    def __eq__(self, other):
+        self.prefetch()
+        if isinstance(other, LazyObservation):
+            other.prefetch()
+        return OrderedDict.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __reduce__(self):
+        return OrderedDict, (list(self.items()),)
+
+    def __repr__(self):
+        return "{}({})".format(
+            type(self).__name__,
+            [(key, OrderedDict.__getitem__(self, key) if self.is_computed(key) else "<not computed>") for key in self],
+        )
+
+
+class ObservationModalityWrapper(gym.Wrapper):
+    """
+    Wrapper of iGibsonEnv for training code that only reads some of the observation modalities: the environment
+    computes observations lazily (see LazyObservation) and only the declared modalities are produced at every step,
+    e.g. no render is done when only the scan is used.
+    """
+
+    def __init__(self, env, modalities):
+        """
+        :param env: iGibsonEnv
+        :param modalities: modalities read by the training code
+        """
+        super(ObservationModalityWrapper, self).__init__(env)
+        unknown_modalities = [modality for modality in modalities if modality not in env.observation_space.spaces]
+        if unknown_modalities:
+            raise ValueError("Unknown observation modalities {}.".format(unknown_modalities))
+        self.modalities = list(modalities)
+        self.observation_space = gym.spaces.Dict(
+            OrderedDict((modality, env.observation_space.spaces[modality]) for modality in self.modalities)
+        )
+        self.unwrapped.lazy_observations = True
+        self.unwrapped.observation_modalities = self.modalities
+
+    def observation(self, state):
+        """
+        :param state: observation of the environment
+        :return: OrderedDict with the declared modalities
+        """
+        if isinstance(state, LazyObservation):
+            state.prefetch(self.modalities)
+        return OrderedDict((modality, state[modality]) for modality in self.modalities)
+
+    def step(self, action):
+        state, reward, done, info = self.env.step(action)
+        if "last_observation" in info:
+            info["last_observation"] = self.observation(info["last_observation"])
+        return self.observation(state), reward, done, info
+
+    def reset(self, **kwargs):
+        return self.observation(self.env.reset(**kwargs))
@@ -4,12 +4,16 @@ import multiprocessing
 import os
 import sys
 import traceback
+from collections import OrderedDict
 
+import gym
 import numpy as np
 
 import igibson
 from igibson.envs.igibson_env import iGibsonEnv
 
+log = logging.getLogger(__name__)
+
 
 class ParallelNavEnv(iGibsonEnv):
     """Batch together environments and simulate them in external processes.
@@ -19,7 +23,7 @@ class ParallelNavEnv(iGibsonEnv):
     access global variables.
     """
 
-    def __init__(self, env_constructors, blocking=False, flatten=False):
+    def __init__(self, env_constructors, blocking=False, flatten=False, use_shared_memory=False, num_buffer_slots=2):
         """Batch together environments and simulate them in external processes.
         The environments can be different but must use the same action and
         observation specs.
@@ -28,9 +32,17 @@ class ParallelNavEnv(iGibsonEnv):
         :param blocking: Whether to step environments one after another.
         :param flatten: Boolean, whether to use flatten action and time_steps during
             communication to reduce overhead.
+        :param use_shared_memory: Whether the workers write observations into shared memory instead of sending them
+            through the pipe. See ProcessPyEnvironment.
+        :param num_buffer_slots: Number of observations kept in each worker's shared memory ring buffer.
         :raise ValueError: If the action or observation specs don't match.
         """
-        self._envs = [ProcessPyEnvironment(ctor, flatten=flatten) for ctor in env_constructors]
+        self._envs = [
+            ProcessPyEnvironment(
+                ctor, flatten=flatten, use_shared_memory=use_shared_memory, num_buffer_slots=num_buffer_slots
+            )
+            for ctor in env_constructors
+        ]
         self._num_envs = len(env_constructors)
         self.start()
         self.action_space = self._envs[0].action_space
@@ -91,8 +103,17 @@ class ProcessPyEnvironment(object):
     _RESULT = 4
     _EXCEPTION = 5
     _CLOSE = 6
-
-    def __init__(self, env_constructor, flatten=False):
+    _ATTACH = 7
+
+    def __init__(
+        self,
+        env_constructor,
+        flatten=False,
+        use_shared_memory=False,
+        num_buffer_slots=2,
+        auto_reset=False,
+        cpu_affinity=None,
+    ):
         """Step environment in a separate process for lock free paralellism.
 
         The environment is created in an external process by calling the provided
@@ -100,17 +121,42 @@ class ProcessPyEnvironment(object):
         environment and potentially wrapping it. The returned environment should
         not access global variables.
 
+        When use_shared_memory is True, the worker writes the observations of step and reset into a ring buffer of
+        num_buffer_slots observations in shared memory, laid out from the observation space, and only the rest of
+        the step result goes through the pipe. The returned observations are views into the buffer: they stay valid
+        for num_buffer_slots - 1 further calls to step / reset, and should be copied to be kept longer.
+
         :param env_constructor: callable that creates and returns a Python environment.
         :param flatten: boolean, whether to assume flattened actions and time_steps
         during communication to avoid overhead.
+        :param use_shared_memory: whether to transfer observations through shared memory.
+        :param num_buffer_slots: number of observations in the shared memory ring buffer.
+        :param auto_reset: whether the worker resets the environment as soon as an episode is done. The step then
+            returns the first observation of the next episode, and the last observation of the finished episode is
+            stored in info["terminal_observation"].
+        :param cpu_affinity: None, or list of the CPU cores the worker process is pinned to.
         """
         self._env_constructor = env_constructor
         self._flatten = flatten
+        self._use_shared_memory = use_shared_memory
+        self._num_buffer_slots = num_buffer_slots
+        self._auto_reset = auto_reset
+        self._cpu_affinity = cpu_affinity
+        self._observation_buffer = None
 
     def start(self):
         """Start the process."""
         self._conn, conn = multiprocessing.Pipe()
-        self._process = multiprocessing.Process(target=self._worker, args=(conn, self._env_constructor, self._flatten))
+        if self._use_shared_memory and os.name == "posix":
+            from multiprocessing import resource_tracker
+
+            # The worker attaches to the observation buffer with the resource tracker of this process: spawn and
+            # forkserver children are handed its file descriptor, but fork children only inherit it if it is running
+            resource_tracker.ensure_running()
+        self._process = multiprocessing.Process(
+            target=self._worker,
+            args=(conn, self._env_constructor, self._flatten, self._auto_reset, self._cpu_affinity),
+        )
         atexit.register(self.close)
         self._process.start()
         result = self._conn.recv()
@@ -120,6 +166,11 @@ class ProcessPyEnvironment(object):
             raise result
         assert result is self._READY, result
 
+        if self._use_shared_memory:
+            self._observation_buffer = SharedObservationBuffer(self.observation_space, self._num_buffer_slots)
+            self._conn.send((self._ATTACH, (self._observation_buffer.name, self._observation_buffer.num_slots)))
+            self._receive()
+
     def __getattr__(self, name):
         """Request an attribute from the environment.
         Note that this involves communication with the external process, so it can
@@ -131,6 +182,14 @@ class ProcessPyEnvironment(object):
         self._conn.send((self._ACCESS, name))
         return self._receive()
 
+    def fileno(self):
+        """Get the file descriptor of the connection to the worker, so that the environment can be waited on with
+        multiprocessing.connection.wait.
+
+        :return: file descriptor of the connection.
+        """
+        return self._conn.fileno()
+
     def call(self, name, *args, **kwargs):
         """Asynchronously call a method of the external environment.
 
@@ -152,6 +211,9 @@ class ProcessPyEnvironment(object):
             # The connection was already closed.
             pass
         self._process.join(5)
+        if self._observation_buffer is not None:
+            self._observation_buffer.close(unlink=True)
+            self._observation_buffer = None
 
     def step(self, action, blocking=True):
         """Step the environment.
@@ -192,29 +254,39 @@ class ProcessPyEnvironment(object):
             stacktrace = payload
             raise Exception(stacktrace)
         if message == self._RESULT:
+            if isinstance(payload, _SharedObservation):
+                return self._observation_buffer.read(payload)
+            if isinstance(payload, tuple) and len(payload) > 0 and isinstance(payload[0], _SharedObservation):
+                return (self._observation_buffer.read(payload[0]),) + payload[1:]
             return payload
         self.close()
         raise KeyError("Received message of unexpected type {}".format(message))
 
-    def _worker(self, conn, env_constructor, flatten=False):
+    def _worker(self, conn, env_constructor, flatten=False, auto_reset=False, cpu_affinity=None):
         """The process waits for actions and sends back environment results.
 
         :param conn: connection for communication to the main process.
         :param env_constructor: env_constructor for the OpenAI Gym environment.
         :param flatten: boolean, whether to assume flattened actions and
         time_steps during communication to avoid overhead.
+        :param auto_reset: whether to reset the environment when an episode is done.
+        :param cpu_affinity: None, or list of the CPU cores to pin the process to.
 
         :raise KeyError: when receiving a message of unknown type.
         """
+        observation_buffer = None
         try:
+            if cpu_affinity is not None:
+                if hasattr(os, "sched_setaffinity"):
+                    os.sched_setaffinity(0, cpu_affinity)
+                else:
+                    log.warning("CPU affinity is not supported on this platform, the worker is not pinned.")
             np.random.seed()
             env = env_constructor()
             conn.send(self._READY)  # Ready.
             while True:
                 try:
-                    # Only block for short times to have keyboard exceptions be raised.
-                    if not conn.poll(0.1):
-                        continue
+                    # recv blocks without busy-waiting, keyboard exceptions are still raised while waiting.
                     message, payload = conn.recv()
                 except (EOFError, KeyboardInterrupt):
                     break
@@ -223,10 +295,25 @@ class ProcessPyEnvironment(object):
                     result = getattr(env, name)
                     conn.send((self._RESULT, result))
                     continue
+                if message == self._ATTACH:
+                    name, num_slots = payload
+                    observation_buffer = SharedObservationBuffer(env.observation_space, num_slots, name=name)
+                    conn.send((self._RESULT, None))
+                    continue
                 if message == self._CALL:
                     name, args, kwargs = payload
                     if name == "step" or name == "reset":
                         result = getattr(env, name)(*args, **kwargs)
+                        if name == "step" and auto_reset and result[2]:
+                            state, reward, done, info = result
+                            info["terminal_observation"] = state
+                            result = (env.reset(), reward, done, info)
+                        if observation_buffer is not None:
+                            # Only send the observation's slot in the shared memory ring buffer.
+                            if name == "step":
+                                result = (observation_buffer.write(result[0]),) + tuple(result[1:])
+                            else:
+                                result = observation_buffer.write(result)
                     conn.send((self._RESULT, result))
                     continue
                 if message == self._CLOSE:
@@ -240,9 +327,129 @@ class ProcessPyEnvironment(object):
             # tf.logging.getLogger(__name__).error(message)
             conn.send((self._EXCEPTION, stacktrace))
         finally:
+            if observation_buffer is not None:
+                observation_buffer.close()
             conn.close()
 
 
+class _SharedObservation(object):
+    """Placeholder sent through the pipe for an observation written to a SharedObservationBuffer."""
+
+    def __init__(self, slot, extra):
+        """
+        :param slot: slot of the ring buffer that holds the observation
+        :param extra: observation entries that are not stored in shared memory
+        """
+        self.slot = slot
+        self.extra = extra
+
+
+class SharedObservationBuffer(object):
+    """
+    Ring buffer of observations in shared memory. Every slot holds one array per Box entry of the observation space,
+    at fixed offsets, so observations are written with a single copy and read without any copy.
+    """
+
+    _ALIGNMENT = 64
+
+    def __init__(self, observation_space, num_slots=2, name=None, shares_resource_tracker=True):
+        """
+        :param observation_space: gym.spaces.Dict (or Box) observation space
+        :param num_slots: number of observations in the ring buffer, which must be the number of slots of the existing
+            buffer when attaching to one: the size of the shared memory block can be rounded up to whole pages
+        :param name: name of an existing buffer to attach to. A new buffer is created if None.
+        :param shares_resource_tracker: when attaching to an existing buffer before Python 3.13, whether this process
+            shares the resource tracker of the creator, i.e. it is the creator or one of its child processes started
+            while the creator's resource tracker was running. Otherwise the buffer is unregistered from the own resource
+            tracker of this process, which would unlink it when this process exits.
+        """
+        try:
+            from multiprocessing import resource_tracker, shared_memory
+        except ImportError:
+            raise Exception("Shared memory observations require Python 3.8 or newer.")
+
+        if isinstance(observation_space, gym.spaces.Dict):
+            spaces = observation_space.spaces.items()
+        else:
+            spaces = [(None, observation_space)]
+        self.specs = [
+            (key, space.shape, np.dtype(space.dtype)) for key, space in spaces if isinstance(space, gym.spaces.Box)
+        ]
+
+        offsets = []
+        slot_size = 0
+        for _, shape, dtype in self.specs:
+            offsets.append(slot_size)
+            nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+            slot_size += -(-nbytes // self._ALIGNMENT) * self._ALIGNMENT
+
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=max(1, slot_size * num_slots))
+        else:
+            # The creator owns the buffer: keep the resource tracker of this process from unlinking it when this process
+            # exits, but do not unregister it from a resource tracker shared with the creator
+            if sys.version_info >= (3, 13):
+                self.shm = shared_memory.SharedMemory(name=name, track=False)
+            else:
+                self.shm = shared_memory.SharedMemory(name=name)
+                if not shares_resource_tracker and os.name == "posix":
+                    resource_tracker.unregister(self.shm._name, "shared_memory")
+            assert self.shm.size >= slot_size * num_slots, "The shared memory buffer is smaller than num_slots slots"
+        self.num_slots = num_slots
+        self.name = self.shm.name
+
+        self.slots = [
+            {
+                key: np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=slot * slot_size + offset)
+                for (key, shape, dtype), offset in zip(self.specs, offsets)
+            }
+            for slot in range(self.num_slots)
+        ]
+        self.next_slot = 0
+
+    def write(self, observation):
+        """
+        Copy an observation into the next slot of the ring buffer.
+
+        :param observation: observation dict (or array for Box observation spaces)
+        :return: _SharedObservation to send instead of the observation
+        """
+        slot = self.next_slot
+        self.next_slot = (self.next_slot + 1) % self.num_slots
+        if None in self.slots[slot]:
+            np.copyto(self.slots[slot][None], observation)
+            return _SharedObservation(slot, None)
+
+        extra = {}
+        for key, value in observation.items():
+            if key in self.slots[slot]:
+                np.copyto(self.slots[slot][key], value)
+            else:
+                extra[key] = value
+        return _SharedObservation(slot, extra)
+
+    def read(self, shared_observation):
+        """
+        :param shared_observation: _SharedObservation received from the writer
+        :return: observation whose arrays are views into the ring buffer
+        """
+        arrays = self.slots[shared_observation.slot]
+        if None in arrays:
+            return arrays[None]
+        observation = OrderedDict(arrays)
+        observation.update(shared_observation.extra)
+        return observation
+
+    def close(self, unlink=False):
+        """
+        :param unlink: whether to also free the shared memory (only the creator should)
+        """
+        self.slots = []
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     config_filename = os.path.join(os.path.dirname(igibson.__file__), "..", "tests", "test.yaml")
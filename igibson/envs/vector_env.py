@@ -0,0 +1,176 @@
+import functools
+import logging
+import multiprocessing.connection
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from igibson.envs.igibson_env import iGibsonEnv
+from igibson.envs.parallel_env import ProcessPyEnvironment
+
+log = logging.getLogger(__name__)
+
+
+class iGibsonVectorEnv(object):
+    """
+    Vectorized iGibson environment: a batch of environments simulated in worker processes, with stacked NumPy
+    observations, rewards and dones.
+
+    Finished environments are reset by their worker right away (see ProcessPyEnvironment auto_reset), so a step never
+    waits for an extra reset round trip. On top of the synchronous step, step_async / step_wait let the caller step
+    every environment as soon as it is ready instead of waiting for the slowest one, e.g. an environment resampling a
+    BEHAVIOR task on reset.
+    """
+
+    def __init__(self, env_constructors, auto_reset=True, use_shared_memory=True, cpu_affinity=None):
+        """
+        :param env_constructors: list of callables that create the environments. They must share the same action and
+            observation spaces.
+        :param auto_reset: whether to reset the environments as soon as their episode is done
+        :param use_shared_memory: whether the workers send observations through shared memory
+        :param cpu_affinity: None to leave the workers unpinned, True to pin every worker to one of the available
+            cores (round robin), or a list with the core (or list of cores) of every worker
+        """
+        self.num_envs = len(env_constructors)
+        cpu_affinities = self.get_cpu_affinities(cpu_affinity, self.num_envs)
+        self._envs = [
+            ProcessPyEnvironment(
+                ctor,
+                use_shared_memory=use_shared_memory,
+                auto_reset=auto_reset,
+                cpu_affinity=affinity,
+            )
+            for ctor, affinity in zip(env_constructors, cpu_affinities)
+        ]
+        for env in self._envs:
+            env.start()
+        self.action_space = self._envs[0].action_space
+        self.observation_space = self._envs[0].observation_space
+        self.auto_reset = auto_reset
+        self._pending = {}
+
+    @classmethod
+    def from_config(cls, config_file, num_envs, mode="headless", **kwargs):
+        """
+        Create a vectorized environment of identical iGibsonEnv.
+
+        :param config_file: config file of the environments
+        :param num_envs: number of environments
+        :param mode: simulator mode of the environments
+        :param kwargs: other arguments of iGibsonVectorEnv
+        :return: iGibsonVectorEnv
+        """
+        env_constructor = functools.partial(iGibsonEnv, config_file=config_file, mode=mode)
+        return cls([env_constructor] * num_envs, **kwargs)
+
+    @staticmethod
+    def get_cpu_affinities(cpu_affinity, num_envs):
+        """
+        :param cpu_affinity: cpu_affinity argument of the constructor
+        :param num_envs: number of environments
+        :return: list with None or the list of cores of every worker
+        """
+        if cpu_affinity is None or cpu_affinity is False:
+            return [None] * num_envs
+        if cpu_affinity is True:
+            if not hasattr(os, "sched_getaffinity"):
+                log.warning("CPU affinity is not supported on this platform, the workers are not pinned.")
+                return [None] * num_envs
+            cores = sorted(os.sched_getaffinity(0))
+            return [[cores[i % len(cores)]] for i in range(num_envs)]
+        if len(cpu_affinity) != num_envs:
+            raise ValueError("cpu_affinity must have one entry per environment.")
+        return [[cores] if np.isscalar(cores) else list(cores) for cores in cpu_affinity]
+
+    @staticmethod
+    def stack_observations(observations):
+        """
+        :param observations: list of observations (dicts of arrays or arrays)
+        :return: observation with every entry stacked along a new first axis
+        """
+        if isinstance(observations[0], dict):
+            return OrderedDict((key, np.stack([obs[key] for obs in observations])) for key in observations[0])
+        return np.stack(observations)
+
+    def reset(self):
+        """
+        Reset all the environments.
+
+        :return: stacked observations
+        """
+        if self._pending:
+            raise ValueError("Cannot reset while steps are pending, call step_wait first.")
+        promises = [env.reset(blocking=False) for env in self._envs]
+        return self.stack_observations([promise() for promise in promises])
+
+    def step_async(self, actions, env_ids=None):
+        """
+        Send actions to some of the environments without waiting for the results.
+
+        :param actions: actions of the environments, in the order of env_ids
+        :param env_ids: ids of the environments to step, all the environments if None
+        """
+        if env_ids is None:
+            env_ids = range(self.num_envs)
+        env_ids = list(env_ids)
+        if len(actions) != len(env_ids):
+            raise ValueError("Got {} actions for {} environments.".format(len(actions), len(env_ids)))
+        for env_id in env_ids:
+            if env_id in self._pending:
+                raise ValueError("Environment {} is already stepping.".format(env_id))
+        for env_id, action in zip(env_ids, actions):
+            self._pending[env_id] = self._envs[env_id].step(action, blocking=False)
+
+    def step_wait(self, min_ready=None, timeout=None):
+        """
+        Wait for pending steps and return the results of the environments that are ready.
+
+        :param min_ready: minimum number of environments to wait for, all the pending environments if None
+        :param timeout: maximum time to wait in seconds, None to wait until min_ready environments are ready
+        :return: (env_ids, observations, rewards, dones, infos) of the ready environments, sorted by env id, with
+            stacked observations, rewards and dones
+        """
+        if min_ready is None:
+            min_ready = len(self._pending)
+        min_ready = min(min_ready, len(self._pending))
+
+        ready = []
+        waiting = {self._envs[env_id]: env_id for env_id in self._pending}
+        while True:
+            for env in multiprocessing.connection.wait(list(waiting), timeout=timeout):
+                ready.append(waiting.pop(env))
+            # Keep waiting until min_ready environments are ready, unless a timeout is given.
+            if len(ready) >= min_ready or timeout is not None or not waiting:
+                break
+
+        env_ids = sorted(ready)
+        results = [self._pending.pop(env_id)() for env_id in env_ids]
+        if not results:
+            return env_ids, None, np.zeros(0), np.zeros(0, dtype=bool), []
+        observations, rewards, dones, infos = zip(*results)
+        return (
+            env_ids,
+            self.stack_observations(observations),
+            np.array(rewards),
+            np.array(dones, dtype=bool),
+            list(infos),
+        )
+
+    def step(self, actions):
+        """
+        Step all the environments and wait for all of them.
+
+        :param actions: actions of all the environments
+        :return: (observations, rewards, dones, infos) with stacked observations, rewards and dones
+        """
+        self.step_async(actions)
+        _, observations, rewards, dones, infos = self.step_wait()
+        return observations, rewards, dones, infos
+
+    def close(self):
+        """
+        Close all the worker processes.
+        """
+        for env in self._envs:
+            env.close()
@@ -8,8 +8,11 @@ from igibson.object_states.object_state_base import AbsoluteObjectState, Boolean
 from igibson.object_states.on_floor import RoomFloor
 from igibson.objects.multi_object_wrappers import ObjectMultiplexer
 from igibson.robots.robot_base import BaseRobot
+from igibson.utils.utils import parse_str_config
 
 SIMULATOR_SETTLE_TIME = 150
+# Synset of the robot in the object scope of BEHAVIOR tasks
+AGENT_SYNSET = "agent.n.01"
 
 
 class KinematicDisarrangement(MetricBase):
@@ -127,6 +130,61 @@ class KinematicDisarrangement(MetricBase):
             relative_disarrangement += np.sum(disarrangement["children"])
         return relative_disarrangement
 
+    @staticmethod
+    def compute_from_log(log_reader, window_size=1000):
+        """
+        Computes the kinematic disarrangement of a log offline, from the object positions recorded by IGLogWriter,
+        without replaying the physics. The logged bodies are mapped to the objects of the task's object scope with the
+        log's obj_body_id_to_name metadata: like the online metric, the robot is skipped and every object counts once,
+        with the position of its first body (the pose of the whole object when the log filters objects). The result
+        matches the online metric over the logged objects, except for split multiplexed objects which are only
+        tracked through their first part.
+
+        :param log_reader: IGLogReader of a log written with a task, preferably exported with IGLogReader.export_to_npy
+        :param window_size: number of frames read at a time
+        :return: dictionary with the same format as gather_results
+        """
+        if "/metadata/obj_body_id_to_name" not in log_reader.hf.attrs:
+            raise ValueError("The log has no obj_body_id_to_name metadata, it was not written with a task.")
+        obj_body_id_to_name = parse_str_config(log_reader.hf.attrs["/metadata/obj_body_id_to_name"])
+
+        dataset_paths = set(log_reader.get_dataset_paths())
+        obj_body_ids = {}
+        for body_id, obj_name in obj_body_id_to_name.items():
+            if obj_name.rsplit("_", 1)[0] == AGENT_SYNSET:
+                continue
+            if "physics_data/{}/position".format(body_id) in dataset_paths:
+                obj_body_ids.setdefault(obj_name, []).append(int(body_id))
+        position_paths = [
+            "physics_data/{}/position".format(min(body_ids)) for _, body_ids in sorted(obj_body_ids.items())
+        ]
+        if not position_paths:
+            timestep = [0.0] * log_reader.total_frame_num
+            return {"kinematic_disarrangement": {"relative": 0.0, "timestep": timestep, "integrated": 0.0}}
+
+        initial_positions = None
+        prev_positions = None
+        delta_disarrangement = []
+        for _, window in log_reader.iter_windows(position_paths, window_size):
+            # (frames, objects, 3) positions of the window
+            positions = np.stack([window[path] for path in position_paths], axis=1).astype(np.float64)
+            if prev_positions is None:
+                initial_positions = prev_positions = positions[0]
+            previous = np.concatenate([prev_positions[np.newaxis], positions[:-1]])
+            delta_disarrangement.extend(np.linalg.norm(positions - previous, axis=2).sum(axis=1).tolist())
+            prev_positions = positions[-1]
+
+        relative = 0.0
+        if prev_positions is not None:
+            relative = float(np.linalg.norm(prev_positions - initial_positions, axis=1).sum())
+        return {
+            "kinematic_disarrangement": {
+                "relative": relative,
+                "timestep": delta_disarrangement,
+                "integrated": float(np.sum(delta_disarrangement)),
+            }
+        }
+
     def gather_results(self):
         return {
             "kinematic_disarrangement": {
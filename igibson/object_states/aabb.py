@@ -5,6 +5,14 @@ from igibson.object_states.object_state_base import CachingEnabledObjectState
 
 
 class AABB(CachingEnabledObjectState):
+    @staticmethod
+    def requires_update_every_step():
+        return False
+
+    def get_update_signature(self):
+        # The cached value only depends on the object's own pose, which the scheduler tracks.
+        return ()
+
     def _compute_value(self):
         body_ids = self.obj.get_body_ids()
 
@@ -63,64 +63,115 @@ def compute_adjacencies(obj, axes, max_distance):
         both its positive and negative direction.
     :return: List[AxisAdjacencyList] of length len(axes) containing the adjacencies.
     """
+    return compute_adjacencies_batch([obj], axes, max_distance)[0]
+
+
+def compute_adjacencies_batch(objs, axes, max_distance):
+    """
+    Batched version of compute_adjacencies: the rays of all the objects are cast together, with one
+    p.rayTestBatch call per hit number, and rays stop being cast as soon as they run out of hits.
+
+    :param objs: The objects to check adjacencies of.
+    :param axes: The axes to check in. Note that each axis will be checked in
+        both its positive and negative direction.
+    :return: List of List[AxisAdjacencyList] of length len(axes) containing the adjacencies of each object.
+    """
     # Get vectors for each of the axes' directions.
     # The ordering is axes1+, axis1-, axis2+, axis2- etc.
     directions = np.empty((len(axes) * 2, 3))
     directions[0::2] = axes
     directions[1::2] = -axes
+    num_directions = directions.shape[0]
 
-    # For now, we keep our result in the dimensionality of (direction, hit_object_order).
-    finalized = np.zeros(directions.shape[0], dtype=bool)
-    bodies_by_direction = [[] for _ in directions]
+    # Prepare the objects' info for ray casting.
+    object_positions = np.array([obj.states[Pose].get_value()[0] for obj in objs]).reshape(-1, 3)
+    body_ids = [set(obj.get_body_ids()) for obj in objs]
 
-    # Prepare this object's info for ray casting.
-    # Use AABB center instead of position because we cannot get valid position
-    # for fixed objects if fixed links are merged.
-    object_position, _ = obj.states[Pose].get_value()
-    body_ids = obj.get_body_ids()
+    # All the rays, ordered by (object, direction).
+    ray_starts = np.repeat(object_positions, num_directions, axis=0)
+    ray_endpoints = ray_starts + np.tile(directions * max_distance, (len(objs), 1))
+
+    # For now, we keep our result in the dimensionality of (ray, hit_object_order).
+    bodies_by_ray = [[] for _ in range(len(ray_starts))]
+    unfinished_rays = np.arange(len(ray_starts))
 
     # Cast rays repeatedly until the max number of casting is reached
     for i in range(_MAX_ITERATIONS):
-        # Find which directions still need ray casting
-        unfinished_directions = finalized != True
-        num_directions_to_cast = np.count_nonzero(unfinished_directions)
-
-        # If all directions are ready, stop.
-        if num_directions_to_cast == 0:
+        # If all rays ran out of hits, stop.
+        if len(unfinished_rays) == 0:
             break
 
-        # Prepare the rays to cast.
-        ray_directions = directions[unfinished_directions, :]
-        ray_starts = np.tile(object_position, (num_directions_to_cast, 1))
-        ray_endpoints = ray_starts + (ray_directions * max_distance)
-
         # Cast time.
-        ray_results = p.rayTestBatch(
-            ray_starts,
-            ray_endpoints,
-            reportHitNumber=i,
-            fractionEpsilon=1,
-            numThreads=0,
+        obj_ids = np.empty(len(unfinished_rays), dtype=int)
+        for batch_start in range(0, len(unfinished_rays), p.MAX_RAY_INTERSECTION_BATCH_SIZE):
+            batch = unfinished_rays[batch_start : batch_start + p.MAX_RAY_INTERSECTION_BATCH_SIZE]
+            ray_results = p.rayTestBatch(
+                ray_starts[batch],
+                ray_endpoints[batch],
+                reportHitNumber=i,
+                fractionEpsilon=1,
+                numThreads=0,
+            )
+            obj_ids[batch_start : batch_start + len(batch)] = [result[0] for result in ray_results]
+
+        # Add the results to the appropriate lists, filtering out self-hit cases.
+        for ray_idx, result in zip(unfinished_rays, obj_ids):
+            if result != -1 and result not in body_ids[ray_idx // num_directions]:
+                bodies_by_ray[ray_idx].append(result)
+
+        # Rays without an i-th hit have no further hits either.
+        unfinished_rays = unfinished_rays[obj_ids != -1]
+
+    # Reshape so that these have the following indices:
+    # (object_idx, axis_idx, direction-one-or-zero, hit_idx)
+    bodies_by_axis = []
+    for obj_idx in range(len(objs)):
+        bodies_by_direction = bodies_by_ray[obj_idx * num_directions : (obj_idx + 1) * num_directions]
+        bodies_by_axis.append(
+            [
+                AxisAdjacencyList(positive_neighbors, negative_neighbors)
+                for positive_neighbors, negative_neighbors in zip(bodies_by_direction[::2], bodies_by_direction[1::2])
+            ]
         )
+    return bodies_by_axis
 
-        # Get the object IDs per axis and filter out self-hit cases.
-        obj_ids = np.array([result[0] for result in ray_results], dtype=int)
 
-        # Add the results to the appropriate lists
-        for direction_idx, result in enumerate(obj_ids):
-            if result != -1 and result not in body_ids:
-                bodies_by_direction[direction_idx].append(result)
+def _get_adjacencies(objs, state_type):
+    """
+    Get the value of an adjacency state for many objects at once. The objects whose value is not cached for the
+    current step are computed together with compute_adjacencies_batch, and their cache is filled.
 
-        # Set the finalization status of no-hit directions
-        finalized[unfinished_directions][obj_ids == -1] = True
+    :param objs: objects with the adjacency state
+    :param state_type: VerticalAdjacency or HorizontalAdjacency
+    :return: list of state values, in the order of objs
+    """
+    states = [obj.states[state_type] for obj in objs]
+    uncached_states = [state for state in states if not state.has_cached_value()]
+    if uncached_states:
+        values = state_type.compute_values([state.obj for state in uncached_states])
+        for state, value in zip(uncached_states, values):
+            state.set_cached_value(value)
+    return [state.get_value() for state in states]
 
-    # Reshape so that these have the following indices:
-    # (axis_idx, direction-one-or-zero, hit_idx)
-    bodies_by_axis = [
-        AxisAdjacencyList(positive_neighbors, negative_neighbors)
-        for positive_neighbors, negative_neighbors in zip(bodies_by_direction[::2], bodies_by_direction[1::2])
-    ]
-    return bodies_by_axis
+
+def get_vertical_adjacencies(objs):
+    """
+    Get the VerticalAdjacency of many objects at once, casting the rays of all uncached objects in one batch.
+
+    :param objs: objects with the VerticalAdjacency state
+    :return: list of AxisAdjacencyList, in the order of objs
+    """
+    return _get_adjacencies(objs, VerticalAdjacency)
+
+
+def get_horizontal_adjacencies(objs):
+    """
+    Get the HorizontalAdjacency of many objects at once, casting the rays of all uncached objects in one batch.
+
+    :param objs: objects with the HorizontalAdjacency state
+    :return: list of HorizontalAdjacency values (see HorizontalAdjacency), in the order of objs
+    """
+    return _get_adjacencies(objs, HorizontalAdjacency)
 
 
 class VerticalAdjacency(CachingEnabledObjectState):
@@ -128,12 +179,16 @@ class VerticalAdjacency(CachingEnabledObjectState):
     Value is a AxisAdjacencyList object.
     """
 
-    def _compute_value(self):
+    @staticmethod
+    def compute_values(objs):
         # Call the adjacency computation with th Z axis.
-        bodies_by_axis = compute_adjacencies(self.obj, np.array([[0, 0, 1]]), _MAX_DISTANCE_VERTICAL)
+        bodies_by_axis = compute_adjacencies_batch(objs, np.array([[0, 0, 1]]), _MAX_DISTANCE_VERTICAL)
 
         # Return the adjacencies from the only axis we passed in.
-        return bodies_by_axis[0]
+        return [obj_bodies_by_axis[0] for obj_bodies_by_axis in bodies_by_axis]
+
+    def _compute_value(self):
+        return self.compute_values([self.obj])[0]
 
     def _set_value(self, new_value):
         raise NotImplementedError("VerticalAdjacency state currently does not support setting.")
@@ -169,17 +224,18 @@ class HorizontalAdjacency(CachingEnabledObjectState):
     2 * _HORIZONTAL_AXIS_COUNT directions.
     """
 
-    def _compute_value(self):
+    @staticmethod
+    def compute_values(objs):
         coordinate_planes = get_equidistant_coordinate_planes(_HORIZONTAL_AXIS_COUNT)
 
-        # Flatten the axis dimension and input into compute_adjacencies.
-        bodies_by_axis = compute_adjacencies(self.obj, coordinate_planes.reshape(-1, 3), _MAX_DISTANCE_HORIZONTAL)
+        # Flatten the axis dimension and input into compute_adjacencies_batch.
+        bodies_by_axis = compute_adjacencies_batch(objs, coordinate_planes.reshape(-1, 3), _MAX_DISTANCE_HORIZONTAL)
 
         # Now reshape the bodies_by_axis to group by coordinate planes.
-        bodies_by_plane = list(zip(bodies_by_axis[::2], bodies_by_axis[1::2]))
+        return [list(zip(obj_bodies_by_axis[::2], obj_bodies_by_axis[1::2])) for obj_bodies_by_axis in bodies_by_axis]
 
-        # Return the adjacencies.
-        return bodies_by_plane
+    def _compute_value(self):
+        return self.compute_values([self.obj])[0]
 
     def _set_value(self, new_value):
         raise NotImplementedError("HorizontalAdjacency state currently does not support setting.")
@@ -1,4 +1,6 @@
-from igibson.external.pybullet_tools.utils import aabb_contains_point, get_aabb
+import numpy as np
+
+from igibson.external.pybullet_tools.utils import get_aabb
 from igibson.object_states.aabb import AABB
 from igibson.object_states.contact_bodies import ContactBodies
 from igibson.object_states.dirty import Dusty, Stained
@@ -58,10 +60,12 @@ class CleaningTool(AbsoluteObjectState, LinkBasedStateMixin):
                 # Otherwise, use the full-object AABB.
                 aabb = self.obj.states[AABB].get_value()
 
-            # Find particles in the AABB.
-            for particle in particle_system.get_active_particles():
-                pos = particle.get_position()
-                if aabb_contains_point(pos, aabb):
+            # Find particles in the AABB, testing all the particle positions at once.
+            positions = particle_system.get_active_particle_positions()
+            lower, upper = np.array(aabb[0]), np.array(aabb[1])
+            in_aabb = np.all((lower <= positions) & (positions <= upper), axis=1)
+            for particle, contained in zip(particle_system.get_active_particles(), in_aabb):
+                if contained:
                     particle_system.stash_particle(particle)
 
     def _set_value(self, new_value):
@@ -1,5 +1,3 @@
-import pybullet as p
-
 from igibson.external.pybullet_tools.utils import ContactResult
 from igibson.object_states.object_state_base import CachingEnabledObjectState
 
@@ -8,8 +6,7 @@ class ContactBodies(CachingEnabledObjectState):
     def _compute_value(self):
         return [
             ContactResult(*item[:10])
-            for body_id in self.obj.get_body_ids()
-            for item in p.getContactPoints(bodyA=body_id)
+            for item in self.simulator.contact_manager.get_contact_points_for_bodies(self.obj.get_body_ids())
         ]
 
     def _set_value(self, new_value):
@@ -147,6 +147,13 @@ class HeatSourceOrSink(AbsoluteObjectState, LinkBasedStateMixin):
             self.marker.set_position(marker_position)
             self.marker.force_wakeup()
 
+    @staticmethod
+    def requires_update_every_step():
+        return False
+
+    def get_update_signature(self):
+        return self.status, None if self.position is None else tuple(self.position)
+
     def _get_value(self):
         return self.status, self.position
 
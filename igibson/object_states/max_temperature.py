@@ -14,8 +14,36 @@ class MaxTemperature(AbsoluteObjectState):
     def __init__(self, obj):
         super(MaxTemperature, self).__init__(obj)
 
+        # Index of the object in the simulator's ThermalSystem, which stores the value once the state is initialized.
+        self.thermal_index = None
         self.value = float("-inf")
 
+    @property
+    def value(self):
+        if self.thermal_index is None:
+            return self._value
+        return float(self.simulator.thermal_system.max_temperatures[self.thermal_index])
+
+    @value.setter
+    def value(self, new_value):
+        if self.thermal_index is None:
+            self._value = new_value
+        else:
+            self.simulator.thermal_system.max_temperatures[self.thermal_index] = new_value
+
+    def _initialize(self):
+        super(MaxTemperature, self)._initialize()
+        value = self.value
+        self.thermal_index = self.simulator.thermal_system.get_index(self.obj)
+        self.value = value
+
+    @staticmethod
+    def requires_update_every_step():
+        return False
+
+    def get_update_signature(self):
+        return self.value
+
     def _get_value(self):
         return self.value
 
@@ -2,6 +2,8 @@ from abc import ABCMeta, abstractmethod
 
 from future.utils import with_metaclass
 
+from igibson.utils.utils import notify_bodies_moved
+
 
 class BaseObjectState(with_metaclass(ABCMeta, object)):
     """
@@ -33,6 +35,28 @@ class BaseObjectState(with_metaclass(ABCMeta, object)):
         """
         return []
 
+    @staticmethod
+    def requires_update_every_step():
+        """
+        Whether this state needs to be updated on every simulator step. States that return False here are only updated
+        by the incremental update scheduler (see ObjectStateUpdateScheduler) when their object has moved, one of their
+        dependencies has changed or their last update changed their value. Such states must implement
+        get_update_signature.
+
+        :return: bool indicating whether the state must be updated every step.
+        """
+        return True
+
+    def get_update_signature(self):
+        """
+        Get a hashable summary of the state's value, used by the incremental update scheduler to detect whether an
+        update changed the state. None means the state cannot be summarized, in which case the state is considered
+        changed whenever its object has moved.
+
+        :return: Hashable signature of the state, or None.
+        """
+        return None
+
     def __init__(self, obj):
         super(BaseObjectState, self).__init__()
         self.obj = obj
@@ -64,6 +88,8 @@ class BaseObjectState(with_metaclass(ABCMeta, object)):
 
     def set_value(self, *args, **kwargs):
         assert self._initialized
+        # Setting a state may teleport bodies, e.g. Open or OnTop
+        notify_bodies_moved()
         return self._set_value(*args, **kwargs)
 
 
@@ -120,6 +146,21 @@ class CachingEnabledObjectState(AbsoluteObjectState):
 
         return self.value
 
+    def has_cached_value(self):
+        """
+        :return: whether the value is cached for the current simulator step
+        """
+        return self.value is not None
+
+    def set_cached_value(self, value):
+        """
+        Cache a value computed outside of the state for the current simulator step, e.g. in a batch with the same
+        state of other objects.
+
+        :param value: value of the state, as returned by _compute_value
+        """
+        self.value = value
+
     def clear_cached_value(self):
         self.value = None
 
@@ -4,6 +4,14 @@ from igibson.object_states.object_state_base import CachingEnabledObjectState
 
 
 class Pose(CachingEnabledObjectState):
+    @staticmethod
+    def requires_update_every_step():
+        return False
+
+    def get_update_signature(self):
+        # The cached value only depends on the object's own pose, which the scheduler tracks.
+        return ()
+
     def _compute_value(self):
         pos = self.obj.get_position()
         orn = self.obj.get_orientation()
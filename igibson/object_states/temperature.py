@@ -1,8 +1,6 @@
 from igibson.object_states.heat_source_or_sink import HeatSourceOrSink
-from igibson.object_states.inside import Inside
 from igibson.object_states.object_state_base import AbsoluteObjectState
 from igibson.object_states.pose import Pose
-from igibson.utils.utils import l2_distance
 
 # TODO: Consider sourcing default temperature from scene
 # Default ambient temperature.
@@ -24,8 +22,36 @@ class Temperature(AbsoluteObjectState):
     def __init__(self, obj):
         super(Temperature, self).__init__(obj)
 
+        # Index of the object in the simulator's ThermalSystem, which stores the value once the state is initialized.
+        self.thermal_index = None
         self.value = DEFAULT_TEMPERATURE
 
+    @property
+    def value(self):
+        if self.thermal_index is None:
+            return self._value
+        return float(self.simulator.thermal_system.temperatures[self.thermal_index])
+
+    @value.setter
+    def value(self, new_value):
+        if self.thermal_index is None:
+            self._value = new_value
+        else:
+            self.simulator.thermal_system.temperatures[self.thermal_index] = new_value
+
+    def _initialize(self):
+        super(Temperature, self)._initialize()
+        value = self.value
+        self.thermal_index = self.simulator.thermal_system.get_index(self.obj)
+        self.value = value
+
+    @staticmethod
+    def requires_update_every_step():
+        return False
+
+    def get_update_signature(self):
+        return self.value
+
     def _get_value(self):
         return self.value
 
@@ -34,44 +60,8 @@ class Temperature(AbsoluteObjectState):
         return True
 
     def _update(self):
-        # Start at the current temperature.
-        new_temperature = self.value
-
-        # Find all heat source objects.
-        affected_by_heat_source = False
-        for obj2 in self.simulator.scene.get_objects_with_state(HeatSourceOrSink):
-            # Obtain heat source position.
-            heat_source = obj2.states[HeatSourceOrSink]
-            heat_source_state, heat_source_position = heat_source.get_value()
-            if heat_source_state:
-                # The heat source is toggled on. If it has a position, we check distance.
-                # If not, we check whether we are inside it or not.
-                if heat_source_position is not None:
-                    # Load our Pose. Note that this is cached already by the state.
-                    # Also note that this produces garbage values for fixed objects - but we are
-                    # assuming none of our temperature-enabled objects are fixed.
-                    position, _ = self.obj.states[Pose].get_value()
-
-                    # Compute distance to heat source from our position.
-                    dist = l2_distance(heat_source_position, position)
-                    if dist > heat_source.distance_threshold:
-                        continue
-                else:
-                    if not self.obj.states[Inside].get_value(obj2):
-                        continue
-
-                new_temperature += (
-                    (heat_source.temperature - self.value) * heat_source.heating_rate * self.simulator.render_timestep
-                )
-                affected_by_heat_source = True
-
-        # Apply temperature decay if not affected by any heat source.
-        if not affected_by_heat_source:
-            new_temperature += (
-                (DEFAULT_TEMPERATURE - self.value) * TEMPERATURE_DECAY_SPEED * self.simulator.render_timestep
-            )
-
-        self.value = new_temperature
+        # The temperatures of all objects are stepped at once by the thermal system.
+        self.simulator.thermal_system.step()
 
     # For this state, we simply store its value.
     def _dump(self):
@@ -0,0 +1,109 @@
+import numpy as np
+
+from igibson.object_states.aabb import AABB
+from igibson.object_states.heat_source_or_sink import HeatSourceOrSink
+from igibson.object_states.inside import Inside
+from igibson.object_states.pose import Pose
+from igibson.object_states.temperature import DEFAULT_TEMPERATURE, TEMPERATURE_DECAY_SPEED, Temperature
+
+_INITIAL_CAPACITY = 64
+
+
+class ThermalSystem(object):
+    """
+    Scene-level thermal simulation. The temperature and max temperature of every object are stored in shared NumPy
+    arrays (the Temperature and MaxTemperature states are views into them), and all the temperatures are stepped at once
+    with one broadcasted distance computation per heat source, instead of one Python loop over all the heat sources per
+    object.
+    """
+
+    def __init__(self, simulator):
+        """
+        :param simulator: Simulator whose scene objects are heated
+        """
+        self.simulator = simulator
+        self.objects = []
+        self.object_index = {}
+        self.temperatures = np.full(_INITIAL_CAPACITY, DEFAULT_TEMPERATURE)
+        self.max_temperatures = np.full(_INITIAL_CAPACITY, float("-inf"))
+        self.last_step_frame = None
+
+    def get_index(self, obj):
+        """
+        Get the index of an object in the temperature arrays, allocating one if needed.
+
+        :param obj: object with a Temperature state
+        :return: index into self.temperatures and self.max_temperatures
+        """
+        if obj in self.object_index:
+            return self.object_index[obj]
+
+        index = len(self.objects)
+        if index == len(self.temperatures):
+            self.temperatures = np.concatenate(
+                [self.temperatures, np.full(len(self.temperatures), DEFAULT_TEMPERATURE)]
+            )
+            self.max_temperatures = np.concatenate(
+                [self.max_temperatures, np.full(len(self.max_temperatures), float("-inf"))]
+            )
+        self.objects.append(obj)
+        self.object_index[obj] = index
+        return index
+
+    def step(self):
+        """
+        Step the temperature of all the objects of the scene. This is called by the Temperature states and only runs
+        once per simulator frame, after all the HeatSourceOrSink states have been updated.
+        """
+        if self.last_step_frame == self.simulator.frame_count:
+            return
+        self.last_step_frame = self.simulator.frame_count
+
+        objects = self.simulator.scene.get_objects_with_state(Temperature)
+        if not objects:
+            return
+        indices = np.array([self.get_index(obj) for obj in objects])
+        temperatures = self.temperatures[indices]
+        new_temperatures = temperatures.copy()
+        affected_by_heat_source = np.zeros(len(objects), dtype=bool)
+        positions = None
+
+        for obj2 in self.simulator.scene.get_objects_with_state(HeatSourceOrSink):
+            # Obtain heat source position.
+            heat_source = obj2.states[HeatSourceOrSink]
+            heat_source_state, heat_source_position = heat_source.get_value()
+            if not heat_source_state:
+                continue
+
+            # Load all our Poses. Note that these are cached already by the state.
+            # Also note that this produces garbage values for fixed objects - but we are
+            # assuming none of our temperature-enabled objects are fixed.
+            if positions is None:
+                positions = np.array([obj.states[Pose].get_value()[0] for obj in objects])
+
+            # The heat source is toggled on. If it has a position, we check distance.
+            # If not, we check whether we are inside it or not.
+            if heat_source_position is not None:
+                dist = np.linalg.norm(positions - np.array(heat_source_position), axis=1)
+                affected = dist <= heat_source.distance_threshold
+            else:
+                # Inside requires the object's position to be in the heat source's AABB: only check those objects.
+                aabb_low, aabb_hi = obj2.states[AABB].get_value()
+                affected = np.all((aabb_low <= positions) & (positions <= aabb_hi), axis=1)
+                for i in np.flatnonzero(affected):
+                    affected[i] = objects[i].states[Inside].get_value(obj2)
+
+            new_temperatures[affected] += (
+                (heat_source.temperature - temperatures[affected])
+                * heat_source.heating_rate
+                * self.simulator.render_timestep
+            )
+            affected_by_heat_source |= affected
+
+        # Apply temperature decay to the objects not affected by any heat source.
+        decaying = ~affected_by_heat_source
+        new_temperatures[decaying] += (
+            (DEFAULT_TEMPERATURE - temperatures[decaying]) * TEMPERATURE_DECAY_SPEED * self.simulator.render_timestep
+        )
+
+        self.temperatures[indices] = new_temperatures
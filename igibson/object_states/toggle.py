@@ -27,6 +27,10 @@ class ToggledOn(AbsoluteObjectState, BooleanState, LinkBasedStateMixin, TextureC
         self.value = new_value
         return True
 
+    def get_update_signature(self):
+        # Still updated every step since toggling depends on the robot's hands.
+        return self.value
+
     @staticmethod
     def get_state_link_name():
         return _TOGGLE_LINK_NAME
@@ -0,0 +1,201 @@
+import pybullet as p
+
+from igibson.utils.utils import get_bodies_moved_generation
+
+
+class ObjectStateUpdateScheduler(object):
+    """
+    Incremental replacement for the per-step loop over all object states in Simulator._non_physics_step.
+
+    States are still processed in global topological order, but states that do not require an update every step
+    (see BaseObjectState.requires_update_every_step) are skipped unless one of the following holds:
+        - their object is dirty, i.e. its base pose or joint positions changed since the last step, it was just added
+          or it was marked dirty explicitly with mark_dirty (e.g. after a set_value / load). The poses of the bodies
+          that are asleep are not polled, see _is_body_asleep;
+        - their signature (see BaseObjectState.get_update_signature) changed since their last update, e.g. because
+          the value was set from outside of the simulator step;
+        - their previous update changed their signature, i.e. the state has not settled yet;
+        - one of their dependencies changed on the same object during this step;
+        - one of their optional dependencies changed on *any* object during this step, since optional dependencies
+          are typically read across objects (e.g. Temperature reads HeatSourceOrSink of every heat source).
+
+    A state is considered changed by an update if its object is dirty or if its signature differs from the one before
+    the update. States without a signature are considered changed whenever their object is dirty.
+    """
+
+    def __init__(self, simulator):
+        """
+        :param simulator: Simulator whose object states are updated
+        """
+        self.simulator = simulator
+        self.reset()
+
+    def reset(self):
+        """
+        Forget all the tracked object poses and state signatures. Every object is dirty on the next step.
+        """
+        self._body_signatures = {}
+        self._num_joints = {}
+        self._base_masses = {}
+        self._sleeping_bodies = set()
+        self._bodies_moved_generation = get_bodies_moved_generation()
+        self._state_signatures = {}
+        self._unsettled_states = set()
+        self._dirty_objects = set()
+        self.num_steps = 0
+        self.num_updates_run = 0
+        self.num_updates_skipped = 0
+        self.last_num_updates_run = 0
+        self.last_num_updates_skipped = 0
+
+    def mark_dirty(self, obj):
+        """
+        Force all the states of an object to be updated on the next step.
+
+        :param obj: object to mark dirty
+        """
+        self._dirty_objects.add(obj)
+        self._sleeping_bodies.difference_update(obj.get_body_ids())
+
+    def _is_body_asleep(self, body_id):
+        """
+        pybullet does not expose the activation state of the bodies, but Bullet zeroes the velocities of the bodies it
+        deactivates and does not integrate them until they are woken up, while a body with a free base that is awake
+        practically never has an exactly zero velocity. Bodies with a fixed base (zero base mass) always have a zero
+        base velocity, so they are never considered asleep.
+
+        Teleported bodies are not woken up by pybullet, see igibson.utils.utils.notify_bodies_moved.
+
+        :param body_id: pybullet body id
+        :return: whether the body is asleep
+        """
+        if self._base_masses[body_id] == 0:
+            return False
+        linear_velocity, angular_velocity = p.getBaseVelocity(body_id)
+        return not any(linear_velocity) and not any(angular_velocity)
+
+    def _get_body_signature(self, body_id):
+        """
+        :param body_id: pybullet body id
+        :return: tuple of the base pose and joint positions of the body
+        """
+        signature = [p.getBasePositionAndOrientation(body_id)]
+        if self._num_joints[body_id] > 0:
+            joint_states = p.getJointStates(body_id, range(self._num_joints[body_id]))
+            signature.append(tuple(joint_state[0] for joint_state in joint_states))
+        return tuple(signature)
+
+    def _body_moved(self, body_id):
+        """
+        Compare the physical signature of a body with the one from its last poll. Bodies that were already asleep at
+        their last poll are not polled: they cannot have moved since.
+
+        :param body_id: pybullet body id
+        :return: whether the body moved since its last poll
+        """
+        if body_id not in self._num_joints:
+            self._num_joints[body_id] = p.getNumJoints(body_id)
+            self._base_masses[body_id] = p.getDynamicsInfo(body_id, -1)[0]
+        asleep = self._is_body_asleep(body_id)
+        if asleep and body_id in self._sleeping_bodies:
+            return False
+
+        # A body that just fell asleep is polled a last time, since it was integrated during the step it fell asleep
+        if asleep:
+            self._sleeping_bodies.add(body_id)
+        else:
+            self._sleeping_bodies.discard(body_id)
+        signature = self._get_body_signature(body_id)
+        if self._body_signatures.get(body_id) == signature:
+            return False
+        self._body_signatures[body_id] = signature
+        return True
+
+    def _update_dirty_objects(self, objects):
+        """
+        Compare the physical signature of the bodies of every object with the one from the previous step.
+
+        :param objects: objects to check
+        :return: set of dirty objects
+        """
+        # Bodies may have been teleported without being woken up: poll all of them again
+        bodies_moved_generation = get_bodies_moved_generation()
+        if bodies_moved_generation != self._bodies_moved_generation:
+            self._bodies_moved_generation = bodies_moved_generation
+            self._sleeping_bodies.clear()
+
+        dirty_objects = self._dirty_objects
+        self._dirty_objects = set()
+        for obj in objects:
+            # Every body is checked, so that their signatures are kept up to date
+            moved = [self._body_moved(body_id) for body_id in obj.get_body_ids()]
+            if any(moved):
+                dirty_objects.add(obj)
+        return dirty_objects
+
+    def step(self):
+        """
+        Update the object states of the simulator's scene, skipping the updates that cannot change anything.
+        """
+        scene = self.simulator.scene
+        dirty_objects = self._update_dirty_objects(scene.get_objects())
+
+        # (object, state type) pairs and state types that changed during this step
+        changed_states = set()
+        changed_state_types = set()
+        num_run = 0
+        num_skipped = 0
+        for state_type in self.simulator.object_state_types:
+            every_step = state_type.requires_update_every_step()
+            dependencies = state_type.get_dependencies()
+            optional_dependency_changed = any(
+                dependency in changed_state_types for dependency in state_type.get_optional_dependencies()
+            )
+            for obj in scene.get_objects_with_state(state_type):
+                state = obj.states[state_type]
+                key = (obj, state_type)
+                obj_dirty = obj in dirty_objects
+                previous_signature = self._state_signatures.get(key)
+                run = (
+                    every_step
+                    or obj_dirty
+                    or optional_dependency_changed
+                    or key in self._unsettled_states
+                    or key not in self._state_signatures
+                    or state.get_update_signature() != previous_signature
+                    or any((obj, dependency) in changed_states for dependency in dependencies)
+                )
+                if not run:
+                    num_skipped += 1
+                    continue
+
+                state.update()
+                num_run += 1
+                new_signature = state.get_update_signature()
+                signature_changed = new_signature is not None and new_signature != previous_signature
+                self._state_signatures[key] = new_signature
+                if signature_changed:
+                    self._unsettled_states.add(key)
+                else:
+                    self._unsettled_states.discard(key)
+                if obj_dirty or signature_changed:
+                    changed_states.add(key)
+                    changed_state_types.add(state_type)
+
+        self.num_steps += 1
+        self.last_num_updates_run = num_run
+        self.last_num_updates_skipped = num_skipped
+        self.num_updates_run += num_run
+        self.num_updates_skipped += num_skipped
+
+    def get_stats(self):
+        """
+        :return: dict with the number of object state updates that were run and skipped, in total and in the last step
+        """
+        return {
+            "num_steps": self.num_steps,
+            "num_updates_run": self.num_updates_run,
+            "num_updates_skipped": self.num_updates_skipped,
+            "last_num_updates_run": self.last_num_updates_run,
+            "last_num_updates_skipped": self.last_num_updates_skipped,
+        }
@@ -10,7 +10,8 @@ from igibson.external.pybullet_tools.utils import get_aabb_center, get_aabb_exte
 from igibson.object_states.aabb import AABB
 from igibson.object_states.object_state_base import CachingEnabledObjectState
 from igibson.utils import sampling_utils
-from igibson.utils.utils import restoreState
+from igibson.utils.contact_manager import invalidate_contacts
+from igibson.utils.utils import notify_bodies_moved, restoreState
 
 _ON_TOP_RAY_CASTING_SAMPLING_PARAMS = {
     # "hit_to_plane_threshold": 0.1,  # TODO: Tune this parameter.
@@ -39,14 +40,31 @@ def get_center_extent(obj_states):
 
 
 def clear_cached_states(obj):
+    # The object has been moved outside of the simulator step
+    notify_bodies_moved()
     for _, obj_state in obj.states.items():
         if isinstance(obj_state, CachingEnabledObjectState):
             obj_state.clear_cached_value()
 
 
-def detect_closeness(bodyA, exclude_bodyB=[], distance=0.01):
+def detect_closeness(bodyA, exclude_bodyB=[], distance=0.01, scene=None):
+    """
+    Check whether any other body is closer than distance to bodyA.
+
+    :param bodyA: pybullet body id
+    :param exclude_bodyB: body ids to ignore
+    :param distance: distance threshold
+    :param scene: optional scene with an up-to-date spatial index (see InteractiveIndoorScene.update_spatial_index),
+        used to only check the bodies that can be within distance of bodyA
+    :return: whether any body is too close to bodyA
+    """
+    if scene is not None and hasattr(scene, "get_body_ids_near_body"):
+        body_ids = scene.get_body_ids_near_body(bodyA, distance=distance)
+    else:
+        body_ids = range(p.getNumBodies())
+
     too_close = False
-    for body_id in range(p.getNumBodies()):
+    for body_id in body_ids:
         # Ignore self-closeness
         if body_id == bodyA or body_id in exclude_bodyB:
             continue
@@ -88,6 +106,11 @@ def sample_kinematics(
     if not sample_on_floor:
         objB.force_wakeup()
 
+    # Only objA moves during the trials, so the spatial index of the scene (if any) only needs a full refresh now.
+    scene = objA.states[object_states.AABB].simulator.scene
+    if hasattr(scene, "update_spatial_index"):
+        scene.update_spatial_index()
+
     state_id = p.saveState()
     for i in range(max_trials):
         pos = None
@@ -202,7 +225,9 @@ def sample_kinematics(
         else:
             pos[2] += z_offset
             objA.set_position_orientation(pos, orientation)
-            success = not any(detect_closeness(bid) for bid in objA.get_body_ids())
+            if hasattr(scene, "update_spatial_index"):
+                scene.update_spatial_index(objA.get_body_ids())
+            success = not any(detect_closeness(bid, scene=scene) for bid in objA.get_body_ids())
 
         if igibson.debug_sampling:
             print("sample_kinematics", success)
@@ -222,6 +247,7 @@ def sample_kinematics(
         physics_timestep = p.getPhysicsEngineParameters()["fixedTimeStep"]
         for _ in range(int(0.2 / physics_timestep)):
             p.stepSimulation()
+            invalidate_contacts()
             if any(detect_collision_with_others(bid) for bid in objA.get_body_ids()):
                 break
 
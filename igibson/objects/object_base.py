@@ -11,6 +11,7 @@ from igibson.utils.constants import (
     SemanticClass,
 )
 from igibson.utils.semantics_utils import CLASS_NAME_TO_CLASS_ID
+from igibson.utils.utils import notify_bodies_moved
 
 
 class BaseObject(with_metaclass(ABCMeta, object)):
@@ -177,6 +178,7 @@ class BaseObject(with_metaclass(ABCMeta, object)):
 
     def set_joint_states(self, joint_states):
         """Set object joint states in the format of Dict[String: (q, q_dot)]]"""
+        notify_bodies_moved()
         for body_id in self.get_body_ids():
             for j in range(p.getNumJoints(body_id)):
                 info = p.getJointInfo(body_id, j)
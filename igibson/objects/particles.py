@@ -10,10 +10,32 @@ from igibson.external.pybullet_tools.utils import get_aabb_extent, get_link_name
 from igibson.objects.object_base import BaseObject
 from igibson.utils import sampling_utils
 from igibson.utils.constants import NO_COLLISION_GROUPS_MASK, PyBulletSleepState
+from igibson.utils.mesh_util import quat2rotmat_batch, xyz2mat_batch
 
 _STASH_POSITION = [0, 0, -100]
 
 
+def _multiply_transforms_batch(pos, orn, local_poses):
+    """
+    Vectorized p.multiplyTransforms of one transform with many local poses.
+
+    :param pos: position of the transform
+    :param orn: orientation of the transform (x, y, z, w)
+    :param local_poses: (N, 7) array of local positions and orientations (x, y, z, w)
+    :return: (N, 7) array of the composed positions and orientations
+    """
+    rot = quat2rotmat_batch(orn)[0, :3, :3]
+    x1, y1, z1, w1 = orn
+    x0, y0, z0, w0 = local_poses[:, 3], local_poses[:, 4], local_poses[:, 5], local_poses[:, 6]
+    poses = np.empty_like(local_poses)
+    poses[:, :3] = local_poses[:, :3].dot(rot.T) + np.asarray(pos)
+    poses[:, 3] = x1 * w0 + y1 * z0 - z1 * y0 + w1 * x0
+    poses[:, 4] = -x1 * z0 + y1 * w0 + z1 * x0 + w1 * y0
+    poses[:, 5] = x1 * y0 - y1 * x0 + z1 * w0 + w1 * z0
+    poses[:, 6] = -x1 * x0 - y1 * y0 - z1 * z0 + w1 * w0
+    return poses
+
+
 class Particle(BaseObject):
     """
     A particle object, used to simulate water stream and dust/stain
@@ -197,11 +219,19 @@ class ParticleSystem(object):
     def get_particles(self):
         return self._all_particles
 
+    def get_active_particle_positions(self):
+        """
+        :return: (N, 3) array with the positions of the active particles, in the order of get_active_particles
+        """
+        return np.array([particle.get_position() for particle in self._active_particles]).reshape(-1, 3)
+
     def stash_particle(self, particle):
         assert particle in self._active_particles
         self._active_particles.remove(particle)
         self._stashed_particles.append(particle)
+        self._move_particle_to_stash(particle)
 
+    def _move_particle_to_stash(self, particle):
         particle.set_position(_STASH_POSITION)
         if particle.visual_only:
             # Stain and Dust need to be woken up before stashing because if
@@ -228,6 +258,14 @@ class ParticleSystem(object):
         else:
             particle = self._stashed_particles.popleft()
 
+        self._move_particle(particle, position, orientation)
+
+        self._active_particles.append(particle)
+        self._particles_activated_at_any_time.add(particle)
+
+        return particle
+
+    def _move_particle(self, particle, position, orientation):
         # Lazy loading of the particle now if not already loaded
         if particle.get_body_ids() is None:
             self._load_particle(particle)
@@ -235,11 +273,6 @@ class ParticleSystem(object):
         particle.set_position_orientation(position, orientation)
         particle.force_wakeup()
 
-        self._active_particles.append(particle)
-        self._particles_activated_at_any_time.add(particle)
-
-        return particle
-
     def reset_stash(self):
         """Stash all particles and re-order the stash in the all_particles order for determinism."""
         for particle in self.get_active_particles():
@@ -257,7 +290,16 @@ class ParticleSystem(object):
 
 
 class AttachedParticleSystem(ParticleSystem):
-    def __init__(self, parent_obj, initial_dump=None, **kwargs):
+    def __init__(self, parent_obj, initial_dump=None, instanced=False, **kwargs):
+        """
+        :param parent_obj: object the particles are attached to
+        :param initial_dump: dump to restore the particles from on initialization
+        :param instanced: whether to use the instanced mode, for visual-only particles. In this mode, the particles are
+            not loaded in pybullet: their offsets from the links of the parent object are kept in an (N, 7) array, their
+            world poses are computed with one vectorized transform per parent link and step, and they are rendered as
+            a single instance group. The Particle objects are then only handles, whose pose cannot be queried from
+            pybullet (use get_active_particle_positions instead).
+        """
         super(AttachedParticleSystem, self).__init__(**kwargs)
 
         self.parent_obj = parent_obj
@@ -275,6 +317,19 @@ class AttachedParticleSystem(ParticleSystem):
         self._attachment_offsets = {}  # in the format of {particle: offset}
         self.initial_dump = initial_dump
 
+        self.instanced = instanced
+        if self.instanced:
+            assert all(particle.visual_only for particle in self.get_particles()), "Only visual-only can be instanced."
+            num = len(self.get_particles())
+            self._particle_indices = {particle: i for i, particle in enumerate(self.get_particles())}
+            self._active_mask = np.zeros(num, dtype=bool)
+            self._particle_link_ids = np.full(num, -1, dtype=int)
+            # Offsets from the attachment links and world poses, as (x, y, z, qx, qy, qz, qw)
+            self._particle_offsets = np.zeros((num, 7))
+            self._particle_poses = np.tile(np.array(_STASH_POSITION + [0, 0, 0, 1], dtype=float), (num, 1))
+            self._active_indices_by_link = None
+            self.renderer_instance = None
+
     def reset_to_dump(self, dump):
         # Assert that the dump is compatible
         assert len(dump) == self.get_num()
@@ -302,65 +357,195 @@ class AttachedParticleSystem(ParticleSystem):
     def initialize(self, simulator):
         super(AttachedParticleSystem, self).initialize(simulator)
 
+        if self.instanced and simulator.renderer is not None:
+            self._load_renderer_instance(simulator.renderer)
+
         # Unstash particles in dump.
         if self.initial_dump:
             self.reset_to_dump(self.initial_dump)
             del self.initial_dump
 
-    def unstash_particle(self, position, orientation, link_id=-1, **kwargs):
-        particle = super(AttachedParticleSystem, self).unstash_particle(position, orientation, **kwargs)
+    def _load_renderer_instance(self, renderer):
+        """
+        Load all the particles in the renderer as a single instance group, with one visual object per particle shape.
 
-        # Compute the offset for this particle.
+        :param renderer: MeshRenderer
+        """
+        particles = self.get_particles()
+        object_ids = []
+        loaded_visual_objects = {}
+        for particle in particles:
+            if particle.base_shape == "sphere":
+                filename = os.path.join(igibson.assets_path, "models/mjcf_primitives/sphere8.obj")
+                scale = [particle.bounding_box[0]] * 3
+            elif particle.base_shape == "box":
+                filename = os.path.join(igibson.assets_path, "models/mjcf_primitives/cube.obj")
+                scale = particle.bounding_box
+            elif particle.base_shape == "mesh":
+                filename = particle.mesh_filename
+                scale = particle.mesh_scale
+            else:
+                raise ValueError("Unsupported particle base shape.")
+
+            key = (filename, tuple(scale), tuple(particle.color))
+            if key not in loaded_visual_objects:
+                renderer.load_object(filename, scale=np.array(scale), input_kd=particle.color[:3])
+                loaded_visual_objects[key] = len(renderer.visual_objects) - 1
+            object_ids.append(loaded_visual_objects[key])
+
+        num_instances = len(renderer.instances)
+        renderer.add_instance_group(
+            object_ids=object_ids,
+            link_ids=[-1] * len(particles),
+            poses_trans=xyz2mat_batch(self._particle_poses[:, :3]),
+            poses_rot=quat2rotmat_batch(self._particle_poses[:, 3:]),
+            class_id=particles[0].class_id,
+            dynamic=False,
+            **particles[0]._rendering_params,
+        )
+        if len(renderer.instances) > num_instances:
+            self.renderer_instance = renderer.instances[-1]
+
+    def _update_renderer_instance(self, indices):
+        """
+        Push the poses of some particles to the renderer.
+
+        :param indices: indices of the particles
+        """
+        if self.renderer_instance is None:
+            return
+        instance = self.renderer_instance
+        instance.last_trans[indices] = instance.poses_trans[indices]
+        instance.last_rot[indices] = instance.poses_rot[indices]
+        instance.poses_trans[indices] = xyz2mat_batch(self._particle_poses[indices, :3])
+        instance.poses_rot[indices] = quat2rotmat_batch(self._particle_poses[indices, 3:])
+
+    def _load_particle(self, particle):
+        if self.instanced:
+            return None
+        return super(AttachedParticleSystem, self)._load_particle(particle)
+
+    def _move_particle(self, particle, position, orientation):
+        if not self.instanced:
+            super(AttachedParticleSystem, self)._move_particle(particle, position, orientation)
+            return
+        index = self._particle_indices[particle]
+        self._particle_poses[index, :3] = position
+        self._particle_poses[index, 3:] = orientation
+        self._update_renderer_instance([index])
+
+    def _move_particle_to_stash(self, particle):
+        if not self.instanced:
+            super(AttachedParticleSystem, self)._move_particle_to_stash(particle)
+            return
+        self._move_particle(particle, _STASH_POSITION, [0, 0, 0, 1])
+
+    def _get_attachment_pose(self, link_id):
+        """
+        :param link_id: link of the parent object
+        :return: world position and orientation of the link, or of the parent object for the base link
+        """
         if link_id == -1:
-            attachment_source_pos = self.parent_obj.get_position()
-            attachment_source_orn = self.parent_obj.get_orientation()
+            return self.parent_obj.get_position(), self.parent_obj.get_orientation()
+        link_state = utils.get_link_state(self.parent_body_id, link_id)
+        return link_state.linkWorldPosition, link_state.linkWorldOrientation
+
+    def _is_attachment_awake(self, link_id):
+        """
+        :param link_id: link of the parent object
+        :return: whether the link is awake, i.e. whether the particles attached to it may have moved
+        """
+        dynamics_info = p.getDynamicsInfo(self.parent_body_id, link_id)
+
+        if len(dynamics_info) == 13:
+            activation_state = dynamics_info[12]
         else:
-            link_state = utils.get_link_state(self.parent_body_id, link_id)
-            attachment_source_pos = link_state.linkWorldPosition
-            attachment_source_orn = link_state.linkWorldOrientation
+            activation_state = PyBulletSleepState.AWAKE
 
+        return activation_state in [PyBulletSleepState.AWAKE, PyBulletSleepState.ISLAND_AWAKE]
+
+    def unstash_particle(self, position, orientation, link_id=-1, **kwargs):
+        particle = super(AttachedParticleSystem, self).unstash_particle(position, orientation, **kwargs)
+
+        # Compute the offset for this particle.
+        attachment_source_pos, attachment_source_orn = self._get_attachment_pose(link_id)
         base_pos, base_orn = p.invertTransform(attachment_source_pos, attachment_source_orn)
         offsets = p.multiplyTransforms(base_pos, base_orn, position, orientation)
         self._attachment_offsets[particle] = (link_id, offsets)
 
+        if self.instanced:
+            index = self._particle_indices[particle]
+            self._active_mask[index] = True
+            self._particle_link_ids[index] = link_id
+            self._particle_offsets[index, :3] = offsets[0]
+            self._particle_offsets[index, 3:] = offsets[1]
+            self._active_indices_by_link = None
+
         return particle
 
     def stash_particle(self, particle):
         super(AttachedParticleSystem, self).stash_particle(particle)
         del self._attachment_offsets[particle]
 
+        if self.instanced:
+            self._active_mask[self._particle_indices[particle]] = False
+            self._active_indices_by_link = None
+
+    def get_active_particle_positions(self):
+        if not self.instanced:
+            return super(AttachedParticleSystem, self).get_active_particle_positions()
+        indices = [self._particle_indices[particle] for particle in self._active_particles]
+        return self._particle_poses[indices, :3]
+
     def update(self, simulator):
         super(AttachedParticleSystem, self).update(simulator)
 
+        if self.instanced:
+            self._update_instanced()
+            return
+
         # Move every particle to their known parent object offsets.
         for particle in self.get_active_particles():
             link_id, (pos_offset, orn_offset) = self._attachment_offsets[particle]
 
-            dynamics_info = p.getDynamicsInfo(self.parent_body_id, link_id)
-
-            if len(dynamics_info) == 13:
-                activation_state = dynamics_info[12]
-            else:
-                activation_state = PyBulletSleepState.AWAKE
-
-            if activation_state not in [PyBulletSleepState.AWAKE, PyBulletSleepState.ISLAND_AWAKE]:
+            if not self._is_attachment_awake(link_id):
                 # If parent object is in sleep, don't update particle poses
                 continue
 
-            if link_id == -1:
-                attachment_source_pos = self.parent_obj.get_position()
-                attachment_source_orn = self.parent_obj.get_orientation()
-            else:
-                link_state = utils.get_link_state(self.parent_body_id, link_id)
-                attachment_source_pos = link_state.linkWorldPosition
-                attachment_source_orn = link_state.linkWorldOrientation
-
+            attachment_source_pos, attachment_source_orn = self._get_attachment_pose(link_id)
             position, orientation = p.multiplyTransforms(
                 attachment_source_pos, attachment_source_orn, pos_offset, orn_offset
             )
             particle.set_position_orientation(position, orientation)
             particle.force_wakeup()
 
+    def _update_instanced(self):
+        """
+        Move the active particles of the instanced mode to their parent link offsets, with one vectorized transform
+        per parent link.
+        """
+        if self._active_indices_by_link is None:
+            active_indices = np.flatnonzero(self._active_mask)
+            active_link_ids = self._particle_link_ids[active_indices]
+            self._active_indices_by_link = {
+                int(link_id): active_indices[active_link_ids == link_id] for link_id in np.unique(active_link_ids)
+            }
+
+        updated_indices = []
+        for link_id, indices in self._active_indices_by_link.items():
+            if not self._is_attachment_awake(link_id):
+                # If parent object is in sleep, don't update particle poses
+                continue
+
+            attachment_source_pos, attachment_source_orn = self._get_attachment_pose(link_id)
+            self._particle_poses[indices] = _multiply_transforms_batch(
+                attachment_source_pos, attachment_source_orn, self._particle_offsets[indices]
+            )
+            updated_indices.append(indices)
+
+        if updated_indices:
+            self._update_renderer_instance(np.concatenate(updated_indices))
+
     def dump(self):
         data = []
         for particle in self.get_particles():
@@ -368,16 +553,8 @@ class AttachedParticleSystem(ParticleSystem):
                 data.append(None)
             else:
                 link_id, (pos_offset, orn_offset) = self._attachment_offsets[particle]
-
-                if link_id == -1:
-                    link_name = None
-                    attachment_source_pos = self.parent_obj.get_position()
-                    attachment_source_orn = self.parent_obj.get_orientation()
-                else:
-                    link_name = get_link_name(self.parent_body_id, link_id)
-                    link_state = utils.get_link_state(self.parent_body_id, link_id)
-                    attachment_source_pos = link_state.linkWorldPosition
-                    attachment_source_orn = link_state.linkWorldOrientation
+                link_name = None if link_id == -1 else get_link_name(self.parent_body_id, link_id)
+                attachment_source_pos, attachment_source_orn = self._get_attachment_pose(link_id)
 
                 position, orientation = p.multiplyTransforms(
                     attachment_source_pos, attachment_source_orn, pos_offset, orn_offset
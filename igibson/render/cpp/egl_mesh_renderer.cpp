@@ -238,6 +238,8 @@ PYBIND11_MODULE(EGLRendererContext, m) {
                  "post-executed functions in MeshRenderer.render");
     pymodule.def("getstring_meshrenderer", &EGLRendererContext::getstring_meshrenderer, "return GL version string");
     pymodule.def("readbuffer_meshrenderer", &EGLRendererContext::readbuffer_meshrenderer, "read pixel buffer");
+    pymodule.def("readbuffer_meshrenderer_into", &EGLRendererContext::readbuffer_meshrenderer_into,
+                 "read pixel buffer into an array");
     pymodule.def("clean_meshrenderer", &EGLRendererContext::clean_meshrenderer, "clean meshrenderer");
     pymodule.def("setup_framebuffer_meshrenderer", &EGLRendererContext::setup_framebuffer_meshrenderer,
                  "setup framebuffer in meshrenderer");
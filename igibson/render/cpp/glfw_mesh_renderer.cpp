@@ -143,6 +143,8 @@ PYBIND11_MODULE(GLFWRendererContext, m) {
                  "post-executed functions in MeshRenderer.render");
     pymodule.def("getstring_meshrenderer", &GLFWRendererContext::getstring_meshrenderer, "return GL version string");
     pymodule.def("readbuffer_meshrenderer", &GLFWRendererContext::readbuffer_meshrenderer, "read pixel buffer");
+    pymodule.def("readbuffer_meshrenderer_into", &GLFWRendererContext::readbuffer_meshrenderer_into,
+                 "read pixel buffer into an array");
     pymodule.def("readbuffer_meshrenderer_shadow_depth", &GLFWRendererContext::readbuffer_meshrenderer_shadow_depth,
                  "read pixel buffer");
     pymodule.def("clean_meshrenderer", &GLFWRendererContext::clean_meshrenderer, "clean meshrenderer");
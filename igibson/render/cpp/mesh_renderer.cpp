@@ -250,8 +250,7 @@ void MeshRendererContext::blit_buffer(int width, int height, GLuint fb1, GLuint
     }
 }
 
-py::array_t<float> MeshRendererContext::readbuffer_meshrenderer(char *mode, int width, int height, GLuint fb2) {
-    glBindFramebuffer(GL_FRAMEBUFFER, fb2);
+static void select_read_buffer(char *mode) {
     if (!strcmp(mode, "rgb")) {
         glReadBuffer(GL_COLOR_ATTACHMENT0);
     } else if (!strcmp(mode, "normal")) {
@@ -270,6 +269,11 @@ py::array_t<float> MeshRendererContext::readbuffer_meshrenderer(char *mode, int
         fprintf(stderr, "ERROR: Unknown buffer mode.\n");
         exit(EXIT_FAILURE);
     }
+}
+
+py::array_t<float> MeshRendererContext::readbuffer_meshrenderer(char *mode, int width, int height, GLuint fb2) {
+    glBindFramebuffer(GL_FRAMEBUFFER, fb2);
+    select_read_buffer(mode);
     py::array_t<float> data = py::array_t<float>(4 * width * height);
     py::buffer_info buf = data.request();
     float *ptr = (float *) buf.ptr;
@@ -277,6 +281,52 @@ py::array_t<float> MeshRendererContext::readbuffer_meshrenderer(char *mode, int
     return data;
 }
 
+// Read some channels of a framebuffer attachment directly into a C-contiguous (height, width, num_channels) array,
+// flipped vertically, as uint8 (normalized) or float32 depending on the dtype of the array
+void MeshRendererContext::readbuffer_meshrenderer_into(char *mode, int width, int height, GLuint fb2,
+                                                       int first_channel, int num_channels, py::buffer out) {
+    py::buffer_info buf = out.request(true);
+    bool is_uint8 = buf.itemsize == 1 && buf.format == py::format_descriptor<uint8_t>::format();
+    bool is_float32 = buf.itemsize == 4 && buf.format == py::format_descriptor<float>::format();
+    if (!is_uint8 && !is_float32) {
+        throw std::runtime_error("readbuffer_meshrenderer_into: output array must be uint8 or float32, got format " +
+                                 buf.format);
+    }
+    size_t row_size = (size_t) width * num_channels * buf.itemsize;
+    if ((size_t) buf.size * buf.itemsize != row_size * height) {
+        throw std::runtime_error("readbuffer_meshrenderer_into: output array has the wrong size");
+    }
+
+    GLenum format;
+    if (num_channels == 4 && first_channel == 0) {
+        format = GL_RGBA;
+    } else if (num_channels == 3 && first_channel == 0) {
+        format = GL_RGB;
+    } else if (num_channels == 2 && first_channel == 0) {
+        format = GL_RG;
+    } else if (num_channels == 1 && first_channel >= 0 && first_channel < 3) {
+        // GL_ALPHA is not a valid read format in the core profile, the alpha channel can only be read with GL_RGBA
+        const GLenum single_channel_formats[3] = {GL_RED, GL_GREEN, GL_BLUE};
+        format = single_channel_formats[first_channel];
+    } else {
+        throw std::runtime_error("readbuffer_meshrenderer_into: unsupported channels");
+    }
+
+    glBindFramebuffer(GL_FRAMEBUFFER, fb2);
+    select_read_buffer(mode);
+    m_readback_buffer.resize(row_size * height);
+    glPixelStorei(GL_PACK_ALIGNMENT, 1);
+    glReadPixels(0, 0, width, height, format, is_uint8 ? GL_UNSIGNED_BYTE : GL_FLOAT,
+                 m_readback_buffer.data());
+    glPixelStorei(GL_PACK_ALIGNMENT, 4);
+
+    // OpenGL rows start at the bottom of the image
+    char *dst = (char *) buf.ptr;
+    for (int row = 0; row < height; row++) {
+        memcpy(dst + row * row_size, m_readback_buffer.data() + (height - 1 - row) * row_size, row_size);
+    }
+}
+
 
 void MeshRendererContext::clean_meshrenderer(std::vector<GLuint> texture1, std::vector<GLuint> texture2,
                                              std::vector<GLuint> fbo, std::vector<GLuint> vaos,
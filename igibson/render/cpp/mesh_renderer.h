@@ -112,6 +112,12 @@ public:
 
     py::array_t<float> readbuffer_meshrenderer(char *mode, int width, int height, GLuint fb2);
 
+    void readbuffer_meshrenderer_into(char *mode, int width, int height, GLuint fb2, int first_channel,
+                                      int num_channels, py::buffer out);
+
+    // Staging buffer of readbuffer_meshrenderer_into, reused across calls
+    std::vector<char> m_readback_buffer;
+
     void clean_meshrenderer(std::vector<GLuint> texture1, std::vector<GLuint> texture2, std::vector<GLuint> fbo,
                             std::vector<GLuint> vaos, std::vector<GLuint> vbos);
 
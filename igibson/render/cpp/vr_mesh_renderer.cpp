@@ -836,6 +836,8 @@ PYBIND11_MODULE(VRRendererContext, m) {
 		"post-executed functions in MeshRenderer.render");
 	pymodule.def("getstring_meshrenderer", &VRRendererContext::getstring_meshrenderer, "return GL version string");
 	pymodule.def("readbuffer_meshrenderer", &VRRendererContext::readbuffer_meshrenderer, "read pixel buffer");
+	pymodule.def("readbuffer_meshrenderer_into", &VRRendererContext::readbuffer_meshrenderer_into,
+		"read pixel buffer into an array");
 	pymodule.def("readbuffer_meshrenderer_shadow_depth", &VRRendererContext::readbuffer_meshrenderer_shadow_depth,
 		"read pixel buffer");
 	pymodule.def("clean_meshrenderer", &VRRendererContext::clean_meshrenderer, "clean meshrenderer");
@@ -45,10 +45,13 @@ class InstanceGroup(object):
         :param parent_body_name: name of the parent body, if any, to be used by the Robosuite/Mujoco bridge
         """
         self.objects = objects
-        self.poses_trans = poses_trans
-        self.poses_rot = poses_rot
+        # Poses are kept in contiguous (N, 4, 4) buffers so that Simulator.sync can write all links at once
+        self.poses_trans = np.array(poses_trans, dtype=np.float64).reshape(-1, 4, 4)
+        self.poses_rot = np.array(poses_rot, dtype=np.float64).reshape(-1, 4, 4)
         self.id = id
         self.link_ids = link_ids
+        # Unique pybullet links of this group and, for each visual object, the index of its link in unique_link_ids
+        self.unique_link_ids, self.link_id_index = np.unique(np.asarray(link_ids, dtype=int), return_inverse=True)
         self.class_id = class_id
         if len(objects) > 0:
             self.renderer = objects[0].renderer
@@ -71,8 +74,8 @@ class InstanceGroup(object):
         # Indices into optimized buffers such as color information and transformation buffer
         # These values are used to set buffer information during simulation
         self.or_buffer_indices = None
-        self.last_trans = [np.copy(item) for item in poses_trans]
-        self.last_rot = [np.copy(item) for item in poses_rot]
+        self.last_trans = np.copy(self.poses_trans)
+        self.last_rot = np.copy(self.poses_rot)
         self.parent_body_name = parent_body_name
 
     def set_highlight(self, highlight):
@@ -206,8 +209,8 @@ class InstanceGroup(object):
         :param pos: positions
         """
 
-        self.last_trans = [np.copy(item) for item in self.poses_trans]
-        self.poses_trans = pos
+        self.last_trans = np.copy(self.poses_trans)
+        self.poses_trans = np.array(pos, dtype=np.float64).reshape(-1, 4, 4)
 
     def set_rotation(self, rot):
         """
@@ -216,8 +219,8 @@ class InstanceGroup(object):
         :param rot: rotation matrix
         """
 
-        self.last_rot = [np.copy(item) for item in self.poses_rot]
-        self.poses_rot = rot
+        self.last_rot = np.copy(self.poses_rot)
+        self.poses_rot = np.array(rot, dtype=np.float64).reshape(-1, 4, 4)
 
     def set_position_for_part(self, pos, j):
         """
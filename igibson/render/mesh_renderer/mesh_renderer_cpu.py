@@ -3,6 +3,8 @@ import os
 import platform
 import shutil
 import sys
+import time
+from collections import OrderedDict
 
 import numpy as np
 import py360convert
@@ -59,6 +61,7 @@ class MeshRenderer(object):
         self.color_tex_rgb, self.color_tex_normal, self.color_tex_semantics, self.color_tex_3d = None, None, None, None
         self.color_tex_scene_flow, self.color_tex_optical_flow, self.color_tex_ins_seg = None, None, None
         self.depth_tex = None
+        self.last_readback_times = OrderedDict()
         self.VAOs = []
         self.VBOs = []
         self.textures = []
@@ -864,6 +867,38 @@ class MeshRenderer(object):
             results.append(frame)
         return results
 
+    def readbuffer_into(self, outputs):
+        """
+        Read framebuffer of rendering directly into preallocated arrays, in their final dtype and orientation, without
+        intermediate arrays. The read time of every mode is stored in last_readback_times.
+
+        :param outputs: list of (mode, first_channel, out) where mode is one of AVAILABLE_MODALITIES and out is a
+            C-contiguous uint8 or float32 array of shape (H, W, C) that receives channels first_channel to
+            first_channel + C of the mode. uint8 arrays receive the channels normalized to [0, 255]. Only the
+            channels (0, 4), (0, 3), (0, 2), (0, 1), (1, 1) and (2, 1) can be read.
+        """
+        self.last_readback_times.clear()
+        for mode, first_channel, out in outputs:
+            if mode not in AVAILABLE_MODALITIES:
+                raise Exception("unknown rendering mode: {}".format(mode))
+            if out.dtype not in (np.uint8, np.float32):
+                raise ValueError("Readback array of mode {} must be uint8 or float32, not {}.".format(mode, out.dtype))
+            if out.ndim != 3 or out.shape[:2] != (self.height, self.width) or not out.flags["C_CONTIGUOUS"]:
+                raise ValueError("Readback array of mode {} must be C-contiguous with shape (H, W, C).".format(mode))
+            start = time.time()
+            if hasattr(self.r, "readbuffer_meshrenderer_into"):
+                self.r.readbuffer_meshrenderer_into(
+                    mode, self.width, self.height, self.fbo, first_channel, out.shape[2], out
+                )
+            else:
+                # Renderer binaries built before readbuffer_meshrenderer_into, the frame is read and converted
+                frame = self.r.readbuffer_meshrenderer(mode, self.width, self.height, self.fbo)
+                frame = frame.reshape(self.height, self.width, 4)[::-1, :, first_channel : first_channel + out.shape[2]]
+                if out.dtype == np.uint8:
+                    frame = np.rint(np.clip(frame, 0.0, 1.0) * 255)
+                np.copyto(out, frame, casting="unsafe")
+            self.last_readback_times[mode] = self.last_readback_times.get(mode, 0.0) + time.time() - start
+
     def update_optimized_texture(self):
         request_update = False
         for material in self.material_idx_to_material_instance_mapping:
@@ -1256,9 +1291,15 @@ class MeshRenderer(object):
 
         return frames
 
-    def render_single_robot_camera(self, robot, modes=("rgb"), cache=True):
-        frames = []
-        hide_instances = robot.renderer_instances if self.rendering_settings.hide_robot else []
+    def set_robot_camera(self, robot, modes=("rgb"), cache=True):
+        """
+        Set the camera to the robot's eyes.
+
+        :param robot: robot whose camera is used
+        :param modes: modalities that will be rendered
+        :param cache: if cache is True, cache the robot pose for optical flow and scene flow calculation
+        :return: instances to hide when rendering from the robot's camera
+        """
         need_flow_info = "optical_flow" in modes or "scene_flow" in modes
         camera_pos = robot.eyes.get_position()
         orn = robot.eyes.get_orientation()
@@ -1266,11 +1307,32 @@ class MeshRenderer(object):
         view_direction = mat.dot(np.array([1, 0, 0]))
         up_direction = mat.dot(np.array([0, 0, 1]))
         self.set_camera(camera_pos, camera_pos + view_direction, up_direction, cache=need_flow_info and cache)
+        return robot.renderer_instances if self.rendering_settings.hide_robot else []
+
+    def render_single_robot_camera(self, robot, modes=("rgb"), cache=True):
+        frames = []
+        hide_instances = self.set_robot_camera(robot, modes=modes, cache=cache)
         for item in self.render(modes=modes, hidden=hide_instances):
             frames.append(item)
 
         return frames
 
+    def render_single_robot_camera_into(self, robot, outputs, cache=True):
+        """
+        Render the robot camera and read the frames into preallocated arrays, see readbuffer_into.
+
+        :param robot: robot whose camera is used
+        :param outputs: list of (mode, first_channel, out), see readbuffer_into
+        :param cache: if cache is True, cache the robot pose for optical flow and scene flow calculation
+        """
+        modes = []
+        for mode, _, _ in outputs:
+            if mode not in modes:
+                modes.append(mode)
+        hide_instances = self.set_robot_camera(robot, modes=modes, cache=cache)
+        self.render(modes=modes, hidden=hide_instances, return_buffer=False)
+        self.readbuffer_into(outputs)
+
     def _get_names_active_cameras(self):
         """
         Query the list of active cameras.
@@ -1706,8 +1768,8 @@ class MeshRenderer(object):
             # Continue if instance has no visual objects
             if not buf_idxs:
                 continue
-            self.trans_data[buf_idxs] = np.array(instance.poses_trans)
-            self.rot_data[buf_idxs] = np.array(instance.poses_rot)
+            self.trans_data[buf_idxs] = instance.poses_trans
+            self.rot_data[buf_idxs] = instance.poses_rot
 
         if need_flow_info:
             # this part could be expensive
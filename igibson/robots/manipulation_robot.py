@@ -343,7 +343,7 @@ class ManipulationRobot(BaseRobot):
         con_results = [
             ContactResult(*res[:10])
             for link in self.finger_links[arm]
-            for res in p.getContactPoints(bodyA=link.body_id, linkIndexA=link.link_id)
+            for res in self.simulator.contact_manager.get_contact_points(body_a=link.body_id, link_a=link.link_id)
         ]
         for con_res in con_results:
             # Only add this contact if it's not a robot self-collision
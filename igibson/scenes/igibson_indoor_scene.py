@@ -1,6 +1,7 @@
 import json
 import logging
 import os
+import pickle
 import random
 import time
 import xml.etree.ElementTree as ET
@@ -12,7 +13,7 @@ import pybullet as p
 from PIL import Image
 
 import igibson
-from igibson.external.pybullet_tools.utils import euler_from_quat, get_joint_names, get_joints
+from igibson.external.pybullet_tools.utils import euler_from_quat, get_aabb, get_joint_names, get_joints
 from igibson.objects.articulated_object import URDFObject
 from igibson.objects.multi_object_wrappers import ObjectGrouper, ObjectMultiplexer
 from igibson.robots import REGISTERED_ROBOTS
@@ -28,9 +29,12 @@ from igibson.utils.assets_utils import (
     get_ig_scene_path,
 )
 from igibson.utils.semantics_utils import ROOM_NAME_TO_ROOM_ID
+from igibson.utils.spatial_index import AABBSpatialIndex
 from igibson.utils.utils import NumpyEncoder, restoreState, rotate_vector_3d
 
 SCENE_SOURCE = ["IG", "CUBICASA", "THREEDFRONT"]
+# Version of the parsed scene cache format, see InteractiveIndoorScene.load_scene_urdf_specs
+SCENE_CACHE_VERSION = 1
 
 log = logging.getLogger(__name__)
 
@@ -140,7 +144,7 @@ class InteractiveIndoorScene(StaticIndoorScene):
 
         self.scene_source = scene_source
         self.scene_dir = scene_dir
-        self.scene_tree = ET.parse(self.scene_file)
+        self._scene_tree = None
         self.pybullet_filename = pybullet_filename
         self.random_groups = {}
         self.objects_by_category = defaultdict(list)
@@ -148,6 +152,9 @@ class InteractiveIndoorScene(StaticIndoorScene):
         self.objects_by_id = {}
         self.objects_by_room = defaultdict(list)
         self.objects_by_state = defaultdict(list)
+        # Broad-phase index over the AABBs of the scene bodies, see update_spatial_index
+        self.spatial_index = AABBSpatialIndex()
+        self.spatial_index_signatures = {}
         self.category_ids = get_ig_category_ids()
         self.merge_fixed_links = merge_fixed_links
         self.include_robots = include_robots
@@ -194,45 +201,39 @@ class InteractiveIndoorScene(StaticIndoorScene):
         # self.object_states[object_name]["non_kinematic_states"] = dict()
         self.object_states = defaultdict(dict)
 
-        # Parse all the special link entries in the root URDF that defines the scene
-        for link in self.scene_tree.findall("link"):
-            object_name = link.attrib["name"]
-            if object_name == "world":
-                continue
-
-            category = link.attrib["category"]
+        # Parse all the special link entries in the root URDF that defines the scene (or load them from the cache)
+        for link_spec in self.load_scene_urdf_specs(self.scene_file):
+            object_name = link_spec["name"]
+            link = link_spec["attrib"]
+            category = link["category"]
 
             # Skip multiplexer and grouper because they are not real objects
             if category == "multiplexer":
-                self.object_multiplexers[object_name]["current_index"] = link.attrib["current_index"]
+                self.object_multiplexers[object_name]["current_index"] = link["current_index"]
                 continue
 
             if category == "grouper":
-                self.object_groupers[object_name]["pose_offsets"] = json.loads(link.attrib["pose_offsets"])
-                self.object_groupers[object_name]["multiplexer"] = link.attrib["multiplexer"]
-                self.object_multiplexers[link.attrib["multiplexer"]]["grouper"] = object_name
+                self.object_groupers[object_name]["pose_offsets"] = link_spec["pose_offsets"]
+                self.object_groupers[object_name]["multiplexer"] = link["multiplexer"]
+                self.object_multiplexers[link["multiplexer"]]["grouper"] = object_name
                 continue
 
             if category == "agent_pose":
                 # Simply store the agent pose. The robot will be created outside and its initial pose will be set accordingly.
-                connecting_joint = [
-                    joint
-                    for joint in self.scene_tree.findall("joint")
-                    if joint.find("child").attrib["link"] == link.attrib["name"]
-                ][0]
-                pos = np.array([float(val) for val in connecting_joint.find("origin").attrib["xyz"].split(" ")])
-                euler = np.array([float(val) for val in connecting_joint.find("origin").attrib["rpy"].split(" ")])
-                self.agent_poses[link.attrib["name"]] = (pos, np.array(p.getQuaternionFromEuler(euler)))
+                self.agent_poses[object_name] = (
+                    link_spec["joint_xyz"],
+                    np.array(p.getQuaternionFromEuler(link_spec["joint_rpy"])),
+                )
                 continue
 
             if category == "agent" and not self.include_robots:
                 continue
 
-            model = link.attrib["model"]
+            model = link["model"]
 
             # Robot object
             if category == "agent":
-                robot_config = json.loads(link.attrib["robot_config"]) if "robot_config" in link.attrib else {}
+                robot_config = link_spec["robot_config"]
                 assert model in REGISTERED_ROBOTS, "Got invalid robot to instantiate: {}".format(model)
                 assert (
                     object_name == robot_config["name"]
@@ -245,11 +246,8 @@ class InteractiveIndoorScene(StaticIndoorScene):
                 if self.not_load_object_categories is not None and category in self.not_load_object_categories:
                     continue
 
-                # An object can in multiple rooms, seperated by commas,
-                # or None if the object is one of the walls, floors or ceilings
-                in_rooms = link.attrib.get("room", None)
-                if in_rooms is not None:
-                    in_rooms = in_rooms.split(",")
+                # An object can in multiple rooms, or None if the object is one of the walls, floors or ceilings
+                in_rooms = link_spec["in_rooms"]
 
                 if category in ["walls", "floors", "ceilings"]:
                     model_path = self.scene_dir
@@ -266,12 +264,12 @@ class InteractiveIndoorScene(StaticIndoorScene):
                     assert len(os.listdir(category_path)) != 0, "No models in category folder {}".format(category_path)
 
                     if model == "random":
-                        if "random_group" not in link.attrib:
+                        if "random_group" not in link:
                             model = random.choice(os.listdir(category_path))
                         else:
                             # Using random group to assign the same model to a group of objects
                             # E.g. we want to use the same model for a group of chairs around the same dining table
-                            random_group = link.attrib["random_group"]
+                            random_group = link["random_group"]
                             # random_group is a unique integer within the category
                             random_group_key = (category, random_group)
 
@@ -284,25 +282,13 @@ class InteractiveIndoorScene(StaticIndoorScene):
                     model_path = get_ig_model_path(category, model)
                     filename = os.path.join(model_path, model + ".urdf")
 
-                if "bounding_box" in link.keys() and "scale" in link.keys():
+                if "bounding_box" in link and "scale" in link:
                     raise Exception("You cannot define both scale and bounding box size for a URDFObject")
 
-                bounding_box = None
-                scale = None
-                if "bounding_box" in link.keys():
-                    bounding_box = np.array([float(val) for val in link.attrib["bounding_box"].split(" ")])
-                elif "scale" in link.keys():
-                    scale = np.array([float(val) for val in link.attrib["scale"].split(" ")])
-                else:
-                    scale = np.array([1.0, 1.0, 1.0])
-
-                bddl_object_scope = link.attrib.get("object_scope", None)
-                connecting_joint = [
-                    joint
-                    for joint in self.scene_tree.findall("joint")
-                    if joint.find("child").attrib["link"] == object_name
-                ][0]
-                fixed_base = connecting_joint.attrib["type"] == "fixed"
+                bounding_box = link_spec["bounding_box"]
+                scale = link_spec["scale"]
+                bddl_object_scope = link.get("object_scope", None)
+                fixed_base = link_spec["joint_type"] == "fixed"
 
                 obj = URDFObject(
                     filename,
@@ -322,43 +308,20 @@ class InteractiveIndoorScene(StaticIndoorScene):
                     rendering_params=rendering_params,
                 )
 
-            bbox_center_pos = np.array([float(val) for val in connecting_joint.find("origin").attrib["xyz"].split(" ")])
-            if "rpy" in connecting_joint.find("origin").attrib:
-                bbx_center_orn = np.array(
-                    [float(val) for val in connecting_joint.find("origin").attrib["rpy"].split(" ")]
-                )
-            else:
-                bbx_center_orn = np.array([0.0, 0.0, 0.0])
-            bbx_center_orn = p.getQuaternionFromEuler(bbx_center_orn)
-
-            base_poses = json.loads(link.attrib["base_poses"]) if "base_poses" in link.attrib else None
-            base_velocities = json.loads(link.attrib["base_velocities"]) if "base_velocities" in link.attrib else None
-            if "joint_states" in link.keys():
-                joint_states = json.loads(link.attrib["joint_states"])
-            elif "joint_positions" in link.keys():
-                # Backward compatibility, assuming multi-sub URDF object don't have any joints
-                joint_states = {
-                    key: (position, 0.0) for key, position in json.loads(link.attrib["joint_positions"])[0].items()
-                }
-            else:
-                joint_states = None
-
-            if "states" in link.keys():
-                non_kinematic_states = json.loads(link.attrib["states"])
-            else:
-                non_kinematic_states = None
+            bbox_center_pos = link_spec["joint_xyz"]
+            bbx_center_orn = p.getQuaternionFromEuler(link_spec["joint_rpy"])
 
             self.object_states[object_name]["bbox_center_pose"] = (bbox_center_pos, bbx_center_orn)
-            self.object_states[object_name]["base_poses"] = base_poses
-            self.object_states[object_name]["base_velocities"] = base_velocities
-            self.object_states[object_name]["joint_states"] = joint_states
-            self.object_states[object_name]["non_kinematic_states"] = non_kinematic_states
-
-            if "multiplexer" in link.keys() or "grouper" in link.keys():
-                if "multiplexer" in link.keys():
-                    self.object_multiplexers[link.attrib["multiplexer"]]["whole_object"] = obj
+            self.object_states[object_name]["base_poses"] = link_spec["base_poses"]
+            self.object_states[object_name]["base_velocities"] = link_spec["base_velocities"]
+            self.object_states[object_name]["joint_states"] = link_spec["joint_states"]
+            self.object_states[object_name]["non_kinematic_states"] = link_spec["non_kinematic_states"]
+
+            if "multiplexer" in link or "grouper" in link:
+                if "multiplexer" in link:
+                    self.object_multiplexers[link["multiplexer"]]["whole_object"] = obj
                 else:
-                    grouper = self.object_groupers[link.attrib["grouper"]]
+                    grouper = self.object_groupers[link["grouper"]]
                     if "object_parts" not in grouper:
                         grouper["object_parts"] = []
                     grouper["object_parts"].append(obj)
@@ -376,6 +339,125 @@ class InteractiveIndoorScene(StaticIndoorScene):
             else:
                 self.add_object(obj, simulator=None)
 
+    @property
+    def scene_tree(self):
+        """
+        ElementTree of the scene URDF, only parsed when requested since the scene is built from the cached link specs.
+        """
+        if self._scene_tree is None:
+            self._scene_tree = ET.parse(self.scene_file)
+        return self._scene_tree
+
+    @staticmethod
+    def parse_scene_urdf(scene_file):
+        """
+        Parse a scene URDF into one spec per link (in file order, without the world link), with all the attributes
+        needed to build the scene already decoded: the raw link attributes, the pose and type of the joint connecting
+        the link to the world, the bounding box or scale, the rooms and the saved kinematic and non-kinematic states.
+
+        :param scene_file: path to the scene URDF
+        :return: list of link specs (dicts)
+        """
+        scene_tree = ET.parse(scene_file)
+        # Index the joints by child link, instead of scanning all the joints for every link
+        joints_by_child = {joint.find("child").attrib["link"]: joint for joint in scene_tree.findall("joint")}
+
+        link_specs = []
+        for link in scene_tree.findall("link"):
+            object_name = link.attrib["name"]
+            if object_name == "world":
+                continue
+            attrib = dict(link.attrib)
+            spec = {"name": object_name, "attrib": attrib}
+
+            connecting_joint = joints_by_child.get(object_name)
+            if connecting_joint is not None:
+                origin = connecting_joint.find("origin").attrib
+                spec["joint_type"] = connecting_joint.attrib["type"]
+                spec["joint_xyz"] = np.array([float(val) for val in origin["xyz"].split(" ")])
+                if "rpy" in origin:
+                    spec["joint_rpy"] = np.array([float(val) for val in origin["rpy"].split(" ")])
+                else:
+                    spec["joint_rpy"] = np.array([0.0, 0.0, 0.0])
+
+            if attrib["category"] == "grouper":
+                spec["pose_offsets"] = json.loads(attrib["pose_offsets"])
+            if attrib["category"] in ["multiplexer", "grouper", "agent_pose"]:
+                link_specs.append(spec)
+                continue
+
+            spec["robot_config"] = json.loads(attrib["robot_config"]) if "robot_config" in attrib else {}
+            # An object can in multiple rooms, seperated by commas,
+            # or None if the object is one of the walls, floors or ceilings
+            spec["in_rooms"] = attrib["room"].split(",") if "room" in attrib else None
+
+            spec["bounding_box"] = None
+            spec["scale"] = None
+            if "bounding_box" in attrib:
+                spec["bounding_box"] = np.array([float(val) for val in attrib["bounding_box"].split(" ")])
+            elif "scale" in attrib:
+                spec["scale"] = np.array([float(val) for val in attrib["scale"].split(" ")])
+            else:
+                spec["scale"] = np.array([1.0, 1.0, 1.0])
+
+            spec["base_poses"] = json.loads(attrib["base_poses"]) if "base_poses" in attrib else None
+            spec["base_velocities"] = json.loads(attrib["base_velocities"]) if "base_velocities" in attrib else None
+            if "joint_states" in attrib:
+                spec["joint_states"] = json.loads(attrib["joint_states"])
+            elif "joint_positions" in attrib:
+                # Backward compatibility, assuming multi-sub URDF object don't have any joints
+                spec["joint_states"] = {
+                    key: (position, 0.0) for key, position in json.loads(attrib["joint_positions"])[0].items()
+                }
+            else:
+                spec["joint_states"] = None
+            spec["non_kinematic_states"] = json.loads(attrib["states"]) if "states" in attrib else None
+            link_specs.append(spec)
+        return link_specs
+
+    @staticmethod
+    def get_scene_cache_path(scene_file):
+        """
+        :param scene_file: path to the scene URDF
+        :return: path of the parsed scene cache, next to the scene URDF
+        """
+        return scene_file + ".cache.pkl"
+
+    @staticmethod
+    def load_scene_urdf_specs(scene_file):
+        """
+        Get the link specs of a scene URDF (see parse_scene_urdf) from the parsed scene cache if it is up to date,
+        otherwise parse the URDF and update the cache. The cache is keyed by the cache version and by the path,
+        modification time and size of the URDF.
+
+        :param scene_file: path to the scene URDF
+        :return: list of link specs
+        """
+        stat = os.stat(scene_file)
+        key = (SCENE_CACHE_VERSION, os.path.abspath(scene_file), stat.st_mtime_ns, stat.st_size)
+        cache_path = InteractiveIndoorScene.get_scene_cache_path(scene_file)
+        if os.path.isfile(cache_path):
+            try:
+                with open(cache_path, "rb") as f:
+                    cache = pickle.load(f)
+                if cache["key"] == key:
+                    log.debug("Loaded parsed scene from {}".format(cache_path))
+                    return cache["link_specs"]
+                log.debug("Parsed scene cache {} is out of date".format(cache_path))
+            except Exception as e:
+                log.warning("Failed to load parsed scene cache {}: {}".format(cache_path, e))
+
+        link_specs = InteractiveIndoorScene.parse_scene_urdf(scene_file)
+        try:
+            # Write to a temporary file first so that concurrent workers never read a partial cache
+            tmp_path = "{}.{}.tmp".format(cache_path, os.getpid())
+            with open(tmp_path, "wb") as f:
+                pickle.dump({"key": key, "link_specs": link_specs}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            log.warning("Failed to save parsed scene cache {}: {}".format(cache_path, e))
+        return link_specs
+
     def get_objects(self):
         return list(self.objects_by_name.values())
 
@@ -513,6 +595,9 @@ class InteractiveIndoorScene(StaticIndoorScene):
 
         for id in obj.get_body_ids():
             del self.objects_by_id[id]
+            if id in self.spatial_index:
+                self.spatial_index.remove(id)
+                del self.spatial_index_signatures[id]
 
     def _add_object(self, obj):
         """
@@ -561,6 +646,86 @@ class InteractiveIndoorScene(StaticIndoorScene):
             obj = self.objects_by_name[int_object]
             obj.randomize_texture()
 
+    @staticmethod
+    def get_body_pose_signature(body_id):
+        """
+        :param body_id: pybullet body id
+        :return: hashable summary of the base pose and joint positions of the body
+        """
+        num_joints = p.getNumJoints(body_id)
+        joint_positions = ()
+        if num_joints > 0:
+            joint_positions = tuple(joint_state[0] for joint_state in p.getJointStates(body_id, range(num_joints)))
+        return p.getBasePositionAndOrientation(body_id), joint_positions
+
+    def update_spatial_index(self, body_ids=None):
+        """
+        Refresh the AABBs of the scene bodies that moved since the last refresh. The spatial index queries do not
+        refresh the index themselves, so this should be called after simulating or moving objects.
+
+        :param body_ids: bodies to refresh, all the scene bodies if None
+        """
+        if body_ids is None:
+            body_ids = self.objects_by_id.keys()
+        for body_id in body_ids:
+            signature = self.get_body_pose_signature(body_id)
+            if self.spatial_index_signatures.get(body_id) != signature:
+                self.spatial_index_signatures[body_id] = signature
+                lower, upper = get_aabb(body_id)
+                self.spatial_index.set_aabb(body_id, lower, upper)
+
+    def get_body_ids_in_aabb(self, lower, upper, margin=0.0):
+        """
+        Get the scene bodies whose AABB overlaps a box. Uses the AABBs from the last update_spatial_index call.
+
+        :param lower: lower corner of the box
+        :param upper: upper corner of the box
+        :param margin: distance by which the box is grown in every direction
+        :return: list of body ids
+        """
+        return self.spatial_index.query_overlap(lower, upper, margin=margin)
+
+    def get_body_ids_in_radius(self, point, radius):
+        """
+        Get the scene bodies whose AABB is within a distance of a point. Uses the AABBs from the last
+        update_spatial_index call.
+
+        :param point: query point
+        :param radius: query radius
+        :return: list of body ids
+        """
+        return self.spatial_index.query_radius(point, radius)
+
+    def get_nearest_body_ids(self, point, k):
+        """
+        Get the scene bodies whose AABB is closest to a point. Uses the AABBs from the last update_spatial_index call.
+
+        :param point: query point
+        :param k: number of bodies to return
+        :return: list of the (at most) k closest body ids, sorted by increasing distance
+        """
+        return self.spatial_index.query_knn(point, k)
+
+    def get_body_ids_near_body(self, body_id, distance=0.0):
+        """
+        Get the candidate bodies that may be within a distance of a body: the scene bodies whose AABB is within
+        distance of the body's AABB, and all the bodies that are not part of the scene (e.g. particles or markers).
+        The AABB of body_id is refreshed, the other scene bodies use the AABBs from the last update_spatial_index call.
+
+        :param body_id: pybullet body id
+        :param distance: distance threshold
+        :return: list of body ids, not including body_id
+        """
+        if body_id in self.objects_by_id:
+            self.update_spatial_index([body_id])
+            lower, upper = self.spatial_index.get_aabb(body_id)
+        else:
+            lower, upper = get_aabb(body_id)
+        candidates = set(self.get_body_ids_in_aabb(lower, upper, margin=distance))
+        candidates.update(i for i in range(p.getNumBodies()) if i not in self.spatial_index)
+        candidates.discard(body_id)
+        return sorted(candidates)
+
     def check_collision(self, body_a, body_b=None, link_a=None, fixed_body_ids=None):
         """
         Helper function to check for collision for scene quality
@@ -570,6 +735,11 @@ class InteractiveIndoorScene(StaticIndoorScene):
             pts = p.getContactPoints(bodyA=body_a, linkIndexA=link_a)
         else:
             assert body_b is not None
+            # Penetrating bodies have overlapping AABBs: skip the contact query for bodies that are far apart.
+            if body_a in self.objects_by_id and body_b in self.objects_by_id:
+                self.update_spatial_index([body_a, body_b])
+                if not self.spatial_index.overlaps(body_a, body_b):
+                    return False
             pts = p.getContactPoints(bodyA=body_a, bodyB=body_b)
 
         # contactDistance < 0 means actual penetration
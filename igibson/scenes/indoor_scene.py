@@ -1,17 +1,21 @@
+import hashlib
 import logging
 import os
 import pickle
 import sys
 from abc import ABCMeta
+from collections import OrderedDict
 
 import cv2
 import networkx as nx
 import numpy as np
+import scipy.sparse
 from future.utils import with_metaclass
 from PIL import Image
+from scipy import ndimage
 
 from igibson.scenes.scene_base import Scene
-from igibson.utils.utils import l2_distance
+from igibson.utils.grid_planning_utils import GeodesicDistanceField, GridPlanner, build_grid_adjacency
 
 log = logging.getLogger(__name__)
 
@@ -57,6 +61,13 @@ class IndoorScene(with_metaclass(ABCMeta, Scene)):
         self.waypoint_interval = int(waypoint_resolution / trav_map_resolution)
         self.mesh_body_id = None
         self.floor_heights = [0.0]
+        self.floor_graph_adjacency = []
+        self._floor_graph = []
+        self.floor_planner = []
+        self.trav_map_path = None
+        # LRU cache of geodesic distance fields, keyed by (floor, target cell)
+        self.distance_fields = OrderedDict()
+        self.max_cached_distance_fields = 32
 
     def load_trav_map(self, maps_path):
         """
@@ -68,8 +79,12 @@ class IndoorScene(with_metaclass(ABCMeta, Scene)):
             log.warning("trav map does not exist: {}".format(maps_path))
             return
 
+        self.trav_map_path = maps_path
         self.floor_map = []
-        self.floor_graph = []
+        self.floor_graph_adjacency = []
+        self._floor_graph = []
+        self.floor_planner = []
+        self.distance_fields.clear()
         for floor in range(len(self.floor_heights)):
             if self.trav_map_type == "with_obj":
                 trav_map = np.array(Image.open(os.path.join(maps_path, "floor_trav_{}.png".format(floor))))
@@ -103,34 +118,51 @@ class IndoorScene(with_metaclass(ABCMeta, Scene)):
                 self.build_trav_graph(maps_path, floor, trav_map)
 
             self.floor_map.append(trav_map)
+            self.floor_planner.append(None)
+
+    def get_trav_graph_cache_path(self, maps_path, floor):
+        """
+        Get the path of the cached traversability graph of a floor. The cache lives next to the traversability map
+        and is keyed by map type, resolution and erosion.
+
+        :param maps_path: String with the path to the folder containing the traversability maps
+        :param floor: floor number
+        :return: path to the cache file
+        """
+        map_name = (
+            "floor_trav_{}".format(floor) if self.trav_map_type == "with_obj" else "floor_trav_no_obj_{}".format(floor)
+        )
+        return os.path.join(
+            maps_path, "{}_graph_res{}_erosion{}.npz".format(map_name, self.trav_map_resolution, self.trav_map_erosion)
+        )
 
-    # TODO: refactor into C++ for speedup
     def build_trav_graph(self, maps_path, floor, trav_map):
         """
-        Build traversibility graph and only take the largest connected component
+        Build traversibility graph and only take the largest connected component.
+        The graph is stored as a sparse adjacency matrix over the traversable cells (in row-major order) and cached to
+        disk, the networkx version in floor_graph is only built when requested.
 
         :param maps_path: String with the path to the folder containing the traversability maps
         :param floor: floor number
         :param trav_map: traversability map
         """
-        log.debug("Building traversable graph")
-        g = nx.Graph()
-        for i in range(self.trav_map_size):
-            for j in range(self.trav_map_size):
-                if trav_map[i, j] == 0:
-                    continue
-                g.add_node((i, j))
-                # 8-connected graph
-                neighbors = [(i - 1, j - 1), (i, j - 1), (i + 1, j - 1), (i - 1, j)]
-                for n in neighbors:
-                    if 0 <= n[0] < self.trav_map_size and 0 <= n[1] < self.trav_map_size and trav_map[n[0], n[1]] > 0:
-                        g.add_edge(n, (i, j), weight=l2_distance(n, (i, j)))
-
-        # only take the largest connected component
-        largest_cc = max(nx.connected_components(g), key=len)
-        g = g.subgraph(largest_cc).copy()
-
-        self.floor_graph.append(g)
+        cache_path = self.get_trav_graph_cache_path(maps_path, floor)
+        mask, adjacency = self.load_trav_graph_cache(cache_path, trav_map)
+
+        if mask is None:
+            log.debug("Building traversable graph")
+            # only take the largest connected component (8-connected)
+            labels, num_labels = ndimage.label(trav_map > 0, structure=np.ones((3, 3)))
+            if num_labels > 0:
+                largest_cc = np.argmax(np.bincount(labels.ravel())[1:]) + 1
+                mask = labels == largest_cc
+            else:
+                mask = np.zeros(trav_map.shape, dtype=bool)
+            adjacency = build_grid_adjacency(mask)
+            self.save_trav_graph_cache(cache_path, trav_map, mask, adjacency)
+
+        self.floor_graph_adjacency.append(adjacency)
+        self._floor_graph.append(None)
 
         # update trav_map accordingly
         # This overwrites the traversability map loaded before
@@ -138,8 +170,90 @@ class IndoorScene(with_metaclass(ABCMeta, Scene)):
         # Dangerous! if the traversability graph is not computed from the loaded map but from a file, it could overwrite
         # it silently.
         trav_map[:, :] = 0
-        for node in g.nodes:
-            trav_map[node[0], node[1]] = 255
+        trav_map[mask] = 255
+
+    @staticmethod
+    def load_trav_graph_cache(cache_path, trav_map):
+        """
+        Load a cached traversability graph, if it exists and was built from the same traversability map
+
+        :param cache_path: path to the cache file
+        :param trav_map: traversability map the graph should be built from
+        :return: boolean mask of the largest connected component and its adjacency matrix, or (None, None)
+        """
+        if not os.path.isfile(cache_path):
+            return None, None
+        try:
+            with np.load(cache_path) as cache:
+                if tuple(cache["shape"]) != trav_map.shape or not np.array_equal(
+                    np.unpackbits(cache["trav_map"])[: trav_map.size].reshape(trav_map.shape), trav_map > 0
+                ):
+                    log.debug("Traversable graph cache {} is out of date".format(cache_path))
+                    return None, None
+                mask = np.unpackbits(cache["mask"])[: trav_map.size].reshape(trav_map.shape).astype(bool)
+                num_nodes = np.count_nonzero(mask)
+                adjacency = scipy.sparse.csr_matrix(
+                    (cache["data"], cache["indices"], cache["indptr"]), shape=(num_nodes, num_nodes)
+                )
+        except Exception as e:
+            log.warning("Failed to load traversable graph cache {}: {}".format(cache_path, e))
+            return None, None
+        log.debug("Loaded traversable graph from {}".format(cache_path))
+        return mask, adjacency
+
+    @staticmethod
+    def save_trav_graph_cache(cache_path, trav_map, mask, adjacency):
+        """
+        Save a traversability graph to disk
+
+        :param cache_path: path to the cache file
+        :param trav_map: traversability map the graph was built from
+        :param mask: boolean mask of the largest connected component
+        :param adjacency: adjacency matrix of the traversable cells
+        """
+        try:
+            np.savez_compressed(
+                cache_path,
+                shape=np.array(trav_map.shape),
+                trav_map=np.packbits(trav_map > 0),
+                mask=np.packbits(mask),
+                data=adjacency.data,
+                indices=adjacency.indices,
+                indptr=adjacency.indptr,
+            )
+        except OSError as e:
+            log.warning("Failed to save traversable graph cache {}: {}".format(cache_path, e))
+
+    @property
+    def floor_graph(self):
+        """
+        networkx traversability graphs, one per floor, with (row, col) map cells as nodes. They are built from the
+        sparse adjacency matrices the first time they are requested.
+        """
+        for floor, g in enumerate(self._floor_graph):
+            if g is None:
+                self._floor_graph[floor] = self.trav_graph_to_networkx(
+                    self.floor_map[floor] > 0, self.floor_graph_adjacency[floor]
+                )
+        return self._floor_graph
+
+    @staticmethod
+    def trav_graph_to_networkx(mask, adjacency):
+        """
+        Convert a traversability graph in adjacency matrix form to networkx
+
+        :param mask: boolean mask of the traversable cells
+        :param adjacency: adjacency matrix indexed by the row-major order of the traversable cells
+        :return: networkx graph with (row, col) map cells as nodes
+        """
+        nodes = [tuple(cell) for cell in np.argwhere(mask).tolist()]
+        edges = scipy.sparse.triu(adjacency).tocoo()
+        g = nx.Graph()
+        g.add_nodes_from(nodes)
+        g.add_weighted_edges_from(
+            (nodes[i], nodes[j], float(w)) for i, j, w in zip(edges.row.tolist(), edges.col.tolist(), edges.data)
+        )
+        return g
 
     def get_random_point(self, floor=None):
         """
@@ -185,38 +299,145 @@ class IndoorScene(with_metaclass(ABCMeta, Scene)):
         :param floor: floor number
         :param world_xy: 2D location in world reference frame (metric)
         """
-        map_xy = tuple(self.world_to_map(world_xy))
-        g = self.floor_graph[floor]
-        return g.has_node(map_xy)
+        map_xy = self.world_to_map(world_xy)
+        trav_map = self.floor_map[floor]
+        if np.any(map_xy < 0) or np.any(map_xy >= trav_map.shape):
+            return False
+        return trav_map[map_xy[0], map_xy[1]] == 255
 
-    def get_shortest_path(self, floor, source_world, target_world, entire_path=False):
+    def get_grid_planner(self, floor):
+        """
+        Get the grid planner of a floor, built from its traversability map on first use
+
+        :param floor: floor number
+        :return: GridPlanner for the floor
+        """
+        if self.floor_planner[floor] is None:
+            adjacency = self.floor_graph_adjacency[floor] if floor < len(self.floor_graph_adjacency) else None
+            self.floor_planner[floor] = GridPlanner(self.floor_map[floor], adjacency=adjacency)
+        return self.floor_planner[floor]
+
+    def get_distance_field_cache_path(self, floor, target_cell):
+        """
+        Get the path of the cached geodesic distance field of a floor and target cell. The file name contains a hash
+        of the traversability map, so that fields computed for a different map are never reused.
+
+        :param floor: floor number
+        :param target_cell: (row, col) target cell
+        :return: path to the cache file, or None if the traversability maps were not loaded from disk
+        """
+        if self.trav_map_path is None:
+            return None
+        map_hash = hashlib.md5(np.packbits(self.floor_map[floor] > 0).tobytes()).hexdigest()[:16]
+        return os.path.join(
+            self.trav_map_path,
+            "geodesic_fields",
+            "floor_{}_{}_target_{}_{}.npy".format(floor, map_hash, target_cell[0], target_cell[1]),
+        )
+
+    def get_geodesic_distance_field(self, floor, target_world, use_disk_cache=True):
+        """
+        Get the geodesic distance field to a target point, i.e. the geodesic distance from every traversable cell of
+        the floor to the target. Fields are kept in an in-memory LRU cache and optionally cached on disk next to the
+        traversability maps, so that episodes with the same goal reuse them.
+
+        :param floor: floor number
+        :param target_world: 2D target location in world reference frame (metric)
+        :param use_disk_cache: whether to load and save the field from and to disk
+        :return: GeodesicDistanceField to the closest traversable cell of the target
+        """
+        assert self.build_graph, "cannot get distance field without building the graph"
+        planner = self.get_grid_planner(floor)
+        target_map = tuple(self.world_to_map(target_world).tolist())
+        target_cell = target_map if planner.is_traversable(target_map) else planner.snap(target_map)
+
+        key = (floor, target_cell)
+        if key in self.distance_fields:
+            self.distance_fields.move_to_end(key)
+            return self.distance_fields[key]
+
+        field = None
+        cache_path = self.get_distance_field_cache_path(floor, target_cell) if use_disk_cache else None
+        if cache_path is not None and os.path.isfile(cache_path):
+            distances = np.load(cache_path)
+            if distances.shape == self.floor_map[floor].shape:
+                field = GeodesicDistanceField(distances, target_cell)
+        if field is None:
+            field = planner.distance_field(target_cell)
+            if cache_path is not None:
+                try:
+                    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                    np.save(cache_path, field.distances)
+                except OSError as e:
+                    log.warning("Failed to save geodesic distance field {}: {}".format(cache_path, e))
+
+        self.distance_fields[key] = field
+        while len(self.distance_fields) > self.max_cached_distance_fields:
+            self.distance_fields.popitem(last=False)
+        return field
+
+    def get_geodesic_distance(self, floor, source_world, target_world, use_disk_cache=True):
+        """
+        Get the geodesic distance between two points by looking it up in the distance field of the target.
+        Equivalent to the geodesic distance returned by get_shortest_path.
+
+        :param floor: floor number
+        :param source_world: 2D source location in world reference frame (metric)
+        :param target_world: 2D target location in world reference frame (metric)
+        :param use_disk_cache: whether to load and save the distance field from and to disk
+        :return: geodesic distance (metric)
+        """
+        source_map = tuple(self.world_to_map(source_world).tolist())
+        target_map = tuple(self.world_to_map(target_world).tolist())
+        if source_map == target_map:
+            return 0.0
+
+        planner = self.get_grid_planner(floor)
+        field = self.get_geodesic_distance_field(floor, target_world, use_disk_cache=use_disk_cache)
+        source_cell = source_map if planner.is_traversable(source_map) else planner.snap(source_map)
+        distance = field.get_distance(source_cell)
+        distance += np.linalg.norm(np.subtract(source_map, source_cell))
+        distance += np.linalg.norm(np.subtract(target_map, field.target))
+        return distance * self.trav_map_resolution
+
+    def get_shortest_path(
+        self, floor, source_world, target_world, entire_path=False, use_distance_field=False, use_disk_cache=True
+    ):
         """
         Get the shortest path from one point to another point.
-        If any of the given point is not in the graph, add it to the graph and
-        create an edge between it to its closest node.
+        If any of the given point is not traversable, connect it to its closest traversable cell.
 
         :param floor: floor number
         :param source_world: 2D source location in world reference frame (metric)
         :param target_world: 2D target location in world reference frame (metric)
         :param entire_path: whether to return the entire path
+        :param use_distance_field: whether to follow the (cached) geodesic distance field of the target instead of
+            running A*. Faster when many paths to the same target are queried.
+        :param use_disk_cache: whether to load and save the distance field from and to disk, if use_distance_field
         """
         assert self.build_graph, "cannot get shortest path without building the graph"
-        source_map = tuple(self.world_to_map(source_world))
-        target_map = tuple(self.world_to_map(target_world))
-
-        g = self.floor_graph[floor]
-
-        if not g.has_node(target_map):
-            nodes = np.array(g.nodes)
-            closest_node = tuple(nodes[np.argmin(np.linalg.norm(nodes - target_map, axis=1))])
-            g.add_edge(closest_node, target_map, weight=l2_distance(closest_node, target_map))
-
-        if not g.has_node(source_map):
-            nodes = np.array(g.nodes)
-            closest_node = tuple(nodes[np.argmin(np.linalg.norm(nodes - source_map, axis=1))])
-            g.add_edge(closest_node, source_map, weight=l2_distance(closest_node, source_map))
-
-        path_map = np.array(nx.astar_path(g, source_map, target_map, heuristic=l2_distance))
+        source_map = tuple(self.world_to_map(source_world).tolist())
+        target_map = tuple(self.world_to_map(target_world).tolist())
+
+        if source_map == target_map:
+            path_map = [source_map]
+        else:
+            planner = self.get_grid_planner(floor)
+            source_cell = source_map if planner.is_traversable(source_map) else planner.snap(source_map)
+            if use_distance_field:
+                field = self.get_geodesic_distance_field(floor, target_world, use_disk_cache=use_disk_cache)
+                target_cell = field.target
+                path_map = field.get_path(source_cell)
+            else:
+                target_cell = target_map if planner.is_traversable(target_map) else planner.snap(target_map)
+                path_map = planner.plan(source_cell, target_cell)
+            if path_map is None:
+                raise ValueError("No path between {} and {} on floor {}".format(source_world, target_world, floor))
+            if source_cell != source_map:
+                path_map.insert(0, source_map)
+            if target_cell != target_map:
+                path_map.append(target_map)
+        path_map = np.array(path_map)
 
         path_world = self.map_to_world(path_map)
         geodesic_distance = np.sum(np.linalg.norm(path_world[1:] - path_world[:-1], axis=1))
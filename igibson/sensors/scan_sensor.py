@@ -38,6 +38,17 @@ class ScanSensor(BaseSensor):
         )
         self.base_position, self.base_orientation = env.robots[0].base_link.get_position_orientation()
 
+        # Unit vectors of the rays and ray start / end points in the laser frame, computed once
+        laser_angular_half_range = self.laser_angular_range / 2.0
+        angle = np.arange(
+            -np.radians(laser_angular_half_range),
+            np.radians(laser_angular_half_range),
+            np.radians(self.laser_angular_range) / self.n_horizontal_rays,
+        )
+        self.unit_vector_laser = np.stack([np.cos(angle), np.sin(angle), np.zeros_like(angle)], axis=1)
+        self.ray_start_laser = self.unit_vector_laser * self.min_laser_dist
+        self.ray_end_laser = self.unit_vector_laser * self.laser_linear_range
+
         if "occupancy_grid" in self.modalities:
             self.grid_resolution = self.config.get("grid_resolution", 128)
             self.occupancy_range = self.config.get("occupancy_range", 5)  # m
@@ -46,6 +57,28 @@ class ScanSensor(BaseSensor):
                 self.robot_footprint_radius / self.occupancy_range * self.grid_resolution
             )
 
+            # The laser is rigidly attached to the robot base: precompute the laser to base transform
+            laser_rotation = quat2mat(
+                [
+                    self.laser_orientation[3],
+                    self.laser_orientation[0],
+                    self.laser_orientation[1],
+                    self.laser_orientation[2],
+                ]
+            )
+            base_rotation = quat2mat(
+                [self.base_orientation[3], self.base_orientation[0], self.base_orientation[1], self.base_orientation[2]]
+            )
+            self.laser_to_base_rotation = base_rotation.T.dot(laser_rotation)
+            self.laser_to_base_translation = base_rotation.T.dot(
+                np.array(self.laser_position) - np.array(self.base_position)
+            )
+
+            # Pixel offsets of the disk drawn around every hit, identical to a filled cv2.circle of radius 2
+            stencil = np.zeros((5, 5), dtype=np.uint8)
+            cv2.circle(img=stencil, center=(2, 2), radius=2, color=1, thickness=-1)
+            self.obstacle_stencil = np.stack(np.nonzero(stencil), axis=1) - 2
+
     def get_local_occupancy_grid(self, scan):
         """
         Get local occupancy grid based on current 1D scan
@@ -53,32 +86,10 @@ class ScanSensor(BaseSensor):
         :param: 1D LiDAR scan
         :return: local occupancy grid
         """
-        laser_linear_range = self.laser_linear_range
-        laser_angular_range = self.laser_angular_range
-        min_laser_dist = self.min_laser_dist
-
-        laser_angular_half_range = laser_angular_range / 2.0
-
-        angle = np.arange(
-            -np.radians(laser_angular_half_range),
-            np.radians(laser_angular_half_range),
-            np.radians(laser_angular_range) / self.n_horizontal_rays,
-        )
-        unit_vector_laser = np.array([[np.cos(ang), np.sin(ang), 0.0] for ang in angle])
-
-        scan_laser = unit_vector_laser * (scan * (laser_linear_range - min_laser_dist) + min_laser_dist)
-
-        laser_translation = self.laser_position
-        laser_rotation = quat2mat(
-            [self.laser_orientation[3], self.laser_orientation[0], self.laser_orientation[1], self.laser_orientation[2]]
-        )
-        scan_world = laser_rotation.dot(scan_laser.T).T + laser_translation
-
-        base_translation = self.base_position
-        base_rotation = quat2mat(
-            [self.base_orientation[3], self.base_orientation[0], self.base_orientation[1], self.base_orientation[2]]
+        scan_laser = self.unit_vector_laser * (
+            scan * (self.laser_linear_range - self.min_laser_dist) + self.min_laser_dist
         )
-        scan_local = base_rotation.T.dot((scan_world - base_translation).T).T
+        scan_local = scan_laser.dot(self.laser_to_base_rotation.T) + self.laser_to_base_translation
         scan_local = scan_local[:, :2]
         scan_local = np.concatenate([np.array([[0, 0]]), scan_local, np.array([[0, 0]])], axis=0)
 
@@ -90,14 +101,15 @@ class ScanSensor(BaseSensor):
         occupancy_grid.fill(int(OccupancyGridState.UNKNOWN * 2.0))
         scan_local_in_map = scan_local / self.occupancy_range * self.grid_resolution + (self.grid_resolution / 2)
         scan_local_in_map = scan_local_in_map.reshape((1, -1, 1, 2)).astype(np.int32)
-        for i in range(scan_local_in_map.shape[1]):
-            cv2.circle(
-                img=occupancy_grid,
-                center=(scan_local_in_map[0, i, 0, 0], scan_local_in_map[0, i, 0, 1]),
-                radius=2,
-                color=int(OccupancyGridState.OBSTACLES * 2.0),
-                thickness=-1,
-            )
+
+        # Stamp the obstacle disks of all the hits at once
+        obstacle_pixels = scan_local_in_map.reshape((-1, 1, 2))[:, :, ::-1] + self.obstacle_stencil
+        obstacle_pixels = obstacle_pixels.reshape((-1, 2))
+        in_grid = np.all((obstacle_pixels >= 0) & (obstacle_pixels < self.grid_resolution), axis=1)
+        occupancy_grid[obstacle_pixels[in_grid, 0], obstacle_pixels[in_grid, 1]] = int(
+            OccupancyGridState.OBSTACLES * 2.0
+        )
+
         cv2.fillPoly(
             img=occupancy_grid, pts=scan_local_in_map, color=int(OccupancyGridState.FREESPACE * 2.0), lineType=1
         )
@@ -111,36 +123,41 @@ class ScanSensor(BaseSensor):
 
         return occupancy_grid[:, :, None].astype(np.float32) / 2.0
 
-    def get_obs(self, env):
+    def get_rays(self, env):
         """
-        Get current LiDAR sensor reading and occupancy grid (optional)
+        Get the LiDAR rays in the world frame, from the current laser pose
 
-        :return: LiDAR sensor reading and local occupancy grid, normalized to [0.0, 1.0]
+        :param env: environment instance
+        :return: start and end points of the rays
         """
-        laser_angular_half_range = self.laser_angular_range / 2.0
         if self.laser_link_name not in env.robots[0].links:
             raise Exception(
                 "Trying to simulate LiDAR sensor, but laser_link_name cannot be found in the robot URDF file. Please add a link named laser_link_name at the intended laser pose. Feel free to check out assets/models/turtlebot/turtlebot.urdf and examples/configs/turtlebot_p2p_nav.yaml for examples."
             )
         laser_position, laser_orientation = env.robots[0].links[self.laser_link_name].get_position_orientation()
-        angle = np.arange(
-            -laser_angular_half_range / 180 * np.pi,
-            laser_angular_half_range / 180 * np.pi,
-            self.laser_angular_range / 180.0 * np.pi / self.n_horizontal_rays,
-        )
-        unit_vector_local = np.array([[np.cos(ang), np.sin(ang), 0.0] for ang in angle])
         transform_matrix = quat2mat(
             [laser_orientation[3], laser_orientation[0], laser_orientation[1], laser_orientation[2]]
         )  # [x, y, z, w]
-        unit_vector_world = transform_matrix.dot(unit_vector_local.T).T
+        start_pose = self.ray_start_laser.dot(transform_matrix.T) + laser_position
+        end_pose = self.ray_end_laser.dot(transform_matrix.T) + laser_position
+        return start_pose, end_pose
 
-        start_pose = np.tile(laser_position, (self.n_horizontal_rays, 1))
-        start_pose += unit_vector_world * self.min_laser_dist
-        end_pose = laser_position + unit_vector_world * self.laser_linear_range
-        results = p.rayTestBatch(start_pose, end_pose, numThreads=6)  # numThreads = 6
+    def get_obs_keys(self):
+        """
+        :return: modalities of the observation returned by get_obs, in order
+        """
+        keys = ["scan" if not self.rear else "scan_rear"]
+        if "occupancy_grid" in self.modalities:
+            keys.append("occupancy_grid")
+        return keys
 
-        # hit fraction = [0.0, 1.0] of self.laser_linear_range
-        hit_fraction = np.array([item[2] for item in results])
+    def get_obs_from_hit_fraction(self, hit_fraction):
+        """
+        Get LiDAR sensor reading and occupancy grid (optional) from the ray test results
+
+        :param hit_fraction: hit fraction of every ray, in [0.0, 1.0] of the laser range
+        :return: LiDAR sensor reading and local occupancy grid, normalized to [0.0, 1.0]
+        """
         hit_fraction = self.noise_model.add_noise(hit_fraction)
         scan = np.expand_dims(hit_fraction, 1)
 
@@ -149,3 +166,33 @@ class ScanSensor(BaseSensor):
         if "occupancy_grid" in self.modalities:
             state["occupancy_grid"] = self.get_local_occupancy_grid(scan)
         return state
+
+    @staticmethod
+    def get_obs_batch(env, sensors):
+        """
+        Get the readings of several LiDAR sensors (e.g. front and rear) with a single batch of ray tests
+
+        :param env: environment instance
+        :param sensors: list of ScanSensor
+        :return: list with the observation of every sensor, see get_obs
+        """
+        rays = [sensor.get_rays(env) for sensor in sensors]
+        start_pose = np.concatenate([start for start, _ in rays])
+        end_pose = np.concatenate([end for _, end in rays])
+        results = p.rayTestBatch(start_pose, end_pose, numThreads=6)  # numThreads = 6
+
+        # hit fraction = [0.0, 1.0] of self.laser_linear_range
+        hit_fraction = np.array([item[2] for item in results])
+        splits = np.cumsum([len(start) for start, _ in rays])[:-1]
+        return [
+            sensor.get_obs_from_hit_fraction(sensor_hit_fraction)
+            for sensor, sensor_hit_fraction in zip(sensors, np.split(hit_fraction, splits))
+        ]
+
+    def get_obs(self, env):
+        """
+        Get current LiDAR sensor reading and occupancy grid (optional)
+
+        :return: LiDAR sensor reading and local occupancy grid, normalized to [0.0, 1.0]
+        """
+        return self.get_obs_batch(env, [self])[0]
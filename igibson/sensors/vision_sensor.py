@@ -15,6 +15,34 @@ class VisionSensor(BaseSensor):
     Vision sensor (including rgb, rgb_filled, depth, 3d, seg, normal, optical flow, scene flow)
     """
 
+    # Modalities in the order of the observation
+    OBS_MODALITIES = [
+        "rgb",
+        "rgb_filled",
+        "depth",
+        "pc",
+        "optical_flow",
+        "scene_flow",
+        "normal",
+        "seg",
+        "ins_seg",
+        "highlight",
+    ]
+
+    # Framebuffer channels read for every modality by the fused readback: (mode, first channel, number of channels).
+    # The alpha channel of rgb cannot be read alone, highlight reads all the channels.
+    READBACK_CHANNELS = {
+        "rgb": ("rgb", 0, 3),
+        "depth": ("3d", 2, 1),
+        "pc": ("3d", 0, 3),
+        "optical_flow": ("optical_flow", 0, 2),
+        "scene_flow": ("scene_flow", 0, 3),
+        "normal": ("normal", 0, 3),
+        "seg": ("seg", 0, 1),
+        "ins_seg": ("ins_seg", 0, 1),
+        "highlight": ("rgb", 0, 4),
+    }
+
     def __init__(self, env, modalities):
         super(VisionSensor, self).__init__(env)
         self.modalities = modalities
@@ -30,6 +58,13 @@ class VisionSensor(BaseSensor):
         self.noise_model.set_noise_rate(self.depth_noise_rate)
         self.noise_model.set_noise_value(0.0)
 
+        # With fused readback, the renderer writes every modality straight into arrays that are allocated once and
+        # reused at every step: the returned arrays are overwritten by the next get_obs, copy them to keep them.
+        self.fused_readback = self.config.get("fused_vision_readback", False) and "rgb_filled" not in modalities
+        self.obs_buffers = {}
+        self.readback_outputs = {}
+        self.readback_scratch = {}
+
         if "rgb_filled" in modalities:
             try:
                 import torch
@@ -145,36 +180,118 @@ class VisionSensor(BaseSensor):
         seg = np.round(raw_vision_obs["ins_seg"][:, :, 0:1] * MAX_INSTANCE_COUNT).astype(np.int32)
         return seg
 
-    def get_obs(self, env):
+    def get_readback_output(self, modality):
+        """
+        Get the readback target of a modality for the fused readback, allocating its arrays on first use.
+
+        :param modality: modality
+        :return: (mode, first_channel, out) entry of MeshRenderer.readbuffer_into
+        """
+        if modality not in self.readback_outputs:
+            mode, first_channel, num_channels = self.READBACK_CHANNELS[modality]
+            shape = (self.image_height, self.image_width)
+            if modality in ["seg", "ins_seg"]:
+                self.obs_buffers[modality] = np.zeros(shape + (1,), dtype=np.int32)
+                out = np.zeros(shape + (num_channels,), dtype=np.float32)
+            elif modality == "highlight":
+                self.obs_buffers[modality] = np.zeros(shape + (1,), dtype=np.float32)
+                self.readback_scratch[modality] = np.zeros(shape + (1,), dtype=bool)
+                out = np.zeros(shape + (num_channels,), dtype=np.float32)
+            else:
+                self.obs_buffers[modality] = np.zeros(shape + (num_channels,), dtype=np.float32)
+                out = self.obs_buffers[modality]
+                if modality == "depth":
+                    self.readback_scratch[modality] = np.zeros(shape + (1,), dtype=bool)
+            self.readback_outputs[modality] = (mode, first_channel, out)
+        return self.readback_outputs[modality]
+
+    def get_obs_fused(self, env, modalities):
+        """
+        Get vision sensor reading with the fused readback: the modalities are read from the framebuffer into the
+        preallocated observation arrays and post-processed in place, so no array is allocated after the first call.
+
+        :param env: environment instance
+        :param modalities: modalities to compute
+        :return: vision sensor reading
+        """
+        if not modalities:
+            return OrderedDict()
+        outputs = [self.get_readback_output(modality) for modality in modalities]
+        env.simulator.renderer.render_single_robot_camera_into(env.simulator.scene.robots[0], outputs)
+
+        if "depth" in modalities:
+            depth, invalid = self.obs_buffers["depth"], self.readback_scratch["depth"]
+            np.negative(depth, out=depth)
+            # 0.0 is a special value for invalid entries
+            np.less(depth, self.depth_low, out=invalid)
+            np.copyto(depth, 0.0, where=invalid)
+            np.greater(depth, self.depth_high, out=invalid)
+            np.copyto(depth, 0.0, where=invalid)
+            # re-scale depth to [0.0, 1.0]
+            depth /= self.depth_high
+            self.noise_model.add_noise(depth)
+        for modality, max_count in [("seg", MAX_CLASS_COUNT), ("ins_seg", MAX_INSTANCE_COUNT)]:
+            if modality in modalities:
+                seg = self.readback_outputs[modality][2]
+                np.multiply(seg, max_count, out=seg)
+                np.rint(seg, out=seg)
+                np.copyto(self.obs_buffers[modality], seg, casting="unsafe")
+        if "highlight" in modalities:
+            highlight = self.readback_scratch["highlight"]
+            np.greater(self.readback_outputs["highlight"][2][:, :, 3:4], 0, out=highlight)
+            np.copyto(self.obs_buffers["highlight"], highlight)
+
+        return OrderedDict((modality, self.obs_buffers[modality]) for modality in modalities)
+
+    def get_obs_keys(self):
+        """
+        :return: modalities of the observation returned by get_obs, in order
+        """
+        return [modality for modality in self.OBS_MODALITIES if modality in self.modalities]
+
+    def get_obs(self, env, modalities=None):
         """
         Get vision sensor reading
 
+        :param env: environment instance
+        :param modalities: subset of the sensor modalities to compute (only the raw modalities they need are rendered),
+            all the sensor modalities if None
         :return: vision sensor reading
         """
-        raw_vision_obs = env.simulator.renderer.render_robot_cameras(modes=self.raw_modalities)
+        if modalities is None:
+            modalities = self.modalities
+            raw_modalities = self.raw_modalities
+        else:
+            modalities = [modality for modality in modalities if modality in self.modalities]
+            raw_modalities = self.get_raw_modalities(modalities)
+
+        if self.fused_readback:
+            return self.get_obs_fused(env, [modality for modality in self.OBS_MODALITIES if modality in modalities])
+
+        raw_vision_obs = env.simulator.renderer.render_robot_cameras(modes=raw_modalities) if raw_modalities else []
 
-        raw_vision_obs = {mode: value for mode, value in zip(self.raw_modalities, raw_vision_obs)}
+        raw_vision_obs = {mode: value for mode, value in zip(raw_modalities, raw_vision_obs)}
 
         vision_obs = OrderedDict()
-        if "rgb" in self.modalities:
+        if "rgb" in modalities:
             vision_obs["rgb"] = self.get_rgb(raw_vision_obs)
-        if "rgb_filled" in self.modalities:
+        if "rgb_filled" in modalities:
             vision_obs["rgb_filled"] = self.get_rgb_filled(raw_vision_obs)
-        if "depth" in self.modalities:
+        if "depth" in modalities:
             vision_obs["depth"] = self.get_depth(raw_vision_obs)
-        if "pc" in self.modalities:
+        if "pc" in modalities:
             vision_obs["pc"] = self.get_pc(raw_vision_obs)
-        if "optical_flow" in self.modalities:
+        if "optical_flow" in modalities:
             vision_obs["optical_flow"] = self.get_optical_flow(raw_vision_obs)
-        if "scene_flow" in self.modalities:
+        if "scene_flow" in modalities:
             vision_obs["scene_flow"] = self.get_scene_flow(raw_vision_obs)
-        if "normal" in self.modalities:
+        if "normal" in modalities:
             vision_obs["normal"] = self.get_normal(raw_vision_obs)
-        if "seg" in self.modalities:
+        if "seg" in modalities:
             vision_obs["seg"] = self.get_seg(raw_vision_obs)
-        if "ins_seg" in self.modalities:
+        if "ins_seg" in modalities:
             vision_obs["ins_seg"] = self.get_ins_seg(raw_vision_obs)
-        if "highlight" in self.modalities:
+        if "highlight" in modalities:
             vision_obs["highlight"] = self.get_highlight(raw_vision_obs)
 
         return vision_obs
@@ -7,6 +7,8 @@ import pybullet as p
 
 import igibson
 from igibson.object_states.factory import get_states_by_dependency_order
+from igibson.object_states.thermal_system import ThermalSystem
+from igibson.object_states.update_scheduler import ObjectStateUpdateScheduler
 from igibson.objects.object_base import BaseObject
 from igibson.objects.particles import Particle, ParticleSystem
 from igibson.objects.visual_marker import VisualMarker
@@ -18,7 +20,9 @@ from igibson.render.viewer import Viewer, ViewerSimple
 from igibson.scenes.scene_base import Scene
 from igibson.utils.assets_utils import get_ig_avg_category_specs
 from igibson.utils.constants import PYBULLET_BASE_LINK_INDEX, PyBulletSleepState, SimulatorMode
-from igibson.utils.mesh_util import quat2rotmat, xyz2mat, xyzw2wxyz
+from igibson.utils.contact_manager import ContactManager
+from igibson.utils.mesh_util import quat2rotmat, quat2rotmat_batch, xyz2mat, xyz2mat_batch, xyzw2wxyz
+from igibson.utils.snapshot_manager import SnapshotManager
 
 log = logging.getLogger(__name__)
 
@@ -56,6 +60,8 @@ class Simulator:
         device_idx=0,
         rendering_settings=MeshRendererSettings(),
         use_pb_gui=False,
+        use_incremental_state_updates=False,
+        use_instanced_dirt_particles=False,
     ):
         """
         :param gravity: gravity on z direction.
@@ -71,6 +77,10 @@ class Simulator:
         :param device_idx: GPU device index to run rendering on
         :param rendering_settings: settings to use for mesh renderer
         :param use_pb_gui: concurrently display the interactive pybullet gui (for debugging)
+        :param use_incremental_state_updates: only update the object states that may have changed since the last
+            step, see ObjectStateUpdateScheduler
+        :param use_instanced_dirt_particles: use the physics-free instanced mode for the Dust and Stain particles, see
+            AttachedParticleSystem
         """
         # physics simulator
         self.gravity = gravity
@@ -89,6 +99,8 @@ class Simulator:
         self.device_idx = device_idx
         self.rendering_settings = rendering_settings
         self.use_pb_gui = use_pb_gui
+        self.use_incremental_state_updates = use_incremental_state_updates
+        self.use_instanced_dirt_particles = use_instanced_dirt_particles
 
         plt = platform.system()
         if plt == "Darwin" and self.mode == SimulatorMode.GUI_INTERACTIVE and use_pb_gui:
@@ -160,6 +172,10 @@ class Simulator:
         self.body_links_awake = 0
         # First sync always sync all objects (regardless of their sleeping states)
         self.first_sync = True
+        self.state_update_scheduler = ObjectStateUpdateScheduler(self) if self.use_incremental_state_updates else None
+        self.thermal_system = ThermalSystem(self)
+        self.contact_manager = ContactManager()
+        self.snapshot_manager = SnapshotManager(self)
 
     def initialize_renderer(self):
         """
@@ -434,20 +450,51 @@ class Simulator:
         """
         Complete any non-physics steps such as state updates.
         """
+        # The physics has been stepped: contacts are fetched again on the first query of this step.
+        self.contact_manager.invalidate()
+
         # Step all of the particle systems.
         for particle_system in self.particle_systems:
             particle_system.update(self)
 
         # Step the object states in global topological order.
-        for state_type in self.object_state_types:
-            for obj in self.scene.get_objects_with_state(state_type):
-                obj.states[state_type].update()
+        if self.state_update_scheduler is not None:
+            self.state_update_scheduler.step()
+        else:
+            for state_type in self.object_state_types:
+                for obj in self.scene.get_objects_with_state(state_type):
+                    obj.states[state_type].update()
 
         # Step the object procedural materials based on the updated object states.
         for obj in self.scene.get_objects():
             if hasattr(obj, "procedural_material") and obj.procedural_material is not None:
                 obj.procedural_material.update()
 
+    def save_snapshot(self, pinned=False):
+        """
+        Take an in-memory snapshot of the simulation, see SnapshotManager.
+
+        :param pinned: whether the snapshot is exempt from the snapshot_manager's LRU eviction
+        :return: id of the snapshot
+        """
+        return self.snapshot_manager.save(pinned=pinned)
+
+    def restore_snapshot(self, snapshot_id):
+        """
+        Restore the simulation to an in-memory snapshot.
+
+        :param snapshot_id: id returned by save_snapshot
+        """
+        self.snapshot_manager.restore(snapshot_id)
+
+    def remove_snapshot(self, snapshot_id):
+        """
+        Free an in-memory snapshot.
+
+        :param snapshot_id: id returned by save_snapshot
+        """
+        self.snapshot_manager.remove(snapshot_id)
+
     def step(self):
         """
         Step the simulation at self.render_timestep and update positions in renderer.
@@ -468,7 +515,9 @@ class Simulator:
         self.body_links_awake = 0
         for instance in self.renderer.instances:
             if instance.dynamic:
-                self.body_links_awake += self.update_position(instance, force_sync=force_sync or self.first_sync)
+                self.body_links_awake += self.update_position_batched(
+                    instance, force_sync=force_sync or self.first_sync
+                )
         if self.viewer is not None:
             self.viewer.update()
         if self.first_sync:
@@ -552,3 +601,59 @@ class Simulator:
             instance.set_rotation_for_part(quat2rotmat(xyzw2wxyz(orn)), j)
             body_links_awake += 1
         return body_links_awake
+
+    @staticmethod
+    def update_position_batched(instance, force_sync=False):
+        """
+        Update the position of an object or a robot in renderer. Equivalent to update_position, but queries the
+        activation state once per pybullet link (instead of once per visual object), fetches all awake link poses
+        with a single getLinkStates call and writes the 4x4 matrices directly into the instance's pose buffers.
+
+        :param instance: an instance in the renderer
+        :param force_sync: whether to force sync the object
+        :return: number of visual objects whose pose was updated
+        """
+        if not isinstance(instance.poses_trans, np.ndarray) or not isinstance(instance.poses_rot, np.ndarray):
+            # The pose buffers have been replaced externally (e.g. by a remote renderer), use the per-link path.
+            return Simulator.update_position(instance, force_sync=force_sync)
+
+        body_id = instance.pybullet_uuid
+        unique_link_ids = instance.unique_link_ids
+        if len(unique_link_ids) == 0:
+            return 0
+
+        if force_sync:
+            awake = np.ones(len(unique_link_ids), dtype=bool)
+        else:
+            awake = np.zeros(len(unique_link_ids), dtype=bool)
+            for i, link_id in enumerate(unique_link_ids):
+                dynamics_info = p.getDynamicsInfo(body_id, int(link_id))
+                activation_state = dynamics_info[12] if len(dynamics_info) == 13 else PyBulletSleepState.AWAKE
+                awake[i] = activation_state in [PyBulletSleepState.AWAKE, PyBulletSleepState.ISLAND_AWAKE]
+            if not np.any(awake):
+                return 0
+
+        awake_link_ids = unique_link_ids[awake]
+        pos = np.empty((len(awake_link_ids), 3))
+        orn = np.empty((len(awake_link_ids), 4))
+
+        # unique_link_ids is sorted, so the base link (-1) can only come first.
+        first_link = 0
+        if awake_link_ids[0] == PYBULLET_BASE_LINK_INDEX:
+            pos[0], orn[0] = p.getBasePositionAndOrientation(body_id)
+            first_link = 1
+        if first_link < len(awake_link_ids):
+            link_states = p.getLinkStates(body_id, awake_link_ids[first_link:].tolist())
+            pos[first_link:] = [link_state[0] for link_state in link_states]
+            orn[first_link:] = [link_state[1] for link_state in link_states]
+
+        # Map every awake visual object to the row of its link in pos / orn.
+        parts = awake[instance.link_id_index]
+        rows = (np.cumsum(awake) - 1)[instance.link_id_index[parts]]
+
+        instance.last_trans[parts] = instance.poses_trans[parts]
+        instance.last_rot[parts] = instance.poses_rot[parts]
+        instance.poses_trans[parts] = xyz2mat_batch(pos)[rows]
+        instance.poses_rot[parts] = quat2rotmat_batch(orn)[rows]
+
+        return int(np.count_nonzero(parts))
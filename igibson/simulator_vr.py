@@ -41,6 +41,8 @@ class SimulatorVR(Simulator):
         rendering_settings=MeshRendererSettings(),
         vr_settings=VrSettings(),
         use_pb_gui=False,
+        use_incremental_state_updates=False,
+        use_instanced_dirt_particles=False,
     ):
         """
         :param gravity: gravity on z direction.
@@ -57,6 +59,10 @@ class SimulatorVR(Simulator):
         :param rendering_settings: settings to use for mesh renderer
         :param vr_settings: settings to use for VR in simulator and MeshRendererVR
         :param use_pb_gui: concurrently display the interactive pybullet gui (for debugging)
+        :param use_incremental_state_updates: only update the object states that may have changed since the last
+            step, see ObjectStateUpdateScheduler
+        :param use_instanced_dirt_particles: use the physics-free instanced mode for the Dust and Stain particles, see
+            AttachedParticleSystem
         """
         if platform.system() == "Windows":
             # By default, windows does not provide ms level timing accuracy
@@ -101,6 +107,8 @@ class SimulatorVR(Simulator):
             device_idx,
             rendering_settings,
             use_pb_gui,
+            use_incremental_state_updates,
+            use_instanced_dirt_particles,
         )
 
         # Get expected number of vsync frames per iGibson frame Note: currently assumes a 90Hz VR system
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import zlib
+
+log = logging.getLogger(__name__)
+
+INSTANCE_CACHE_VERSION = 2
+
+# Env config keys that select the objects loaded with the scene, hence the objects the sampling can choose from
+SCENE_LOADING_CONFIG_KEYS = [
+    "load_object_categories",
+    "not_load_object_categories",
+    "load_room_types",
+    "load_room_instances",
+]
+
+
+def get_activity_hash(conds):
+    """
+    :param conds: bddl Conditions of the activity
+    :return: hash of the activity definition (objects, initial and goal conditions)
+    """
+    definition = json.dumps(
+        [conds.parsed_objects, conds.parsed_initial_conditions, conds.parsed_goal_conditions], sort_keys=True
+    )
+    return hashlib.sha1(definition.encode("utf-8")).hexdigest()
+
+
+def get_scene_loading_config(config):
+    """
+    :param config: env config
+    :return: dict of the scene loading options of the config (see SCENE_LOADING_CONFIG_KEYS), with lists sorted and
+        single strings turned into lists like InteractiveIndoorScene does
+    """
+    scene_loading_config = {}
+    for key in SCENE_LOADING_CONFIG_KEYS:
+        value = config.get(key, None)
+        if isinstance(value, str):
+            value = [value]
+        scene_loading_config[key] = sorted(value) if value is not None else None
+    return scene_loading_config
+
+
+def get_instance_key(activity_hash, scene_id, robot_name, seed, load_clutter, scene_loading_config=None):
+    """
+    :param activity_hash: hash of the activity definition, see get_activity_hash
+    :param scene_id: scene id
+    :param robot_name: name of the robot class
+    :param seed: NumPy random seed of the sampling
+    :param load_clutter: whether clutter objects are added to the scene after the sampling
+    :param scene_loading_config: scene loading options of the env config, see get_scene_loading_config. Instances
+        sampled in partially loaded scenes (e.g. without some object categories or room types) differ.
+    :return: key of the sampled task instance
+    """
+    if scene_loading_config is None:
+        scene_loading_config = get_scene_loading_config({})
+    key = json.dumps(
+        [
+            INSTANCE_CACHE_VERSION,
+            activity_hash,
+            scene_id,
+            robot_name,
+            int(seed),
+            bool(load_clutter),
+            scene_loading_config,
+        ],
+        sort_keys=True,
+    )
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+class BehaviorInstanceCache(object):
+    """
+    On-disk cache of sampled BEHAVIOR task instances, one zlib-compressed pickle file per instance key (see
+    get_instance_key). An entry is a dict written by BehaviorTask.dump_sampled_instance: the object scope, the
+    serialized simulator snapshot (poses and non-kinematic states), the clutter objects and the chosen ground goal
+    option. Entries are written atomically, so that concurrent processes can share the cache directory.
+    """
+
+    def __init__(self, cache_dir):
+        """
+        :param cache_dir: directory of the cache files
+        """
+        self.cache_dir = os.path.expanduser(cache_dir)
+
+    def get_path(self, key):
+        """
+        :param key: instance key
+        :return: path of the cache file of the instance
+        """
+        return os.path.join(self.cache_dir, "{}.pkl.z".format(key))
+
+    def __contains__(self, key):
+        return os.path.isfile(self.get_path(key))
+
+    def load(self, key):
+        """
+        :param key: instance key
+        :return: cached entry of the instance, or None if it is not cached (or cannot be read)
+        """
+        path = self.get_path(key)
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.loads(zlib.decompress(f.read()))
+            if entry["version"] != INSTANCE_CACHE_VERSION:
+                log.debug("Sampled instance cache {} is out of date".format(path))
+                return None
+            return entry
+        except Exception as e:
+            log.warning("Failed to load sampled instance cache {}: {}".format(path, e))
+            return None
+
+    def save(self, key, entry):
+        """
+        :param key: instance key
+        :param entry: dict to cache, see BehaviorTask.dump_sampled_instance
+        """
+        path = self.get_path(key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            data = zlib.compress(pickle.dumps(dict(entry, version=INSTANCE_CACHE_VERSION), pickle.HIGHEST_PROTOCOL))
+            # Write to a temporary file first so that concurrent workers never read a partial entry
+            tmp_path = "{}.{}.tmp".format(path, os.getpid())
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            log.warning("Failed to save sampled instance cache {}: {}".format(path, e))
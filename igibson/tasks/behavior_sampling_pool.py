@@ -0,0 +1,211 @@
+import logging
+import multiprocessing
+import time
+from collections import OrderedDict
+
+import numpy as np
+from bddl.activity import get_goal_conditions, get_ground_goal_state_options
+
+from igibson.object_states.on_floor import RoomFloor
+from igibson.tasks.behavior_task import BehaviorTask
+
+log = logging.getLogger(__name__)
+
+# Environment of the current worker process and error raised while creating it, see init_sampling_worker
+_worker_env = None
+_worker_error = None
+
+
+def get_condition_key(condition, positive):
+    """
+    :param condition: grounded atomic formula
+    :param positive: whether the condition is sampled as true or false
+    :return: key identifying the condition across processes
+    """
+    return condition.STATE_NAME, tuple(condition.body), positive
+
+
+class BehaviorSamplingWorkerTask(BehaviorTask):
+    """
+    BehaviorTask of a sampling worker: it imports the same sampleable objects as the main process and groups the
+    conditions, but does not sample them. The candidates of filter_object_scope are then evaluated on request, every
+    one of them from the same initial state.
+    """
+
+    def __init__(self, env, rng_state):
+        """
+        :param env: iGibsonEnv of the worker
+        :param rng_state: NumPy random state of the main process before BehaviorTask.check_scene
+        """
+        self.rng_state = rng_state
+        super(BehaviorSamplingWorkerTask, self).__init__(env)
+
+    def initialize(self, env):
+        # Replay the random choices of the main process, so that the same object models are imported
+        np.random.set_state(self.rng_state)
+        accept_scene, feedback = self.check_scene(env)
+        if not accept_scene:
+            return accept_scene, feedback
+        env.robots[0].set_position_orientation([300, 300, 300], [0, 0, 0, 1])
+        error_msg = self.group_initial_conditions()
+        if error_msg:
+            return False, error_msg
+
+        self.conditions_by_key = {
+            get_condition_key(condition, positive): (condition, positive)
+            for condition, positive in self.non_sampleable_obj_conditions
+        }
+        self.goal_conditions = get_goal_conditions(self.conds, self.backend, self.object_scope)
+        self.ground_goal_state_options = get_ground_goal_state_options(
+            self.conds, self.backend, self.object_scope, self.goal_conditions
+        )
+        for goal_condition_set in self.ground_goal_state_options:
+            for condition in goal_condition_set:
+                condition, positive = self.process_single_condition(condition)
+                if condition is not None:
+                    self.conditions_by_key.setdefault(get_condition_key(condition, positive), (condition, positive))
+
+        self.objects_by_name = dict(self.scene.objects_by_name)
+        for room_type in self.non_sampleable_object_scope:
+            for obj_inst in self.non_sampleable_object_scope[room_type]:
+                for objs in self.non_sampleable_object_scope[room_type][obj_inst].values():
+                    for obj in objs:
+                        if isinstance(obj, RoomFloor):
+                            self.objects_by_name[obj.name] = obj
+        return True, None
+
+    def evaluate_job(self, env, object_names, scene_obj, obj_name, condition_keys):
+        """
+        Sample the conditions of a candidate object, from the initial state of the worker.
+
+        :param env: iGibsonEnv of the worker
+        :param object_names: dict mapping the object instances already assigned in the main process to the names of
+            their simulator objects
+        :param scene_obj: object instance
+        :param obj_name: name of the candidate simulator object
+        :param condition_keys: keys of the conditions to sample, see get_condition_key
+        :return: list of (predicate, sampling time, success) of the sampled conditions
+        """
+        env.simulator.restore_snapshot(self.initial_state)
+        for obj_inst, name in object_names.items():
+            self.object_scope[obj_inst] = self.objects_by_name[name]
+        self.object_scope[scene_obj] = self.objects_by_name[obj_name]
+
+        results = []
+        for key in condition_keys:
+            condition, positive = self.conditions_by_key[key]
+            start = time.time()
+            success = condition.sample(binary_state=positive)
+            results.append((condition.STATE_NAME, time.time() - start, success))
+            if not success:
+                break
+        return results
+
+
+def init_sampling_worker(config, rng_state, sampleable_object_names, action_timestep, physics_timestep):
+    """
+    Initializer of the worker processes: load the scene, the robot and the sampleable objects of the main process in a
+    headless simulator.
+
+    :param config: config of the environment of the main process
+    :param rng_state: NumPy random state of the main process before BehaviorTask.check_scene
+    :param sampleable_object_names: dict mapping the sampleable object instances of the main process to the names of
+        their simulator objects, to check that the worker imported the same objects
+    :param action_timestep: action timestep of the environment of the main process
+    :param physics_timestep: physics timestep of the environment of the main process
+    """
+    global _worker_env, _worker_error
+    # Imported here since igibson_env imports behavior_task
+    from igibson.envs.igibson_env import iGibsonEnv
+
+    try:
+        worker_config = dict(config)
+        task = worker_config.pop("task")
+        worker_config["load_clutter"] = False
+        worker_config["should_highlight_task_relevant_objs"] = False
+        worker_config["episode_save_dir"] = None
+        worker_config["num_sampling_workers"] = 0
+        env = iGibsonEnv(
+            config_file=worker_config,
+            mode="headless",
+            action_timestep=action_timestep,
+            physics_timestep=physics_timestep,
+        )
+        env.config["task"] = task
+        env.task = BehaviorSamplingWorkerTask(env, rng_state)
+        if not env.task.initialized:
+            raise ValueError("Sampling worker rejected the scene: {}".format(env.task.feedback))
+        worker_object_names = {obj_inst: env.task.object_scope[obj_inst].name for obj_inst in sampleable_object_names}
+        if worker_object_names != sampleable_object_names:
+            raise ValueError("Sampling worker did not import the same sampleable objects as the main process.")
+        _worker_env = env
+    except Exception as e:
+        # Raising in a pool initializer would make the pool respawn the worker forever
+        _worker_error = e
+
+
+def evaluate_candidate(job):
+    """
+    :param job: (object_names, scene_obj, obj_name, condition_keys), see BehaviorSamplingWorkerTask.evaluate_job
+    :return: list of (predicate, sampling time, success) of the sampled conditions
+    """
+    if _worker_error is not None:
+        raise _worker_error
+    return _worker_env.task.evaluate_job(_worker_env, *job)
+
+
+class BehaviorSamplingPool(object):
+    """
+    Pool of worker processes evaluating the candidate objects of BehaviorTask.filter_object_scope in parallel. Every
+    worker holds its own headless simulator with the scene, the robot and the sampleable objects of the main process.
+    """
+
+    def __init__(self, task, env, num_workers, rng_state):
+        """
+        :param task: BehaviorTask of the main process, after check_scene
+        :param env: iGibsonEnv of the main process
+        :param num_workers: number of worker processes
+        :param rng_state: NumPy random state of the main process before BehaviorTask.check_scene
+        """
+        sampleable_object_names = {
+            obj_inst: obj.name
+            for obj_inst, obj in task.object_scope.items()
+            if obj_inst not in task.non_sampleable_object_inst and obj_inst != "agent.n.01_1"
+        }
+        # Spawned rather than forked: the workers must not share the pybullet and OpenGL contexts of the main process
+        context = multiprocessing.get_context("spawn")
+        self.pool = context.Pool(
+            num_workers,
+            initializer=init_sampling_worker,
+            initargs=(task.config, rng_state, sampleable_object_names, env.action_timestep, env.physics_timestep),
+        )
+
+    def evaluate(self, task, candidates):
+        """
+        :param task: BehaviorTask of the main process
+        :param candidates: list of (scene_obj, candidate simulator object, list of (condition, positive))
+        :return: list with the list of (predicate, sampling time, success) of every candidate
+        """
+        # The non-sampleable objects already assigned in the main process (e.g. by the initial conditions' matching)
+        object_names = OrderedDict(
+            (obj_inst, task.object_scope[obj_inst].name)
+            for obj_inst in task.non_sampleable_object_inst
+            if task.object_scope[obj_inst] is not None
+        )
+        jobs = [
+            (
+                object_names,
+                scene_obj,
+                obj.name,
+                [get_condition_key(condition, positive) for condition, positive in conditions],
+            )
+            for scene_obj, obj, conditions in candidates
+        ]
+        return self.pool.map(evaluate_candidate, jobs, chunksize=1)
+
+    def close(self):
+        """
+        Shut down the worker processes.
+        """
+        self.pool.terminate()
+        self.pool.join()
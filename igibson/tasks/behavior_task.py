@@ -1,7 +1,7 @@
 import copy
 import datetime
 import logging
-from collections import OrderedDict
+import time
 
 import networkx as nx
 import pybullet as p
@@ -24,9 +24,17 @@ from igibson.object_states.on_floor import RoomFloor
 from igibson.objects.articulated_object import URDFObject
 from igibson.objects.multi_object_wrappers import ObjectGrouper, ObjectMultiplexer
 from igibson.reward_functions.potential_reward import PotentialReward
+from igibson.robots.manipulation_robot import IsGraspingState
 from igibson.robots.robot_base import BaseRobot
 from igibson.scenes.igibson_indoor_scene import InteractiveIndoorScene
 from igibson.tasks.bddl_backend import IGibsonBDDLBackend
+from igibson.tasks.behavior_instance_cache import (
+    BehaviorInstanceCache,
+    get_activity_hash,
+    get_instance_key,
+    get_scene_loading_config,
+)
+from igibson.tasks.incremental_goal_evaluator import IncrementalGoalEvaluator
 from igibson.tasks.task_base import BaseTask
 from igibson.termination_conditions.predicate_goal import PredicateGoal
 from igibson.termination_conditions.timeout import Timeout
@@ -41,6 +49,8 @@ from igibson.utils.constants import (
     SimulatorMode,
 )
 from igibson.utils.ig_logging import IGLogWriter
+from igibson.utils.timing_stats import TimingStats
+from igibson.utils.transform_utils import quat2euler
 from igibson.utils.utils import restoreState
 
 log = logging.getLogger(__name__)
@@ -72,10 +82,32 @@ class BehaviorTask(BaseTask):
         self.online_sampling = self.config.get("online_sampling", False)
         self.reset_checkpoint_idx = self.config.get("reset_checkpoint_idx", -1)
         self.reset_checkpoint_dir = self.config.get("reset_checkpoint_dir", None)
+        # Number of worker processes evaluating the candidate objects of the sampling, 0 to evaluate them in this one
+        self.num_sampling_workers = self.config.get("num_sampling_workers", 0)
+        self.sampling_pool = None
+        self.sampling_rng_state = None
+        self.sampling_stats = TimingStats()
+        # Seed of the online sampling, successful samplings are cached on disk when it is set
+        sampling_cache_dir = self.config.get("sampling_cache_dir", None)
+        self.sampling_cache = BehaviorInstanceCache(sampling_cache_dir) if sampling_cache_dir is not None else None
+        self.sampling_seed = self.config.get("sampling_seed", None)
+        self.clutter_scene_name = None
+        self.clutter_object_names = []
         self.task_obs_dim = MAX_TASK_RELEVANT_OBJS * TASK_RELEVANT_OBJS_OBS_DIM + AGENT_POSE_DIM
+        # Slots of the task relevant objects in the task observation, built lazily since the object scope is only
+        # final after the sampling, see get_task_obs_layout
+        self.task_obs_layout = None
+        self.task_obs_buffer = np.zeros(self.task_obs_dim, dtype=np.float32)
+        # Whether the grasping slots of the task observation report the assisted grasps. They always reported FALSE
+        # in assisted grasping mode (the object in hand was compared with the list of body ids of every object), so
+        # this is off by default to keep the observations of agents trained with them unchanged
+        self.task_obs_assisted_grasps = self.config.get("task_obs_assisted_grasps", False)
+        # Only re-evaluate the goal predicates whose objects or states changed, see IncrementalGoalEvaluator
+        self.use_incremental_goal_evaluation = self.config.get("use_incremental_goal_evaluation", False)
+        self.goal_condition_evaluator = None
+        self.potential_evaluator = None
 
         self.initialized, self.feedback = self.initialize(env)
-        self.state_history = {}
         self.initial_state = self.save_scene(env)
         if self.config.get("should_highlight_task_relevant_objs", True):
             self.highlight_task_relevant_objs(env)
@@ -139,22 +171,32 @@ class BehaviorTask(BaseTask):
 
     def get_potential(self, env):
         # Evaluate the first ground goal state option as the potential
-        _, satisfied_predicates = evaluate_goal_conditions(self.ground_goal_state_options[0])
+        if self.use_incremental_goal_evaluation:
+            if (
+                self.potential_evaluator is None
+                or self.potential_evaluator.conditions is not self.ground_goal_state_options[0]
+            ):
+                self.potential_evaluator = IncrementalGoalEvaluator(self.ground_goal_state_options[0])
+            _, satisfied_predicates = self.potential_evaluator.evaluate()
+        else:
+            _, satisfied_predicates = evaluate_goal_conditions(self.ground_goal_state_options[0])
         success_score = len(satisfied_predicates["satisfied"]) / (
             len(satisfied_predicates["satisfied"]) + len(satisfied_predicates["unsatisfied"])
         )
         return -success_score
 
     def save_scene(self, env):
-        scene_tree, snapshot_id = self.scene.save(pybullet_save_state=True)
-        self.state_history[snapshot_id] = scene_tree
-        return snapshot_id
+        # The snapshot is pinned so that it is never evicted from the simulator's snapshots
+        return env.simulator.save_snapshot(pinned=True)
 
     def reset_scene(self, env):
         if self.reset_checkpoint_dir is not None and self.reset_checkpoint_idx != -1:
             load_checkpoint(env.simulator, self.reset_checkpoint_dir, self.reset_checkpoint_idx)
         else:
-            self.scene.restore(scene_tree=self.state_history[self.initial_state], pybullet_state_id=self.initial_state)
+            env.simulator.restore_snapshot(self.initial_state)
+        for evaluator in [self.goal_condition_evaluator, self.potential_evaluator]:
+            if evaluator is not None:
+                evaluator.reset()
 
     def reset_agent(self, env):
         return
@@ -247,19 +289,38 @@ class BehaviorTask(BaseTask):
         feedback = None
 
         if self.online_sampling:
+            instance_key = None
+            if self.sampling_seed is not None:
+                np.random.seed(self.sampling_seed)
+                if self.sampling_cache is not None:
+                    instance_key = self.get_sampled_instance_key()
+            elif self.sampling_cache is not None:
+                log.warning("Sampled instances are only cached when sampling_seed is set")
+
             # Reject scenes with missing non-sampleable objects
             # Populate object_scope with sampleable objects and the robot
+            if self.num_sampling_workers > 0:
+                # The sampling workers replay the random choices of check_scene to import the same objects
+                self.sampling_rng_state = np.random.get_state()
             accept_scene, feedback = self.check_scene(env)
-            if not accept_scene:
-                return accept_scene, feedback
-            # Sample objects to satisfy initial conditions
-            accept_scene, feedback = self.sample(env)
             if not accept_scene:
                 return accept_scene, feedback
 
-            if self.load_clutter:
-                # Add clutter objects into the scenes
-                self.clutter_scene(env)
+            entry = self.sampling_cache.load(instance_key) if instance_key is not None else None
+            if entry is not None and self.restore_sampled_instance(env, entry):
+                log.info("Restored sampled instance {} from the cache".format(instance_key))
+            else:
+                # Sample objects to satisfy initial conditions
+                accept_scene, feedback = self.sample(env)
+                if not accept_scene:
+                    return accept_scene, feedback
+
+                if self.load_clutter:
+                    # Add clutter objects into the scenes
+                    self.clutter_scene(env)
+
+                if instance_key is not None:
+                    self.sampling_cache.save(instance_key, self.dump_sampled_instance(env))
         else:
             # Load existing scene cache and assign object scope accordingly
             self.assign_object_scope_with_cache(env)
@@ -536,6 +597,77 @@ class BehaviorTask(BaseTask):
     def get_agent(self, env):
         return env.robots[0]
 
+    def get_sampled_instance_key(self):
+        """
+        :return: key of the instance sampled with sampling_seed in the sampling cache, see get_instance_key
+        """
+        return get_instance_key(
+            get_activity_hash(self.conds),
+            self.scene.scene_id,
+            self.config["robot"]["name"],
+            self.sampling_seed,
+            self.load_clutter,
+            get_scene_loading_config(self.config),
+        )
+
+    def dump_sampled_instance(self, env):
+        """
+        Dump the result of a successful sampling, to be cached.
+
+        :param env: iGibsonEnv
+        :return: dict with the object scope, the clutter objects and the serialized simulator snapshot
+        """
+        snapshot_id = env.simulator.save_snapshot()
+        snapshot = env.simulator.snapshot_manager.serialize(snapshot_id)
+        env.simulator.remove_snapshot(snapshot_id)
+        return {
+            "object_scope": {
+                obj_inst: obj.name for obj_inst, obj in self.object_scope.items() if obj_inst != "agent.n.01_1"
+            },
+            "clutter_scene_name": self.clutter_scene_name,
+            "clutter_object_names": self.clutter_object_names,
+            "snapshot": snapshot,
+        }
+
+    def restore_sampled_instance(self, env, entry):
+        """
+        Restore a cached sampling instead of sampling, after check_scene imported the sampleable objects.
+
+        :param env: iGibsonEnv
+        :param entry: dict returned by dump_sampled_instance
+        :return: whether the entry matches the imported objects and was restored
+        """
+        objects_by_name = dict(self.scene.objects_by_name)
+        for room_type in self.non_sampleable_object_scope:
+            for obj_inst in self.non_sampleable_object_scope[room_type]:
+                for objs in self.non_sampleable_object_scope[room_type][obj_inst].values():
+                    for obj in objs:
+                        objects_by_name[obj.name] = obj
+
+        object_scope = {}
+        for obj_inst, name in entry["object_scope"].items():
+            if obj_inst in self.non_sampleable_object_inst:
+                object_scope[obj_inst] = objects_by_name.get(name)
+            elif self.object_scope.get(obj_inst) is not None and self.object_scope[obj_inst].name == name:
+                object_scope[obj_inst] = self.object_scope[obj_inst]
+            else:
+                object_scope[obj_inst] = None
+            if object_scope[obj_inst] is None:
+                log.warning("Cached sampled instance does not match object [{}], sampling instead".format(obj_inst))
+                return False
+        self.object_scope.update(object_scope)
+
+        if entry["clutter_scene_name"] is not None:
+            clutter_scene = InteractiveIndoorScene(self.scene.scene_id, entry["clutter_scene_name"])
+            for name in entry["clutter_object_names"]:
+                env.simulator.import_object(clutter_scene.objects_by_name[name])
+        self.clutter_scene_name = entry["clutter_scene_name"]
+        self.clutter_object_names = entry["clutter_object_names"]
+
+        snapshot_id = env.simulator.snapshot_manager.restore_serialized(entry["snapshot"])
+        env.simulator.remove_snapshot(snapshot_id)
+        return True
+
     def assign_object_scope_with_cache(self, env):
         # Assign object_scope based on a cached scene
         for obj_inst in self.object_scope:
@@ -601,64 +733,97 @@ class BehaviorTask(BaseTask):
                 self.sampleable_obj_conditions.append((condition, positive))
 
     def filter_object_scope(self, input_object_scope, conditions, condition_type):
+        candidates = []
         filtered_object_scope = {}
         for room_type in input_object_scope:
             filtered_object_scope[room_type] = {}
             for scene_obj in input_object_scope[room_type]:
                 filtered_object_scope[room_type][scene_obj] = {}
+                # Positive kinematic conditions that involve this object instance are sampled for every candidate
+                # If a candidate object is not involved in any conditions, it will qualify by default
+                candidate_conditions = [
+                    (condition, positive)
+                    for condition, positive in conditions
+                    if condition.STATE_NAME in KINEMATICS_STATES and positive and scene_obj in condition.body
+                ]
                 for room_inst in input_object_scope[room_type][scene_obj]:
                     # These are a list of candidate simulator objects that need sampling test
                     for obj in input_object_scope[room_type][scene_obj][room_inst]:
-                        # Temporarily set object_scope to point to this candidate object
-                        self.object_scope[scene_obj] = obj
-
-                        success = True
-                        # If this candidate object is not involved in any conditions,
-                        # success will be True by default and this object will qualify
-                        for condition, positive in conditions:
-                            # Sample positive kinematic conditions that involve this candidate object
-                            if condition.STATE_NAME in KINEMATICS_STATES and positive and scene_obj in condition.body:
-                                # Use pybullet GUI for debugging
-                                if self.debug_obj_inst is not None and self.debug_obj_inst == condition.body[0]:
-                                    igibson.debug_sampling = True
-                                    obj_pos = obj.get_position()
-                                    # Set the camera to have a bird's eye view of the sampling process
-                                    p.resetDebugVisualizerCamera(
-                                        cameraDistance=3.0,
-                                        cameraYaw=0,
-                                        cameraPitch=-89.99999,
-                                        cameraTargetPosition=obj_pos,
-                                    )
-
-                                success = condition.sample(binary_state=positive)
-                                log_msg = " ".join(
-                                    [
-                                        "{} condition sampling".format(condition_type),
-                                        room_type,
-                                        scene_obj,
-                                        room_inst,
-                                        obj.name,
-                                        condition.STATE_NAME,
-                                        str(condition.body),
-                                        str(success),
-                                    ]
-                                )
-                                log.warning(log_msg)
-
-                                # If any condition fails for this candidate object, skip
-                                if not success:
-                                    break
-
-                        # If this candidate object fails, move on to the next candidate object
-                        if not success:
-                            continue
+                        candidates.append((room_type, scene_obj, room_inst, obj, candidate_conditions))
 
-                        if room_inst not in filtered_object_scope[room_type][scene_obj]:
-                            filtered_object_scope[room_type][scene_obj][room_inst] = []
-                        filtered_object_scope[room_type][scene_obj][room_inst].append(obj)
+        if self.sampling_pool is not None:
+            all_results = self.sampling_pool.evaluate(
+                self,
+                [(scene_obj, obj, candidate_conditions) for _, scene_obj, _, obj, candidate_conditions in candidates],
+            )
+        else:
+            all_results = [
+                self.evaluate_candidate(scene_obj, obj, candidate_conditions)
+                for room_type, scene_obj, _, obj, candidate_conditions in candidates
+            ]
+
+        for (room_type, scene_obj, room_inst, obj, candidate_conditions), results in zip(candidates, all_results):
+            for (condition, _), (predicate, duration, success) in zip(candidate_conditions, results):
+                self.sampling_stats.record(predicate, duration, success)
+                log_msg = " ".join(
+                    [
+                        "{} condition sampling".format(condition_type),
+                        room_type,
+                        scene_obj,
+                        room_inst,
+                        obj.name,
+                        condition.STATE_NAME,
+                        str(condition.body),
+                        str(success),
+                    ]
+                )
+                log.warning(log_msg)
+
+            # If any condition fails for this candidate object, move on to the next candidate object
+            if not all(success for _, _, success in results):
+                continue
+
+            if room_inst not in filtered_object_scope[room_type][scene_obj]:
+                filtered_object_scope[room_type][scene_obj][room_inst] = []
+            filtered_object_scope[room_type][scene_obj][room_inst].append(obj)
 
         return filtered_object_scope
 
+    def evaluate_candidate(self, scene_obj, obj, conditions):
+        """
+        Sample the conditions of a candidate simulator object for an object instance, stopping at the first failure.
+
+        :param scene_obj: object instance
+        :param obj: candidate simulator object
+        :param conditions: list of (condition, positive) to sample
+        :return: list of (predicate, sampling time, success) of the sampled conditions
+        """
+        # Temporarily set object_scope to point to this candidate object
+        self.object_scope[scene_obj] = obj
+
+        results = []
+        for condition, positive in conditions:
+            # Use pybullet GUI for debugging
+            if self.debug_obj_inst is not None and self.debug_obj_inst == condition.body[0]:
+                igibson.debug_sampling = True
+                obj_pos = obj.get_position()
+                # Set the camera to have a bird's eye view of the sampling process
+                p.resetDebugVisualizerCamera(
+                    cameraDistance=3.0,
+                    cameraYaw=0,
+                    cameraPitch=-89.99999,
+                    cameraTargetPosition=obj_pos,
+                )
+
+            start = time.time()
+            success = condition.sample(binary_state=positive)
+            results.append((condition.STATE_NAME, time.time() - start, success))
+
+            # If any condition fails for this candidate object, skip
+            if not success:
+                break
+        return results
+
     def consolidate_room_instance(self, filtered_object_scope, condition_type):
         for room_type in filtered_object_scope:
             # For each room_type, filter in room_inst that has successful
@@ -745,13 +910,15 @@ class BehaviorTask(BaseTask):
         return error_msg
 
     def sample_goal_conditions(self):
-        np.random.shuffle(self.ground_goal_state_options)
+        goal_option_indices = list(range(len(self.ground_goal_state_options)))
+        np.random.shuffle(goal_option_indices)
         log.warning(("number of ground_goal_state_options", len(self.ground_goal_state_options)))
         num_goal_condition_set_to_test = 10
 
         goal_condition_success = False
         # Try to fulfill different set of ground goal conditions (maximum num_goal_condition_set_to_test)
-        for goal_condition_set in self.ground_goal_state_options[:num_goal_condition_set_to_test]:
+        for goal_option_idx in goal_option_indices[:num_goal_condition_set_to_test]:
+            goal_condition_set = self.ground_goal_state_options[goal_option_idx]
             goal_condition_processed = []
             for condition in goal_condition_set:
                 condition, positive = self.process_single_condition(condition)
@@ -819,6 +986,38 @@ class BehaviorTask(BaseTask):
                         if not success:
                             return "Sampleable object conditions failed: {}".format(condition.body)
 
+    def start_sampling_pool(self, env):
+        """
+        Start the worker processes evaluating the candidate objects of filter_object_scope, if enabled.
+        The candidates are evaluated in this process when debugging the sampling of an object.
+
+        :param env: iGibsonEnv
+        """
+        if self.num_sampling_workers <= 0 or self.debug_obj_inst is not None:
+            return
+        if self.sampling_rng_state is None:
+            log.warning("The sampling workers can only be started by initialize, sampling in this process instead")
+            return
+        # Imported here since the worker processes import iGibsonEnv
+        from igibson.tasks.behavior_sampling_pool import BehaviorSamplingPool
+
+        self.sampling_pool = BehaviorSamplingPool(self, env, self.num_sampling_workers, self.sampling_rng_state)
+
+    def stop_sampling_pool(self):
+        """
+        Shut down the worker processes started by start_sampling_pool.
+        """
+        if self.sampling_pool is not None:
+            self.sampling_pool.close()
+            self.sampling_pool = None
+
+    def get_sampling_stats(self):
+        """
+        :return: dict mapping every sampled predicate to its number of samplings, success rate, total, mean and max
+            time, see TimingStats
+        """
+        return self.sampling_stats.summary()
+
     def sample(self, env, validate_goal=True):
         # Before sampling, set robot to be far away
         env.robots[0].set_position_orientation([300, 300, 300], [0, 0, 0, 1])
@@ -827,17 +1026,27 @@ class BehaviorTask(BaseTask):
             log.warning(error_msg)
             return False, error_msg
 
-        error_msg = self.sample_initial_conditions()
-        if error_msg:
-            log.warning(error_msg)
-            return False, error_msg
-
-        if validate_goal:
-            error_msg = self.sample_goal_conditions()
+        self.start_sampling_pool(env)
+        try:
+            error_msg = self.sample_initial_conditions()
             if error_msg:
                 log.warning(error_msg)
                 return False, error_msg
 
+            if validate_goal:
+                error_msg = self.sample_goal_conditions()
+                if error_msg:
+                    log.warning(error_msg)
+                    return False, error_msg
+        finally:
+            self.stop_sampling_pool()
+            for predicate, stats in self.get_sampling_stats().items():
+                log.info(
+                    "Sampling {}: {} samples, success rate {:.2f}, mean time {:.3f}s, max time {:.3f}s".format(
+                        predicate, stats["num_calls"], stats["success_rate"], stats["mean_time"], stats["max_time"]
+                    )
+                )
+
         error_msg = self.sample_initial_conditions_final()
         if error_msg:
             log.warning(error_msg)
@@ -853,6 +1062,7 @@ class BehaviorTask(BaseTask):
         :param clutter_scene: A clutter scene to load new clutter objects from
         :param existing_objects: A list of objects that needs to be kept min_distance away when loading the new objects
         :param min_distance: A minimum distance to require for objects to load
+        :return: A list of the loaded objects
         """
         state_id = p.saveState()
         objects_to_add = []
@@ -924,6 +1134,7 @@ class BehaviorTask(BaseTask):
 
         # Restore clutter objects to their correct poses
         clutter_scene.restore_object_states(clutter_scene.object_states)
+        return objects_to_add
 
     def clutter_scene(self, env):
         """
@@ -932,51 +1143,99 @@ class BehaviorTask(BaseTask):
         scene_id = self.scene.scene_id
         clutter_ids = [""] + list(range(2, 5))
         clutter_id = np.random.choice(clutter_ids)
-        clutter_scene = InteractiveIndoorScene(scene_id, "{}_clutter{}".format(scene_id, clutter_id))
+        self.clutter_scene_name = "{}_clutter{}".format(scene_id, clutter_id)
+        clutter_scene = InteractiveIndoorScene(scene_id, self.clutter_scene_name)
         existing_objects = [value for key, value in self.object_scope.items() if "floor.n.01" not in key]
-        self.import_non_colliding_objects(
+        clutter_objects = self.import_non_colliding_objects(
             env=env, clutter_scene=clutter_scene, existing_objects=existing_objects, min_distance=0.5
         )
+        self.clutter_object_names = [obj.name for obj in clutter_objects]
+
+    def get_task_obs_layout(self, env):
+        """
+        Get the layout of the task observation: the agent pose, then one slot per URDFObject of the object scope with
+        a valid flag, its position, its orientation (roll, pitch, yaw) and its grasping state for every arm. The layout
+        is rebuilt when the object scope changed.
+
+        :param env: environment instance
+        :return: dict with the scope objects, the body ids whose base pose is the pose of every slot, a dict mapping the
+            body ids of the objects to their slots, and the buffer indices of the positions, orientations and grasping
+            states of the slots
+        """
+        scope_objects = list(self.object_scope.values())
+        if self.task_obs_layout is not None and self.task_obs_layout["scope_objects"] == scope_objects:
+            return self.task_obs_layout
+
+        objs = [obj for obj in scope_objects if isinstance(obj, URDFObject)]
+        num_arms = len(env.robots[0].arm_names)
+        slot_dim = 7 + num_arms
+        assert AGENT_POSE_DIM + slot_dim * len(objs) <= self.task_obs_dim, "Too many task relevant objects"
+        offsets = AGENT_POSE_DIM + slot_dim * np.arange(len(objs))
+        self.task_obs_layout = {
+            "scope_objects": scope_objects,
+            "body_ids": [obj.get_body_ids()[obj.main_body] for obj in objs],
+            "body_id_to_slot": {body_id: i for i, obj in enumerate(objs) for body_id in obj.get_body_ids()},
+            "pos_idx": offsets[:, None] + 1 + np.arange(3),
+            "orn_idx": offsets[:, None] + 4 + np.arange(3),
+            "grasp_idx": offsets[:, None] + 7 + np.arange(num_arms),
+        }
+        self.task_obs_buffer[:] = 0.0
+        self.task_obs_buffer[offsets] = 1.0
+        return self.task_obs_layout
 
     def get_task_obs(self, env):
-        state = OrderedDict()
-        task_obs = np.zeros((self.task_obs_dim))
-        state["robot_pos"] = np.array(env.robots[0].get_position())
-        state["robot_orn"] = np.array(env.robots[0].get_rpy())
-
-        i = 0
-        for _, v in self.object_scope.items():
-            if isinstance(v, URDFObject):
-                state["obj_{}_valid".format(i)] = 1.0
-                state["obj_{}_pos".format(i)] = np.array(v.get_position())
-                state["obj_{}_orn".format(i)] = np.array(p.getEulerFromQuaternion(v.get_orientation()))
-                grasping_objects = env.robots[0].is_grasping_all_arms(candidate_obj=v.get_body_ids())
-                for grasp_idx, grasping in enumerate(grasping_objects):
-                    state["obj_{}_pos_in_gripper_{}".format(i, grasp_idx)] = float(grasping)
-                i += 1
-
-        state_list = []
-        for k, v in state.items():
-            if isinstance(v, list):
-                state_list.extend(v)
-            elif isinstance(v, tuple):
-                state_list.extend(list(v))
-            elif isinstance(v, np.ndarray):
-                state_list.extend(list(v))
-            elif isinstance(v, (float, int)):
-                state_list.append(v)
+        layout = self.get_task_obs_layout(env)
+        robot = env.robots[0]
+        task_obs = self.task_obs_buffer
+        task_obs[:3] = robot.get_position()
+        task_obs[3:AGENT_POSE_DIM] = robot.get_rpy()
+
+        if layout["body_ids"]:
+            poses = [p.getBasePositionAndOrientation(body_id) for body_id in layout["body_ids"]]
+            task_obs[layout["pos_idx"]] = [pos for pos, _ in poses]
+            task_obs[layout["orn_idx"]] = quat2euler([orn for _, orn in poses])
+
+            if robot.grasping_mode == "physical":
+                # The grasping state of an arm does not depend on the object
+                task_obs[layout["grasp_idx"]] = np.array(robot.is_grasping_all_arms(), dtype=np.float32)
+            elif self.task_obs_assisted_grasps:
+                task_obs[layout["grasp_idx"]] = IsGraspingState.FALSE
+                for arm_idx, arm in enumerate(robot.arm_names):
+                    if robot.is_grasping(arm=arm) == IsGraspingState.TRUE:
+                        slot = layout["body_id_to_slot"].get(robot._ag_obj_in_hand[arm])
+                        if slot is not None:
+                            task_obs[layout["grasp_idx"][slot, arm_idx]] = IsGraspingState.TRUE
             else:
-                raise ValueError("cannot serialize task obs")
-
-        assert len(state_list) <= len(task_obs)
-        task_obs[: len(state_list)] = state_list
+                # Assisted grasps are not reported, see task_obs_assisted_grasps
+                task_obs[layout["grasp_idx"]] = IsGraspingState.FALSE
 
-        return task_obs
+        # The buffer is reused at every step
+        return task_obs.copy()
 
     def check_success(self):
-        self.current_success, self.current_goal_status = evaluate_goal_conditions(self.goal_conditions)
+        if self.use_incremental_goal_evaluation:
+            if (
+                self.goal_condition_evaluator is None
+                or self.goal_condition_evaluator.conditions is not self.goal_conditions
+            ):
+                self.goal_condition_evaluator = IncrementalGoalEvaluator(self.goal_conditions)
+            self.current_success, self.current_goal_status = self.goal_condition_evaluator.evaluate()
+        else:
+            self.current_success, self.current_goal_status = evaluate_goal_conditions(self.goal_conditions)
         return self.current_success, self.current_goal_status
 
+    def get_goal_evaluation_stats(self):
+        """
+        :return: dict with the cache statistics of the incremental evaluation of the goal conditions (check_success)
+            and of the potential (get_potential), see IncrementalGoalEvaluator.get_stats
+        """
+        stats = {}
+        if self.goal_condition_evaluator is not None:
+            stats["goal_conditions"] = self.goal_condition_evaluator.get_stats()
+        if self.potential_evaluator is not None:
+            stats["potential"] = self.potential_evaluator.get_stats()
+        return stats
+
     def get_termination(self, env, collision_links=[], action=None, info={}):
         """
         Aggreate termination conditions and fill info
@@ -0,0 +1,384 @@
+import numpy as np
+import pybullet as p
+from bddl.condition_evaluation import (
+    HEAD,
+    Conjunction,
+    Disjunction,
+    Existential,
+    ForNPairs,
+    ForPairs,
+    Implication,
+    Negation,
+    NQuantifier,
+    Universal,
+)
+from bddl.logic_base import AtomicFormula, BinaryAtomicFormula
+
+from igibson import object_states
+from igibson.object_states.adjacency import (
+    _MAX_DISTANCE_HORIZONTAL,
+    _MAX_DISTANCE_VERTICAL,
+    HorizontalAdjacency,
+    VerticalAdjacency,
+    get_horizontal_adjacencies,
+    get_vertical_adjacencies,
+)
+from igibson.object_states.kinematics import KinematicsMixin
+
+# Predicates whose value depends on the poses and joint positions of their objects
+POSE_DEPENDENT_STATES = (KinematicsMixin, object_states.OnTop, object_states.Under, object_states.Open)
+
+# Pose dependent predicates that also depend on the bodies around their objects, which they find by casting rays from
+# the positions of their objects (see object_states.adjacency), with the adjacency states they read on each object
+ADJACENCY_DEPENDENCIES = {
+    object_states.OnTop: [[VerticalAdjacency], []],
+    object_states.Under: [[VerticalAdjacency], []],
+    object_states.Inside: [[VerticalAdjacency, HorizontalAdjacency], []],
+    object_states.NextTo: [[HorizontalAdjacency], [HorizontalAdjacency]],
+}
+ADJACENCY_STATES = tuple(ADJACENCY_DEPENDENCIES)
+
+# Half extents of the box around the position of a body that contains all the adjacency rays cast from it
+ADJACENCY_EXTENTS = np.array([_MAX_DISTANCE_HORIZONTAL, _MAX_DISTANCE_HORIZONTAL, _MAX_DISTANCE_VERTICAL])
+
+# Predicates whose value is a function of another state of their object, which has an update signature
+DERIVED_STATES = {
+    object_states.Cooked: object_states.MaxTemperature,
+    object_states.Burnt: object_states.MaxTemperature,
+    object_states.Frozen: object_states.Temperature,
+}
+
+SUPPORTED_EXPRESSIONS = (
+    HEAD,
+    Conjunction,
+    Disjunction,
+    Universal,
+    Existential,
+    NQuantifier,
+    ForPairs,
+    ForNPairs,
+    Negation,
+    Implication,
+)
+
+
+class _Node(object):
+    """
+    Node of the goal condition tree, with the value of its expression at the last evaluation.
+    """
+
+    def __init__(self, expression, parent):
+        self.expression = expression
+        self.parent = parent
+        self.children = []
+        self.value = None
+        # Leaves only: objects and state inputs at the last evaluation
+        self.inputs = None
+        # Adjacency leaves only: (lower, upper) box containing the adjacency rays at the last evaluation, and dict
+        # mapping the bodies overlapping it to their poses
+        self.neighborhood = None
+        self.neighbors = None
+        # ForPairs and ForNPairs only: shape of the children
+        self.shape = None
+
+
+class IncrementalGoalEvaluator(object):
+    """
+    Incremental replacement for bddl's evaluate_goal_conditions.
+
+    The value of every grounded predicate (leaf of the goal condition trees) is cached along with its inputs: the
+    versions of its objects, which change when the base pose or the joint positions of an object move by more than
+    pose_tolerance since the last version, and the update signatures of the non-kinematic states it reads (see
+    BaseObjectState.get_update_signature). A predicate is only re-evaluated when one of its inputs changed, and the
+    changed values are propagated up the boolean expressions to the goal conditions.
+
+    Kinematic predicates based on adjacency (ontop, under, inside, nextto) cast rays from their objects: the rays of
+    all the predicates to re-evaluate are cast in one batch before evaluating them. They also depend on the bodies hit
+    by their rays: they are also re-evaluated when the bodies overlapping the box containing the rays cast from their objects
+    change (found with a single broadphase query per predicate, p.getOverlappingObjects), or when one of these bodies
+    moves by more than pose_tolerance. Only the poses of the goal objects and of the bodies around them are read, so
+    the cost does not grow with the number of bodies of the scene. Predicates whose state has no update signature
+    (e.g. sliced, soaked, dusty) cannot be cached and are evaluated every time.
+    """
+
+    def __init__(self, conditions, pose_tolerance=1e-4):
+        """
+        :param conditions: list of compiled goal conditions (bddl.condition_evaluation.HEAD)
+        :param pose_tolerance: maximum change of the positions, orientation quaternions and joint positions of an
+            object that does not change its version
+        """
+        self.conditions = conditions
+        self.pose_tolerance = pose_tolerance
+        self.roots = []
+        self.leaves = []
+        # Internal nodes, children before parents
+        self.internal_nodes = []
+        for condition in conditions:
+            self.roots.append(self._build(condition, None))
+
+        self._num_joints = {}
+        self._reference_poses = {}
+        self._object_versions = {}
+        # Pose vectors of the bodies queried during the current evaluation
+        self._body_poses = {}
+        self.num_evaluations = 0
+        self.num_predicate_evaluations = 0
+        self.num_predicate_cache_hits = 0
+
+    def _build(self, expression, parent):
+        """
+        :param expression: bddl expression
+        :param parent: parent node
+        :return: node of the expression, with its subtree
+        """
+        node = _Node(expression, parent)
+        if isinstance(expression, AtomicFormula):
+            self.leaves.append(node)
+            return node
+        if not isinstance(expression, SUPPORTED_EXPRESSIONS):
+            raise ValueError("Unsupported goal condition expression {}".format(type(expression).__name__))
+        # ForPairs and ForNPairs have a list of lists of children
+        if isinstance(expression, (ForPairs, ForNPairs)):
+            node.shape = (len(expression.children), len(expression.children[0]))
+            children = [subchild for child in expression.children for subchild in child]
+        else:
+            children = expression.children
+        node.children = [self._build(child, node) for child in children]
+        self.internal_nodes.append(node)
+        return node
+
+    def reset(self):
+        """
+        Forget all the cached values, e.g. after the scene was reset.
+        """
+        for node in self.leaves + self.internal_nodes:
+            node.value = None
+            node.inputs = None
+            node.neighborhood = None
+            node.neighbors = None
+        self._reference_poses = {}
+        self._object_versions = {}
+
+    def _get_body_pose_vector(self, body_id):
+        """
+        :param body_id: pybullet body id
+        :return: base pose and joint positions of the body, queried once per evaluation
+        """
+        pose = self._body_poses.get(body_id)
+        if pose is None:
+            if body_id not in self._num_joints:
+                self._num_joints[body_id] = p.getNumJoints(body_id)
+            pos, orn = p.getBasePositionAndOrientation(body_id)
+            pose = list(pos) + list(orn)
+            if self._num_joints[body_id] > 0:
+                pose.extend(
+                    joint_state[0] for joint_state in p.getJointStates(body_id, range(self._num_joints[body_id]))
+                )
+            pose = np.array(pose)
+            self._body_poses[body_id] = pose
+        return pose
+
+    def _get_pose_vector(self, obj):
+        """
+        :param obj: simulator object
+        :return: base poses and joint positions of all the bodies of the object
+        """
+        body_ids = obj.get_body_ids()
+        if not body_ids:
+            return np.array([])
+        return np.concatenate([self._get_body_pose_vector(body_id) for body_id in body_ids])
+
+    def _get_neighborhood(self, objs):
+        """
+        :param objs: objects of an adjacency predicate
+        :return: (2, 3) box containing the adjacency rays cast from the bodies of the objects
+        """
+        positions = np.array(
+            [self._get_body_pose_vector(body_id)[:3] for obj in objs for body_id in obj.get_body_ids()]
+        )
+        return np.array([np.min(positions, axis=0) - ADJACENCY_EXTENTS, np.max(positions, axis=0) + ADJACENCY_EXTENTS])
+
+    def _get_neighbors(self, neighborhood):
+        """
+        :param neighborhood: (2, 3) box, see _get_neighborhood
+        :return: dict mapping the bodies whose AABB overlaps the box to their base pose and joint positions
+        """
+        overlapping = p.getOverlappingObjects(neighborhood[0].tolist(), neighborhood[1].tolist()) or ()
+        return {body_id: self._get_body_pose_vector(body_id) for body_id in set(item[0] for item in overlapping)}
+
+    def _neighbors_changed(self, leaf):
+        """
+        :param leaf: adjacency leaf
+        :return: whether a body appeared in, disappeared from or moved within the neighborhood of the leaf since its
+            last evaluation
+        """
+        neighbors = self._get_neighbors(leaf.neighborhood)
+        if neighbors.keys() != leaf.neighbors.keys():
+            return True
+        for body_id, pose in neighbors.items():
+            reference_pose = leaf.neighbors[body_id]
+            if (
+                reference_pose.shape != pose.shape
+                or np.max(np.abs(reference_pose - pose), initial=0.0) > self.pose_tolerance
+            ):
+                return True
+        return False
+
+    def _get_object_version(self, obj, checked_objects):
+        """
+        :param obj: simulator object
+        :param checked_objects: objects whose pose was already compared during this evaluation
+        :return: version of the object, incremented when it moved by more than pose_tolerance
+        """
+        if obj in checked_objects:
+            return self._object_versions[obj]
+        checked_objects.add(obj)
+        pose = self._get_pose_vector(obj)
+        reference_pose = self._reference_poses.get(obj)
+        if (
+            reference_pose is None
+            or reference_pose.shape != pose.shape
+            or np.max(np.abs(reference_pose - pose), initial=0.0) > self.pose_tolerance
+        ):
+            self._reference_poses[obj] = pose
+            self._object_versions[obj] = self._object_versions.get(obj, -1) + 1
+        return self._object_versions[obj]
+
+    @staticmethod
+    def _get_leaf_objects(expression):
+        """
+        :param expression: grounded predicate
+        :return: objects of the predicate
+        """
+        if isinstance(expression, BinaryAtomicFormula):
+            return [expression.scope[expression.input1], expression.scope[expression.input2]]
+        return [expression.scope[expression.input]]
+
+    def _get_leaf_inputs(self, expression, checked_objects):
+        """
+        :param expression: grounded predicate
+        :param checked_objects: objects whose pose was already compared during this evaluation
+        :return: hashable inputs of the predicate, or None if it cannot be cached
+        """
+        objs = self._get_leaf_objects(expression)
+        if any(obj is None for obj in objs):
+            return None
+
+        state_class = getattr(expression, "STATE_CLASS", None)
+        if state_class is None:
+            return None
+        if issubclass(state_class, POSE_DEPENDENT_STATES):
+            return tuple((id(obj), self._get_object_version(obj, checked_objects)) for obj in objs)
+
+        signature = objs[0].states[DERIVED_STATES.get(state_class, state_class)].get_update_signature()
+        if signature is None:
+            return None
+        return id(objs[0]), signature
+
+    def _prefetch_adjacencies(self, leaves):
+        """
+        Compute the adjacency states read by the adjacency predicates of the leaves, casting the rays of all their
+        objects in one batch per adjacency state (see get_vertical_adjacencies), instead of one per object.
+
+        :param leaves: leaves about to be evaluated
+        """
+        objs_by_state_type = {VerticalAdjacency: [], HorizontalAdjacency: []}
+        for leaf in leaves:
+            dependencies = ADJACENCY_DEPENDENCIES.get(getattr(leaf.expression, "STATE_CLASS", None))
+            if dependencies is None:
+                continue
+            for obj, state_types in zip(self._get_leaf_objects(leaf.expression), dependencies):
+                if obj is None:
+                    continue
+                for state_type in state_types:
+                    if state_type in obj.states and obj not in objs_by_state_type[state_type]:
+                        objs_by_state_type[state_type].append(obj)
+        if objs_by_state_type[VerticalAdjacency]:
+            get_vertical_adjacencies(objs_by_state_type[VerticalAdjacency])
+        if objs_by_state_type[HorizontalAdjacency]:
+            get_horizontal_adjacencies(objs_by_state_type[HorizontalAdjacency])
+
+    def _combine(self, node):
+        """
+        :param node: internal node
+        :return: value of the expression of the node from the values of its children
+        """
+        expression = node.expression
+        values = [child.value for child in node.children]
+        if isinstance(expression, (Conjunction, Universal)):
+            return all(values)
+        if isinstance(expression, (Disjunction, Existential)):
+            return any(values)
+        if isinstance(expression, NQuantifier):
+            return sum(values) == expression.N
+        if isinstance(expression, Negation):
+            return not values[0]
+        if isinstance(expression, Implication):
+            return (not values[0]) or values[1]
+        if isinstance(expression, HEAD):
+            expression.currently_satisfied = values[0]
+            return values[0]
+        values = np.array(values).reshape(node.shape)
+        num_pairs = min(node.shape) if isinstance(expression, ForPairs) else expression.N
+        return bool(
+            (np.sum(np.any(values, axis=1), axis=0) >= num_pairs)
+            and (np.sum(np.any(values, axis=0), axis=0) >= num_pairs)
+        )
+
+    def evaluate(self):
+        """
+        Evaluate the goal conditions, re-evaluating only the predicates whose inputs changed.
+
+        :return: whether all the conditions are satisfied, and dict with the indices of the satisfied and unsatisfied
+            conditions (same as evaluate_goal_conditions)
+        """
+        self.num_evaluations += 1
+        self._body_poses = {}
+        checked_objects = set()
+        leaves_to_evaluate = []
+        for leaf in self.leaves:
+            inputs = self._get_leaf_inputs(leaf.expression, checked_objects)
+            if inputs is not None and leaf.inputs is not None and inputs == leaf.inputs:
+                if leaf.neighborhood is None or not self._neighbors_changed(leaf):
+                    self.num_predicate_cache_hits += 1
+                    continue
+            leaves_to_evaluate.append((leaf, inputs))
+
+        self._prefetch_adjacencies([leaf for leaf, _ in leaves_to_evaluate])
+        dirty_nodes = set()
+        for leaf, inputs in leaves_to_evaluate:
+            self.num_predicate_evaluations += 1
+            value = leaf.expression.evaluate()
+            leaf.inputs = inputs
+            if inputs is not None and issubclass(leaf.expression.STATE_CLASS, ADJACENCY_STATES):
+                leaf.neighborhood = self._get_neighborhood(self._get_leaf_objects(leaf.expression))
+                leaf.neighbors = self._get_neighbors(leaf.neighborhood)
+            if leaf.value is None or value != leaf.value:
+                leaf.value = value
+                dirty_nodes.add(leaf.parent)
+
+        for node in self.internal_nodes:
+            if node not in dirty_nodes and node.value is not None:
+                continue
+            value = self._combine(node)
+            if value != node.value:
+                node.value = value
+                if node.parent is not None:
+                    dirty_nodes.add(node.parent)
+
+        results = {"satisfied": [], "unsatisfied": []}
+        for i, root in enumerate(self.roots):
+            results["satisfied" if root.value else "unsatisfied"].append(i)
+        return not bool(results["unsatisfied"]), results
+
+    def get_stats(self):
+        """
+        :return: dict with the number of evaluations, of predicate evaluations and cache hits, and the hit rate
+        """
+        num_predicates = self.num_predicate_evaluations + self.num_predicate_cache_hits
+        return {
+            "num_evaluations": self.num_evaluations,
+            "num_predicate_evaluations": self.num_predicate_evaluations,
+            "num_predicate_cache_hits": self.num_predicate_cache_hits,
+            "hit_rate": self.num_predicate_cache_hits / num_predicates if num_predicates > 0 else 0.0,
+        }
@@ -7,6 +7,7 @@ from igibson.reward_functions.point_goal_reward import PointGoalReward
 from igibson.reward_functions.potential_reward import PotentialReward
 from igibson.scenes.gibson_indoor_scene import StaticIndoorScene
 from igibson.scenes.igibson_indoor_scene import InteractiveIndoorScene
+from igibson.scenes.indoor_scene import IndoorScene
 from igibson.tasks.task_base import BaseTask
 from igibson.termination_conditions.max_collision import MaxCollision
 from igibson.termination_conditions.out_of_bound import OutOfBound
@@ -46,6 +47,11 @@ class PointNavFixedTask(BaseTask):
         self.visible_path = self.config.get("visible_path", False)
         self.floor_num = 0
 
+        # Whether to compute geodesic distances and shortest paths from a precomputed distance field of the target
+        # instead of planning from scratch every time, and whether to cache these fields on disk across episodes
+        self.use_geodesic_distance_field = self.config.get("use_geodesic_distance_field", False)
+        self.cache_geodesic_distance_field = self.config.get("cache_geodesic_distance_field", True)
+
         self.load_visualization(env)
 
     def load_visualization(self, env):
@@ -109,9 +115,25 @@ class PointNavFixedTask(BaseTask):
         :param env: environment instance
         :return: geodesic distance to the target position
         """
+        if self.has_geodesic_distance_field(env):
+            return env.scene.get_geodesic_distance(
+                self.floor_num,
+                env.robots[0].get_position()[:2],
+                self.target_pos[:2],
+                use_disk_cache=self.cache_geodesic_distance_field,
+            )
         _, geodesic_dist = self.get_shortest_path(env)
         return geodesic_dist
 
+    def has_geodesic_distance_field(self, env):
+        """
+        Whether geodesic distances to the target are looked up in a distance field
+
+        :param env: environment instance
+        :return: True if distance fields are enabled and supported by the scene
+        """
+        return self.use_geodesic_distance_field and isinstance(env.scene, IndoorScene) and env.scene.build_graph
+
     def get_l2_potential(self, env):
         """
         Get potential based on L2 distance
@@ -214,6 +236,15 @@ class PointNavFixedTask(BaseTask):
         else:
             source = env.robots[0].get_position()[:2]
         target = self.target_pos[:2]
+        if self.has_geodesic_distance_field(env):
+            return env.scene.get_shortest_path(
+                self.floor_num,
+                source,
+                target,
+                entire_path=entire_path,
+                use_distance_field=True,
+                use_disk_cache=self.cache_geodesic_distance_field,
+            )
         return env.scene.get_shortest_path(self.floor_num, source, target, entire_path=entire_path)
 
     def step_visualization(self, env):
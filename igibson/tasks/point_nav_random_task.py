@@ -19,6 +19,8 @@ class PointNavRandomTask(PointNavFixedTask):
         super(PointNavRandomTask, self).__init__(env)
         self.target_dist_min = self.config.get("target_dist_min", 1.0)
         self.target_dist_max = self.config.get("target_dist_max", 10.0)
+        # Random targets are rarely reused, so their distance fields are not cached on disk by default
+        self.cache_geodesic_distance_field = self.config.get("cache_geodesic_distance_field", False)
 
     def sample_initial_pose_and_target_pos(self, env):
         """
@@ -32,7 +34,12 @@ class PointNavRandomTask(PointNavFixedTask):
         dist = 0.0
         for _ in range(max_trials):
             _, target_pos = env.scene.get_random_point(floor=self.floor_num)
-            if env.scene.build_graph:
+            if self.has_geodesic_distance_field(env):
+                # Geodesic distance is symmetric: all candidate targets are looked up in the field of the initial pose
+                dist = env.scene.get_geodesic_distance(
+                    self.floor_num, target_pos[:2], initial_pos[:2], use_disk_cache=False
+                )
+            elif env.scene.build_graph:
                 _, dist = env.scene.get_shortest_path(
                     self.floor_num, initial_pos[:2], target_pos[:2], entire_path=False
                 )
@@ -1,14 +1,44 @@
 """This file contains utils for BEHAVIOR demo replay checkpoints."""
+
 import os
 
 
-def save_checkpoint(simulator, root_directory):
+def save_checkpoint(simulator, root_directory, use_snapshot=False):
+    """
+    Save a checkpoint of the current frame.
+
+    :param simulator: Simulator to save
+    :param root_directory: directory of the checkpoints
+    :param use_snapshot: whether to save a single binary snapshot file (see SnapshotManager.save_to_file), which
+        loads much faster, instead of a scene URDF and a .bullet file
+    """
+    if use_snapshot:
+        snapshot_path = os.path.join(root_directory, "%d.snapshot" % simulator.frame_count)
+        snapshot_id = simulator.save_snapshot()
+        simulator.snapshot_manager.save_to_file(snapshot_id, snapshot_path)
+        simulator.remove_snapshot(snapshot_id)
+        return
+
     bullet_path = os.path.join(root_directory, "%d.bullet" % simulator.frame_count)
     urdf_path = os.path.join(root_directory, "%d.urdf" % simulator.frame_count)
     simulator.scene.save(urdf_path=urdf_path, pybullet_filename=bullet_path)
 
 
 def load_checkpoint(simulator, root_directory, frame):
+    """
+    Load the checkpoint of a frame, from a snapshot file if there is one, otherwise from the scene URDF and .bullet
+    file.
+
+    :param simulator: Simulator to restore
+    :param root_directory: directory of the checkpoints
+    :param frame: frame of the checkpoint
+    """
+    snapshot_path = os.path.join(root_directory, "%d.snapshot" % frame)
+    if os.path.exists(snapshot_path):
+        snapshot_id = simulator.snapshot_manager.restore_from_file(snapshot_path)
+        simulator.remove_snapshot(snapshot_id)
+        return
+
     bullet_path = os.path.join(root_directory, "%d.bullet" % frame)
     urdf_path = os.path.join(root_directory, "%d.urdf" % frame)
     simulator.scene.restore(urdf_path=urdf_path, pybullet_filename=bullet_path)
@@ -0,0 +1,157 @@
+import numpy as np
+import pybullet as p
+
+CONTACT_DTYPE = np.dtype(
+    [
+        ("body_a", np.int32),
+        ("body_b", np.int32),
+        ("link_a", np.int32),
+        ("link_b", np.int32),
+        ("position_on_a", np.float64, 3),
+        ("position_on_b", np.float64, 3),
+        ("normal_on_b", np.float64, 3),
+        ("distance", np.float64),
+        ("normal_force", np.float64),
+    ]
+)
+
+# Incremented whenever the contacts of the simulation may have changed outside of Simulator.step, see
+# invalidate_contacts
+_contacts_generation = 0
+
+
+def invalidate_contacts():
+    """
+    Drop the contact snapshots of all the ContactManagers. To be called after the contacts have been recomputed or
+    restored without stepping the simulator, e.g. after a raw p.stepSimulation, p.performCollisionDetection or
+    p.restoreState call (utils.restoreState calls it).
+    """
+    global _contacts_generation
+    _contacts_generation += 1
+
+
+def swap_contact_point(contact_point):
+    """
+    Swap bodies A and B of a pybullet contact point, as p.getContactPoints(bodyA=...) does for the contacts in which
+    the queried body is body B.
+
+    :param contact_point: contact point tuple returned by p.getContactPoints
+    :return: the same contact point seen from body B
+    """
+    flag, body_a, body_b, link_a, link_b, position_on_a, position_on_b, normal_on_b = contact_point[:8]
+    normal_on_a = tuple(-x for x in normal_on_b)
+    return (flag, body_b, body_a, link_b, link_a, position_on_b, position_on_a, normal_on_a) + tuple(contact_point[8:])
+
+
+class ContactManager(object):
+    """
+    Per-step snapshot of all the contact points of the simulation. The first query after a simulator step fetches all
+    the contact points with a single p.getContactPoints() call, and every other query of the step (per object, per
+    body pair or per link) is answered from the snapshot, with the same results as the corresponding
+    p.getContactPoints call.
+
+    Every contact is stored twice, once from the point of view of each body, in a structured array (see
+    CONTACT_DTYPE) whose rows are grouped by body A.
+
+    The snapshot is also dropped when the contacts change outside of the simulator step (see invalidate_contacts),
+    e.g. when the sampling code steps the physics or restores a state.
+    """
+
+    def __init__(self):
+        self.num_queries = 0
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Drop the snapshot, e.g. after the simulation has been stepped. The next query fetches the contacts again.
+        """
+        self.contact_points = None
+        self.contact_array = None
+        self._original_rows = None
+        self._rows_by_body = None
+        self._generation = None
+
+    def _update(self):
+        """
+        Fetch all the contact points and index them by body.
+        """
+        self.num_queries += 1
+        contact_points = []
+        original_rows = []
+        for contact_point in p.getContactPoints():
+            original_rows.append(len(contact_points))
+            contact_points.append(contact_point)
+            # pybullet does not swap self-collisions, which are reported from the point of view of body A only.
+            if contact_point[1] != contact_point[2]:
+                contact_points.append(swap_contact_point(contact_point))
+
+        contact_array = np.zeros(len(contact_points), dtype=CONTACT_DTYPE)
+        if contact_points:
+            contact_array["body_a"], contact_array["body_b"], contact_array["link_a"], contact_array["link_b"] = zip(
+                *[contact_point[1:5] for contact_point in contact_points]
+            )
+            contact_array["position_on_a"] = [contact_point[5] for contact_point in contact_points]
+            contact_array["position_on_b"] = [contact_point[6] for contact_point in contact_points]
+            contact_array["normal_on_b"] = [contact_point[7] for contact_point in contact_points]
+            contact_array["distance"] = [contact_point[8] for contact_point in contact_points]
+            contact_array["normal_force"] = [contact_point[9] for contact_point in contact_points]
+
+        # Group the rows by body A, keeping the pybullet order within each group.
+        order = np.argsort(contact_array["body_a"], kind="stable")
+        bodies, starts = np.unique(contact_array["body_a"][order], return_index=True)
+        self._rows_by_body = dict(zip(bodies.tolist(), np.split(order, starts[1:])))
+        self._original_rows = np.array(original_rows, dtype=int)
+        self.contact_points = contact_points
+        self.contact_array = contact_array
+        self._generation = _contacts_generation
+
+    def _get_rows(self, body_a=None, link_a=None, body_b=None, link_b=None):
+        """
+        :return: rows of the snapshot matching the filters, see get_contact_points
+        """
+        if self.contact_points is None or self._generation != _contacts_generation:
+            self._update()
+        if body_a is None:
+            rows = self._original_rows
+        else:
+            rows = self._rows_by_body.get(body_a, self._original_rows[:0])
+        for field, value in (("link_a", link_a), ("body_b", body_b), ("link_b", link_b)):
+            if value is not None:
+                rows = rows[self.contact_array[field][rows] == value]
+        return rows
+
+    def get_contact_points(self, body_a=None, link_a=None, body_b=None, link_b=None):
+        """
+        Get contact points from the snapshot, equivalent to p.getContactPoints(bodyA=body_a, bodyB=body_b,
+        linkIndexA=link_a, linkIndexB=link_b).
+
+        :param body_a: body whose contacts are returned (as body A), all the contacts if None
+        :param link_a: only return the contacts of this link of body_a
+        :param body_b: only return the contacts with this body
+        :param link_b: only return the contacts with this link of body_b
+        :return: list of pybullet contact point tuples
+        """
+        return [self.contact_points[row] for row in self._get_rows(body_a, link_a, body_b, link_b)]
+
+    def get_contact_points_for_bodies(self, body_ids):
+        """
+        Get the contact points of all the bodies of an object.
+
+        :param body_ids: body ids of the object
+        :return: list of pybullet contact point tuples, with the object's bodies as body A
+        """
+        return [contact_point for body_id in body_ids for contact_point in self.get_contact_points(body_a=body_id)]
+
+    def get_contact_array(self, body_a=None, link_a=None, body_b=None, link_b=None):
+        """
+        Same as get_contact_points, but returns the contacts as a structured array (see CONTACT_DTYPE).
+        """
+        return self.contact_array[self._get_rows(body_a, link_a, body_b, link_b)]
+
+    def in_contact(self, body_a, body_b):
+        """
+        :param body_a: first body
+        :param body_b: second body
+        :return: whether the two bodies are in contact
+        """
+        return len(self._get_rows(body_a=body_a, body_b=body_b)) > 0
@@ -0,0 +1,126 @@
+"""
+Pre-generate sampled instances of a BEHAVIOR activity into a sampling cache, in parallel worker processes.
+An environment created later with the same config, sampling_cache_dir and sampling_seed restores the cached instance
+instead of sampling it.
+
+Example:
+python -m igibson.utils.data_utils.sampling_task.sampling_cache_generator --task cleaning_out_drawers \
+    --scenes Benevolence_1_int Rs_int --num_instances 20 --num_workers 4 --cache_dir ~/behavior_sampling_cache
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import time
+
+import bddl
+from bddl.activity import Conditions
+
+import igibson
+from igibson.tasks.behavior_instance_cache import (
+    BehaviorInstanceCache,
+    get_activity_hash,
+    get_instance_key,
+    get_scene_loading_config,
+)
+from igibson.utils.assets_utils import get_available_ig_scenes
+from igibson.utils.utils import parse_config
+
+log = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--task", type=str, required=True, help="Name of ATUS task matching BDDL parent folder in bddl."
+    )
+    parser.add_argument("--task_id", type=int, default=0, help="BDDL integer ID, matching suffix of bddl.")
+    parser.add_argument("--scenes", type=str, nargs="+", help="A list of scenes to sample the BDDL description.")
+    parser.add_argument("--num_instances", type=int, default=10, help="Number of instances (seeds) per scene.")
+    parser.add_argument("--start_seed", type=int, default=0, help="Seed of the first instance.")
+    parser.add_argument("--num_workers", type=int, default=1, help="Number of worker processes.")
+    parser.add_argument("--cache_dir", type=str, required=True, help="Directory of the sampling cache.")
+    parser.add_argument(
+        "--config",
+        type=str,
+        default=os.path.join(igibson.configs_path, "behavior_robot_mp_behavior_task.yaml"),
+        help="Environment config, its robot and load_clutter are part of the instance keys.",
+    )
+    return parser.parse_args()
+
+
+def sample_instance(job):
+    """
+    Sample an instance in a new environment, which saves it to the sampling cache.
+
+    :param job: (env_config, scene_id, seed)
+    :return: (scene_id, seed, success, feedback, sampling time)
+    """
+    # Imported here so that the main process does not need to load the simulator
+    from igibson.envs.igibson_env import iGibsonEnv
+
+    env_config, scene_id, seed = job
+    start = time.time()
+    env = iGibsonEnv(config_file=dict(env_config, scene_id=scene_id, sampling_seed=seed), mode="headless")
+    success, feedback = env.task.initialized, env.task.feedback
+    env.close()
+    return scene_id, seed, success, feedback, time.time() - start
+
+
+def main():
+    args = parse_args()
+    env_config = parse_config(args.config)
+    env_config["task"] = args.task
+    env_config["task_id"] = args.task_id
+    env_config["online_sampling"] = True
+    env_config["sampling_cache_dir"] = args.cache_dir
+    env_config["num_sampling_workers"] = 0
+
+    if args.scenes is not None:
+        scene_choices = args.scenes
+    else:
+        scene_json = os.path.join(os.path.dirname(bddl.__file__), "activity_to_preselected_scenes.json")
+        with open(scene_json) as f:
+            activity_to_scenes = json.load(f)
+        if args.task in activity_to_scenes:
+            scene_choices = activity_to_scenes[args.task]
+        else:
+            scene_choices = [item for item in get_available_ig_scenes() if item.endswith("_int")]
+
+    cache = BehaviorInstanceCache(args.cache_dir)
+    activity_hash = get_activity_hash(Conditions(args.task, args.task_id, simulator_name="igibson"))
+    jobs = []
+    for scene_id in scene_choices:
+        for seed in range(args.start_seed, args.start_seed + args.num_instances):
+            key = get_instance_key(
+                activity_hash,
+                scene_id,
+                env_config["robot"]["name"],
+                seed,
+                env_config.get("load_clutter", True),
+                get_scene_loading_config(env_config),
+            )
+            if key in cache:
+                log.info("Already cached: {} seed {}".format(scene_id, seed))
+                continue
+            jobs.append((env_config, scene_id, seed))
+    log.info("Sampling {} instances of {} with {} workers".format(len(jobs), args.task, args.num_workers))
+
+    # One environment per process: the simulator does not free all its resources when it is closed
+    context = multiprocessing.get_context("spawn")
+    num_successes = 0
+    with context.Pool(args.num_workers, maxtasksperchild=1) as pool:
+        for scene_id, seed, success, feedback, duration in pool.imap_unordered(sample_instance, jobs):
+            num_successes += int(success)
+            if success:
+                log.info("Sampled {} seed {} in {:.1f}s".format(scene_id, seed, duration))
+            else:
+                log.warning("Failed to sample {} seed {}: {}".format(scene_id, seed, feedback))
+    log.info("Sampled {} / {} instances".format(num_successes, len(jobs)))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,231 @@
+import heapq
+import math
+
+import numpy as np
+import scipy.sparse
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+
+# 8-connected neighbourhood of a grid cell and the cost of moving to each neighbour
+GRID_NEIGHBOR_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+GRID_NEIGHBOR_COSTS = tuple(math.hypot(di, dj) for di, dj in GRID_NEIGHBOR_OFFSETS)
+# Offsets to half of the 8-neighbourhood of a cell, the other half is covered by symmetry
+GRID_HALF_NEIGHBOR_OFFSETS = ((0, 1), (1, -1), (1, 0), (1, 1))
+_SQRT2_MINUS_2 = math.sqrt(2) - 2
+
+
+def octile_distance(a, b):
+    """
+    Octile distance between two grid cells, i.e. the shortest path length on an obstacle-free 8-connected grid
+
+    :param a: (row, col) grid cell
+    :param b: (row, col) grid cell
+    :return: octile distance
+    """
+    di = abs(a[0] - b[0])
+    dj = abs(a[1] - b[1])
+    return di + dj + _SQRT2_MINUS_2 * min(di, dj)
+
+
+def build_grid_adjacency(mask):
+    """
+    Build the 8-connected adjacency matrix of the traversable cells of a grid, weighted by the L2 distance between cells
+
+    :param mask: boolean traversability mask
+    :return: symmetric scipy.sparse.csr_matrix indexed by the row-major order of the traversable cells
+    """
+    height, width = mask.shape
+    node_index = -np.ones(mask.shape, dtype=np.int64)
+    node_index[mask] = np.arange(np.count_nonzero(mask))
+
+    rows, cols, weights = [], [], []
+    for di, dj in GRID_HALF_NEIGHBOR_OFFSETS:
+        # Cells (i, j) whose neighbour (i + di, j + dj) is inside the map
+        src = node_index[: height - di, max(0, -dj) : width - max(0, dj)]
+        dst = node_index[di:, max(0, dj) : width - max(0, -dj)]
+        valid = (src >= 0) & (dst >= 0)
+        rows.append(src[valid])
+        cols.append(dst[valid])
+        weights.append(np.full(np.count_nonzero(valid), math.hypot(di, dj)))
+
+    rows, cols, weights = np.concatenate(rows), np.concatenate(cols), np.concatenate(weights)
+    num_nodes = np.count_nonzero(mask)
+    adjacency = scipy.sparse.coo_matrix(
+        (np.concatenate([weights, weights]), (np.concatenate([rows, cols]), np.concatenate([cols, rows]))),
+        shape=(num_nodes, num_nodes),
+    )
+    return adjacency.tocsr()
+
+
+class GridPlanner(object):
+    """
+    Shortest path planner that works directly on an 8-connected traversability map.
+    Planning uses A* with an octile heuristic and keeps the open and closed sets in flat arrays indexed by
+    row * width + col, so no graph needs to be built. Off-grid queries are snapped to the closest traversable cell
+    using a KD-tree built once over the traversable cells.
+    """
+
+    def __init__(self, trav_map, adjacency=None):
+        """
+        :param trav_map: 2D traversability map, cells > 0 are traversable
+        :param adjacency: optional adjacency matrix of the traversable cells (see build_grid_adjacency), used to
+            compute distance fields. Built from trav_map when needed if not given.
+        """
+        trav_map = np.asarray(trav_map)
+        self.mask = trav_map > 0
+        self.height, self.width = trav_map.shape
+        self.traversable = bytearray(self.mask.ravel().astype(np.uint8).tobytes())
+        self.cells = np.argwhere(self.mask)
+        self.kd_tree = cKDTree(self.cells) if len(self.cells) > 0 else None
+        self.adjacency = adjacency
+
+    def is_traversable(self, map_xy):
+        """
+        :param map_xy: (row, col) map coordinates
+        :return: whether the cell is inside the map and traversable
+        """
+        i, j = int(map_xy[0]), int(map_xy[1])
+        return 0 <= i < self.height and 0 <= j < self.width and self.traversable[i * self.width + j] == 1
+
+    def snap(self, map_xy):
+        """
+        :param map_xy: (row, col) map coordinates, possibly outside of the map
+        :return: (row, col) closest traversable cell
+        """
+        assert self.kd_tree is not None, "traversability map has no traversable cells"
+        _, idx = self.kd_tree.query(map_xy)
+        return tuple(self.cells[idx].tolist())
+
+    def plan(self, source, target):
+        """
+        A* search between two traversable cells
+
+        :param source: (row, col) source cell, must be traversable
+        :param target: (row, col) target cell, must be traversable
+        :return: list of (row, col) cells from source to target (both included), or None if there is no path
+        """
+        if not self.is_traversable(source) or not self.is_traversable(target):
+            return None
+
+        height, width = self.height, self.width
+        traversable = self.traversable
+        source_idx = int(source[0]) * width + int(source[1])
+        target_idx = int(target[0]) * width + int(target[1])
+        target_i, target_j = divmod(target_idx, width)
+
+        num_cells = height * width
+        g_score = [math.inf] * num_cells
+        parent = [-1] * num_cells
+        closed = bytearray(num_cells)
+
+        g_score[source_idx] = 0.0
+        # Ties are broken towards larger g (i.e. closer to the target), which expands fewer cells on open grids
+        open_heap = [(octile_distance(divmod(source_idx, width), (target_i, target_j)), 0.0, source_idx)]
+        neighbors = tuple(zip(GRID_NEIGHBOR_OFFSETS, GRID_NEIGHBOR_COSTS))
+        while open_heap:
+            _, neg_g, idx = heapq.heappop(open_heap)
+            if closed[idx]:
+                continue
+            if idx == target_idx:
+                break
+            closed[idx] = 1
+            i, j = divmod(idx, width)
+            g = -neg_g
+            for (di, dj), cost in neighbors:
+                ni = i + di
+                nj = j + dj
+                if ni < 0 or ni >= height or nj < 0 or nj >= width:
+                    continue
+                n_idx = ni * width + nj
+                if closed[n_idx] or not traversable[n_idx]:
+                    continue
+                n_g = g + cost
+                if n_g < g_score[n_idx]:
+                    g_score[n_idx] = n_g
+                    parent[n_idx] = idx
+                    dti = abs(ni - target_i)
+                    dtj = abs(nj - target_j)
+                    h = dti + dtj + _SQRT2_MINUS_2 * (dti if dti < dtj else dtj)
+                    heapq.heappush(open_heap, (n_g + h, -n_g, n_idx))
+        else:
+            return None
+
+        path = [target_idx]
+        while path[-1] != source_idx:
+            path.append(parent[path[-1]])
+        return [divmod(idx, width) for idx in reversed(path)]
+
+    def distance_field(self, target):
+        """
+        Compute the geodesic distance from every cell to a target cell, using the same 8-connected metric as plan
+
+        :param target: (row, col) target cell, must be traversable
+        :return: GeodesicDistanceField to the target
+        """
+        assert self.is_traversable(target), "target of a distance field must be traversable"
+        if self.adjacency is None:
+            self.adjacency = build_grid_adjacency(self.mask)
+        target_node = int(np.count_nonzero(self.mask.ravel()[: int(target[0]) * self.width + int(target[1])]))
+        distances = np.full((self.height, self.width), np.inf, dtype=np.float32)
+        distances[self.mask] = dijkstra(self.adjacency, directed=False, indices=target_node)
+        return GeodesicDistanceField(distances, target)
+
+
+class GeodesicDistanceField(object):
+    """
+    Single-target geodesic distance field over a traversability map.
+    Distances are looked up in O(1) and shortest paths are recovered by descending the field.
+    """
+
+    def __init__(self, distances, target):
+        """
+        :param distances: (H, W) array of geodesic distances (in cells) to the target, inf where not reachable
+        :param target: (row, col) target cell
+        """
+        self.distances = distances
+        self.target = tuple(int(x) for x in target)
+        self._next_cell = None
+
+    def get_distance(self, cell):
+        """
+        :param cell: (row, col) cell
+        :return: geodesic distance (in cells) from the cell to the target
+        """
+        return float(self.distances[int(cell[0]), int(cell[1])])
+
+    def _compute_next_cell(self):
+        """
+        For every cell, compute the flat index of the neighbour that lies on a shortest path to the target
+        """
+        height, width = self.distances.shape
+        padded = np.pad(self.distances, 1, mode="constant", constant_values=np.inf)
+        candidates = np.stack(
+            [
+                padded[1 + di : 1 + di + height, 1 + dj : 1 + dj + width] + cost
+                for (di, dj), cost in zip(GRID_NEIGHBOR_OFFSETS, GRID_NEIGHBOR_COSTS)
+            ]
+        )
+        best = np.argmin(candidates, axis=0)
+        offsets = np.array([di * width + dj for di, dj in GRID_NEIGHBOR_OFFSETS])
+        self._next_cell = np.arange(height * width).reshape(height, width) + offsets[best]
+
+    def get_path(self, source):
+        """
+        Follow the field from a source cell down to the target
+
+        :param source: (row, col) traversable source cell
+        :return: list of (row, col) cells from source to target (both included), or None if there is no path
+        """
+        if not np.isfinite(self.get_distance(source)):
+            return None
+        if self._next_cell is None:
+            self._compute_next_cell()
+        width = self.distances.shape[1]
+        next_cell = self._next_cell.ravel()
+        idx = int(source[0]) * width + int(source[1])
+        target_idx = self.target[0] * width + self.target[1]
+        path = [idx]
+        while idx != target_idx:
+            idx = int(next_cell[idx])
+            path.append(idx)
+        return [divmod(idx, width) for idx in path]
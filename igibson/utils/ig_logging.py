@@ -5,6 +5,10 @@ can be used to write regular logs, iGATUS task logs or VR logs to HDF5 for savin
 
 import copy
 import datetime
+import json
+import os
+import queue
+import threading
 import time
 
 import h5py
@@ -42,6 +46,11 @@ class IGLogWriter(object):
         filter_objects=True,
         profiling_mode=False,
         log_status=True,
+        async_write=False,
+        max_queued_writes=4,
+        pose_dtype=np.float64,
+        compression=None,
+        compression_opts=None,
     ):
         """
         Initializes IGLogWriter
@@ -54,6 +63,14 @@ class IGLogWriter(object):
         :param filter_objects: whether to filter objects
         :param profiling_mode: whether to print out how much time each log-write takes
         :param log_status: whether to log status updates to the console
+        :param async_write: whether to write to HDF5 in a background thread instead of on the simulation thread
+        :param max_queued_writes: maximum number of blocks of frames_before_write frames waiting to be written by the
+            background thread. process_frame blocks when the queue is full.
+        :param pose_dtype: dtype of the stored physics data (positions, orientations and joint states). np.float32
+            halves the size of long recordings, np.float64 keeps the exact simulator values.
+        :param compression: HDF5 compression filter of the datasets (e.g. "gzip" or "lzf"), None for no compression.
+            Datasets are chunked by blocks of frames_before_write frames.
+        :param compression_opts: options of the compression filter (e.g. the gzip level)
         """
         self.sim = sim
         # The number of frames to store data on the stack before writing to HDF5.
@@ -89,6 +106,18 @@ class IGLogWriter(object):
         self.default_fill_sentinel = -1.0
         # Numpy dtype common to all values
         self.np_dtype = np.float64
+        # Numpy dtype of the stored physics data
+        self.pose_dtype = pose_dtype
+        self.compression = compression
+        self.compression_opts = compression_opts
+        # Background writer thread and its queue of blocks of frames to write
+        self.async_write = async_write
+        self.max_queued_writes = max_queued_writes
+        self.write_queue = None
+        self.writer_thread = None
+        self.writer_exception = None
+        # Number of frames handed to write_to_hdf5 so far
+        self.frames_submitted = 0
         # Counts number of frames (reset to 0 every self.frames_before_write)
         self.frame_counter = 0
         # Counts number of frames and does not reset
@@ -269,9 +298,25 @@ class IGLogWriter(object):
             curr_data_shape = (0,) + self.get_data_for_name_path(name_path).shape[1:]
             # None as first shape value allows dataset to grow without bound through time
             max_shape = (None,) + curr_data_shape[1:]
+            # Chunk by blocks of frames_before_write frames, so that every write fills whole chunks.
+            # Datasets without data (e.g. joint states of objects without joints) cannot be chunked.
+            if np.prod(curr_data_shape[1:]) > 0:
+                chunks = (self.frames_before_write,) + curr_data_shape[1:]
+                compression = self.compression
+            else:
+                chunks = None
+                compression = None
             # Create_dataset with a '/'-joined path automatically creates the required groups
-            # Important note: we store values with double precision to avoid truncation
-            hf.create_dataset(joined_path, curr_data_shape, maxshape=max_shape, dtype=np.float64)
+            # Important note: unless pose_dtype is changed, we store values with double precision to avoid truncation
+            hf.create_dataset(
+                joined_path,
+                curr_data_shape,
+                maxshape=max_shape,
+                dtype=self.get_dtype_for_name_path(name_path),
+                chunks=chunks,
+                compression=compression,
+                compression_opts=self.compression_opts if compression is not None else None,
+            )
 
         hf.close()
         # Now open in r+ mode to append to the file
@@ -293,6 +338,17 @@ class IGLogWriter(object):
         if self.store_vr:
             self.hf.attrs["/metadata/vr_settings"] = self.sim.vr_settings.dump_vr_settings()
 
+        if self.async_write:
+            self.write_queue = queue.Queue(maxsize=self.max_queued_writes)
+            self.writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+            self.writer_thread.start()
+
+    def get_dtype_for_name_path(self, name_path):
+        """Returns the dtype used to store the data at a name path in the HDF5 file."""
+        if name_path[0] == "physics_data":
+            return self.pose_dtype
+        return np.float64
+
     def get_data_for_name_path(self, name_path):
         """Resolves a list of names (group/dataset) into a numpy array.
         eg. [vr, vr_camera, right_eye_view] -> self.data_map['vr']['vr_camera']['right_eye_view']"""
@@ -437,9 +493,7 @@ class IGLogWriter(object):
                 handle = self.data_map["physics_data"][obj_name]
                 handle["position"][self.frame_counter] = pos
                 handle["orientation"][self.frame_counter] = orn
-                handle["joint_state"][self.frame_counter] = np.array(
-                    [p.getJointState(obj_bid, n)[0] for n in range(self.joint_map[obj_bid])]
-                )
+                self.write_joint_states_to_map(obj_bid, handle)
         else:
             for bid in self.tracked_objects:
                 obj_name = str(bid)
@@ -447,9 +501,13 @@ class IGLogWriter(object):
                 handle = self.data_map["physics_data"][obj_name]
                 handle["position"][self.frame_counter] = pos
                 handle["orientation"][self.frame_counter] = orn
-                handle["joint_state"][self.frame_counter] = np.array(
-                    [p.getJointState(bid, n)[0] for n in range(self.joint_map[bid])]
-                )
+                self.write_joint_states_to_map(bid, handle)
+
+    def write_joint_states_to_map(self, bid, handle):
+        """Write the joint positions of a body to its physics data map, with a single getJointStates call."""
+        if self.joint_map[bid] > 0:
+            joint_states = p.getJointStates(bid, range(self.joint_map[bid]))
+            handle["joint_state"][self.frame_counter] = [joint_state[0] for joint_state in joint_states]
 
     def _print_pybullet_data(self):
         """Print pybullet debug data - hidden API since this is used for debugging purposes only."""
@@ -523,15 +581,25 @@ class IGLogWriter(object):
 
         start_time = time.time()
 
-        frames_to_write = self.persistent_frame_count - self.hf["frame_data"].shape[0]
+        frames_to_write = self.persistent_frame_count - self.frames_submitted
         if frames_to_write > 0:
-            for name_path in self.name_path_data:
-                curr_dset = self.hf["/".join(name_path)]
-                # Resize to accommodate new data
-                curr_dset.resize(curr_dset.shape[0] + frames_to_write, axis=0)
-                # Set the last frames_to_write rows to numpy data from data map
-                curr_dset[-frames_to_write:, ...] = self.get_data_for_name_path(name_path)[:frames_to_write, ...]
+            if self.async_write:
+                self._raise_writer_exception()
+                # Hand a copy of the new rows to the writer thread, the data map is reused for the next frames.
+                block = [
+                    (name_path, self.get_data_for_name_path(name_path)[:frames_to_write, ...].copy())
+                    for name_path in self.name_path_data
+                ]
+                self.write_queue.put(block)
+            else:
+                self._write_block_to_hdf5(
+                    [
+                        (name_path, self.get_data_for_name_path(name_path)[:frames_to_write, ...])
+                        for name_path in self.name_path_data
+                    ]
+                )
 
+            self.frames_submitted += frames_to_write
             self.refresh_data_map()
             self.frame_counter = 0
 
@@ -539,27 +607,105 @@ class IGLogWriter(object):
         if self.profiling_mode:
             print("Time to write: {0}".format(delta))
 
+    def _write_block_to_hdf5(self, block):
+        """Appends a block of frames to the HDF5 datasets.
+
+        Args:
+            block: list of (name_path, data) pairs, where data holds the new rows of the dataset at name_path
+        """
+        for name_path, data in block:
+            curr_dset = self.hf["/".join(name_path)]
+            # Resize to accommodate new data
+            curr_dset.resize(curr_dset.shape[0] + data.shape[0], axis=0)
+            # Set the last rows to the new data
+            curr_dset[-data.shape[0] :, ...] = data
+
+    def _writer_loop(self):
+        """Main loop of the background writer thread: writes the queued blocks until it receives None."""
+        while True:
+            block = self.write_queue.get()
+            try:
+                if block is None:
+                    return
+                if self.writer_exception is None:
+                    self._write_block_to_hdf5(block)
+            except Exception as e:
+                self.writer_exception = e
+            finally:
+                self.write_queue.task_done()
+
+    def _raise_writer_exception(self):
+        """Re-raises an exception of the background writer thread in the simulation thread."""
+        if self.writer_exception is not None:
+            raise RuntimeError("IGLogWriter background write failed") from self.writer_exception
+
     def end_log_session(self):
         """Closes hdf5 log file at end of logging session."""
         # Write the remaining data to hdf
         self.write_to_hdf5()
+        if self.writer_thread is not None:
+            # Wait for the queued writes to be done
+            self.write_queue.put(None)
+            self.writer_thread.join()
+            self.writer_thread = None
         if self.log_status:
             print("IG LOGGER INFO: Ending log writing session after {} frames".format(self.persistent_frame_count))
         self.hf.close()
+        self._raise_writer_exception()
+
+
+class MemmapLog(object):
+    """Read-only, h5py.File-like view of a log exported with IGLogReader.export_to_npy. Every dataset is a
+    memory-mapped .npy file, so slicing frames only reads the pages that are accessed."""
+
+    INDEX_FILENAME = "index.json"
+
+    def __init__(self, log_dir):
+        """
+        :param log_dir: directory written by IGLogReader.export_to_npy
+        """
+        with open(os.path.join(log_dir, self.INDEX_FILENAME), "r") as f:
+            index = json.load(f)
+        self.attrs = index["attrs"]
+        self.datasets = {
+            path: np.load(os.path.join(log_dir, filename), mmap_mode="r")
+            for path, filename in index["datasets"].items()
+        }
+
+    def __getitem__(self, path):
+        return self.datasets[path.strip("/")]
+
+    def __contains__(self, path):
+        return path.strip("/") in self.datasets
+
+    def get_dataset_paths(self):
+        return list(self.datasets.keys())
+
+    def close(self):
+        self.datasets = {}
+
+
+def open_log(log_filepath):
+    """Opens a log for reading: an HDF5 file, or a directory exported with IGLogReader.export_to_npy."""
+    if os.path.isdir(log_filepath):
+        return MemmapLog(log_filepath)
+    return h5py.File(log_filepath, "r")
 
 
 class IGLogReader(object):
     def __init__(self, log_filepath, log_status=True):
         """
-        :param log_filepath: path for logging files to be read from
+        :param log_filepath: path for logging files to be read from. This can be an HDF5 file, or a directory exported
+            with IGLogReader.export_to_npy for memory-mapped access.
         :param log_status: whether to print status updates to the command line
         """
         self.log_filepath = log_filepath
         self.log_status = log_status
         # Frame counter keeping track of how many frames have been reproduced
         self.frame_counter = -1
-        self.hf = h5py.File(self.log_filepath, "r")
-        self.pb_ids = [p.getBodyUniqueId(i) for i in range(p.getNumBodies())]
+        self.hf = open_log(self.log_filepath)
+        # Logs can also be read for offline analysis, without a physics server
+        self.pb_ids = [p.getBodyUniqueId(i) for i in range(p.getNumBodies())] if p.isConnected() else []
         # Get total frame num (dataset row length) from an arbitary dataset
         self.total_frame_num = self.hf["frame_data"].shape[0]
         # Placeholder VrData object, which will be filled every frame if we are performing action replay
@@ -568,9 +714,49 @@ class IGLogReader(object):
             print("----- IGLogReader initialized -----")
             print("Preparing to read {0} frames".format(self.total_frame_num))
 
+    @staticmethod
+    def export_to_npy(log_filepath, out_dir):
+        """
+        Exports an HDF5 log to a flat layout that can be memory-mapped: one .npy file per dataset, and an index.json
+        file with the dataset paths and the metadata attributes. The exported directory can be read with IGLogReader
+        like the HDF5 file.
+
+        :param log_filepath: HDF5 log to export
+        :param out_dir: directory to write the exported log to
+        """
+        if not os.path.isdir(out_dir):
+            os.makedirs(out_dir)
+        datasets = {}
+        with h5py.File(log_filepath, "r") as hf:
+            for path in IGLogReader.get_dataset_paths_of_file(hf):
+                filename = path.replace("/", ".") + ".npy"
+                np.save(os.path.join(out_dir, filename), hf[path][...])
+                datasets[path] = filename
+            # Metadata attributes are strings or numpy scalars
+            attrs = {key: value.item() if hasattr(value, "item") else value for key, value in hf.attrs.items()}
+        with open(os.path.join(out_dir, MemmapLog.INDEX_FILENAME), "w") as f:
+            json.dump({"datasets": datasets, "attrs": attrs}, f, indent=2)
+
+    @staticmethod
+    def get_dataset_paths_of_file(hf):
+        """
+        Returns the paths of all the datasets of an opened log.
+        """
+        if isinstance(hf, MemmapLog):
+            return hf.get_dataset_paths()
+        paths = []
+        hf.visititems(lambda name, node: paths.append(name) if isinstance(node, h5py.Dataset) else None)
+        return paths
+
+    def get_dataset_paths(self):
+        """
+        Returns the paths of all the datasets of the log, e.g. physics_data/3/position.
+        """
+        return self.get_dataset_paths_of_file(self.hf)
+
     @staticmethod
     def get_obj_body_id_to_name(vr_log_path):
-        f = h5py.File(vr_log_path, "r")
+        f = open_log(vr_log_path)
         return parse_str_config(f.attrs["/metadata/obj_body_id_to_name"])
 
     @staticmethod
@@ -578,7 +764,7 @@ class IGLogReader(object):
         """
         Checks whether a given HDF5 log has a metadata attribute.
         """
-        f = h5py.File(vr_log_path, "r")
+        f = open_log(vr_log_path)
         return attr_name in f.attrs
 
     @staticmethod
@@ -586,7 +772,7 @@ class IGLogReader(object):
         """
         Returns a list of available metadata attributes
         """
-        f = h5py.File(vr_log_path, "r")
+        f = open_log(vr_log_path)
         return f.attrs
 
     @staticmethod
@@ -594,7 +780,7 @@ class IGLogReader(object):
         """
         Reads a metadata attribute from a given HDF5 log path.
         """
-        f = h5py.File(vr_log_path, "r")
+        f = open_log(vr_log_path)
         if attr_name in f.attrs:
             return f.attrs[attr_name]
         else:
@@ -658,6 +844,91 @@ class IGLogReader(object):
         full_action_path = "action/" + action_path
         return self.hf[full_action_path][self.frame_counter]
 
+    def seek(self, frame):
+        """Moves the reader to any frame: the read_* and get_* functions then return the data of that frame.
+        The next call to get_data_left_to_read moves on to the following frame.
+
+        Args:
+            frame: frame to move to, negative values index from the end of the log
+        """
+        if frame < 0:
+            frame += self.total_frame_num
+        if not 0 <= frame < self.total_frame_num:
+            raise IndexError("Frame {} is out of range for a log of {} frames".format(frame, self.total_frame_num))
+        self.frame_counter = frame
+
+    def read_frames(self, value_path, start=0, stop=None):
+        """Reads any saved value over a range of frames, as a NumPy array (a memory-mapped slice for exported logs).
+
+        Args:
+            value_path: /-separated string representing the value to fetch, see read_value
+            start: first frame to read
+            stop: frame after the last frame to read, the end of the log if None
+        """
+        return self.hf[value_path][start:stop]
+
+    def iter_windows(self, value_paths, window_size, start=0, stop=None, prefetch=2):
+        """Iterates over windows of consecutive frames. The next windows are read in a background thread while the
+        current one is processed.
+
+        Args:
+            value_paths: list of /-separated strings representing the values to fetch, see read_value
+            window_size: number of frames of every window (the last one can be shorter)
+            start: first frame to read
+            stop: frame after the last frame to read, the end of the log if None
+            prefetch: number of windows to read ahead, 0 to read every window on demand
+
+        Yields:
+            (window_start, dict mapping every value path to the array of its values in the window)
+        """
+        stop = self.total_frame_num if stop is None else min(stop, self.total_frame_num)
+        window_starts = range(start, stop, window_size)
+
+        def read_window(window_start):
+            window_stop = min(window_start + window_size, stop)
+            return window_start, {path: self.read_frames(path, window_start, window_stop) for path in value_paths}
+
+        if prefetch <= 0:
+            for window_start in window_starts:
+                yield read_window(window_start)
+            return
+
+        windows = queue.Queue(maxsize=prefetch)
+        stopped = threading.Event()
+
+        def put(item):
+            # Give up if the consumer stopped iterating, instead of blocking on the full queue forever.
+            while not stopped.is_set():
+                try:
+                    windows.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def prefetch_windows():
+            try:
+                for window_start in window_starts:
+                    if not put(read_window(window_start)):
+                        return
+                put(None)
+            except Exception as e:
+                put(e)
+
+        thread = threading.Thread(target=prefetch_windows, daemon=True)
+        thread.start()
+        try:
+            while True:
+                window = windows.get()
+                if window is None:
+                    return
+                if isinstance(window, Exception):
+                    raise window
+                yield window
+        finally:
+            stopped.set()
+            thread.join()
+
     def get_data_left_to_read(self):
         """Returns whether there is still data left to read."""
         self.frame_counter += 1
@@ -230,6 +230,59 @@ def xyz2mat(xyz):
     return trans_mat
 
 
+def quat2rotmat_batch(quats, out=None):
+    """
+    Vectorized version of quat2rotmat. Matches transforms3d's quat2mat, including the
+    identity fallback for degenerate quaternions.
+
+    :param quats: (N, 4) array of quaternions in x,y,z,w (pybullet convention)
+    :param out: optional (N, 4, 4) array to write the rotation matrices into
+    :return: (N, 4, 4) rotation matrices
+    """
+    quats = np.asarray(quats, dtype=np.float64).reshape(-1, 4)
+    if out is None:
+        out = np.empty((quats.shape[0], 4, 4))
+    x, y, z, w = quats[:, 0], quats[:, 1], quats[:, 2], quats[:, 3]
+    nq = w * w + x * x + y * y + z * z
+    degenerate = nq < np.finfo(np.float64).eps
+    s = 2.0 / np.where(degenerate, 1.0, nq)
+    X, Y, Z = x * s, y * s, z * s
+    wX, wY, wZ = w * X, w * Y, w * Z
+    xX, xY, xZ = x * X, x * Y, x * Z
+    yY, yZ, zZ = y * Y, y * Z, z * Z
+
+    out[:] = 0.0
+    out[:, 0, 0] = 1.0 - (yY + zZ)
+    out[:, 0, 1] = xY - wZ
+    out[:, 0, 2] = xZ + wY
+    out[:, 1, 0] = xY + wZ
+    out[:, 1, 1] = 1.0 - (xX + zZ)
+    out[:, 1, 2] = yZ - wX
+    out[:, 2, 0] = xZ - wY
+    out[:, 2, 1] = yZ + wX
+    out[:, 2, 2] = 1.0 - (xX + yY)
+    out[:, 3, 3] = 1.0
+    if np.any(degenerate):
+        out[degenerate] = np.eye(4)
+    return out
+
+
+def xyz2mat_batch(xyz, out=None):
+    """
+    Vectorized version of xyz2mat.
+
+    :param xyz: (N, 3) array of positions
+    :param out: optional (N, 4, 4) array to write the translation matrices into
+    :return: (N, 4, 4) translation matrices
+    """
+    xyz = np.asarray(xyz, dtype=np.float64).reshape(-1, 3)
+    if out is None:
+        out = np.empty((xyz.shape[0], 4, 4))
+    out[:] = np.eye(4)
+    out[:, -1, :3] = xyz
+    return out
+
+
 def mat2xyz(mat):
     xyz = mat[-1, :3]
     xyz[np.isnan(xyz)] = 0
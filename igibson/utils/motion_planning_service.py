@@ -0,0 +1,225 @@
+import numpy as np
+
+from igibson.external.motion.motion_planners.lazy_prm import check_path, wastar_search
+from igibson.external.motion.motion_planners.rrt_connect import direct_path
+
+
+class CollisionCache(object):
+    """
+    Memoized collision checks of joint configurations. Configurations are compared after rounding to the cache
+    resolution, and every collision function (e.g. with or without the gripper links) has its own context.
+
+    The cached results are only valid while the rest of the scene does not move: the cache must be cleared at the start
+    of every planning episode.
+    """
+
+    def __init__(self, resolution=1e-3):
+        """
+        :param resolution: configurations closer than this (per joint) share their collision result
+        """
+        self.resolution = resolution
+        self.results = {}
+        self.num_hits = 0
+        self.num_misses = 0
+
+    def clear(self):
+        """
+        Forget all the collision results, e.g. when the scene has changed.
+        """
+        self.results.clear()
+
+    def get_key(self, context, q):
+        """
+        :param context: collision context
+        :param q: joint configuration
+        :return: hashable key of the configuration in the context
+        """
+        return (context,) + tuple(np.round(np.asarray(q) / self.resolution).astype(int).tolist())
+
+    def wrap(self, collision_fn, context):
+        """
+        :param collision_fn: function returning whether a configuration is in collision
+        :param context: collision context, identifies collision_fn in the cache
+        :return: memoized collision_fn
+        """
+
+        def cached_collision_fn(q):
+            key = self.get_key(context, q)
+            if key in self.results:
+                self.num_hits += 1
+            else:
+                self.num_misses += 1
+                self.results[key] = collision_fn(q)
+            return self.results[key]
+
+        return cached_collision_fn
+
+    def get_hit_rate(self):
+        """
+        :return: fraction of collision checks answered from the cache
+        """
+        num_checks = self.num_hits + self.num_misses
+        return self.num_hits / num_checks if num_checks > 0 else 0.0
+
+
+class JointSpaceRoadmap(object):
+    """
+    Lazy probabilistic roadmap in joint space, reused by successive planning queries in the same scene. The samples and
+    their nearest neighbor graph are kept between queries, only their collision status is cleared at the start of every
+    planning episode: vertices and edges are checked lazily, when a candidate path goes through them. The start and goal
+    configurations of a query are only temporary vertices, so the roadmap does not grow past max_samples.
+    """
+
+    def __init__(self, num_samples=200, max_samples=2000, max_degree=10):
+        """
+        :param num_samples: number of samples added every time the roadmap needs to grow
+        :param max_samples: maximum number of samples of the roadmap
+        :param max_degree: number of nearest neighbors every new sample is connected to
+        """
+        self.num_samples = num_samples
+        self.max_samples = max_samples
+        self.max_degree = max_degree
+        self.samples = []
+        self.sample_indices = {}
+        self.neighbors = []
+        self.embedded = None
+        self.collision_status = {}
+
+    def __len__(self):
+        return len(self.samples)
+
+    def clear_collisions(self):
+        """
+        Forget the collision status of the vertices and edges, e.g. when the scene has changed.
+        """
+        self.collision_status.clear()
+
+    def add_samples(self, samples):
+        """
+        Add samples to the roadmap and connect them to their nearest neighbors.
+
+        :param samples: joint configurations
+        :return: indices of the samples in the roadmap
+        """
+        indices = []
+        new_samples = []
+        for q in samples:
+            q = tuple(q)
+            if q not in self.sample_indices:
+                self.sample_indices[q] = len(self.samples)
+                self.samples.append(q)
+                self.neighbors.append(set())
+                new_samples.append(q)
+            indices.append(self.sample_indices[q])
+        if not new_samples:
+            return indices
+
+        new_embedded = np.array(new_samples)
+        self.embedded = new_embedded if self.embedded is None else np.concatenate([self.embedded, new_embedded])
+        first_new_index = len(self.samples) - len(new_samples)
+        distances = np.linalg.norm(new_embedded[:, None, :] - self.embedded[None, :, :], axis=2)
+        for i, row in enumerate(distances):
+            index = first_new_index + i
+            row[index] = np.inf
+            for neighbor in np.argsort(row)[: self.max_degree].tolist():
+                if np.isfinite(row[neighbor]):
+                    self.neighbors[index].add(neighbor)
+                    self.neighbors[neighbor].add(index)
+        return indices
+
+    def _truncate(self, num_samples):
+        """
+        Remove the samples added after the first num_samples ones, with their edges and collision status.
+
+        :param num_samples: number of samples to keep
+        """
+        for index in range(len(self.samples) - 1, num_samples - 1, -1):
+            # The edges to the samples with higher indices were removed with them
+            neighbors = self.neighbors.pop()
+            for neighbor in neighbors:
+                self.neighbors[neighbor].discard(index)
+            for colliding_vertices, colliding_edges in self.collision_status.values():
+                colliding_vertices.pop(index, None)
+                for neighbor in neighbors:
+                    colliding_edges.pop((index, neighbor), None)
+                    colliding_edges.pop((neighbor, index), None)
+            del self.sample_indices[self.samples.pop()]
+        self.embedded = self.embedded[:num_samples] if num_samples > 0 else None
+
+    def search_between(self, start_conf, end_conf, distance_fn, extend_fn, collision_fn, context):
+        """
+        Find a collision-free path between two configurations, which are connected to the roadmap as temporary
+        vertices for the duration of the search.
+
+        :return: list of configurations of the vertices of the path, or None if there is no collision-free path
+        """
+        num_samples = len(self)
+        start_index, end_index = self.add_samples([start_conf, end_conf])
+        try:
+            path = self.search(start_index, end_index, distance_fn, extend_fn, collision_fn, context)
+            return None if path is None else [self.samples[v] for v in path]
+        finally:
+            self._truncate(num_samples)
+
+    def search(self, start_index, end_index, distance_fn, extend_fn, collision_fn, context):
+        """
+        Find a collision-free path between two vertices, checking the candidate paths lazily.
+
+        :return: list of vertex indices or None if the vertices are not connected by collision-free edges
+        """
+        colliding_vertices, colliding_edges = self.collision_status.setdefault(context, ({}, {}))
+
+        def neighbors_fn(v1):
+            for v2 in self.neighbors[v1]:
+                if not (colliding_vertices.get(v2, False) or colliding_edges.get((v1, v2), False)):
+                    yield v2
+
+        def cost_fn(v1, v2):
+            return distance_fn(self.samples[v1], self.samples[v2])
+
+        def heuristic_fn(v):
+            return distance_fn(self.samples[v], self.samples[end_index])
+
+        while True:
+            path = wastar_search(
+                start_index, end_index, neighbors_fn=neighbors_fn, cost_fn=cost_fn, heuristic_fn=heuristic_fn
+            )
+            if path is None:
+                return None
+            if check_path(path, colliding_vertices, colliding_edges, self.samples, extend_fn, collision_fn):
+                return path
+
+    def plan(self, start_conf, end_conf, distance_fn, sample_fn, extend_fn, collision_fn, context=None):
+        """
+        Plan a collision-free path, growing the roadmap when the current one does not connect the configurations.
+
+        :param start_conf: start joint configuration
+        :param end_conf: goal joint configuration
+        :param distance_fn: distance between two configurations
+        :param sample_fn: function returning a random configuration
+        :param extend_fn: function returning the configurations between two configurations
+        :param collision_fn: function returning whether a configuration is in collision
+        :param context: collision context, the collision status of the roadmap is kept per context
+        :return: path as a list of configurations or None if no plan can be found
+        """
+        if collision_fn(start_conf) or collision_fn(end_conf):
+            return None
+        path = direct_path(start_conf, end_conf, extend_fn, collision_fn)
+        if path is not None:
+            return path
+
+        if len(self) < self.num_samples:
+            self.add_samples([sample_fn() for _ in range(self.num_samples - len(self))])
+        while True:
+            path = self.search_between(start_conf, end_conf, distance_fn, extend_fn, collision_fn, context)
+            if path is not None:
+                break
+            if len(self) >= self.max_samples:
+                return None
+            num_samples = min(self.num_samples, self.max_samples - len(self))
+            self.add_samples([sample_fn() for _ in range(num_samples)])
+
+        solution = [tuple(start_conf)]
+        for q1, q2 in zip(path, path[1:]):
+            solution.extend(extend_fn(q1, q2))
+        return solution
@@ -8,9 +8,17 @@ from transforms3d import euler
 log = logging.getLogger(__name__)
 
 
+from igibson.external.motion.motion_planners.rrt_connect import birrt, direct_path
 from igibson.external.pybullet_tools.utils import (
+    CIRCULAR_LIMITS,
+    MAX_DISTANCE,
+    check_initial_end,
     control_joints,
     get_base_values,
+    get_collision_fn,
+    get_custom_limits,
+    get_distance_fn,
+    get_extend_fn,
     get_joint_positions,
     get_max_limits,
     get_min_limits,
@@ -26,6 +34,9 @@ from igibson.external.pybullet_tools.utils import (
 from igibson.objects.visual_marker import VisualMarker
 from igibson.scenes.gibson_indoor_scene import StaticIndoorScene
 from igibson.scenes.igibson_indoor_scene import InteractiveIndoorScene
+from igibson.utils.contact_manager import invalidate_contacts
+from igibson.utils.motion_planning_service import CollisionCache, JointSpaceRoadmap
+from igibson.utils.timing_stats import TimingStats
 from igibson.utils.utils import l2_distance, quatToXYZW, restoreState, rotate_vector_2d
 
 
@@ -45,9 +56,17 @@ class MotionPlanningWrapper(object):
         collision_with_pb_2d_planning=False,
         visualize_2d_planning=False,
         visualize_2d_result=False,
+        num_ik_seeds=15,
+        collision_cache_resolution=1e-3,
     ):
         """
         Get planning related parameters.
+
+        :param arm_mp_algo: arm motion planning algorithm (see plan_joint_motion), or "roadmap" to plan on a lazy
+            roadmap reused between successive queries in the same scene (see JointSpaceRoadmap)
+        :param num_ik_seeds: number of IK seeds drawn in every batch, which are solved closest to the current arm joint
+            positions first
+        :param collision_cache_resolution: resolution of the joint configurations in the collision cache
         """
         self.env = env
         assert "occupancy_grid" in self.env.output
@@ -123,6 +142,14 @@ class MotionPlanningWrapper(object):
         self.visualize_2d_planning = visualize_2d_planning
         self.visualize_2d_result = visualize_2d_result
 
+        # Collision checks of arm configurations are memoized within a planning episode, i.e. while the simulation is
+        # not stepped and the robot base does not move, and the arm roadmap is reused for the whole scene
+        self.num_ik_seeds = num_ik_seeds
+        self.collision_cache = CollisionCache(resolution=collision_cache_resolution)
+        self.arm_roadmap = JointSpaceRoadmap()
+        self.planning_episode = None
+        self.planning_stats = TimingStats()
+
     def set_marker_position(self, pos):
         """
         Set subgoal marker position
@@ -213,6 +240,48 @@ class MotionPlanningWrapper(object):
             # We need to remove it to not check twice for self collisions
             self.mp_obstacles.remove(self.robot_id)
 
+        self.arm_sample_fn = get_sample_fn(self.robot_id, self.arm_joint_ids)
+        self.arm_distance_fn = get_distance_fn(self.robot_id, self.arm_joint_ids)
+        self.arm_extend_fn = get_extend_fn(self.robot_id, self.arm_joint_ids)
+        self.arm_collision_fns = {}
+
+    def get_planning_episode(self):
+        """
+        :return: key of the current planning episode: collision checks stay valid as long as it does not change
+        """
+        base_pose = np.round(get_base_values(self.robot_id), 4)
+        return self.env.simulator.frame_count, tuple(base_pose.tolist())
+
+    def reset_planning_episode(self):
+        """
+        Forget the collision checks of the current planning episode. Call it if objects have been moved without
+        stepping the simulation.
+        """
+        self.collision_cache.clear()
+        self.arm_roadmap.clear_collisions()
+        self.planning_episode = self.get_planning_episode()
+
+    def update_planning_episode(self):
+        """
+        Start a new planning episode if the simulation has been stepped or the robot base has moved.
+        """
+        if self.get_planning_episode() != self.planning_episode:
+            self.reset_planning_episode()
+
+    def get_planning_stats(self):
+        """
+        :return: dict with the number of calls, success rate and planning time of every type of query (arm_ik,
+            arm_motion, base_motion), see TimingStats, and the collision cache and roadmap statistics
+        """
+        stats = self.planning_stats.summary()
+        stats["collision_cache"] = {
+            "num_hits": self.collision_cache.num_hits,
+            "num_misses": self.collision_cache.num_misses,
+            "hit_rate": self.collision_cache.get_hit_rate(),
+        }
+        stats["arm_roadmap_size"] = len(self.arm_roadmap)
+        return stats
+
     def plan_base_motion(self, goal):
         """
         Plan base motion given a base subgoal
@@ -224,6 +293,7 @@ class MotionPlanningWrapper(object):
             self.set_marker_position_yaw([goal[0], goal[1], 0.05], goal[2])
 
         log.debug("Motion planning base goal: {}".format(goal))
+        plan_base_start = time()
 
         state = self.env.get_state()
         x, y, theta = goal
@@ -280,7 +350,9 @@ class MotionPlanningWrapper(object):
             use_pb_for_collisions=self.collision_with_pb_2d_planning,
         )
 
-        if path is not None and len(path) > 0:
+        success = path is not None and len(path) > 0
+        self.planning_stats.record("base_motion", time() - plan_base_start, success)
+        if success:
             log.debug("Path found!")
         else:
             log.debug("Path NOT found!")
@@ -335,40 +407,31 @@ class MotionPlanningWrapper(object):
 
         return (max_limits, min_limits, rest_position, joint_range, joint_damping)
 
-    def get_arm_joint_positions(self, arm_ik_goal):
+    def solve_ik_batch(self, arm_ik_goal, seeds, collision_fn):
         """
-        Attempt to find arm_joint_positions that satisfies arm_subgoal
-        If failed, return None
+        Solve the arm IK from a batch of seeds, the seeds closest to the current arm joint positions first, until a
+        collision-free solution is found.
 
         :param arm_ik_goal: [x, y, z] in the world frame
-        :return: arm joint positions
+        :param seeds: array of initial arm joint positions, one row per seed
+        :param collision_fn: function returning whether arm joint positions are in collision
+        :return: the first arm joint positions that reach arm_ik_goal within arm_ik_threshold and are collision-free,
+            or None
         """
-        log.debug("IK query for EE position {}".format(arm_ik_goal))
-        ik_start = time()
-
         max_limits, min_limits, rest_position, joint_range, joint_damping = self.get_ik_parameters()
-
-        n_attempt = 0
-        max_attempt = 75
-        sample_fn = get_sample_fn(self.robot_id, self.arm_joint_ids)
-        base_pose = get_base_values(self.robot_id)
-        state_id = p.saveState()
-        # p.configureDebugVisualizer(p.COV_ENABLE_RENDERING, False)
-        # find collision-free IK solution for arm_subgoal
-        while n_attempt < max_attempt:
-
-            set_joint_positions(self.robot_id, self.arm_joint_ids, sample_fn())
+        current_positions = np.array(get_joint_positions(self.robot_id, self.arm_joint_ids))
+        seeds = sorted(seeds, key=lambda seed: np.linalg.norm(seed - current_positions))
+        for seed in seeds:
+            set_joint_positions(self.robot_id, self.arm_joint_ids, seed)
             arm_joint_positions = p.calculateInverseKinematics(
                 self.robot_id,
                 self.robot.eef_links[self.robot.default_arm].link_id,
                 targetPosition=arm_ik_goal,
-                # targetOrientation=self.robots[0].get_orientation(),
                 lowerLimits=min_limits,
                 upperLimits=max_limits,
                 jointRanges=joint_range,
                 restPoses=rest_position,
                 jointDamping=joint_damping,
-                # solver=p.IK_DLS,
                 maxNumIterations=100,
             )
 
@@ -376,64 +439,85 @@ class MotionPlanningWrapper(object):
                 arm_joint_positions = np.array(arm_joint_positions)[self.robot_arm_indices]
 
             set_joint_positions(self.robot_id, self.arm_joint_ids, arm_joint_positions)
-
-            dist = l2_distance(self.robot.get_eef_position(), arm_ik_goal)
-            # print('dist', dist)
-            if dist > self.arm_ik_threshold:
-                n_attempt += 1
+            if l2_distance(self.robot.get_eef_position(), arm_ik_goal) > self.arm_ik_threshold:
                 continue
+            if not collision_fn(arm_joint_positions):
+                return arm_joint_positions
 
-            # need to simulator_step to get the latest collision
-            self.simulator_step()
+        return None
 
-            # simulator_step will slightly move the robot base and the objects
-            set_base_values_with_z(self.robot_id, base_pose, z=self.initial_height)
-            # self.reset_object_states()
-            # TODO: have a princpled way for stashing and resetting object states
+    def is_arm_configuration_in_collision(self, arm_joint_positions):
+        """
+        Check an IK solution: the arm should not have any collision and the gripper should not have any self-collision.
+        The contacts are computed without stepping the simulation.
 
-            # arm should not have any collision
-            collision_free = is_collision_free(body_a=self.robot_id, link_a_list=self.arm_joint_ids)
+        :param arm_joint_positions: arm joint positions
+        :return: whether the configuration is in collision
+        """
+        set_joint_positions(self.robot_id, self.arm_joint_ids, arm_joint_positions)
+        p.performCollisionDetection()
+        invalidate_contacts()
 
-            if not collision_free:
-                n_attempt += 1
-                # print('arm has collision')
-                continue
+        if not is_collision_free(body_a=self.robot_id, link_a_list=self.arm_joint_ids):
+            return True
 
-            # gripper should not have any self-collision
-            collision_free = is_collision_free(
-                body_a=self.robot_id,
-                link_a_list=[self.robot.eef_links[self.robot.default_arm].link_id],
-                body_b=self.robot_id,
-            )
-            if not collision_free:
-                n_attempt += 1
-                log.debug("Gripper in collision")
-                continue
+        if not is_collision_free(
+            body_a=self.robot_id,
+            link_a_list=[self.robot.eef_links[self.robot.default_arm].link_id],
+            body_b=self.robot_id,
+        ):
+            log.debug("Gripper in collision")
+            return True
 
-            # self.episode_metrics['arm_ik_time'] += time() - ik_start
-            # p.configureDebugVisualizer(p.COV_ENABLE_RENDERING, True)
-            restoreState(state_id)
-            p.removeState(state_id)
-            log.debug("IK Solver found a valid configuration")
-            return arm_joint_positions
+        return False
+
+    def get_arm_joint_positions(self, arm_ik_goal):
+        """
+        Attempt to find arm_joint_positions that satisfies arm_subgoal
+        If failed, return None
+
+        IK seeds are drawn in batches of num_ik_seeds, and solved closest to the current arm configuration first until a
+        solution is collision-free (with the collision cache of the planning episode).
+
+        :param arm_ik_goal: [x, y, z] in the world frame
+        :return: arm joint positions
+        """
+        log.debug("IK query for EE position {}".format(arm_ik_goal))
+        ik_start = time()
+        self.update_planning_episode()
+
+        n_attempt = 0
+        max_attempt = 75
+        lower_limits, upper_limits = get_custom_limits(
+            self.robot_id, self.arm_joint_ids, circular_limits=CIRCULAR_LIMITS
+        )
+        collision_fn = self.collision_cache.wrap(self.is_arm_configuration_in_collision, "ik")
+        state_id = p.saveState()
+        # find collision-free IK solution for arm_subgoal
+        arm_joint_positions = None
+        while arm_joint_positions is None and n_attempt < max_attempt:
+            num_seeds = min(self.num_ik_seeds, max_attempt - n_attempt)
+            n_attempt += num_seeds
+            seeds = np.random.uniform(lower_limits, upper_limits, size=(num_seeds, len(self.arm_joint_ids)))
+            arm_joint_positions = self.solve_ik_batch(arm_ik_goal, seeds, collision_fn)
 
-        # p.configureDebugVisualizer(p.COV_ENABLE_RENDERING, True)
         restoreState(state_id)
         p.removeState(state_id)
-        # self.episode_metrics['arm_ik_time'] += time() - ik_start
-        log.debug("IK Solver failed to find a configuration")
-        return None
+        self.planning_stats.record("arm_ik", time() - ik_start, arm_joint_positions is not None)
+        if arm_joint_positions is not None:
+            log.debug("IK Solver found a valid configuration")
+        else:
+            log.debug("IK Solver failed to find a configuration")
+        return arm_joint_positions
 
-    def plan_arm_motion(self, arm_joint_positions, override_fetch_collision_links=False):
+    def get_arm_collision_parameters(self, override_fetch_collision_links=False):
         """
-        Attempt to reach arm arm_joint_positions and return arm trajectory
-        If failed, reset the arm to its original pose and return None
+        Get the collision parameters of arm motion planning.
 
-        :param arm_joint_positions: final arm joint position to reach
         :param override_fetch_collision_links: if True, include Fetch hand and finger collisions while motion planning
-        :return: arm trajectory or None if no plan can be found
+        :return: dict with the disabled_collisions, self_collisions, obstacles and allow_collision_links arguments of
+            plan_joint_motion
         """
-        log.debug("Planning path in joint space to {}".format(arm_joint_positions))
         disabled_collisions = {}
         if self.robot_type == "Fetch":
             disabled_collisions = {
@@ -451,30 +535,95 @@ class MotionPlanningWrapper(object):
             self_collisions = False
             mp_obstacles = []
 
-        plan_arm_start = time()
-        p.configureDebugVisualizer(p.COV_ENABLE_RENDERING, False)
-        state_id = p.saveState()
-
         allow_collision_links = []
         if self.robot_type == "Fetch" and not override_fetch_collision_links:
             allow_collision_links = [self.robot.eef_links[self.robot.default_arm].link_id] + [
                 finger.link_id for finger in self.robot.finger_links[self.robot.default_arm]
             ]
-        arm_path = plan_joint_motion(
-            self.robot_id,
-            self.arm_joint_ids,
-            arm_joint_positions,
-            disabled_collisions=disabled_collisions,
-            self_collisions=self_collisions,
-            obstacles=mp_obstacles,
-            algorithm=self.arm_mp_algo,
-            allow_collision_links=allow_collision_links,
-        )
+        return {
+            "disabled_collisions": disabled_collisions,
+            "self_collisions": self_collisions,
+            "obstacles": mp_obstacles,
+            "allow_collision_links": allow_collision_links,
+        }
+
+    def get_arm_collision_fn(self, override_fetch_collision_links=False):
+        """
+        Get the collision function of arm motion planning, built once per set of collision links.
+
+        :param override_fetch_collision_links: if True, include Fetch hand and finger collisions while motion planning
+        :return: function returning whether arm joint positions are in collision
+        """
+        if override_fetch_collision_links not in self.arm_collision_fns:
+            collision_parameters = self.get_arm_collision_parameters(override_fetch_collision_links)
+            self.arm_collision_fns[override_fetch_collision_links] = get_collision_fn(
+                self.robot_id,
+                self.arm_joint_ids,
+                collision_parameters["obstacles"],
+                [],
+                collision_parameters["self_collisions"],
+                collision_parameters["disabled_collisions"],
+                max_distance=MAX_DISTANCE,
+                allow_collision_links=collision_parameters["allow_collision_links"],
+            )
+        return self.arm_collision_fns[override_fetch_collision_links]
+
+    def plan_arm_motion(self, arm_joint_positions, override_fetch_collision_links=False):
+        """
+        Attempt to reach arm arm_joint_positions and return arm trajectory
+        If failed, reset the arm to its original pose and return None
+
+        :param arm_joint_positions: final arm joint position to reach
+        :param override_fetch_collision_links: if True, include Fetch hand and finger collisions while motion planning
+        :return: arm trajectory or None if no plan can be found
+        """
+        log.debug("Planning path in joint space to {}".format(arm_joint_positions))
+        plan_arm_start = time()
+        self.update_planning_episode()
+        p.configureDebugVisualizer(p.COV_ENABLE_RENDERING, False)
+        state_id = p.saveState()
+
+        context = ("arm", override_fetch_collision_links)
+        collision_fn = self.collision_cache.wrap(self.get_arm_collision_fn(override_fetch_collision_links), context)
+        start_conf = get_joint_positions(self.robot_id, self.arm_joint_ids)
+        if self.arm_mp_algo == "roadmap":
+            arm_path = self.arm_roadmap.plan(
+                start_conf,
+                arm_joint_positions,
+                self.arm_distance_fn,
+                self.arm_sample_fn,
+                self.arm_extend_fn,
+                collision_fn,
+                context=context,
+            )
+        elif not check_initial_end(start_conf, arm_joint_positions, collision_fn):
+            arm_path = None
+        elif self.arm_mp_algo == "direct":
+            arm_path = direct_path(start_conf, arm_joint_positions, self.arm_extend_fn, collision_fn)
+        elif self.arm_mp_algo == "birrt":
+            arm_path = birrt(
+                start_conf,
+                arm_joint_positions,
+                self.arm_distance_fn,
+                self.arm_sample_fn,
+                self.arm_extend_fn,
+                collision_fn,
+            )
+        else:
+            arm_path = plan_joint_motion(
+                self.robot_id,
+                self.arm_joint_ids,
+                arm_joint_positions,
+                algorithm=self.arm_mp_algo,
+                **self.get_arm_collision_parameters(override_fetch_collision_links),
+            )
         p.configureDebugVisualizer(p.COV_ENABLE_RENDERING, True)
         restoreState(state_id)
         p.removeState(state_id)
 
-        if arm_path is not None and len(arm_path) > 0:
+        success = arm_path is not None and len(arm_path) > 0
+        self.planning_stats.record("arm_motion", time() - plan_arm_start, success)
+        if success:
             log.debug("Path found!")
         else:
             log.debug("Path NOT found!")
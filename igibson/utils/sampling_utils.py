@@ -19,6 +19,8 @@ _DEFAULT_MAX_SAMPLING_ATTEMPTS = 10
 _DEFAULT_CUBOID_BOTTOM_PADDING = 0.005
 # We will cast an additional parallel ray for each additional this much distance.
 _DEFAULT_NEW_RAY_PER_HORIZONTAL_DISTANCE = 0.1
+# Maximum number of rays cast in a single p.rayTestBatch call.
+_MAX_RAYS_PER_BATCH = 16384
 
 
 def fit_plane(points):
@@ -59,7 +61,11 @@ def draw_debug_markers(hit_positions):
 
 
 def get_parallel_rays(
-    source, destination, offset, new_ray_per_horizontal_distance=_DEFAULT_NEW_RAY_PER_HORIZONTAL_DISTANCE
+    source,
+    destination,
+    offset,
+    new_ray_per_horizontal_distance=_DEFAULT_NEW_RAY_PER_HORIZONTAL_DISTANCE,
+    random_vector=None,
 ):
     """Given a ray described by a source and a destination, sample parallel rays and return together with input ray.
 
@@ -72,21 +78,47 @@ def get_parallel_rays(
     :param offset: Orthogonal distance of parallel rays from input ray.
     :param new_ray_per_horizontal_distance: Step in offset beyond which an additional split will be applied in the
         parallel ray grid (which at minimum is 3x3 at the AABB corners & center).
-    :return Tuple[List, List, Array[W, H, 3]] containing sources and destinations of original ray and the unflattened,
-        untransformed grid in object coordinates.
+    :param random_vector: Array of shape (3, ) used to get the orthogonal vectors, sampled with np.random.rand if None.
+    :return Tuple[Array[W * H, 3], Array[W * H, 3], Array[W, H, 2]] containing sources and destinations of original
+        ray and the unflattened, untransformed grid in object coordinates.
     """
-    ray_direction = destination - source
+    if random_vector is None:
+        random_vector = np.random.rand(3)
+    sources, destinations, ray_grid = get_parallel_rays_batch(
+        np.array([source]), np.array([destination]), offset, np.array([random_vector]), new_ray_per_horizontal_distance
+    )
+    return sources[0], destinations[0], ray_grid
+
+
+def get_parallel_rays_batch(
+    sources,
+    destinations,
+    offset,
+    random_vectors,
+    new_ray_per_horizontal_distance=_DEFAULT_NEW_RAY_PER_HORIZONTAL_DISTANCE,
+):
+    """Same as get_parallel_rays for a batch of rays with the same offset, and thus the same grid.
+
+    :param sources: Array of shape (N, 3), sources of the rays to sample parallel rays of.
+    :param destinations: Array of shape (N, 3), destinations of the rays to sample parallel rays of.
+    :param offset: Orthogonal distance of parallel rays from input rays.
+    :param random_vectors: Array of shape (N, 3) used to get the orthogonal vectors of every ray.
+    :param new_ray_per_horizontal_distance: See get_parallel_rays.
+    :return Tuple[Array[N, W * H, 3], Array[N, W * H, 3], Array[W, H, 2]] containing sources and destinations of the
+        parallel rays of every input ray and the unflattened, untransformed grid in object coordinates.
+    """
+    ray_directions = destinations - sources
 
     # Get an orthogonal vector using a random vector.
-    random_vector = np.random.rand(3)
-    orthogonal_vector_1 = np.cross(ray_direction, random_vector)
-    orthogonal_vector_1 /= np.linalg.norm(orthogonal_vector_1)
+    orthogonal_vectors_1 = np.cross(ray_directions, random_vectors)
+    # The norms are computed row by row to get the exact same values as for a single ray.
+    orthogonal_vectors_1 /= np.array([np.linalg.norm(vector) for vector in orthogonal_vectors_1])[:, None]
 
     # Get a second vector orthogonal to both the ray and the first vector.
-    orthogonal_vector_2 = -np.cross(ray_direction, orthogonal_vector_1)
-    orthogonal_vector_2 /= np.linalg.norm(orthogonal_vector_2)
+    orthogonal_vectors_2 = -np.cross(ray_directions, orthogonal_vectors_1)
+    orthogonal_vectors_2 /= np.array([np.linalg.norm(vector) for vector in orthogonal_vectors_2])[:, None]
 
-    orthogonal_vectors = np.array([orthogonal_vector_1, orthogonal_vector_2])
+    orthogonal_vectors = np.stack([orthogonal_vectors_1, orthogonal_vectors_2], axis=1)
     assert np.all(np.isfinite(orthogonal_vectors))
 
     # Convert the offset into a 2-vector if it already isn't one.
@@ -101,10 +133,8 @@ def get_parallel_rays(
     ray_grid_flattened = ray_grid.reshape(-1, 2)
 
     # Apply the grid onto the orthogonal vectors to obtain the rays.
-    sources = [source + np.dot(offsets, orthogonal_vectors) for offsets in ray_grid_flattened]
-    destinations = [destination + np.dot(offsets, orthogonal_vectors) for offsets in ray_grid_flattened]
-
-    return sources, destinations, ray_grid
+    grid_offsets = np.matmul(ray_grid_flattened, orthogonal_vectors)
+    return sources[:, None, :] + grid_offsets, destinations[:, None, :] + grid_offsets, ray_grid
 
 
 def sample_origin_positions(mins, maxes, count, bimodal_mean_fraction, bimodal_stdev_fraction, axis_probabilities):
@@ -173,6 +203,7 @@ def sample_cuboid_on_object(
     max_angle_with_z_axis=_DEFAULT_MAX_ANGLE_WITH_Z_AXIS,
     hit_to_plane_threshold=_DEFAULT_HIT_TO_PLANE_THRESHOLD,
     refuse_downwards=False,
+    batch_ray_casting=True,
 ):
     """
     Samples points on an object's surface using ray casting.
@@ -198,6 +229,9 @@ def sample_cuboid_on_object(
     :param hit_to_plane_threshold: float, how far any given hit position can be from the least-squares fit plane to
         all of the hit positions before the sample is rejected.
     :param refuse_downwards: bool, whether downward-facing hits (as defined by max_angle_with_z_axis) are allowed.
+    :param batch_ray_casting: bool, whether the rays of all the sampling attempts of a point are cast in a single
+        batch (see sample_cuboid_with_batched_attempts). The results are identical to sequential attempts for the same
+        random seed. Sampling is always sequential when the debug_sampling flag is set.
     :return: List of num_samples elements where each element is a tuple in the form of
         (cuboid_centroid, cuboid_up_vector, cuboid_rotation, {refusal_reason: [refusal_details...]}). Cuboid positions
         are set to None when no successful sampling happens within the max number of attempts. Refusal details are only
@@ -205,6 +239,7 @@ def sample_cuboid_on_object(
     """
     bbox_center, bbox_orn, bbox_bf_extent, _ = obj.get_base_aligned_bounding_box(xy_aligned=True, fallback_to_aabb=True)
     half_extent_with_offset = (bbox_bf_extent / 2) + aabb_offset
+    to_wf_transform = utils.quat_pos_to_mat(bbox_center, bbox_orn)
 
     body_ids = obj.get_body_ids()
 
@@ -231,129 +266,32 @@ def sample_cuboid_on_object(
 
         refusal_reasons = results[i][4]
 
-        # Try each sampled position in the AABB.
-        for axis, is_top, start_pos in samples:
-            # Compute the ray's destination using the sampling & AABB information.
-            point_on_face = compute_ray_destination(
-                axis, is_top, start_pos, -half_extent_with_offset, half_extent_with_offset
-            )
-
-            # If we have a list of offset distances, pick the distance for this particular sample we're getting.
-            this_cuboid_dimensions = cuboid_dimensions if cuboid_dimensions.ndim == 1 else cuboid_dimensions[i]
+        # If we have a list of offset distances, pick the distance for this particular sample we're getting.
+        this_cuboid_dimensions = cuboid_dimensions if cuboid_dimensions.ndim == 1 else cuboid_dimensions[i]
 
-            # Obtain the parallel rays using the direction sampling method.
-            bbf_sources, bbf_destinations, grid = get_parallel_rays(
-                start_pos, point_on_face, this_cuboid_dimensions[:2] / 2.0
-            )
-
-            # Transform the sources, destinations and grid to the world frame coordinates.
-            to_wf_transform = utils.quat_pos_to_mat(bbox_center, bbox_orn)
-            sources = trimesh.transformations.transform_points(bbf_sources, to_wf_transform)
-            destinations = trimesh.transformations.transform_points(bbf_destinations, to_wf_transform)
-
-            # Time to cast the rays.
-            cast_results = p.rayTestBatch(rayFromPositions=sources, rayToPositions=destinations, numThreads=0)
-
-            # for ray_start, ray_end in zip(sources, destinations):
-            #     p.addUserDebugLine(ray_start, ray_end, lineWidth=4)
-
-            threshold, hits = check_rays_hit_object(cast_results, body_ids, refusal_reasons["missed_object"], 0.6)
-            if not threshold:
-                continue
-
-            filtered_cast_results = []
-            center_idx = int(len(cast_results) / 2)
-            filtered_center_idx = None
-            center_hit = False
-            for idx, hit in enumerate(hits):
-                if hit:
-                    filtered_cast_results.append(cast_results[idx])
-                    if idx == center_idx:
-                        center_hit = True
-                        filtered_center_idx = len(filtered_cast_results) - 1
-
-            # Only consider objects whose center idx has a ray hit
-            if not center_hit:
-                continue
-
-            # Process the hit positions and normals.
-            hit_positions = np.array([ray_res[3] for ray_res in filtered_cast_results])
-            hit_normals = np.array([ray_res[4] for ray_res in filtered_cast_results])
-            hit_normals /= np.linalg.norm(hit_normals, axis=1)[:, np.newaxis]
-
-            assert filtered_center_idx
-            hit_link = filtered_cast_results[filtered_center_idx][1]
-            center_hit_normal = hit_normals[filtered_center_idx]
-
-            # Reject anything facing more than 45deg downwards if requested.
-            if refuse_downwards:
-                if not check_hit_max_angle_from_z_axis(
-                    center_hit_normal, max_angle_with_z_axis, refusal_reasons["downward_normal"]
-                ):
-                    continue
-
-            # Check that none of the parallel rays' hit normal differs from center ray by more than threshold.
-            if not check_normal_similarity(center_hit_normal, hit_normals, refusal_reasons["hit_normal_similarity"]):
-                continue
-
-            # Fit a plane to the points.
-            plane_centroid, plane_normal = fit_plane(hit_positions)
-
-            # The fit_plane normal can be facing either direction on the normal axis, but we want it to face away from
-            # the object for purposes of normal checking and padding. To do this:
-            # We get a vector from the centroid towards the center ray source, and flip the plane normal to match it.
-            # The cosine has positive sign if the two vectors are similar and a negative one if not.
-            plane_to_source = sources[center_idx] - plane_centroid
-            plane_normal *= np.sign(np.dot(plane_to_source, plane_normal))
-
-            # Check that the plane normal is similar to the hit normal
-            if not check_normal_similarity(
-                center_hit_normal, plane_normal[None, :], refusal_reasons["plane_normal_similarity"]
-            ):
-                continue
-
-            # Check that the points are all within some acceptable distance of the plane.
-            distances = get_distance_to_plane(hit_positions, plane_centroid, plane_normal)
-            if np.any(distances > hit_to_plane_threshold):
-                if igibson.debug_sampling:
-                    refusal_reasons["dist_to_plane"].append("distances to plane: %r" % (distances,))
-                continue
-
-            # Get projection of the base onto the plane, fit a rotation, and compute the new center hit / corners.
-            hit_positions = np.array([ray_res[3] for ray_res in cast_results])
-            projected_hits = get_projection_onto_plane(hit_positions, plane_centroid, plane_normal)
-            padding = _DEFAULT_CUBOID_BOTTOM_PADDING * plane_normal
-            projected_hits += padding
-            center_projected_hit = projected_hits[center_idx]
-            cuboid_centroid = center_projected_hit + plane_normal * this_cuboid_dimensions[2] / 2.0
-            rotation = compute_rotation_from_grid_sample(grid, projected_hits, cuboid_centroid, this_cuboid_dimensions)
-            corner_positions = cuboid_centroid[None, :] + (
-                rotation.apply(
-                    0.5
-                    * this_cuboid_dimensions
-                    * np.array(
-                        [
-                            [1, 1, -1],
-                            [-1, 1, -1],
-                            [-1, -1, -1],
-                            [1, -1, -1],
-                        ]
-                    )
-                )
-            )
-
-            # Now we use the cuboid's diagonals to check that the cuboid is actually empty.
-            if not check_cuboid_empty(
-                plane_normal, corner_positions, refusal_reasons["cuboid_not_empty"], this_cuboid_dimensions
-            ):
-                continue
+        sampling_args = (
+            samples,
+            half_extent_with_offset,
+            to_wf_transform,
+            body_ids,
+            this_cuboid_dimensions,
+            refuse_downwards,
+            max_angle_with_z_axis,
+            hit_to_plane_threshold,
+            refusal_reasons,
+        )
+        if batch_ray_casting and not igibson.debug_sampling:
+            result = sample_cuboid_with_batched_attempts(*sampling_args)
+        else:
+            result = sample_cuboid_with_sequential_attempts(*sampling_args)
 
+        if result is not None:
+            cuboid_centroid, plane_normal, rotation, hit_link, padding = result
             if undo_padding:
                 cuboid_centroid -= padding
 
-            # We've found a nice attachment point. Continue onto next point to sample.
+            # We've found a nice attachment point.
             results[i] = (cuboid_centroid, plane_normal, rotation.as_quat(), hit_link, refusal_reasons)
-            break
 
     if igibson.debug_sampling:
         print("Sampling rejection reasons:")
@@ -368,6 +306,298 @@ def sample_cuboid_on_object(
     return results
 
 
+def get_attempt_rays(
+    axis, is_top, start_pos, half_extent_with_offset, to_wf_transform, this_cuboid_dimensions, **kwargs
+):
+    """
+    Get the parallel rays of a sampling attempt.
+
+    :param axis: int, ray casting axis of the attempt
+    :param is_top: bool, whether the attempt was sampled from the top side of the axis
+    :param start_pos: Array of shape (3, ), origin of the attempt in the bounding box frame
+    :param half_extent_with_offset: Array of shape (3, ), half extent of the padded bounding box
+    :param to_wf_transform: Array of shape (4, 4), transform from the bounding box frame to the world frame
+    :param this_cuboid_dimensions: Array of shape (3, ), dimensions of the sampled cuboid
+    :param kwargs: other arguments of get_parallel_rays
+    :return: Tuple of the ray sources and destinations in the world frame, and the untransformed ray grid
+    """
+    # Compute the ray's destination using the sampling & AABB information.
+    point_on_face = compute_ray_destination(axis, is_top, start_pos, -half_extent_with_offset, half_extent_with_offset)
+
+    # Obtain the parallel rays using the direction sampling method.
+    bbf_sources, bbf_destinations, grid = get_parallel_rays(
+        start_pos, point_on_face, this_cuboid_dimensions[:2] / 2.0, **kwargs
+    )
+
+    # Transform the sources, destinations and grid to the world frame coordinates.
+    sources = trimesh.transformations.transform_points(bbf_sources, to_wf_transform)
+    destinations = trimesh.transformations.transform_points(bbf_destinations, to_wf_transform)
+    return sources, destinations, grid
+
+
+def fit_cuboid_to_hits(
+    cast_results,
+    hits,
+    sources,
+    grid,
+    this_cuboid_dimensions,
+    refuse_downwards,
+    max_angle_with_z_axis,
+    hit_to_plane_threshold,
+    refusal_reasons,
+):
+    """
+    Fit a cuboid to the hits of the parallel rays of a sampling attempt, checking everything but cuboid emptiness.
+
+    :param cast_results: p.rayTestBatch results of the parallel rays
+    :param hits: boolean sequence, whether each ray hit the object
+    :param sources: Array of shape (N, 3), sources of the parallel rays in the world frame
+    :param grid: Array of shape (W, H, 2), untransformed ray grid
+    :return: None if the attempt is refused, otherwise a tuple of the cuboid centroid, plane normal, rotation, hit
+        link, bottom corner positions and bottom padding
+    """
+    filtered_cast_results = []
+    center_idx = int(len(cast_results) / 2)
+    filtered_center_idx = None
+    center_hit = False
+    for idx, hit in enumerate(hits):
+        if hit:
+            filtered_cast_results.append(cast_results[idx])
+            if idx == center_idx:
+                center_hit = True
+                filtered_center_idx = len(filtered_cast_results) - 1
+
+    # Only consider objects whose center idx has a ray hit
+    if not center_hit:
+        return None
+
+    # Process the hit positions and normals.
+    hit_positions = np.array([ray_res[3] for ray_res in filtered_cast_results])
+    hit_normals = np.array([ray_res[4] for ray_res in filtered_cast_results])
+    hit_normals /= np.linalg.norm(hit_normals, axis=1)[:, np.newaxis]
+
+    assert filtered_center_idx
+    hit_link = filtered_cast_results[filtered_center_idx][1]
+    center_hit_normal = hit_normals[filtered_center_idx]
+
+    # Reject anything facing more than 45deg downwards if requested.
+    if refuse_downwards:
+        if not check_hit_max_angle_from_z_axis(
+            center_hit_normal, max_angle_with_z_axis, refusal_reasons["downward_normal"]
+        ):
+            return None
+
+    # Check that none of the parallel rays' hit normal differs from center ray by more than threshold.
+    if not check_normal_similarity(center_hit_normal, hit_normals, refusal_reasons["hit_normal_similarity"]):
+        return None
+
+    # Fit a plane to the points.
+    plane_centroid, plane_normal = fit_plane(hit_positions)
+
+    # The fit_plane normal can be facing either direction on the normal axis, but we want it to face away from
+    # the object for purposes of normal checking and padding. To do this:
+    # We get a vector from the centroid towards the center ray source, and flip the plane normal to match it.
+    # The cosine has positive sign if the two vectors are similar and a negative one if not.
+    plane_to_source = sources[center_idx] - plane_centroid
+    plane_normal *= np.sign(np.dot(plane_to_source, plane_normal))
+
+    # Check that the plane normal is similar to the hit normal
+    if not check_normal_similarity(
+        center_hit_normal, plane_normal[None, :], refusal_reasons["plane_normal_similarity"]
+    ):
+        return None
+
+    # Check that the points are all within some acceptable distance of the plane.
+    distances = get_distance_to_plane(hit_positions, plane_centroid, plane_normal)
+    if np.any(distances > hit_to_plane_threshold):
+        if igibson.debug_sampling:
+            refusal_reasons["dist_to_plane"].append("distances to plane: %r" % (distances,))
+        return None
+
+    # Get projection of the base onto the plane, fit a rotation, and compute the new center hit / corners.
+    hit_positions = np.array([ray_res[3] for ray_res in cast_results])
+    projected_hits = get_projection_onto_plane(hit_positions, plane_centroid, plane_normal)
+    padding = _DEFAULT_CUBOID_BOTTOM_PADDING * plane_normal
+    projected_hits += padding
+    center_projected_hit = projected_hits[center_idx]
+    cuboid_centroid = center_projected_hit + plane_normal * this_cuboid_dimensions[2] / 2.0
+    rotation = compute_rotation_from_grid_sample(grid, projected_hits, cuboid_centroid, this_cuboid_dimensions)
+    corner_positions = cuboid_centroid[None, :] + (
+        rotation.apply(
+            0.5
+            * this_cuboid_dimensions
+            * np.array(
+                [
+                    [1, 1, -1],
+                    [-1, 1, -1],
+                    [-1, -1, -1],
+                    [1, -1, -1],
+                ]
+            )
+        )
+    )
+    return cuboid_centroid, plane_normal, rotation, hit_link, corner_positions, padding
+
+
+def sample_cuboid_with_sequential_attempts(
+    samples,
+    half_extent_with_offset,
+    to_wf_transform,
+    body_ids,
+    this_cuboid_dimensions,
+    refuse_downwards,
+    max_angle_with_z_axis,
+    hit_to_plane_threshold,
+    refusal_reasons,
+):
+    """
+    Try the sampled origins one by one, casting the rays of every attempt separately.
+
+    :param samples: sampled origins, see sample_origin_positions
+    :return: None if no attempt succeeds, otherwise a tuple of the cuboid centroid, plane normal, rotation, hit link
+        and bottom padding of the first successful attempt
+    """
+    for axis, is_top, start_pos in samples:
+        sources, destinations, grid = get_attempt_rays(
+            axis, is_top, start_pos, half_extent_with_offset, to_wf_transform, this_cuboid_dimensions
+        )
+
+        # Time to cast the rays.
+        cast_results = p.rayTestBatch(rayFromPositions=sources, rayToPositions=destinations, numThreads=0)
+
+        # for ray_start, ray_end in zip(sources, destinations):
+        #     p.addUserDebugLine(ray_start, ray_end, lineWidth=4)
+
+        threshold, hits = check_rays_hit_object(cast_results, body_ids, refusal_reasons["missed_object"], 0.6)
+        if not threshold:
+            continue
+
+        cuboid = fit_cuboid_to_hits(
+            cast_results,
+            hits,
+            sources,
+            grid,
+            this_cuboid_dimensions,
+            refuse_downwards,
+            max_angle_with_z_axis,
+            hit_to_plane_threshold,
+            refusal_reasons,
+        )
+        if cuboid is None:
+            continue
+        cuboid_centroid, plane_normal, rotation, hit_link, corner_positions, padding = cuboid
+
+        # Now we use the cuboid's diagonals to check that the cuboid is actually empty.
+        if not check_cuboid_empty(
+            plane_normal, corner_positions, refusal_reasons["cuboid_not_empty"], this_cuboid_dimensions
+        ):
+            continue
+
+        return cuboid_centroid, plane_normal, rotation, hit_link, padding
+
+    return None
+
+
+def sample_cuboid_with_batched_attempts(
+    samples,
+    half_extent_with_offset,
+    to_wf_transform,
+    body_ids,
+    this_cuboid_dimensions,
+    refuse_downwards,
+    max_angle_with_z_axis,
+    hit_to_plane_threshold,
+    refusal_reasons,
+):
+    """
+    Same as sample_cuboid_with_sequential_attempts, but the parallel rays of all the attempts are cast in a single
+    batch and the object hits are filtered for all the attempts at once. The attempts that hit the object are then
+    fitted in order until the first successful one.
+
+    The random vectors of the parallel rays of all the attempts are drawn up front, then the global random state is
+    rewound and advanced by the attempts that the sequential sampling would have made, so that the results and the
+    random state are identical to sample_cuboid_with_sequential_attempts for the same seed.
+    """
+    random_state = np.random.get_state()
+    random_vectors = np.random.rand(len(samples), 3)
+
+    # Compute the rays' destinations and the parallel rays of all the attempts.
+    start_positions = np.array([start_pos for _, _, start_pos in samples])
+    points_on_face = np.array(
+        [
+            compute_ray_destination(axis, is_top, start_pos, -half_extent_with_offset, half_extent_with_offset)
+            for axis, is_top, start_pos in samples
+        ]
+    )
+    bbf_sources, bbf_destinations, grid = get_parallel_rays_batch(
+        start_positions, points_on_face, this_cuboid_dimensions[:2] / 2.0, random_vectors
+    )
+    rays_per_attempt = bbf_sources.shape[1]
+
+    # Transform the sources and destinations to the world frame coordinates, and cast all the rays at once.
+    sources = trimesh.transformations.transform_points(bbf_sources.reshape(-1, 3), to_wf_transform)
+    destinations = trimesh.transformations.transform_points(bbf_destinations.reshape(-1, 3), to_wf_transform)
+    cast_results = cast_rays(sources, destinations)
+    sources = sources.reshape(len(samples), rays_per_attempt, 3)
+
+    # Filter the hits of all the attempts at once.
+    hit_body_ids = np.array([ray_res[0] for ray_res in cast_results]).reshape(len(samples), rays_per_attempt)
+    hits = np.isin(hit_body_ids, body_ids)
+    enough_hits = hits.sum(axis=1) / rays_per_attempt >= 0.6
+    center_hit = hits[:, int(rays_per_attempt / 2)]
+
+    result = None
+    num_attempts = len(samples)
+    for attempt in np.flatnonzero(enough_hits & center_hit):
+        cuboid = fit_cuboid_to_hits(
+            cast_results[attempt * rays_per_attempt : (attempt + 1) * rays_per_attempt],
+            hits[attempt],
+            sources[attempt],
+            grid,
+            this_cuboid_dimensions,
+            refuse_downwards,
+            max_angle_with_z_axis,
+            hit_to_plane_threshold,
+            refusal_reasons,
+        )
+        if cuboid is None:
+            continue
+        cuboid_centroid, plane_normal, rotation, hit_link, corner_positions, padding = cuboid
+
+        # Now we use the cuboid's diagonals to check that the cuboid is actually empty.
+        if check_cuboid_empty(
+            plane_normal, corner_positions, refusal_reasons["cuboid_not_empty"], this_cuboid_dimensions
+        ):
+            result = cuboid_centroid, plane_normal, rotation, hit_link, padding
+            num_attempts = attempt + 1
+            break
+
+    # Only consume the random vectors of the attempts that were needed.
+    np.random.set_state(random_state)
+    np.random.rand(num_attempts * 3)
+    return result
+
+
+def cast_rays(sources, destinations):
+    """
+    Cast rays with p.rayTestBatch, splitting them in batches of at most _MAX_RAYS_PER_BATCH rays.
+
+    :param sources: Array of shape (N, 3), ray sources
+    :param destinations: Array of shape (N, 3), ray destinations
+    :return: List of the N p.rayTestBatch results
+    """
+    cast_results = []
+    for start in range(0, len(sources), _MAX_RAYS_PER_BATCH):
+        cast_results.extend(
+            p.rayTestBatch(
+                rayFromPositions=sources[start : start + _MAX_RAYS_PER_BATCH],
+                rayToPositions=destinations[start : start + _MAX_RAYS_PER_BATCH],
+                numThreads=0,
+            )
+        )
+    return cast_results
+
+
 def compute_rotation_from_grid_sample(two_d_grid, hit_positions, cuboid_centroid, this_cuboid_dimensions):
     # TODO: Figure out if the normalization has any advantages.
     grid_in_planar_coordinates = two_d_grid.reshape(-1, 2)
@@ -465,10 +695,10 @@ def compute_ray_destination(axis, is_top, start_pos, aabb_min, aabb_max):
     return point_on_face
 
 
-def check_cuboid_empty(hit_normal, bottom_corner_positions, refusal_log, this_cuboid_dimensions):
-    if igibson.debug_sampling:
-        draw_debug_markers(bottom_corner_positions)
-
+def get_cuboid_diagonal_rays(hit_normal, bottom_corner_positions, this_cuboid_dimensions):
+    """
+    :return: Array of shape (N, 2, 3), sources and destinations of the rays checking that a cuboid is empty
+    """
     # Compute top corners.
     top_corner_positions = bottom_corner_positions + hit_normal * this_cuboid_dimensions[2]
 
@@ -480,8 +710,15 @@ def check_cuboid_empty(hit_normal, bottom_corner_positions, refusal_log, this_cu
     bottom_pairs = list(itertools.combinations(bottom_corner_positions, 2))
     top_pairs = list(itertools.combinations(top_corner_positions, 2))
 
-    # Combine all these pairs, cast the rays, and make sure the rays don't hit anything.
-    all_pairs = np.array(top_to_bottom_pairs + bottom_pairs + top_pairs)
+    return np.array(top_to_bottom_pairs + bottom_pairs + top_pairs)
+
+
+def check_cuboid_empty(hit_normal, bottom_corner_positions, refusal_log, this_cuboid_dimensions):
+    if igibson.debug_sampling:
+        draw_debug_markers(bottom_corner_positions)
+
+    # Combine all the corner pairs, cast the rays, and make sure the rays don't hit anything.
+    all_pairs = get_cuboid_diagonal_rays(hit_normal, bottom_corner_positions, this_cuboid_dimensions)
     check_cast_results = p.rayTestBatch(
         rayFromPositions=all_pairs[:, 0, :], rayToPositions=all_pairs[:, 1, :], numThreads=0
     )
@@ -0,0 +1,218 @@
+import logging
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+
+import pybullet as p
+
+from igibson.object_states.utils import clear_cached_states
+from igibson.utils.utils import restoreState
+
+log = logging.getLogger(__name__)
+
+SNAPSHOT_FILE_VERSION = 1
+
+
+class Snapshot(object):
+    """
+    In-memory snapshot of the simulation: a pybullet state id for the kinematics (poses, velocities, joint states) and
+    a pickled dump of every object's dump_state for the non-kinematic states (e.g. temperature, sliced, dirty).
+    """
+
+    def __init__(self, pybullet_state_id, object_states, pinned=False):
+        """
+        :param pybullet_state_id: id returned by p.saveState
+        :param object_states: pickled dict mapping object names to their dump_state
+        :param pinned: whether the snapshot is exempt from LRU eviction
+        """
+        self.pybullet_state_id = pybullet_state_id
+        self.object_states = object_states
+        self.pinned = pinned
+
+
+class SnapshotManager(object):
+    """
+    Saves and restores in-memory simulator snapshots, as a fast alternative to saving the scene to URDF and .bullet
+    files (see InteractiveIndoorScene.save / restore). A snapshot can be restored any number of times, e.g. to roll
+    out many episodes from the same state. The number of snapshots kept in memory is bounded by max_snapshots: when
+    the limit is reached, the least recently used snapshot that is not pinned is removed.
+    """
+
+    def __init__(self, simulator, max_snapshots=32):
+        """
+        :param simulator: Simulator to snapshot
+        :param max_snapshots: maximum number of snapshots kept in memory
+        """
+        self.simulator = simulator
+        self.max_snapshots = max_snapshots
+        self.snapshots = OrderedDict()
+        self.next_snapshot_id = 0
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def __contains__(self, snapshot_id):
+        return snapshot_id in self.snapshots
+
+    def _get_objects_by_name(self):
+        """
+        :return: dict mapping the names of the scene's objects to the objects
+        """
+        scene = self.simulator.scene
+        if hasattr(scene, "objects_by_name"):
+            return scene.objects_by_name
+        return {str(i): obj for i, obj in enumerate(scene.get_objects())}
+
+    def dump_object_states(self):
+        """
+        :return: pickled dict mapping object names to their non-kinematic states
+        """
+        return pickle.dumps(
+            {name: obj.dump_state() for name, obj in self._get_objects_by_name().items()},
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+
+    def load_object_states(self, object_states):
+        """
+        :param object_states: pickled dict returned by dump_object_states
+        """
+        object_states = pickle.loads(object_states)
+        for name, obj in self._get_objects_by_name().items():
+            if name not in object_states:
+                log.debug("Missing object [{}] in the snapshot".format(name))
+                continue
+            if object_states[name] is not None:
+                obj.load_state(object_states[name])
+
+    def _add(self, snapshot):
+        """
+        Register a snapshot, evicting the least recently used ones if needed.
+
+        :param snapshot: Snapshot to register
+        :return: id of the snapshot
+        """
+        snapshot_id = self.next_snapshot_id
+        self.next_snapshot_id += 1
+        self.snapshots[snapshot_id] = snapshot
+        while len(self.snapshots) > self.max_snapshots:
+            evictable = [key for key, value in self.snapshots.items() if not value.pinned]
+            if not evictable:
+                break
+            self.remove(evictable[0])
+        return snapshot_id
+
+    def save(self, pinned=False):
+        """
+        Take a snapshot of the current state of the simulation.
+
+        :param pinned: whether the snapshot is exempt from LRU eviction (e.g. the initial state of an episode)
+        :return: id of the snapshot
+        """
+        return self._add(Snapshot(p.saveState(), self.dump_object_states(), pinned=pinned))
+
+    def _after_restore(self):
+        """
+        Invalidate everything computed from the previous state of the simulation.
+        """
+        for obj in self.simulator.scene.get_objects():
+            if hasattr(obj, "states"):
+                clear_cached_states(obj)
+        self.simulator.contact_manager.invalidate()
+        if self.simulator.state_update_scheduler is not None:
+            self.simulator.state_update_scheduler.reset()
+        if hasattr(self.simulator.scene, "update_spatial_index"):
+            self.simulator.scene.update_spatial_index()
+
+    def restore(self, snapshot_id):
+        """
+        Restore the simulation to a snapshot. The renderer is synced on the next simulator step (or call
+        Simulator.sync to render before that).
+
+        :param snapshot_id: id returned by save
+        """
+        snapshot = self.snapshots[snapshot_id]
+        self.snapshots.move_to_end(snapshot_id)
+        self.load_object_states(snapshot.object_states)
+        restoreState(stateId=snapshot.pybullet_state_id)
+        self._after_restore()
+
+    def remove(self, snapshot_id):
+        """
+        Free a snapshot.
+
+        :param snapshot_id: id returned by save
+        """
+        snapshot = self.snapshots.pop(snapshot_id)
+        p.removeState(snapshot.pybullet_state_id)
+
+    def clear(self):
+        """
+        Free all the snapshots.
+        """
+        for snapshot_id in list(self.snapshots.keys()):
+            self.remove(snapshot_id)
+
+    def serialize(self, snapshot_id):
+        """
+        Serialize a snapshot to a dict of bytes, e.g. to embed it in another file.
+        Note that this restores the snapshot, since pybullet can only serialize the current state.
+
+        :param snapshot_id: id returned by save
+        :return: dict with the file version, the .bullet file of the kinematic state and the object states
+        """
+        self.restore(snapshot_id)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            bullet_path = os.path.join(tmp_dir, "state.bullet")
+            p.saveBullet(bullet_path)
+            with open(bullet_path, "rb") as f:
+                bullet = f.read()
+        return {
+            "version": SNAPSHOT_FILE_VERSION,
+            "bullet": bullet,
+            "object_states": self.snapshots[snapshot_id].object_states,
+        }
+
+    def restore_serialized(self, data, pinned=False):
+        """
+        Restore the simulation to a snapshot serialized by serialize, and keep the snapshot in memory.
+
+        :param data: dict returned by serialize
+        :param pinned: whether the snapshot is exempt from LRU eviction
+        :return: id of the in-memory snapshot, for fast subsequent restores
+        """
+        if data["version"] != SNAPSHOT_FILE_VERSION:
+            raise ValueError("Unsupported snapshot file version {}".format(data["version"]))
+
+        self.load_object_states(data["object_states"])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            bullet_path = os.path.join(tmp_dir, "state.bullet")
+            with open(bullet_path, "wb") as f:
+                f.write(data["bullet"])
+            restoreState(fileName=bullet_path)
+        self._after_restore()
+        return self._add(Snapshot(p.saveState(), data["object_states"], pinned=pinned))
+
+    def save_to_file(self, snapshot_id, path):
+        """
+        Serialize a snapshot to a single binary file, which loads much faster than a scene URDF.
+        Note that this restores the snapshot, since pybullet can only serialize the current state.
+
+        :param snapshot_id: id returned by save
+        :param path: file to write
+        """
+        data = self.serialize(snapshot_id)
+        with open(path, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def restore_from_file(self, path, pinned=False):
+        """
+        Restore the simulation to a snapshot file written by save_to_file, and keep the snapshot in memory.
+
+        :param path: file written by save_to_file
+        :param pinned: whether the snapshot is exempt from LRU eviction
+        :return: id of the in-memory snapshot, for fast subsequent restores
+        """
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        return self.restore_serialized(data, pinned=pinned)
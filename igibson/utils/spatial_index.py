@@ -0,0 +1,140 @@
+import numpy as np
+
+_INITIAL_CAPACITY = 64
+
+
+class AABBSpatialIndex(object):
+    """
+    Broad-phase index over axis-aligned bounding boxes, keyed by arbitrary hashable keys (e.g. pybullet body ids).
+    The boxes are kept in flat (N, 3) lower / upper arrays so that every query is a single vectorized sweep, which for
+    scene-sized collections (up to a few thousand boxes) is faster than maintaining a hierarchy from Python. Updating a
+    box is O(1), so the index can be refreshed incrementally for the entries that moved.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.key_to_row = {}
+        self.free_rows = []
+        self.lower = np.full((_INITIAL_CAPACITY, 3), np.inf)
+        self.upper = np.full((_INITIAL_CAPACITY, 3), -np.inf)
+        self.valid = np.zeros(_INITIAL_CAPACITY, dtype=bool)
+
+    def __len__(self):
+        return len(self.key_to_row)
+
+    def __contains__(self, key):
+        return key in self.key_to_row
+
+    def set_aabb(self, key, lower, upper):
+        """
+        Insert a box or update an existing one.
+
+        :param key: key of the box
+        :param lower: lower corner of the box
+        :param upper: upper corner of the box
+        """
+        row = self.key_to_row.get(key)
+        if row is None:
+            if self.free_rows:
+                row = self.free_rows.pop()
+                self.keys[row] = key
+            else:
+                row = len(self.keys)
+                self.keys.append(key)
+                if row == len(self.valid):
+                    self.lower = np.concatenate([self.lower, np.full_like(self.lower, np.inf)])
+                    self.upper = np.concatenate([self.upper, np.full_like(self.upper, -np.inf)])
+                    self.valid = np.concatenate([self.valid, np.zeros_like(self.valid)])
+            self.key_to_row[key] = row
+            self.valid[row] = True
+        self.lower[row] = lower
+        self.upper[row] = upper
+
+    def get_aabb(self, key):
+        """
+        :param key: key of the box
+        :return: lower and upper corners of the box
+        """
+        row = self.key_to_row[key]
+        return self.lower[row].copy(), self.upper[row].copy()
+
+    def remove(self, key):
+        """
+        :param key: key of the box to remove
+        """
+        row = self.key_to_row.pop(key)
+        self.keys[row] = None
+        self.valid[row] = False
+        self.lower[row] = np.inf
+        self.upper[row] = -np.inf
+        self.free_rows.append(row)
+
+    def overlaps(self, key_a, key_b, margin=0.0):
+        """
+        :param key_a: key of the first box
+        :param key_b: key of the second box
+        :param margin: distance under which two disjoint boxes are still considered overlapping
+        :return: whether the two boxes overlap
+        """
+        row_a = self.key_to_row[key_a]
+        row_b = self.key_to_row[key_b]
+        return bool(
+            np.all(self.lower[row_a] <= self.upper[row_b] + margin)
+            and np.all(self.upper[row_a] >= self.lower[row_b] - margin)
+        )
+
+    def _rows_to_keys(self, rows):
+        return [self.keys[row] for row in rows]
+
+    def query_overlap(self, lower, upper, margin=0.0):
+        """
+        Find the boxes that overlap a query box.
+
+        :param lower: lower corner of the query box
+        :param upper: upper corner of the query box
+        :param margin: distance by which the query box is grown in every direction
+        :return: list of keys of the overlapping boxes
+        """
+        n = len(self.keys)
+        overlap = np.all(
+            (self.lower[:n] <= np.asarray(upper) + margin) & (self.upper[:n] >= np.asarray(lower) - margin), axis=1
+        )
+        return self._rows_to_keys(np.flatnonzero(overlap))
+
+    def get_distances(self, point):
+        """
+        :param point: query point
+        :return: (N,) array of distances between the point and every box (0 inside a box, inf for empty rows)
+        """
+        n = len(self.keys)
+        point = np.asarray(point)
+        delta = np.maximum(np.maximum(self.lower[:n] - point, point - self.upper[:n]), 0.0)
+        distances = np.linalg.norm(delta, axis=1)
+        distances[~self.valid[:n]] = np.inf
+        return distances
+
+    def query_radius(self, point, radius):
+        """
+        Find the boxes within a distance of a point.
+
+        :param point: query point
+        :param radius: query radius
+        :return: list of keys of the boxes within radius of the point
+        """
+        return self._rows_to_keys(np.flatnonzero(self.get_distances(point) <= radius))
+
+    def query_knn(self, point, k):
+        """
+        Find the boxes closest to a point.
+
+        :param point: query point
+        :param k: number of boxes to return
+        :return: list of the keys of the (at most) k closest boxes, sorted by increasing distance
+        """
+        distances = self.get_distances(point)
+        k = min(k, len(self))
+        if k <= 0:
+            return []
+        rows = np.argpartition(distances, k - 1)[:k]
+        rows = rows[np.argsort(distances[rows], kind="stable")]
+        return self._rows_to_keys(rows)
@@ -0,0 +1,42 @@
+from collections import OrderedDict
+
+
+class TimingStats(object):
+    """
+    Number of calls, successes and time of every type of operation, e.g. every sampled predicate of a BEHAVIOR
+    activity or every type of motion planning query (arm IK, arm motion, base motion), to find the slow or failing ones.
+    """
+
+    def __init__(self):
+        self.operations = OrderedDict()
+
+    def reset(self):
+        """
+        Forget all the recorded calls.
+        """
+        self.operations.clear()
+
+    def record(self, operation, duration, success):
+        """
+        :param operation: type of operation
+        :param duration: time of the call in seconds
+        :param success: whether the call succeeded
+        """
+        stats = self.operations.setdefault(
+            operation, {"num_calls": 0, "num_successes": 0, "total_time": 0.0, "max_time": 0.0}
+        )
+        stats["num_calls"] += 1
+        stats["num_successes"] += int(success)
+        stats["total_time"] += duration
+        stats["max_time"] = max(stats["max_time"], duration)
+
+    def summary(self):
+        """
+        :return: dict mapping every type of operation to its number of calls, success rate, total, mean and max time
+        """
+        summary = OrderedDict()
+        for operation, stats in self.operations.items():
+            summary[operation] = dict(stats)
+            summary[operation]["success_rate"] = stats["num_successes"] / stats["num_calls"]
+            summary[operation]["mean_time"] = stats["total_time"] / stats["num_calls"]
+        return summary
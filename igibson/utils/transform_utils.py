@@ -549,6 +549,38 @@ def quat2mat(quaternion):
     )
 
 
+def quat2euler(quaternions):
+    """
+    Converts quaternions to roll, pitch, yaw Euler angles, with the same convention and handling of the gimbal lock
+    as pybullet's getEulerFromQuaternion.
+
+    Args:
+        quaternions (np.array): (..., 4) (x,y,z,w) float quaternions
+
+    Returns:
+        np.array: (..., 3) (roll, pitch, yaw) float angles
+    """
+    q = np.asarray(quaternions, dtype=np.float64)
+    x, y, z, w = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+    sqx, sqy, sqz, sqw = x * x, y * y, z * z, w * w
+    sarg = -2.0 * (x * z - w * y)
+    lower_lock = sarg <= -0.99999
+    upper_lock = sarg >= 0.99999
+    locked = lower_lock | upper_lock
+
+    euler = np.empty(q.shape[:-1] + (3,))
+    euler[..., 0] = np.where(locked, 0.0, np.arctan2(2.0 * (y * z + w * x), sqw - sqx - sqy + sqz))
+    euler[..., 1] = np.where(
+        lower_lock, -0.5 * np.pi, np.where(upper_lock, 0.5 * np.pi, np.arcsin(np.clip(sarg, -1, 1)))
+    )
+    euler[..., 2] = np.where(
+        lower_lock,
+        2.0 * np.arctan2(x, -y),
+        np.where(upper_lock, 2.0 * np.arctan2(-x, y), np.arctan2(2.0 * (x * y + w * z), sqw + sqx - sqy - sqz)),
+    )
+    return euler
+
+
 def quat2axisangle(quat):
     """
     Converts quaternion to axis-angle format.
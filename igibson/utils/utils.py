@@ -12,12 +12,12 @@ from scipy.spatial.transform import Rotation as R
 from transforms3d import quaternions
 
 from igibson.utils.constants import CoordinateSystem
+from igibson.utils.contact_manager import invalidate_contacts
 
 # File I/O related
 
 
 def parse_config(config):
-
     """
     Parse iGibson config file / object
     """
@@ -250,6 +250,26 @@ def brighten_texture(input_filename, output_filename, brightness=1):
 
 # Other
 
+# Incremented whenever bodies may have been moved outside of Simulator.step, see notify_bodies_moved
+_bodies_moved_generation = 0
+
+
+def notify_bodies_moved():
+    """
+    Signal that bodies may have been moved without being woken up, e.g. by p.resetBasePositionAndOrientation,
+    p.resetJointState or p.restoreState: pybullet keeps the bodies it teleports asleep, so the
+    ObjectStateUpdateSchedulers poll the poses of the sleeping bodies again on their next step.
+    """
+    global _bodies_moved_generation
+    _bodies_moved_generation += 1
+
+
+def get_bodies_moved_generation():
+    """
+    :return: counter incremented by every notify_bodies_moved call
+    """
+    return _bodies_moved_generation
+
 
 def restoreState(*args, **kwargs):
     """Restore to a given pybullet state, with a mitigation for a known sleep state restore bug.
@@ -257,14 +277,18 @@ def restoreState(*args, **kwargs):
     When the pybullet state is restored, the object's wake zone (the volume around the object where
     if any other object enters, the object should be waken up) does not get reset correctly,
     causing weird bugs around asleep objects. This function mitigates the issue by forcing the
-    sleep code to update each object's wake zone.
+    sleep code to update each object's wake zone. The contacts are restored too, so the contact snapshots of the
+    ContactManagers are dropped, and the bodies are moved without being woken up (see notify_bodies_moved).
     """
     p.restoreState(*args, **kwargs)
     for body_id in range(p.getNumBodies()):
         p.resetBasePositionAndOrientation(
             body_id, *p.getBasePositionAndOrientation(body_id), physicsClientId=kwargs.get("physicsClientId", 0)
         )
-    return p.restoreState(*args, **kwargs)
+    result = p.restoreState(*args, **kwargs)
+    invalidate_contacts()
+    notify_bodies_moved()
+    return result
 
 
 def let_user_pick(options, print_intro=True, selection="user"):
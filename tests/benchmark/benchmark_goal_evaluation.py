@@ -0,0 +1,96 @@
+import time
+
+import numpy as np
+import pybullet as p
+from bddl.condition_evaluation import compile_state, evaluate_state
+
+from igibson import object_states
+from igibson.tasks.bddl_backend import IGibsonBDDLBackend
+from igibson.tasks.incremental_goal_evaluator import IncrementalGoalEvaluator
+
+
+class RayOnTop(object):
+    """
+    Stand-in for the OnTop state of an object, with a similar cost: a batch of vertical rays cast down from the object,
+    as VerticalAdjacency does.
+    """
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def get_value(self, other):
+        lower, upper = p.getAABB(self.obj.body_id)
+        xs, ys = np.meshgrid(np.linspace(lower[0], upper[0], 3), np.linspace(lower[1], upper[1], 3))
+        center_z = (lower[2] + upper[2]) / 2
+        starts = [[x, y, center_z] for x, y in zip(xs.flatten(), ys.flatten())]
+        ends = [[x, y, center_z - 0.5] for x, y in zip(xs.flatten(), ys.flatten())]
+        return any(hit[0] == other.body_id for hit in p.rayTestBatch(starts, ends))
+
+
+class BoxObject(object):
+    def __init__(self, position, half_extents, mass):
+        shape = p.createCollisionShape(p.GEOM_BOX, halfExtents=half_extents)
+        self.body_id = p.createMultiBody(baseMass=mass, baseCollisionShapeIndex=shape, basePosition=position)
+        self.states = {object_states.OnTop: RayOnTop(self)}
+
+    def get_body_ids(self):
+        return [self.body_id]
+
+
+def benchmark(n_clutter, n_goal_objects=10, n_frame=200, n_moving=5):
+    """
+    Time the evaluation of the goal conditions of a scene with many bodies that are not part of the goal, a few of
+    which move every frame.
+
+    :return: mean time in ms of evaluate_goal_conditions and of IncrementalGoalEvaluator.evaluate
+    """
+    p.connect(p.DIRECT)
+    p.setGravity(0, 0, -9.8)
+    rng = np.random.RandomState(0)
+    BoxObject([0, 0, -0.5], [100, 100, 0.5], 0)
+    scope = {}
+    for i in range(n_goal_objects):
+        scope["table.n.02_{}".format(i + 1)] = BoxObject([3 * i, -5, 0.4], [0.5, 0.5, 0.4], 0)
+        scope["apple.n.01_{}".format(i + 1)] = BoxObject([3 * i, -5, 0.9], [0.05, 0.05, 0.05], 0.1)
+    clutter = [
+        BoxObject([rng.uniform(-20, 20), rng.uniform(0, 20), 0.1], [0.1, 0.1, 0.1], 1.0) for _ in range(n_clutter)
+    ]
+    object_map = {
+        "table.n.02": ["table.n.02_{}".format(i + 1) for i in range(n_goal_objects)],
+        "apple.n.01": ["apple.n.01_{}".format(i + 1) for i in range(n_goal_objects)],
+    }
+    goal = [["ontop", "apple.n.01_{}".format(i + 1), "table.n.02_{}".format(i + 1)] for i in range(n_goal_objects)]
+    conditions = compile_state(goal, IGibsonBDDLBackend(), scope=scope, object_map=object_map)
+    evaluator = IncrementalGoalEvaluator(conditions)
+
+    full_times = []
+    incremental_times = []
+    for _ in range(n_frame):
+        for i in rng.choice(len(clutter), min(n_moving, len(clutter)), replace=False):
+            p.resetBaseVelocity(clutter[i].body_id, rng.uniform(-1, 1, 3) * [1, 1, 0])
+        p.stepSimulation()
+
+        start = time.time()
+        expected = evaluate_state(conditions)
+        full_times.append(time.time() - start)
+        start = time.time()
+        result = evaluator.evaluate()
+        incremental_times.append(time.time() - start)
+        assert result == expected
+    num_satisfied = len(evaluator.evaluate()[1]["satisfied"])
+    p.disconnect()
+    assert num_satisfied == n_goal_objects
+    return np.mean(full_times) * 1000, np.mean(incremental_times) * 1000, evaluator.get_stats()["hit_rate"]
+
+
+def main():
+    for n_clutter in [0, 100, 500, 1000]:
+        full_time, incremental_time, hit_rate = benchmark(n_clutter)
+        print(
+            "{} bodies out of the goal: evaluate_goal_conditions {:.3f} ms, incremental {:.3f} ms "
+            "(hit rate {:.2f})".format(n_clutter, full_time, incremental_time, hit_rate)
+        )
+
+
+if __name__ == "__main__":
+    main()
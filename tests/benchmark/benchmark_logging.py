@@ -0,0 +1,83 @@
+import os
+import tempfile
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+import igibson
+from igibson.objects.articulated_object import ArticulatedObject
+from igibson.render.mesh_renderer.mesh_renderer_settings import MeshRendererSettings
+from igibson.scenes.empty_scene import EmptyScene
+from igibson.simulator import Simulator
+from igibson.utils.assets_utils import download_assets
+from igibson.utils.ig_logging import IGLogWriter
+
+
+def time_frames(s, log_writer, n_frame):
+    """
+    Time every simulator frame, including the logging of the frame if a log writer is given.
+    """
+    frame_times = []
+    for _ in range(n_frame):
+        start = time.time()
+        s.step()
+        if log_writer is not None:
+            log_writer.process_frame()
+        frame_times.append(time.time() - start)
+    if log_writer is not None:
+        log_writer.end_log_session()
+    return np.array(frame_times) * 1000
+
+
+def benchmark(n_objects=40, n_frame=2000):
+    download_assets()
+    cabinet = os.path.join(igibson.assets_path, "models/cabinet2/cabinet_0007.urdf")
+    settings = MeshRendererSettings(msaa=False, enable_shadow=False, optimized=False)
+    s = Simulator(mode="headless", image_width=128, image_height=128, rendering_settings=settings)
+    s.import_scene(EmptyScene())
+    for i in range(n_objects):
+        obj = ArticulatedObject(filename=cabinet)
+        s.import_object(obj)
+        obj.set_position([i % 10, i // 10, 0.5])
+
+    log_dir = tempfile.mkdtemp()
+    configs = {
+        "no logging": None,
+        "sync": dict(),
+        "async float32 gzip": dict(async_write=True, pose_dtype=np.float32, compression="gzip"),
+    }
+    results = {}
+    for name, kwargs in configs.items():
+        log_writer = None
+        if kwargs is not None:
+            log_path = os.path.join(log_dir, name.replace(" ", "_") + ".hdf5")
+            log_writer = IGLogWriter(s, log_path, filter_objects=False, log_status=False, **kwargs)
+            log_writer.set_up_data_storage()
+        frame_times = time_frames(s, log_writer, n_frame)
+        results[name] = frame_times
+        size = os.path.getsize(log_path) / 1e6 if kwargs is not None else 0
+        print(
+            "{}: mean {:.2f} ms, std {:.2f} ms, p99 {:.2f} ms, max {:.2f} ms, file size {:.1f} MB".format(
+                name, frame_times.mean(), frame_times.std(), np.percentile(frame_times, 99), frame_times.max(), size
+            )
+        )
+    s.disconnect()
+
+    plt.figure()
+    for name, frame_times in results.items():
+        plt.plot(frame_times, label=name)
+    plt.xlabel("frame")
+    plt.ylabel("frame time (ms)")
+    plt.title("Logging Frame Time Benchmark")
+    plt.legend()
+    plt.savefig("logging_benchmark.pdf")
+    return results
+
+
+def main():
+    benchmark()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import os
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+import igibson
+from igibson.envs.igibson_env import iGibsonEnv
+from igibson.envs.parallel_env import ParallelNavEnv
+from igibson.utils.assets_utils import download_assets
+
+config_filename = os.path.join(os.path.dirname(igibson.__file__), "..", "tests", "test.yaml")
+
+
+def load_env():
+    return iGibsonEnv(config_file=config_filename, mode="headless")
+
+
+def time_parallel_env(n_workers, use_shared_memory, n_step):
+    """
+    Measure the number of environment steps per second of a ParallelNavEnv with the given observation transport.
+    """
+    env = ParallelNavEnv([load_env] * n_workers, use_shared_memory=use_shared_memory)
+    env.reset()
+    actions = [env.action_space.sample() for _ in range(n_workers)]
+    start = time.time()
+    for _ in range(n_step):
+        env.step(actions)
+    elapsed = time.time() - start
+    env.close()
+    return n_workers * n_step / elapsed
+
+
+def benchmark(worker_counts=(1, 4, 16), n_step=200):
+    download_assets()
+
+    pipe_throughputs = []
+    shared_memory_throughputs = []
+    for n_workers in worker_counts:
+        pipe_throughput = time_parallel_env(n_workers, False, n_step)
+        shared_memory_throughput = time_parallel_env(n_workers, True, n_step)
+        print(
+            "{} workers: pipe {:.1f} steps/s, shared memory {:.1f} steps/s, speedup {:.2f}x".format(
+                n_workers, pipe_throughput, shared_memory_throughput, shared_memory_throughput / pipe_throughput
+            )
+        )
+        pipe_throughputs.append(pipe_throughput)
+        shared_memory_throughputs.append(shared_memory_throughput)
+
+    plt.figure()
+    plt.plot(worker_counts, pipe_throughputs, "o-", label="pipe")
+    plt.plot(worker_counts, shared_memory_throughputs, "o-", label="shared memory")
+    plt.xlabel("number of workers")
+    plt.ylabel("throughput (steps/s)")
+    plt.title("Parallel Env Observation Transport Benchmark")
+    plt.legend()
+    plt.savefig("parallel_env_benchmark.pdf")
+    return np.array(worker_counts), np.array(pipe_throughputs), np.array(shared_memory_throughputs)
+
+
+def main():
+    benchmark()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import os
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+import igibson
+from igibson.objects.articulated_object import ArticulatedObject
+from igibson.render.mesh_renderer.mesh_renderer_settings import MeshRendererSettings
+from igibson.robots.fetch import Fetch
+from igibson.scenes.empty_scene import EmptyScene
+from igibson.simulator import Simulator
+from igibson.utils.assets_utils import download_assets
+
+
+def time_sync(s, update_fn, n_frame):
+    """
+    Time the renderer pose sync of all dynamic instances with the given update function, forcing every link to sync.
+    """
+    start = time.time()
+    for _ in range(n_frame):
+        for instance in s.renderer.instances:
+            if instance.dynamic:
+                update_fn(instance, force_sync=True)
+    return (time.time() - start) / n_frame
+
+
+def benchmark(object_counts=(1, 5, 10, 20, 40), n_frame=200):
+    download_assets()
+    cabinet = os.path.join(igibson.assets_path, "models/cabinet2/cabinet_0007.urdf")
+
+    link_counts = []
+    per_link_times = []
+    batched_times = []
+    for n_objects in object_counts:
+        settings = MeshRendererSettings(msaa=False, enable_shadow=False, optimized=False)
+        s = Simulator(mode="headless", image_width=128, image_height=128, rendering_settings=settings)
+        scene = EmptyScene()
+        s.import_scene(scene)
+        s.import_object(Fetch())
+        for i in range(n_objects):
+            obj = ArticulatedObject(filename=cabinet)
+            s.import_object(obj)
+            obj.set_position([2 + (i % 10), i // 10, 0.5])
+
+        for _ in range(10):
+            s.step()
+
+        n_links = sum(len(instance.link_ids) for instance in s.renderer.instances if instance.dynamic)
+        per_link_time = time_sync(s, Simulator.update_position, n_frame)
+        batched_time = time_sync(s, Simulator.update_position_batched, n_frame)
+        print(
+            "{} links: per-link sync {:.3f} ms, batched sync {:.3f} ms, speedup {:.2f}x".format(
+                n_links, per_link_time * 1000, batched_time * 1000, per_link_time / batched_time
+            )
+        )
+        link_counts.append(n_links)
+        per_link_times.append(per_link_time * 1000)
+        batched_times.append(batched_time * 1000)
+        s.disconnect()
+
+    plt.figure()
+    plt.plot(link_counts, per_link_times, "o-", label="update_position")
+    plt.plot(link_counts, batched_times, "o-", label="update_position_batched")
+    plt.xlabel("number of synced links")
+    plt.ylabel("sync time per frame (ms)")
+    plt.title("Renderer Pose Sync Benchmark")
+    plt.legend()
+    plt.savefig("sync_benchmark.pdf")
+    return np.array(link_counts), np.array(per_link_times), np.array(batched_times)
+
+
+def main():
+    benchmark()
+
+
+if __name__ == "__main__":
+    main()
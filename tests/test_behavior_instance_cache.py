@@ -0,0 +1,166 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pybullet as p
+import pybullet_data
+
+from igibson.tasks.behavior_instance_cache import (
+    BehaviorInstanceCache,
+    get_activity_hash,
+    get_instance_key,
+    get_scene_loading_config,
+)
+from igibson.tasks.behavior_task import BehaviorTask
+from igibson.utils.contact_manager import ContactManager
+from igibson.utils.snapshot_manager import SnapshotManager
+
+
+def test_instance_keys():
+    conds = SimpleNamespace(
+        parsed_objects={"apple.n.01": ["apple.n.01_1"], "table.n.02": ["table.n.02_1"]},
+        parsed_initial_conditions=[["ontop", "apple.n.01_1", "table.n.02_1"]],
+        parsed_goal_conditions=[["not", ["ontop", "apple.n.01_1", "table.n.02_1"]]],
+    )
+    activity_hash = get_activity_hash(conds)
+    key = get_instance_key(activity_hash, "Rs_int", "BehaviorRobot", 0, True)
+    assert key == get_instance_key(get_activity_hash(conds), "Rs_int", "BehaviorRobot", 0, True)
+    assert key != get_instance_key(activity_hash, "Rs_int", "BehaviorRobot", 1, True)
+    assert key != get_instance_key(activity_hash, "Rs_int", "Fetch", 0, True)
+    assert key != get_instance_key(activity_hash, "Rs_int", "BehaviorRobot", 0, False)
+
+    # Scenes loaded with other objects are different instances, the order of the lists does not matter
+    scene_loading_config = get_scene_loading_config({"not_load_object_categories": ["ceilings", "carpet"]})
+    assert scene_loading_config == get_scene_loading_config({"not_load_object_categories": ["carpet", "ceilings"]})
+    assert get_scene_loading_config({"load_room_types": "kitchen"})["load_room_types"] == ["kitchen"]
+    assert key == get_instance_key(activity_hash, "Rs_int", "BehaviorRobot", 0, True, get_scene_loading_config({}))
+    assert key != get_instance_key(activity_hash, "Rs_int", "BehaviorRobot", 0, True, scene_loading_config)
+
+    conds.parsed_initial_conditions = [["inside", "apple.n.01_1", "table.n.02_1"]]
+    assert get_activity_hash(conds) != activity_hash
+
+
+def test_instance_cache(tmp_path):
+    cache = BehaviorInstanceCache(str(tmp_path / "cache"))
+    assert "key" not in cache
+    assert cache.load("key") is None
+
+    entry = {"object_scope": {"apple.n.01_1": "apple_0"}, "snapshot": {"bullet": b"\x00" * 1000}}
+    cache.save("key", entry)
+    assert "key" in cache
+    loaded = cache.load("key")
+    assert loaded["object_scope"] == entry["object_scope"]
+    assert loaded["snapshot"] == entry["snapshot"]
+
+    # Corrupted entries are ignored
+    with open(cache.get_path("key"), "wb") as f:
+        f.write(b"corrupted")
+    assert cache.load("key") is None
+
+
+class SampledObject(object):
+    """Minimal scene object with a name and a non-kinematic state that is not part of the pybullet state."""
+
+    def __init__(self, name, position):
+        self.name = name
+        self.body_id = p.loadURDF("cube_small.urdf", position)
+        self.temperature = 23.0
+
+    def get_position_orientation(self):
+        pos, orn = p.getBasePositionAndOrientation(self.body_id)
+        return np.array(pos), np.array(orn)
+
+    def dump_state(self):
+        return {"temperature": self.temperature}
+
+    def load_state(self, dump):
+        self.temperature = dump["temperature"]
+
+
+def create_env(objects_by_name):
+    scene = SimpleNamespace(
+        scene_id="Rs_int", objects_by_name=objects_by_name, get_objects=lambda: list(objects_by_name.values())
+    )
+    simulator = SimpleNamespace(scene=scene, contact_manager=ContactManager(), state_update_scheduler=None)
+    simulator.snapshot_manager = SnapshotManager(simulator)
+    simulator.save_snapshot = simulator.snapshot_manager.save
+    simulator.remove_snapshot = simulator.snapshot_manager.remove
+    return SimpleNamespace(simulator=simulator)
+
+
+def create_task(env, apple, config):
+    # Not loading an activity, only the sampled instance logic of BehaviorTask is tested
+    task = BehaviorTask.__new__(BehaviorTask)
+    task.config = config
+    task.conds = SimpleNamespace(
+        parsed_objects={"apple.n.01": ["apple.n.01_1"], "table.n.02": ["table.n.02_1"]},
+        parsed_initial_conditions=[["ontop", "apple.n.01_1", "table.n.02_1"]],
+        parsed_goal_conditions=[["not", ["ontop", "apple.n.01_1", "table.n.02_1"]]],
+    )
+    task.scene = env.simulator.scene
+    task.sampling_seed = 0
+    task.load_clutter = False
+    # State after check_scene: the sampleable objects are imported, the non-sampleable ones are not chosen yet
+    task.object_scope = {"apple.n.01_1": apple, "table.n.02_1": None}
+    task.non_sampleable_object_inst = {"table.n.02_1"}
+    task.non_sampleable_object_scope = {}
+    task.clutter_scene_name = None
+    task.clutter_object_names = []
+    return task
+
+
+def test_sampled_instance_keys():
+    config = {"robot": {"name": "BehaviorRobot"}, "not_load_object_categories": ["ceilings"]}
+    task = create_task(create_env({}), None, config)
+    key = task.get_sampled_instance_key()
+    assert key == create_task(create_env({}), None, dict(config)).get_sampled_instance_key()
+    for scene_config in [
+        {"not_load_object_categories": None},
+        {"load_object_categories": ["walls", "floors", "table"]},
+        {"load_room_types": ["kitchen"]},
+        {"load_room_instances": ["kitchen_0"]},
+    ]:
+        assert create_task(create_env({}), None, dict(config, **scene_config)).get_sampled_instance_key() != key
+
+
+def test_sampled_instance_round_trip(tmp_path):
+    p.connect(p.DIRECT)
+    try:
+        p.setAdditionalSearchPath(pybullet_data.getDataPath())
+        p.loadURDF("plane.urdf")
+        apple = SampledObject("apple_0", [0, 0, 0.5])
+        tables = {name: SampledObject(name, [i, 1, 0.2]) for i, name in enumerate(["table_0", "table_1"])}
+        env = create_env(dict(tables, apple_0=apple))
+        task = create_task(env, apple, {"robot": {"name": "BehaviorRobot"}})
+
+        # Sampling result
+        task.object_scope["table.n.02_1"] = tables["table_1"]
+        p.resetBasePositionAndOrientation(apple.body_id, [1, 1, 0.3], p.getQuaternionFromEuler([0, 0, 0.5]))
+        apple.temperature = 80.0
+        sampled_poses = {
+            name: obj.get_position_orientation() for name, obj in env.simulator.scene.objects_by_name.items()
+        }
+
+        cache = BehaviorInstanceCache(str(tmp_path))
+        key = task.get_sampled_instance_key()
+        cache.save(key, task.dump_sampled_instance(env))
+
+        # Restore in a new episode
+        p.resetBasePositionAndOrientation(apple.body_id, [0, 0, 0.5], [0, 0, 0, 1])
+        p.resetBasePositionAndOrientation(tables["table_1"].body_id, [2, 2, 0.2], [0, 0, 0, 1])
+        apple.temperature = 23.0
+        task = create_task(env, apple, {"robot": {"name": "BehaviorRobot"}})
+        assert task.get_sampled_instance_key() == key
+        assert task.restore_sampled_instance(env, cache.load(key))
+        assert task.object_scope == {"apple.n.01_1": apple, "table.n.02_1": tables["table_1"]}
+        assert apple.temperature == 80.0
+        for name, obj in env.simulator.scene.objects_by_name.items():
+            pos, orn = obj.get_position_orientation()
+            assert np.allclose(pos, sampled_poses[name][0])
+            assert np.allclose(orn, sampled_poses[name][1])
+
+        # The entry is rejected if check_scene imported other objects
+        task = create_task(env, SampledObject("apple_1", [0, 0, 0.5]), {"robot": {"name": "BehaviorRobot"}})
+        assert not task.restore_sampled_instance(env, cache.load(key))
+        assert task.object_scope["table.n.02_1"] is None
+    finally:
+        p.disconnect()
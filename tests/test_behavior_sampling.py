@@ -0,0 +1,109 @@
+import multiprocessing
+from types import SimpleNamespace
+
+from igibson.tasks import behavior_sampling_pool
+from igibson.tasks.behavior_sampling_pool import BehaviorSamplingPool, BehaviorSamplingWorkerTask, get_condition_key
+from igibson.tasks.behavior_task import BehaviorTask
+from igibson.utils.timing_stats import TimingStats
+
+OBJECT_NAMES = ["apple_0", "table_0", "table_1", "table_2"]
+
+
+class FakeObject(object):
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeCondition(object):
+    """
+    Kinematic condition that can only be sampled when its second object is one of the supporting objects.
+    """
+
+    def __init__(self, state_name, body, object_scope, supporting_objects):
+        self.STATE_NAME = state_name
+        self.body = body
+        self.object_scope = object_scope
+        self.supporting_objects = supporting_objects
+
+    def sample(self, binary_state):
+        return self.object_scope[self.body[1]].name in self.supporting_objects
+
+
+def create_conditions(object_scope):
+    return [
+        (FakeCondition("ontop", ["apple.n.01_1", "table.n.02_1"], object_scope, {"table_1", "table_2"}), True),
+        # Not sampled: negative, or not a kinematic state
+        (FakeCondition("ontop", ["apple.n.01_1", "table.n.02_1"], object_scope, set()), False),
+        (FakeCondition("cooked", ["apple.n.01_1", "table.n.02_1"], object_scope, set()), True),
+    ]
+
+
+def create_task():
+    # Not loading a scene, only the sampling logic of BehaviorTask is tested
+    task = BehaviorTask.__new__(BehaviorTask)
+    task.objects_by_name = {name: FakeObject(name) for name in OBJECT_NAMES}
+    task.object_scope = {"apple.n.01_1": task.objects_by_name["apple_0"], "table.n.02_1": None}
+    task.non_sampleable_object_inst = {"table.n.02_1"}
+    task.debug_obj_inst = None
+    task.sampling_pool = None
+    task.sampling_stats = TimingStats()
+    return task
+
+
+def init_fake_sampling_worker():
+    """
+    Initializer of the sampling workers of the test, with a worker task holding the same objects and conditions as the
+    task of the main process, instead of a simulator.
+    """
+    task = BehaviorSamplingWorkerTask.__new__(BehaviorSamplingWorkerTask)
+    task.initial_state = None
+    task.objects_by_name = {name: FakeObject(name) for name in OBJECT_NAMES}
+    task.object_scope = {"apple.n.01_1": task.objects_by_name["apple_0"], "table.n.02_1": None}
+    task.conditions_by_key = {
+        get_condition_key(condition, positive): (condition, positive)
+        for condition, positive in create_conditions(task.object_scope)
+    }
+    simulator = SimpleNamespace(restore_snapshot=lambda snapshot_id: None)
+    behavior_sampling_pool._worker_env = SimpleNamespace(task=task, simulator=simulator)
+
+
+def filter_tables(task):
+    tables = {
+        "kitchen_0": [task.objects_by_name["table_0"], task.objects_by_name["table_1"]],
+        "kitchen_1": [task.objects_by_name["table_2"]],
+    }
+    filtered_object_scope = task.filter_object_scope(
+        {"kitchen": {"table.n.02_1": tables}}, create_conditions(task.object_scope), "initial"
+    )
+    return {
+        room_inst: [obj.name for obj in objs]
+        for room_inst, objs in filtered_object_scope["kitchen"]["table.n.02_1"].items()
+    }
+
+
+def test_filter_object_scope():
+    task = create_task()
+    assert filter_tables(task) == {"kitchen_0": ["table_1"], "kitchen_1": ["table_2"]}
+
+    stats = task.get_sampling_stats()
+    assert list(stats.keys()) == ["ontop"]
+    assert stats["ontop"]["num_calls"] == 3
+    assert stats["ontop"]["num_successes"] == 2
+
+
+def test_filter_object_scope_in_worker_processes():
+    task = create_task()
+    expected = filter_tables(task)
+    expected_stats = task.get_sampling_stats()
+
+    task = create_task()
+    # The workers are spawned like in BehaviorSamplingPool, but do not load a simulator
+    task.sampling_pool = BehaviorSamplingPool.__new__(BehaviorSamplingPool)
+    task.sampling_pool.pool = multiprocessing.get_context("spawn").Pool(2, initializer=init_fake_sampling_worker)
+    try:
+        assert filter_tables(task) == expected
+    finally:
+        task.sampling_pool.close()
+    stats = task.get_sampling_stats()
+    for key in ["num_calls", "num_successes"]:
+        assert stats["ontop"][key] == expected_stats["ontop"][key]
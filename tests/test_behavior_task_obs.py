@@ -0,0 +1,127 @@
+import numpy as np
+import pybullet as p
+
+from igibson.objects.articulated_object import URDFObject
+from igibson.robots.manipulation_robot import IsGraspingState
+from igibson.tasks.behavior_task import BehaviorTask
+from igibson.utils.transform_utils import quat2euler
+
+
+class FakeEnv(object):
+    def __init__(self, robot):
+        self.robots = [robot]
+
+
+class FakeRobot(object):
+    """
+    Two-armed robot with the grasping interface used by BehaviorTask.get_task_obs.
+    """
+
+    arm_names = ["left_hand", "right_hand"]
+
+    def __init__(self, grasping_mode):
+        self.grasping_mode = grasping_mode
+        self._ag_obj_in_hand = {arm: None for arm in self.arm_names}
+        self._ag_release_counter = {arm: None for arm in self.arm_names}
+        self.physical_grasps = {arm: IsGraspingState.FALSE for arm in self.arm_names}
+
+    def get_position(self):
+        return np.array([1.0, 2.0, 0.5])
+
+    def get_rpy(self):
+        return np.array([0.0, 0.0, 0.3])
+
+    def is_grasping(self, arm="default", candidate_obj=None):
+        if self.grasping_mode == "physical":
+            return self.physical_grasps[arm]
+        is_grasping_obj = (
+            self._ag_obj_in_hand[arm] is not None
+            if candidate_obj is None
+            else self._ag_obj_in_hand[arm] == candidate_obj
+        )
+        if is_grasping_obj and self._ag_release_counter[arm] is None:
+            return IsGraspingState.TRUE
+        return IsGraspingState.FALSE
+
+    def is_grasping_all_arms(self, candidate_obj=None):
+        return np.array([self.is_grasping(arm=arm, candidate_obj=candidate_obj) for arm in self.arm_names])
+
+
+def create_object(position, orientation):
+    obj = URDFObject.__new__(URDFObject)
+    shape = p.createCollisionShape(p.GEOM_BOX, halfExtents=[0.1, 0.1, 0.1])
+    obj._body_ids = [p.createMultiBody(baseMass=0, baseCollisionShapeIndex=shape, basePosition=position)]
+    obj.main_body = 0
+    p.resetBasePositionAndOrientation(obj._body_ids[0], position, orientation)
+    return obj
+
+
+def get_expected_task_obs(task, robot):
+    expected = [robot.get_position(), robot.get_rpy()]
+    for obj in task.object_scope.values():
+        if isinstance(obj, URDFObject):
+            pos, orn = p.getBasePositionAndOrientation(obj.get_body_ids()[0])
+            # Like the original per-object loop, which never reported assisted grasps unless task_obs_assisted_grasps
+            candidate_obj = obj.get_body_ids()[0] if task.task_obs_assisted_grasps else obj.get_body_ids()
+            grasps = [robot.is_grasping(arm=arm, candidate_obj=candidate_obj) for arm in robot.arm_names]
+            expected.extend([[1.0], pos, p.getEulerFromQuaternion(orn), grasps])
+    expected = np.concatenate(expected)
+    return np.concatenate([expected, np.zeros(task.task_obs_dim - len(expected))]).astype(np.float32)
+
+
+def test_task_obs():
+    p.connect(p.DIRECT)
+    try:
+        task = BehaviorTask.__new__(BehaviorTask)
+        task.task_obs_dim = 6 + 9 * 4
+        task.task_obs_layout = None
+        task.task_obs_buffer = np.zeros(task.task_obs_dim, dtype=np.float32)
+        task.task_obs_assisted_grasps = False
+        apple = create_object([0.5, 0.0, 1.0], p.getQuaternionFromEuler([0.1, 0.2, 0.3]))
+        bowl = create_object([-0.5, 0.3, 1.0], [0, 0, 0, 1])
+        task.object_scope = {"apple.n.01_1": apple, "floor.n.01_1": object(), "bowl.n.01_1": bowl}
+
+        robot = FakeRobot("assisted")
+        env = FakeEnv(robot)
+        task_obs = task.get_task_obs(env)
+        expected_task_obs = get_expected_task_obs(task, robot)
+        assert task_obs.dtype == np.float32
+        assert np.allclose(task_obs, expected_task_obs)
+
+        # The observation is not modified by the next steps
+        p.resetBasePositionAndOrientation(bowl.get_body_ids()[0], [0.0, 0.0, 2.0], [0, 0, 0, 1])
+        robot._ag_obj_in_hand["right_hand"] = bowl.get_body_ids()[0]
+        next_task_obs = task.get_task_obs(env)
+        assert np.array_equal(task_obs, expected_task_obs)
+        assert np.allclose(next_task_obs, get_expected_task_obs(task, robot))
+        # Assisted grasps are only reported if task_obs_assisted_grasps is set
+        assert next_task_obs[6 + 9 + 8] == IsGraspingState.FALSE
+        task.task_obs_assisted_grasps = True
+        next_task_obs = task.get_task_obs(env)
+        assert np.allclose(next_task_obs, get_expected_task_obs(task, robot))
+        assert next_task_obs[6 + 9 + 8] == IsGraspingState.TRUE
+
+        # Objects being released are not grasped
+        robot._ag_release_counter["right_hand"] = 3
+        assert np.allclose(task.get_task_obs(env), get_expected_task_obs(task, robot))
+
+        robot = FakeRobot("physical")
+        robot.physical_grasps["left_hand"] = IsGraspingState.UNKNOWN
+        robot.physical_grasps["right_hand"] = IsGraspingState.TRUE
+        assert np.allclose(task.get_task_obs(FakeEnv(robot)), get_expected_task_obs(task, robot))
+
+        # The layout follows the changes of the object scope
+        task.object_scope["apple.n.01_1"] = None
+        assert np.allclose(task.get_task_obs(FakeEnv(robot)), get_expected_task_obs(task, robot))
+    finally:
+        p.disconnect()
+
+
+def test_quat2euler():
+    quats = np.random.RandomState(0).randn(100, 4)
+    quats /= np.linalg.norm(quats, axis=1, keepdims=True)
+    # Gimbal lock
+    quats = np.concatenate([quats, [[0, np.sqrt(0.5), 0, np.sqrt(0.5)], [0, -np.sqrt(0.5), 0, np.sqrt(0.5)]]])
+    expected = np.array([p.getEulerFromQuaternion(quat) for quat in quats])
+    assert np.allclose(quat2euler(quats), expected)
+    assert np.allclose(quat2euler(quats[0]), expected[0])
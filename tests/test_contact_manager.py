@@ -0,0 +1,75 @@
+import numpy as np
+import pybullet as p
+import pybullet_data
+
+from igibson.utils.contact_manager import ContactManager, invalidate_contacts
+from igibson.utils.utils import restoreState
+
+
+def test_contact_manager_matches_pybullet():
+    p.connect(p.DIRECT)
+    try:
+        p.setAdditionalSearchPath(pybullet_data.getDataPath())
+        p.setGravity(0, 0, -10)
+        plane = p.loadURDF("plane.urdf")
+        robot = p.loadURDF("r2d2.urdf", [0, 0, 0.5])
+        cubes = [p.loadURDF("cube_small.urdf", [0.05 * i, 0.3, 0.05 + 0.06 * i]) for i in range(3)]
+        for _ in range(50):
+            p.stepSimulation()
+
+        contact_manager = ContactManager()
+        assert contact_manager.get_contact_points() == list(p.getContactPoints())
+        for body in [plane, robot] + cubes:
+            assert contact_manager.get_contact_points(body_a=body) == list(p.getContactPoints(bodyA=body))
+            for other in [plane, robot] + cubes:
+                expected = list(p.getContactPoints(bodyA=body, bodyB=other))
+                assert contact_manager.get_contact_points(body_a=body, body_b=other) == expected
+                assert contact_manager.in_contact(body, other) == (len(expected) > 0)
+        for link in range(-1, p.getNumJoints(robot)):
+            expected = list(p.getContactPoints(bodyA=robot, linkIndexA=link))
+            assert contact_manager.get_contact_points(body_a=robot, link_a=link) == expected
+            contact_array = contact_manager.get_contact_array(body_a=robot, link_a=link)
+            assert np.all(contact_array["body_a"] == robot) and np.all(contact_array["link_a"] == link)
+            assert np.allclose(contact_array["normal_force"], [item[9] for item in expected])
+
+        # All the queries of a step are answered from a single snapshot.
+        assert contact_manager.num_queries == 1
+        p.stepSimulation()
+        contact_manager.invalidate()
+        assert contact_manager.get_contact_points(body_a=plane) == list(p.getContactPoints(bodyA=plane))
+        assert contact_manager.num_queries == 2
+    finally:
+        p.disconnect()
+
+
+def test_contact_manager_invalidated_outside_of_simulator_steps():
+    p.connect(p.DIRECT)
+    try:
+        p.setAdditionalSearchPath(pybullet_data.getDataPath())
+        p.loadURDF("plane.urdf")
+        cube = p.loadURDF("cube_small.urdf", [0, 0, 1])
+        p.stepSimulation()
+        state_id = p.saveState()
+
+        contact_manager = ContactManager()
+        assert contact_manager.get_contact_points(body_a=cube) == []
+
+        # Like the falling step of sample_kinematics
+        p.resetBasePositionAndOrientation(cube, [0, 0, 0.02], [0, 0, 0, 1])
+        p.stepSimulation()
+        invalidate_contacts()
+        contact_points = contact_manager.get_contact_points(body_a=cube)
+        assert contact_points == list(p.getContactPoints(bodyA=cube)) and len(contact_points) > 0
+
+        restoreState(state_id)
+        assert contact_manager.get_contact_points(body_a=cube) == list(p.getContactPoints(bodyA=cube))
+        assert contact_manager.num_queries == 3
+
+        # Like the collision checks of the motion planning
+        p.performCollisionDetection()
+        invalidate_contacts()
+        assert contact_manager.get_contact_points(body_a=cube) == list(p.getContactPoints(bodyA=cube)) == []
+        assert contact_manager.num_queries == 4
+        p.removeState(state_id)
+    finally:
+        p.disconnect()
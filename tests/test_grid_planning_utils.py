@@ -0,0 +1,85 @@
+import networkx as nx
+import numpy as np
+
+from igibson.utils.grid_planning_utils import GridPlanner, octile_distance
+
+
+def build_networkx_graph(trav_map):
+    g = nx.Graph()
+    height, width = trav_map.shape
+    for i in range(height):
+        for j in range(width):
+            if trav_map[i, j] == 0:
+                continue
+            g.add_node((i, j))
+            for n in [(i - 1, j - 1), (i, j - 1), (i + 1, j - 1), (i - 1, j)]:
+                if 0 <= n[0] < height and 0 <= n[1] < width and trav_map[n] > 0:
+                    g.add_edge(n, (i, j), weight=np.linalg.norm(np.subtract(n, (i, j))))
+    return g
+
+
+def path_length(path):
+    path = np.array(path)
+    return np.sum(np.linalg.norm(path[1:] - path[:-1], axis=1))
+
+
+def test_octile_distance():
+    assert octile_distance((0, 0), (3, 0)) == 3
+    assert np.isclose(octile_distance((0, 0), (2, 2)), 2 * np.sqrt(2))
+    assert np.isclose(octile_distance((1, 5), (4, 1)), 1 + 3 * np.sqrt(2))
+
+
+def test_grid_planner_matches_networkx():
+    rng = np.random.RandomState(0)
+    trav_map = (rng.rand(40, 40) > 0.25).astype(np.uint8) * 255
+    g = build_networkx_graph(trav_map)
+    largest_cc = max(nx.connected_components(g), key=len)
+    g = g.subgraph(largest_cc).copy()
+    trav_map[:, :] = 0
+    for node in g.nodes:
+        trav_map[node] = 255
+
+    planner = GridPlanner(trav_map)
+    nodes = list(g.nodes)
+    for _ in range(20):
+        source = nodes[rng.randint(len(nodes))]
+        target = nodes[rng.randint(len(nodes))]
+        path = planner.plan(source, target)
+        assert path[0] == source and path[-1] == target
+        assert all(trav_map[cell] > 0 for cell in path)
+        assert np.isclose(path_length(path), nx.astar_path_length(g, source, target, heuristic=octile_distance))
+
+
+def test_grid_planner_snap():
+    trav_map = np.zeros((10, 10), dtype=np.uint8)
+    trav_map[2:5, 2:5] = 255
+    trav_map[4, 4:9] = 255
+    planner = GridPlanner(trav_map)
+
+    assert planner.is_traversable((3, 3))
+    assert not planner.is_traversable((0, 0))
+    assert not planner.is_traversable((-1, 3))
+    assert planner.snap((0, 0)) == (2, 2)
+    assert planner.snap((20, 8)) == (4, 8)
+    assert planner.plan((0, 0), (3, 3)) is None
+
+
+def test_distance_field_matches_planner():
+    rng = np.random.RandomState(1)
+    trav_map = (rng.rand(40, 40) > 0.25).astype(np.uint8) * 255
+    planner = GridPlanner(trav_map)
+    target = tuple(planner.cells[rng.randint(len(planner.cells))].tolist())
+    field = planner.distance_field(target)
+    assert field.get_distance(target) == 0
+
+    for _ in range(20):
+        source = tuple(planner.cells[rng.randint(len(planner.cells))].tolist())
+        path = planner.plan(source, target)
+        if path is None:
+            assert not np.isfinite(field.get_distance(source))
+            assert field.get_path(source) is None
+            continue
+        assert np.isclose(field.get_distance(source), path_length(path), atol=1e-4)
+        field_path = field.get_path(source)
+        assert field_path[0] == source and field_path[-1] == target
+        assert np.isclose(path_length(field_path), path_length(path), atol=1e-4)
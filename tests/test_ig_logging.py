@@ -0,0 +1,173 @@
+import os
+from types import SimpleNamespace
+
+import h5py
+import numpy as np
+import pybullet as p
+import pybullet_data
+
+from igibson.metrics.disarrangement import KinematicDisarrangement
+from igibson.object_states import Pose
+from igibson.robots.turtlebot import Turtlebot
+from igibson.utils.ig_logging import IGLogReader, IGLogWriter
+
+
+def write_log(log_filepath, n_frames, **kwargs):
+    sim = SimpleNamespace(physics_timestep=1 / 120.0, render_timestep=1 / 30.0)
+    log_writer = IGLogWriter(sim, log_filepath, frames_before_write=16, log_status=False, **kwargs)
+    log_writer.set_up_data_storage()
+    for _ in range(n_frames):
+        for _ in range(4):
+            p.stepSimulation()
+        log_writer.process_frame()
+    log_writer.end_log_session()
+
+
+class LoggedObject(object):
+    """
+    Object made of pybullet bodies, whose pose is the pose of its first body.
+    """
+
+    def __init__(self, body_ids):
+        self.body_ids = body_ids
+        self.states = {Pose: SimpleNamespace(get_value=self.get_position_orientation)}
+
+    def get_body_ids(self):
+        return self.body_ids
+
+    def get_position_orientation(self):
+        pos, orn = p.getBasePositionAndOrientation(self.body_ids[0])
+        return np.array(pos), np.array(orn)
+
+
+class LoggedRobot(Turtlebot):
+    def __init__(self, body_id):
+        self.body_ids = [body_id]
+
+    def get_body_ids(self):
+        return self.body_ids
+
+    def get_position_orientation(self):
+        pos, orn = p.getBasePositionAndOrientation(self.body_ids[0])
+        return np.array(pos), np.array(orn)
+
+
+def load_bodies():
+    p.setAdditionalSearchPath(pybullet_data.getDataPath())
+    p.setGravity(0, 0, -10)
+    p.loadURDF("plane.urdf")
+    p.loadURDF("r2d2.urdf", [0, 0, 0.5])
+    p.loadURDF("cube_small.urdf", [0, 1, 1])
+
+
+def test_log_writer_async(tmp_path):
+    p.connect(p.DIRECT)
+    try:
+        load_bodies()
+        state_id = p.saveState()
+
+        sync_path = os.path.join(str(tmp_path), "sync.hdf5")
+        async_path = os.path.join(str(tmp_path), "async.hdf5")
+        write_log(sync_path, 50)
+        p.restoreState(state_id)
+        write_log(async_path, 50, async_write=True, pose_dtype=np.float32, compression="gzip")
+
+        with h5py.File(sync_path, "r") as sync_log, h5py.File(async_path, "r") as async_log:
+            for bid in ["1", "2"]:
+                for name in ["position", "orientation", "joint_state"]:
+                    sync_data = sync_log["physics_data"][bid][name]
+                    async_data = async_log["physics_data"][bid][name]
+                    assert sync_data.shape[0] == 50
+                    assert sync_data.dtype == np.float64 and async_data.dtype == np.float32
+                    assert np.allclose(sync_data[:], async_data[:], atol=1e-6)
+            assert async_log["physics_data"]["1"]["joint_state"].compression == "gzip"
+            # The joint states are actually logged, not left at the fill sentinel
+            assert np.all(sync_log["physics_data"]["1"]["joint_state"][:, 0] != -1.0)
+    finally:
+        p.disconnect()
+
+
+def test_log_reader_random_access(tmp_path):
+    log_path = os.path.join(str(tmp_path), "log.hdf5")
+    p.connect(p.DIRECT)
+    try:
+        load_bodies()
+        write_log(log_path, 50)
+    finally:
+        p.disconnect()
+
+    export_dir = os.path.join(str(tmp_path), "log_npy")
+    IGLogReader.export_to_npy(log_path, export_dir)
+    value_path = "physics_data/2/position"
+    for path in [log_path, export_dir]:
+        log_reader = IGLogReader(path, log_status=False)
+        assert log_reader.total_frame_num == 50
+        assert IGLogReader.read_metadata_attr(path, "/metadata/render_timestep") == 1 / 30.0
+
+        positions = log_reader.read_frames(value_path)
+        assert positions.shape == (50, 3)
+        log_reader.seek(30)
+        assert np.all(log_reader.read_value(value_path) == positions[30])
+        assert log_reader.get_data_left_to_read()
+        assert np.all(log_reader.read_value(value_path) == positions[31])
+
+        windows = list(log_reader.iter_windows([value_path], 16))
+        assert [window_start for window_start, _ in windows] == [0, 16, 32, 48]
+        assert np.all(np.concatenate([window[value_path] for _, window in windows]) == positions)
+
+        log_reader.end_log_session()
+
+
+def test_kinematic_disarrangement_from_log_matches_online(tmp_path):
+    log_path = os.path.join(str(tmp_path), "log.hdf5")
+    p.connect(p.DIRECT)
+    try:
+        load_bodies()
+        p.resetBaseVelocity(1, [1.0, 0.0, 0.0])
+        # An object made of two bodies that move independently: only the pose of the object counts
+        box_ids = [p.loadURDF("cube_small.urdf", [1, 0, 1]), p.loadURDF("cube_small.urdf", [1, 0.5, 2])]
+        objects_by_name = {
+            "floors": LoggedObject([0]),
+            "robot": LoggedRobot(1),
+            "cube": LoggedObject([2]),
+            "box": LoggedObject(box_ids),
+        }
+        task = SimpleNamespace(
+            object_scope={
+                "floor.n.01_1": objects_by_name["floors"],
+                "agent.n.01_1": objects_by_name["robot"],
+                "cube.n.01_1": objects_by_name["cube"],
+                "box.n.01_1": objects_by_name["box"],
+            },
+            current_goal_status={"satisfied": [], "unsatisfied": [0]},
+            behavior_activity="test",
+            activity_definition=0,
+            scene=SimpleNamespace(scene_id="test", fname="test"),
+        )
+        task.check_success = lambda: None
+        env = SimpleNamespace(scene=SimpleNamespace(objects_by_name=objects_by_name))
+
+        sim = SimpleNamespace(physics_timestep=1 / 120.0, render_timestep=1 / 30.0)
+        log_writer = IGLogWriter(sim, log_path, frames_before_write=16, log_status=False, task=task)
+        log_writer.set_up_data_storage()
+        online_metric = KinematicDisarrangement()
+        for _ in range(40):
+            for _ in range(4):
+                p.stepSimulation()
+            log_writer.process_frame()
+            online_metric.step_callback(env, None)
+        log_writer.end_log_session()
+    finally:
+        p.disconnect()
+
+    online_results = online_metric.gather_results()["kinematic_disarrangement"]
+    assert online_results["integrated"] > 0
+    export_dir = os.path.join(str(tmp_path), "log_npy")
+    IGLogReader.export_to_npy(log_path, export_dir)
+    for path in [log_path, export_dir]:
+        log_reader = IGLogReader(path, log_status=False)
+        results = KinematicDisarrangement.compute_from_log(log_reader, window_size=16)["kinematic_disarrangement"]
+        log_reader.end_log_session()
+        assert np.allclose(results["timestep"], online_results["timestep"])
+        assert np.isclose(results["integrated"], online_results["integrated"])
+        assert np.isclose(results["relative"], online_results["relative"])
@@ -0,0 +1,199 @@
+import pybullet as p
+from bddl.condition_evaluation import compile_state, evaluate_state
+
+from igibson import object_states
+from igibson.object_states.adjacency import VerticalAdjacency
+from igibson.object_states.pose import Pose
+from igibson.tasks.bddl_backend import IGibsonBDDLBackend
+from igibson.tasks.incremental_goal_evaluator import IncrementalGoalEvaluator
+
+
+class CountingState(object):
+    """Fake object state counting the evaluations of its predicate."""
+
+    def __init__(self, obj, get_value):
+        self.obj = obj
+        self._get_value = get_value
+        self.num_calls = 0
+        self.value = None
+
+    def get_value(self, *args):
+        self.num_calls += 1
+        return self._get_value(self.obj, *args)
+
+    def get_update_signature(self):
+        return None
+
+
+class MaxTemperatureState(CountingState):
+    def get_update_signature(self):
+        return self.value
+
+
+class FakeObject(object):
+    def __init__(self, position):
+        shape = p.createCollisionShape(p.GEOM_BOX, halfExtents=[0.1, 0.1, 0.1])
+        self.body_id = p.createMultiBody(baseMass=0, baseCollisionShapeIndex=shape, basePosition=position)
+        max_temperature = MaxTemperatureState(self, lambda obj: obj.states[object_states.MaxTemperature].value)
+        max_temperature.value = 20.0
+        sliced = CountingState(self, lambda obj: obj.states[object_states.Sliced].value)
+        sliced.value = False
+        self.states = {
+            object_states.OnTop: CountingState(self, lambda obj, other: obj.get_z() > other.get_z()),
+            object_states.MaxTemperature: max_temperature,
+            object_states.Cooked: CountingState(self, lambda obj: max_temperature.value >= 70.0),
+            object_states.Sliced: sliced,
+        }
+
+    def get_body_ids(self):
+        return [self.body_id]
+
+    def get_z(self):
+        return p.getBasePositionAndOrientation(self.body_id)[0][2]
+
+    def set_z(self, z):
+        p.resetBasePositionAndOrientation(self.body_id, [0, 0, z], [0, 0, 0, 1])
+
+    def get_num_calls(self, state):
+        return self.states[state].num_calls
+
+
+def test_incremental_goal_evaluator():
+    p.connect(p.DIRECT)
+    try:
+        apple_1, apple_2, table = FakeObject([0, 0, 1]), FakeObject([0, 0, 2]), FakeObject([0, 0, 0.5])
+        scope = {"apple.n.01_1": apple_1, "apple.n.01_2": apple_2, "table.n.02_1": table}
+        object_map = {"apple.n.01": ["apple.n.01_1", "apple.n.01_2"], "table.n.02": ["table.n.02_1"]}
+        goal = [
+            ["ontop", "apple.n.01_1", "table.n.02_1"],
+            ["forall", ["?a", "-", "apple.n.01"], ["cooked", "?a"]],
+            ["not", ["sliced", "apple.n.01_2"]],
+        ]
+        conditions = compile_state(goal, IGibsonBDDLBackend(), scope=scope, object_map=object_map)
+        evaluator = IncrementalGoalEvaluator(conditions)
+
+        def check(expected):
+            result = evaluator.evaluate()
+            assert result == evaluate_state(conditions)
+            assert result[1]["satisfied"] == expected
+
+        check([0, 2])
+        num_calls = apple_1.get_num_calls(object_states.OnTop)
+
+        # Nothing changed, only the predicate without update signature is evaluated again
+        check([0, 2])
+        assert evaluator.get_stats()["num_predicate_cache_hits"] == 3
+        assert evaluator.get_stats()["num_predicate_evaluations"] == 5
+
+        # Moving an object less than the tolerance does not re-evaluate its predicates
+        apple_1.set_z(1.00001)
+        check([0, 2])
+        assert evaluator.get_stats()["num_predicate_cache_hits"] == 6
+
+        apple_1.set_z(0.2)
+        check([2])
+        assert evaluator.get_stats()["num_predicate_cache_hits"] == 8
+
+        # A state change only re-evaluates the predicates that read it
+        for apple in [apple_1, apple_2]:
+            apple.states[object_states.MaxTemperature].value = 100.0
+        apple_2.states[object_states.Sliced].value = True
+        check([1])
+        assert evaluator.get_stats()["num_predicate_cache_hits"] == 9
+
+        # Four reference evaluations, and a single incremental one after apple_1 moved
+        assert apple_1.get_num_calls(object_states.OnTop) == num_calls + 4 + 1
+    finally:
+        p.disconnect()
+
+
+def is_on_top_and_uncovered(obj, other):
+    # Like OnTop, the value depends on the bodies above the object
+    pos = p.getBasePositionAndOrientation(obj.body_id)[0]
+    hit_id = p.rayTest([pos[0], pos[1], pos[2] + 0.11], [pos[0], pos[1], pos[2] + 5.0])[0][0]
+    return obj.get_z() > other.get_z() and hit_id == -1
+
+
+def test_incremental_goal_evaluator_adjacency():
+    p.connect(p.DIRECT)
+    try:
+        apple, table = FakeObject([0, 0, 1]), FakeObject([0, 0, 0.5])
+        apple.states[object_states.OnTop] = CountingState(apple, is_on_top_and_uncovered)
+        scope = {"apple.n.01_1": apple, "table.n.02_1": table}
+        object_map = {"apple.n.01": ["apple.n.01_1"], "table.n.02": ["table.n.02_1"]}
+        conditions = compile_state(
+            [["ontop", "apple.n.01_1", "table.n.02_1"]], IGibsonBDDLBackend(), scope=scope, object_map=object_map
+        )
+        evaluator = IncrementalGoalEvaluator(conditions)
+        # A body that is not part of the goal conditions
+        shape = p.createCollisionShape(p.GEOM_BOX, halfExtents=[0.1, 0.1, 0.1])
+        box_id = p.createMultiBody(baseMass=1, baseCollisionShapeIndex=shape, basePosition=[10, 10, 0])
+
+        def check(expected):
+            result = evaluator.evaluate()
+            assert result == evaluate_state(conditions)
+            assert result[1]["satisfied"] == expected
+
+        check([0])
+        # Moving the body far from the objects does not re-evaluate the predicate
+        p.resetBasePositionAndOrientation(box_id, [10, 12, 0], [0, 0, 0, 1])
+        check([0])
+        assert evaluator.get_stats()["num_predicate_cache_hits"] == 1
+
+        # Putting the body on top of the apple changes ontop, although neither the apple nor the table moved
+        p.resetBasePositionAndOrientation(box_id, [0, 0, 1.5], [0, 0, 0, 1])
+        check([])
+        p.removeBody(box_id)
+        check([0])
+        assert evaluator.get_stats()["num_predicate_evaluations"] == 3
+    finally:
+        p.disconnect()
+
+
+def is_above(obj, other):
+    # Like OnTop, the value is read from the vertical adjacency of the object
+    return other.body_id in obj.states[VerticalAdjacency].get_value().negative_neighbors
+
+
+def test_incremental_goal_evaluator_batches_adjacencies(monkeypatch):
+    computed_objects = []
+    compute_values = VerticalAdjacency.compute_values
+
+    def counting_compute_values(objs):
+        computed_objects.append(list(objs))
+        return compute_values(objs)
+
+    monkeypatch.setattr(VerticalAdjacency, "compute_values", staticmethod(counting_compute_values))
+    p.connect(p.DIRECT)
+    try:
+        table = FakeObject([0, 0, 0.5])
+        apples = [FakeObject([0, 0, 1]), FakeObject([0.05, 0, 1.5]), FakeObject([2, 0, 1])]
+        for apple in apples:
+            apple.get_position = lambda apple=apple: p.getBasePositionAndOrientation(apple.body_id)[0]
+            apple.get_orientation = lambda apple=apple: p.getBasePositionAndOrientation(apple.body_id)[1]
+            apple.states[object_states.OnTop] = CountingState(apple, is_above)
+            apple.states[Pose] = Pose(apple)
+            apple.states[VerticalAdjacency] = VerticalAdjacency(apple)
+            for state in [apple.states[Pose], apple.states[VerticalAdjacency]]:
+                state.initialize(None)
+        scope = {"apple.n.01_{}".format(i + 1): apple for i, apple in enumerate(apples)}
+        scope["table.n.02_1"] = table
+        object_map = {"apple.n.01": list(scope)[:3], "table.n.02": ["table.n.02_1"]}
+        goal = [["ontop", obj_inst, "table.n.02_1"] for obj_inst in object_map["apple.n.01"]]
+        conditions = compile_state(goal, IGibsonBDDLBackend(), scope=scope, object_map=object_map)
+        evaluator = IncrementalGoalEvaluator(conditions)
+
+        # The rays of all the apples are cast in a single batch
+        assert evaluator.evaluate()[1]["satisfied"] == [0, 1]
+        assert computed_objects == [apples]
+
+        # The moved apple is now above the other apples, whose predicates are re-evaluated in the same batch
+        p.resetBasePositionAndOrientation(apples[2].body_id, [0, 0.05, 2], [0, 0, 0, 1])
+        for apple in apples:
+            apple.states[Pose].clear_cached_value()
+            apple.states[VerticalAdjacency].clear_cached_value()
+        assert evaluator.evaluate()[1]["satisfied"] == [0, 1, 2]
+        assert computed_objects == [apples, apples]
+        assert evaluator.evaluate() == evaluate_state(conditions)
+    finally:
+        p.disconnect()
@@ -0,0 +1,103 @@
+import pickle
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from igibson.envs.igibson_env import iGibsonEnv
+from igibson.envs.lazy_observation import LazyObservation
+
+
+def make_observation(calls):
+    def render(keys):
+        calls.append(list(keys))
+        return {"rgb": np.ones((2, 2, 3)), "depth": np.zeros((2, 2, 1))}
+
+    state = LazyObservation()
+    state.add_provider(["task_obs"], lambda keys: calls.append(list(keys)) or {"task_obs": np.arange(3)})
+    state.add_provider(["rgb", "depth"], render)
+    return state
+
+
+def test_lazy_observation_computes_on_access():
+    calls = []
+    state = make_observation(calls)
+    assert list(state) == ["task_obs", "rgb", "depth"]
+    assert not any(state.is_computed(key) for key in state)
+    assert calls == []
+
+    # Reads compute the modality once, prefetch batches the modalities of a provider.
+    assert np.array_equal(state["task_obs"], np.arange(3))
+    assert np.array_equal(state["task_obs"], np.arange(3))
+    assert calls == [["task_obs"]]
+    state.prefetch(["rgb", "depth"])
+    assert calls == [["task_obs"], ["rgb", "depth"]]
+
+    # The OrderedDict interface returns the computed values.
+    assert [key for key, _ in state.items()] == ["task_obs", "rgb", "depth"]
+    assert all(isinstance(value, np.ndarray) for value in state.values())
+    copied = state.copy()
+    assert type(copied) is OrderedDict and list(copied) == list(state)
+    unpickled = pickle.loads(pickle.dumps(state))
+    assert type(unpickled) is OrderedDict and np.array_equal(unpickled["rgb"], state["rgb"])
+    assert len(calls) == 2
+
+
+def test_lazy_observation_expires():
+    calls = []
+    state = make_observation(calls)
+    state["rgb"]
+    state.expire()
+    assert state["rgb"].shape == (2, 2, 3)
+    with pytest.raises(ValueError):
+        state["depth"]
+    assert calls == [["rgb"]]
+
+
+class CountingTask(object):
+    """Task whose step changes what its observation describes, like the visualization markers of PointNav."""
+
+    def __init__(self):
+        self.num_steps = 0
+
+    def get_task_obs(self, env):
+        return np.array([self.num_steps])
+
+    def get_reward(self, env, collision_links, action, info):
+        return 0.0, info
+
+    def get_termination(self, env, collision_links, action, info):
+        return False, info
+
+    def step(self, env):
+        self.num_steps += 1
+
+
+def make_env(lazy_observations):
+    env = iGibsonEnv.__new__(iGibsonEnv)
+    env.task = CountingTask()
+    env.robots = [SimpleNamespace(apply_action=lambda action: None)]
+    env.run_simulation = lambda: []
+    env.output = ["task_obs"]
+    env.sensors = {}
+    env.automatic_reset = False
+    env.lazy_observations = lazy_observations
+    env.last_lazy_state = None
+    env.current_step = 0
+    env.collision_step = 0
+    return env
+
+
+def test_lazy_observation_of_env_step():
+    # The eager observation is computed before the task step, like the reward and the termination
+    env = make_env(lazy_observations=False)
+    state, _, _, _ = env.step(None)
+    assert not isinstance(state, LazyObservation)
+    assert np.array_equal(state["task_obs"], [0])
+
+    # The lazy observation is computed when read, after the task step
+    env = make_env(lazy_observations=True)
+    state, _, _, _ = env.step(None)
+    assert isinstance(state, LazyObservation)
+    assert np.array_equal(state["task_obs"], [1])
@@ -0,0 +1,124 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from igibson.utils import motion_planning_wrapper
+from igibson.utils.motion_planning_service import CollisionCache, JointSpaceRoadmap
+from igibson.utils.motion_planning_wrapper import MotionPlanningWrapper
+
+
+def get_planning_fns():
+    """
+    2D joint space with a wall at x = 0.5, except for a gap at y > 0.8.
+    """
+
+    def distance_fn(q1, q2):
+        return np.linalg.norm(np.array(q2) - np.array(q1))
+
+    def sample_fn():
+        return tuple(np.random.uniform(0.0, 1.0, size=2))
+
+    def extend_fn(q1, q2):
+        num_steps = int(np.ceil(distance_fn(q1, q2) / 0.01))
+        for i in range(1, num_steps + 1):
+            yield tuple(np.array(q1) + (np.array(q2) - np.array(q1)) * i / num_steps)
+
+    def collision_fn(q):
+        return abs(q[0] - 0.5) < 0.05 and q[1] < 0.8
+
+    return distance_fn, sample_fn, extend_fn, collision_fn
+
+
+def test_collision_cache():
+    num_calls = [0]
+
+    def collision_fn(q):
+        num_calls[0] += 1
+        return q[0] > 0
+
+    cache = CollisionCache(resolution=1e-3)
+    cached_collision_fn = cache.wrap(collision_fn, "arm")
+    assert cached_collision_fn((1.0, 0.0))
+    assert cached_collision_fn((1.0001, 0.0))
+    assert not cached_collision_fn((-1.0, 0.0))
+    assert num_calls[0] == 2
+    assert cache.num_hits == 1 and cache.num_misses == 2
+
+    # Every context has its own results
+    cache.wrap(lambda q: False, "ik")((1.0, 0.0))
+    assert cached_collision_fn((1.0, 0.0))
+
+    cache.clear()
+    cached_collision_fn((1.0, 0.0))
+    assert num_calls[0] == 3
+
+
+def test_roadmap_reuse():
+    np.random.seed(0)
+    distance_fn, sample_fn, extend_fn, collision_fn = get_planning_fns()
+    roadmap = JointSpaceRoadmap(num_samples=100)
+
+    path = roadmap.plan((0.1, 0.1), (0.9, 0.1), distance_fn, sample_fn, extend_fn, collision_fn)
+    assert path is not None
+    assert np.allclose(path[0], (0.1, 0.1)) and np.allclose(path[-1], (0.9, 0.1))
+    assert not any(collision_fn(q) for q in path)
+    num_samples = len(roadmap)
+
+    # The second query reuses the roadmap, the start and goal configurations are not kept in it
+    path = roadmap.plan((0.2, 0.3), (0.8, 0.3), distance_fn, sample_fn, extend_fn, collision_fn)
+    assert path is not None and not any(collision_fn(q) for q in path)
+    assert len(roadmap) == num_samples
+    assert (0.2, 0.3) not in roadmap.sample_indices and (0.8, 0.3) not in roadmap.sample_indices
+    assert roadmap.embedded.shape == (num_samples, 2)
+    assert all(neighbor < num_samples for neighbors in roadmap.neighbors for neighbor in neighbors)
+    for colliding_vertices, colliding_edges in roadmap.collision_status.values():
+        assert all(v < num_samples for v in colliding_vertices)
+        assert all(v1 < num_samples and v2 < num_samples for v1, v2 in colliding_edges)
+
+    # Without the gap, there is no path and the roadmap stops growing at max_samples
+    roadmap.clear_collisions()
+    roadmap.max_samples = 300
+    path = roadmap.plan((0.1, 0.1), (0.9, 0.1), distance_fn, sample_fn, extend_fn, lambda q: abs(q[0] - 0.5) < 0.05)
+    assert path is None
+    assert len(roadmap) == 300
+
+
+def test_solve_ik_batch_stops_at_first_collision_free_solution(monkeypatch):
+    # Arm of 4 joints whose end effector is at the position of the first 3 joints: the IK solution from a seed reaches
+    # the goal and keeps the last joint of the seed
+    arm = {"joint_positions": np.zeros(4)}
+    goal = np.array([0.1, 0.2, 0.3])
+    ik_seeds = []
+
+    def set_joint_positions(body_id, joint_ids, joint_positions):
+        arm["joint_positions"] = np.array(joint_positions)
+
+    def calculate_inverse_kinematics(*args, **kwargs):
+        ik_seeds.append(arm["joint_positions"])
+        return np.concatenate([goal, arm["joint_positions"][3:]])
+
+    monkeypatch.setattr(motion_planning_wrapper, "set_joint_positions", set_joint_positions)
+    monkeypatch.setattr(motion_planning_wrapper, "get_joint_positions", lambda *args: arm["joint_positions"])
+    monkeypatch.setattr(motion_planning_wrapper.p, "calculateInverseKinematics", calculate_inverse_kinematics)
+    motion_planner = MotionPlanningWrapper.__new__(MotionPlanningWrapper)
+    motion_planner.robot_id = 0
+    motion_planner.arm_joint_ids = [0, 1, 2, 3]
+    motion_planner.robot_type = "Locobot"
+    motion_planner.arm_ik_threshold = 0.05
+    motion_planner.robot = SimpleNamespace(
+        default_arm="default",
+        eef_links={"default": SimpleNamespace(link_id=3)},
+        get_eef_position=lambda: arm["joint_positions"][:3],
+    )
+    motion_planner.get_ik_parameters = lambda: (None, None, None, None, None)
+
+    # The solutions with a last joint below 0.5 are in collision
+    seeds = np.array([[0.0, 0.0, 0.0, 0.9], [0.0, 0.0, 0.0, 0.4], [0.0, 0.0, 0.0, 0.1], [0.0, 0.0, 0.0, 0.6]])
+    solution = motion_planner.solve_ik_batch(goal, seeds, lambda q: q[3] < 0.5)
+    assert np.allclose(solution, [0.1, 0.2, 0.3, 0.6])
+    # The seeds closest to the current arm joint positions are solved first, and the last one is never solved
+    assert [seed[3] for seed in ik_seeds] == [0.1, 0.4, 0.6]
+
+    ik_seeds.clear()
+    assert motion_planner.solve_ik_batch(goal, seeds, lambda q: True) is None
+    assert len(ik_seeds) == 4
@@ -0,0 +1,84 @@
+import multiprocessing
+import sys
+
+import gym
+import numpy as np
+
+from igibson.envs.parallel_env import SharedObservationBuffer
+
+
+def test_shared_observation_buffer_round_trip():
+    observation_space = gym.spaces.Dict(
+        {
+            "rgb": gym.spaces.Box(low=0.0, high=1.0, shape=(4, 5, 3), dtype=np.float32),
+            "task_obs": gym.spaces.Box(low=-np.inf, high=np.inf, shape=(7,), dtype=np.float64),
+            "discrete": gym.spaces.Discrete(3),
+        }
+    )
+    reader = SharedObservationBuffer(observation_space, num_slots=3)
+    writer = SharedObservationBuffer(observation_space, num_slots=reader.num_slots, name=reader.name)
+    try:
+        assert writer.num_slots == 3
+        # Wrap around the ring buffer twice, every observation is read before the next one is written
+        for i in range(7):
+            observation = {
+                "rgb": np.full((4, 5, 3), i / 10.0, dtype=np.float32),
+                "task_obs": np.arange(7) + i,
+                "discrete": i % 3,
+            }
+            shared_observation = writer.write(observation)
+            assert shared_observation.slot == i % 3
+            read_observation = reader.read(shared_observation)
+            assert np.array_equal(read_observation["rgb"], observation["rgb"])
+            assert np.array_equal(read_observation["task_obs"], observation["task_obs"])
+            assert read_observation["discrete"] == observation["discrete"]
+
+        # Box observation spaces are stored without a key
+        box_space = gym.spaces.Box(low=0, high=255, shape=(2, 2), dtype=np.uint8)
+        box_reader = SharedObservationBuffer(box_space, num_slots=2)
+        box_writer = SharedObservationBuffer(box_space, num_slots=2, name=box_reader.name)
+        try:
+            for i in range(3):
+                observation = np.full((2, 2), i, dtype=np.uint8)
+                assert np.array_equal(box_reader.read(box_writer.write(observation)), observation)
+        finally:
+            box_writer.close()
+            box_reader.close(unlink=True)
+    finally:
+        writer.close()
+        reader.close(unlink=True)
+
+
+def write_in_spawned_process(observation_space, name, num_slots):
+    writer = SharedObservationBuffer(observation_space, num_slots, name=name)
+    writer.write(np.full((2, 2), 7, dtype=np.uint8))
+    writer.close()
+
+
+def test_shared_observation_buffer_resource_tracking(monkeypatch):
+    from multiprocessing import resource_tracker
+
+    observation_space = gym.spaces.Box(low=0, high=255, shape=(2, 2), dtype=np.uint8)
+    reader = SharedObservationBuffer(observation_space, num_slots=2)
+    try:
+        # The resource tracker shared with the creator must keep tracking the buffer, only a resource tracker of its own
+        # is told to forget it
+        unregistered = []
+        monkeypatch.setattr(resource_tracker, "unregister", lambda name, rtype: unregistered.append(name))
+        SharedObservationBuffer(observation_space, num_slots=2, name=reader.name).close()
+        assert unregistered == []
+        SharedObservationBuffer(observation_space, num_slots=2, name=reader.name, shares_resource_tracker=False).close()
+        assert len(unregistered) == (0 if sys.version_info >= (3, 13) else 1)
+        monkeypatch.undo()
+
+        # Child processes share the resource tracker of the creator, which keeps the buffer after they exit
+        process = multiprocessing.get_context("spawn").Process(
+            target=write_in_spawned_process, args=(observation_space, reader.name, reader.num_slots)
+        )
+        process.start()
+        process.join()
+        assert process.exitcode == 0
+        assert np.all(reader.slots[0][None] == 7)
+        SharedObservationBuffer(observation_space, num_slots=2, name=reader.name).close()
+    finally:
+        reader.close(unlink=True)
@@ -0,0 +1,70 @@
+import numpy as np
+import pybullet as p
+import pybullet_data
+
+from igibson.objects.particles import AttachedParticleSystem, _multiply_transforms_batch
+
+
+class ParentObject(object):
+    def __init__(self, body_id):
+        self.body_id = body_id
+
+    def get_body_ids(self):
+        return [self.body_id]
+
+    def get_position(self):
+        return p.getBasePositionAndOrientation(self.body_id)[0]
+
+    def get_orientation(self):
+        return p.getBasePositionAndOrientation(self.body_id)[1]
+
+
+class HeadlessSimulator(object):
+    renderer = None
+
+
+def test_multiply_transforms_batch():
+    rng = np.random.RandomState(0)
+    local_poses = np.concatenate([rng.uniform(-1, 1, (10, 3)), rng.normal(size=(10, 4))], axis=1)
+    local_poses[:, 3:] /= np.linalg.norm(local_poses[:, 3:], axis=1, keepdims=True)
+    pos, orn = [1.0, -2.0, 0.5], p.getQuaternionFromEuler([0.3, -0.2, 1.0])
+    poses = _multiply_transforms_batch(pos, orn, local_poses)
+    for local_pose, pose in zip(local_poses, poses):
+        expected_pos, expected_orn = p.multiplyTransforms(pos, orn, local_pose[:3], local_pose[3:])
+        assert np.allclose(pose[:3], expected_pos)
+        # q and -q are the same rotation
+        assert np.isclose(abs(np.dot(pose[3:], expected_orn)), 1.0)
+
+
+def test_instanced_attached_particles_follow_parent():
+    p.connect(p.DIRECT)
+    try:
+        p.setAdditionalSearchPath(pybullet_data.getDataPath())
+        parent = ParentObject(p.loadURDF("cube_small.urdf", [0, 0, 1]))
+        particle_system = AttachedParticleSystem(
+            parent, instanced=True, num=5, size=[0.01] * 3, visual_only=True, mass=0
+        )
+        particle_system.initialize(HeadlessSimulator())
+        particles = particle_system.get_particles()
+        for i, particle in enumerate(particles[:3]):
+            particle_system.unstash_particle([0.02 * i, 0, 1.03], [0, 0, 0, 1], particle=particle)
+        particle_system.stash_particle(particles[1])
+        assert particle_system.get_num_active() == 2
+        assert np.allclose(particle_system.get_active_particle_positions(), [[0, 0, 1.03], [0.04, 0, 1.03]])
+
+        # The active particles follow the parent, the particles are never loaded in pybullet.
+        pos, orn = [1.0, 2.0, 0.5], p.getQuaternionFromEuler([0, 0, np.pi / 2])
+        p.resetBasePositionAndOrientation(parent.body_id, pos, orn)
+        particle_system.update(None)
+        expected = [p.multiplyTransforms(pos, orn, [0.02 * i, 0, 0.03], [0, 0, 0, 1])[0] for i in [0, 2]]
+        assert np.allclose(particle_system.get_active_particle_positions(), expected)
+        assert all(particle.get_body_ids() is None for particle in particles)
+
+        # Dumps are compatible with the pybullet particle mode.
+        dump = particle_system.dump()
+        assert dump[1] is None and dump[3] is None
+        assert np.allclose(dump[2][1], expected[1])
+        particle_system.reset_to_dump(dump)
+        assert np.allclose(particle_system.get_active_particle_positions(), expected)
+    finally:
+        p.disconnect()
@@ -3,6 +3,7 @@ import time
 
 import GPUtil
 import numpy as np
+import pytest
 
 import igibson
 from igibson.render.mesh_renderer.mesh_renderer_cpu import MeshRenderer
@@ -96,6 +97,23 @@ def test_render_rendering(record_property):
     renderer.release()
 
 
+def test_readbuffer_into_dtypes():
+    renderer = MeshRenderer(width=64, height=48)
+    renderer.render(("rgb"))
+    rgb = renderer.readbuffer(["rgb"])[0]
+    for dtype in [np.uint8, np.float32]:
+        out = np.zeros((48, 64, 4), dtype=dtype)
+        renderer.readbuffer_into([("rgb", 0, out)])
+        expected = rgb if dtype == np.float32 else np.rint(np.clip(rgb, 0.0, 1.0) * 255)
+        assert np.allclose(out, expected, atol=1)
+
+    # Arrays of other dtypes are rejected, even with the same item size
+    for dtype in [np.int32, np.float64, np.int8]:
+        with pytest.raises(ValueError):
+            renderer.readbuffer_into([("rgb", 0, np.zeros((48, 64, 4), dtype=dtype))])
+    renderer.release()
+
+
 def test_render_rendering_cleaning():
     download_assets()
     test_dir = os.path.join(igibson.assets_path, "test")
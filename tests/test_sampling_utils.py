@@ -0,0 +1,58 @@
+import numpy as np
+import pybullet as p
+
+from igibson.utils import sampling_utils
+
+
+class BoxObject(object):
+    """
+    Minimal object with the interface used by sample_cuboid_on_object.
+    """
+
+    def __init__(self, body_id):
+        self.body_id = body_id
+
+    def get_body_ids(self):
+        return [self.body_id]
+
+    def get_base_aligned_bounding_box(self, xy_aligned=True, fallback_to_aabb=True):
+        aabb_min, aabb_max = np.array(p.getAABB(self.body_id))
+        return (aabb_min + aabb_max) / 2, np.array([0, 0, 0, 1]), aabb_max - aabb_min, None
+
+
+def create_box(half_extents, position):
+    shape = p.createCollisionShape(p.GEOM_BOX, halfExtents=half_extents)
+    return p.createMultiBody(baseMass=0, baseCollisionShapeIndex=shape, basePosition=position)
+
+
+def test_batched_sample_cuboid_on_object_matches_sequential():
+    p.connect(p.DIRECT)
+    try:
+        table = BoxObject(create_box([0.5, 0.4, 0.05], [0, 0, 0.5]))
+        # Clutter on the table, so that some cuboids are not empty
+        create_box([0.1, 0.1, 0.1], [0.2, 0.1, 0.65])
+        create_box([0.05, 0.2, 0.05], [-0.3, -0.1, 0.6])
+
+        for seed in range(20):
+            results = []
+            for batch_ray_casting in [False, True]:
+                np.random.seed(seed)
+                samples = sampling_utils.sample_cuboid_on_object(
+                    table,
+                    num_samples=5,
+                    cuboid_dimensions=[[0.1, 0.1, 0.1]] * 5,
+                    bimodal_mean_fraction=0.5,
+                    bimodal_stdev_fraction=0.2,
+                    axis_probabilities=[0.1, 0.1, 0.8],
+                    refuse_downwards=True,
+                    batch_ray_casting=batch_ray_casting,
+                )
+                results.append((samples, np.random.rand()))
+
+            (sequential_samples, sequential_next), (batched_samples, batched_next) = results
+            assert sequential_next == batched_next
+            for sequential_sample, batched_sample in zip(sequential_samples, batched_samples):
+                for sequential_value, batched_value in zip(sequential_sample[:4], batched_sample[:4]):
+                    assert np.array_equal(sequential_value, batched_value)
+    finally:
+        p.disconnect()
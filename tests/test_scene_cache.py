@@ -0,0 +1,76 @@
+import os
+import pickle
+
+import numpy as np
+
+from igibson.scenes.igibson_indoor_scene import InteractiveIndoorScene
+
+SCENE_URDF = """<?xml version="1.0" ?>
+<robot name="igibson_scene">
+  <link name="world"/>
+  <link category="floors" model="floors" name="floors"/>
+  <link bounding_box="1.0 2.0 0.5" category="table" model="19203" name="table_1" room="kitchen_0,dining_room_0"
+        joint_states='{"j_0": [0.1, 0.0]}'/>
+  <link category="chair" model="random" name="chair_1" random_group="1" scale="1.0 1.0 1.2" room="kitchen_0"/>
+  <link category="agent_pose" name="agent_0"/>
+  <joint name="j_floors" type="fixed">
+    <origin xyz="0 0 0"/>
+    <child link="floors"/>
+    <parent link="world"/>
+  </joint>
+  <joint name="j_table_1" type="floating">
+    <origin rpy="0 0 1.57" xyz="1.0 2.0 0.25"/>
+    <child link="table_1"/>
+    <parent link="world"/>
+  </joint>
+  <joint name="j_chair_1" type="fixed">
+    <origin rpy="0 0 0" xyz="0.5 0.5 0.4"/>
+    <child link="chair_1"/>
+    <parent link="world"/>
+  </joint>
+  <joint name="j_agent_0" type="fixed">
+    <origin rpy="0 0 3.14" xyz="-1.0 0.0 0.0"/>
+    <child link="agent_0"/>
+    <parent link="world"/>
+  </joint>
+</robot>
+"""
+
+
+def test_scene_urdf_cache(tmp_path):
+    scene_file = str(tmp_path / "scene.urdf")
+    with open(scene_file, "w") as f:
+        f.write(SCENE_URDF)
+
+    link_specs = InteractiveIndoorScene.parse_scene_urdf(scene_file)
+    assert [spec["name"] for spec in link_specs] == ["floors", "table_1", "chair_1", "agent_0"]
+    floors, table, chair, agent = link_specs
+    assert floors["in_rooms"] is None
+    assert np.array_equal(floors["joint_rpy"], [0, 0, 0])
+    assert np.array_equal(floors["scale"], [1, 1, 1])
+    assert table["in_rooms"] == ["kitchen_0", "dining_room_0"]
+    assert table["joint_type"] == "floating"
+    assert np.array_equal(table["bounding_box"], [1.0, 2.0, 0.5]) and table["scale"] is None
+    assert table["joint_states"] == {"j_0": [0.1, 0.0]}
+    assert chair["attrib"]["random_group"] == "1"
+    assert np.array_equal(chair["scale"], [1.0, 1.0, 1.2])
+    assert np.array_equal(agent["joint_xyz"], [-1.0, 0.0, 0.0])
+
+    # Cold load parses the URDF and writes the cache, warm load reads the cache.
+    cache_path = InteractiveIndoorScene.get_scene_cache_path(scene_file)
+    cold_specs = InteractiveIndoorScene.load_scene_urdf_specs(scene_file)
+    assert os.path.isfile(cache_path)
+    warm_specs = InteractiveIndoorScene.load_scene_urdf_specs(scene_file)
+    assert pickle.dumps(warm_specs) == pickle.dumps(cold_specs) == pickle.dumps(link_specs)
+
+    # Editing the URDF invalidates the cache.
+    with open(scene_file, "w") as f:
+        f.write(SCENE_URDF.replace('scale="1.0 1.0 1.2"', 'scale="2.0 2.0 2.0"'))
+    specs = InteractiveIndoorScene.load_scene_urdf_specs(scene_file)
+    assert np.array_equal(specs[2]["scale"], [2.0, 2.0, 2.0])
+
+    # A corrupted cache falls back to parsing the URDF.
+    with open(cache_path, "wb") as f:
+        f.write(b"not a pickle")
+    specs = InteractiveIndoorScene.load_scene_urdf_specs(scene_file)
+    assert np.array_equal(specs[2]["scale"], [2.0, 2.0, 2.0])
@@ -1,3 +1,4 @@
+import numpy as np
 import pybullet as p
 
 import igibson
@@ -33,6 +34,29 @@ def test_import_building_big():
     s.disconnect()
 
 
+def test_trav_graph_cache():
+    download_assets()
+    download_demo_data()
+
+    s = Simulator(mode="headless")
+    scene = StaticIndoorScene("Rs", build_graph=True)
+    s.import_scene(scene)
+    floor_map = np.copy(scene.floor_map[0])
+    adjacency = scene.floor_graph_adjacency[0]
+    g = scene.floor_graph[0]
+    assert g.number_of_nodes() == np.count_nonzero(floor_map) == adjacency.shape[0]
+    assert g.number_of_edges() == adjacency.nnz // 2
+    s.disconnect()
+
+    # The second load should use the cached graph and produce the same result
+    s = Simulator(mode="headless")
+    scene = StaticIndoorScene("Rs", build_graph=True)
+    s.import_scene(scene)
+    assert np.array_equal(scene.floor_map[0], floor_map)
+    assert (scene.floor_graph_adjacency[0] != adjacency).nnz == 0
+    s.disconnect()
+
+
 def test_import_stadium():
     download_assets()
     download_demo_data()
@@ -35,6 +35,17 @@ def test_vision_sensor():
     assert vision_obs["seg"].shape == (env.image_height, env.image_width, 1)
     assert np.all(0 <= vision_obs["seg"]) and np.all(vision_obs["seg"] <= MAX_CLASS_COUNT)
 
+    # The fused readback into preallocated arrays gives the same observation and reuses its arrays
+    env.config["fused_vision_readback"] = True
+    fused_vision_sensor = VisionSensor(env, vision_modalities)
+    fused_vision_obs = fused_vision_sensor.get_obs(env)
+    assert list(fused_vision_obs.keys()) == list(vision_obs.keys())
+    for modality in vision_modalities:
+        assert fused_vision_obs[modality].dtype == vision_obs[modality].dtype
+        assert np.allclose(fused_vision_obs[modality], vision_obs[modality])
+    assert fused_vision_sensor.get_obs(env)["rgb"] is fused_vision_obs["rgb"]
+    assert set(env.simulator.renderer.last_readback_times.keys()) == {"rgb", "3d", "normal", "seg"}
+
 
 def test_scan_sensor():
     download_assets()
@@ -47,6 +58,14 @@ def test_scan_sensor():
     assert scan_obs.shape == (scan_sensor.n_horizontal_rays, scan_sensor.n_vertical_beams)
     assert np.all(0 <= scan_obs) and np.all(scan_obs <= 1.0)
 
+    # Front and rear scans cast in a single batch match the individual readings
+    scan_sensor = ScanSensor(env, ["scan", "occupancy_grid"])
+    rear_scan_sensor = ScanSensor(env, ["scan", "occupancy_grid"], rear=True)
+    front_obs, rear_obs = ScanSensor.get_obs_batch(env, [scan_sensor, rear_scan_sensor])
+    assert np.array_equal(front_obs["scan"], scan_sensor.get_obs(env)["scan"])
+    assert np.array_equal(rear_obs["scan_rear"], rear_scan_sensor.get_obs(env)["scan_rear"])
+    assert front_obs["occupancy_grid"].shape == (scan_sensor.grid_resolution, scan_sensor.grid_resolution, 1)
+
 
 def test_velodyne():
     download_assets()
@@ -1,4 +1,9 @@
+import copy
+
+import numpy as np
+
 from igibson.objects.ycb_object import YCBObject
+from igibson.robots.fetch import Fetch
 from igibson.scenes.stadium_scene import StadiumScene
 from igibson.simulator import Simulator
 from igibson.utils.assets_utils import download_assets
@@ -21,3 +26,33 @@ def test_simulator():
     for i in range(1000):
         s.step()
     s.disconnect()
+
+
+def test_batched_sync():
+    download_assets()
+    s = Simulator(mode="headless")
+    scene = StadiumScene()
+    s.import_scene(scene)
+    s.import_object(Fetch())
+
+    for i in range(5):
+        obj = YCBObject("006_mustard_bottle")
+        s.import_object(obj)
+        obj.set_position([1, i * 0.2, 0.5])
+
+    for i in range(10):
+        s.step()
+
+    for force_sync in [True, False]:
+        for instance in s.renderer.instances:
+            if not instance.dynamic:
+                continue
+            reference = copy.copy(instance)
+            reference.poses_trans, reference.poses_rot = np.copy(instance.poses_trans), np.copy(instance.poses_rot)
+            reference.last_trans, reference.last_rot = np.copy(instance.last_trans), np.copy(instance.last_rot)
+            n_reference = Simulator.update_position(reference, force_sync=force_sync)
+            n_batched = Simulator.update_position_batched(instance, force_sync=force_sync)
+            assert n_reference == n_batched
+            assert np.allclose(reference.poses_trans, instance.poses_trans)
+            assert np.allclose(reference.poses_rot, instance.poses_rot)
+    s.disconnect()
@@ -0,0 +1,80 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pybullet as p
+import pybullet_data
+
+from igibson.utils.contact_manager import ContactManager
+from igibson.utils.snapshot_manager import SnapshotManager
+
+
+class HeatedCube(object):
+    """Minimal scene object with a non-kinematic state that is not part of the pybullet state."""
+
+    def __init__(self, position):
+        self.body_id = p.loadURDF("cube_small.urdf", position)
+        self.temperature = 23.0
+
+    def get_position(self):
+        return np.array(p.getBasePositionAndOrientation(self.body_id)[0])
+
+    def dump_state(self):
+        return {"temperature": self.temperature}
+
+    def load_state(self, dump):
+        self.temperature = dump["temperature"]
+
+
+def make_simulator(objects):
+    scene = SimpleNamespace(objects_by_name=objects, get_objects=lambda: list(objects.values()))
+    simulator = SimpleNamespace(scene=scene, contact_manager=ContactManager(), state_update_scheduler=None)
+    simulator.snapshot_manager = SnapshotManager(simulator, max_snapshots=2)
+    return simulator
+
+
+def test_snapshot_restore_and_eviction(tmp_path):
+    p.connect(p.DIRECT)
+    try:
+        p.setAdditionalSearchPath(pybullet_data.getDataPath())
+        p.setGravity(0, 0, -10)
+        p.loadURDF("plane.urdf")
+        cube = HeatedCube([0, 0, 1])
+        simulator = make_simulator({"cube": cube})
+        snapshot_manager = simulator.snapshot_manager
+
+        initial = snapshot_manager.save(pinned=True)
+        initial_position = cube.get_position()
+        for _ in range(100):
+            p.stepSimulation()
+        cube.temperature = 100.0
+        fallen_position = cube.get_position()
+        assert not np.allclose(fallen_position, initial_position)
+
+        # Branch twice from the same snapshot.
+        for _ in range(2):
+            snapshot_manager.restore(initial)
+            assert np.allclose(cube.get_position(), initial_position)
+            assert cube.temperature == 23.0
+            for _ in range(100):
+                p.stepSimulation()
+            assert np.allclose(cube.get_position(), fallen_position)
+
+        # The least recently used snapshot is evicted, but never the pinned one.
+        first = snapshot_manager.save()
+        second = snapshot_manager.save()
+        assert initial in snapshot_manager and first not in snapshot_manager and second in snapshot_manager
+
+        snapshot_path = os.path.join(str(tmp_path), "initial.snapshot")
+        snapshot_manager.save_to_file(initial, snapshot_path)
+        cube.temperature = 50.0
+        p.resetBasePositionAndOrientation(cube.body_id, [1, 1, 1], [0, 0, 0, 1])
+        loaded = snapshot_manager.restore_from_file(snapshot_path)
+        assert np.allclose(cube.get_position(), initial_position)
+        assert cube.temperature == 23.0
+        assert loaded in snapshot_manager
+
+        snapshot_manager.clear()
+        assert len(snapshot_manager) == 0
+    finally:
+        p.disconnect()
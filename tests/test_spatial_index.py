@@ -0,0 +1,57 @@
+import numpy as np
+
+from igibson.utils.spatial_index import AABBSpatialIndex
+
+
+def brute_force_distances(lowers, uppers, point):
+    return np.array(
+        [
+            np.linalg.norm(np.maximum(np.maximum(lower - point, point - upper), 0))
+            for lower, upper in zip(lowers, uppers)
+        ]
+    )
+
+
+def test_spatial_index_queries():
+    rng = np.random.RandomState(0)
+    lowers = rng.uniform(-5, 5, size=(200, 3))
+    uppers = lowers + rng.uniform(0.1, 1, size=(200, 3))
+    index = AABBSpatialIndex()
+    for key, (lower, upper) in enumerate(zip(lowers, uppers)):
+        index.set_aabb(key, lower, upper)
+    assert len(index) == 200
+
+    for _ in range(20):
+        point = rng.uniform(-5, 5, size=3)
+        distances = brute_force_distances(lowers, uppers, point)
+        assert sorted(index.query_radius(point, 1.0)) == list(np.flatnonzero(distances <= 1.0))
+        assert index.query_knn(point, 5) == list(np.argsort(distances, kind="stable")[:5])
+
+        query_lower = point - 0.5
+        query_upper = point + 0.5
+        overlap = np.all((lowers <= query_upper) & (uppers >= query_lower), axis=1)
+        assert sorted(index.query_overlap(query_lower, query_upper)) == list(np.flatnonzero(overlap))
+
+
+def test_spatial_index_update_and_remove():
+    index = AABBSpatialIndex()
+    index.set_aabb("a", [0, 0, 0], [1, 1, 1])
+    index.set_aabb("b", [2, 0, 0], [3, 1, 1])
+    assert not index.overlaps("a", "b")
+    assert index.overlaps("a", "b", margin=1.0)
+    assert index.query_overlap([0.5, 0.5, 0.5], [2.5, 0.5, 0.5]) == ["a", "b"]
+
+    # Moving a box only touches its own row.
+    index.set_aabb("b", [10, 10, 10], [11, 11, 11])
+    assert index.query_overlap([0.5, 0.5, 0.5], [2.5, 0.5, 0.5]) == ["a"]
+    assert index.query_knn([10, 10, 10], 1) == ["b"]
+
+    index.remove("a")
+    assert "a" not in index
+    assert index.query_radius([0, 0, 0], 1.0) == []
+    assert index.query_knn([0, 0, 0], 5) == ["b"]
+
+    # Removed rows are reused.
+    index.set_aabb("c", [0, 0, 0], [1, 1, 1])
+    assert len(index) == 2
+    assert index.query_radius([0, 0, 0], 0.0) == ["c"]
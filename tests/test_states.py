@@ -7,6 +7,7 @@ import pybullet as p
 import igibson
 from igibson import object_states
 from igibson.external.pybullet_tools.utils import Euler, quat_from_euler
+from igibson.object_states.adjacency import flatten_planes, get_horizontal_adjacencies, get_vertical_adjacencies
 from igibson.object_states.factory import get_state_dependency_graph, get_states_by_dependency_order
 from igibson.objects.articulated_object import ArticulatedObject, URDFObject
 from igibson.objects.ycb_object import YCBObject
@@ -56,6 +57,38 @@ def test_on_top():
         s.disconnect()
 
 
+def test_on_top_sampling_contacts():
+    s = Simulator(mode="headless")
+
+    try:
+        scene = EmptyScene()
+        s.import_scene(scene)
+
+        cabinet_0007 = os.path.join(igibson.assets_path, "models/cabinet2/cabinet_0007.urdf")
+        obj1 = ArticulatedObject(filename=cabinet_0007)
+        s.import_object(obj1)
+        obj1.set_position([0, 0, 0.5])
+
+        obj2 = YCBObject("003_cracker_box")
+        s.import_object(obj2)
+        obj2.set_position_orientation([2, 2, 0.2], [0, 0, 0, 1])
+
+        for _ in range(100):
+            s.step()
+
+        # The contacts of the step are fetched before the sampling
+        assert not obj2.states[object_states.Touching].get_value(obj1)
+
+        # The sampling steps the physics without stepping the simulator, the contacts are read again after it
+        assert obj2.states[object_states.OnTop].set_value(obj1, True, use_ray_casting_method=True)
+        expected = [item for body_id in obj2.get_body_ids() for item in p.getContactPoints(bodyA=body_id)]
+        assert s.contact_manager.get_contact_points_for_bodies(obj2.get_body_ids()) == expected
+        assert obj2.states[object_states.Touching].get_value(obj1)
+        assert obj2.states[object_states.OnTop].get_value(obj1)
+    finally:
+        s.disconnect()
+
+
 def test_inside():
     s = Simulator(mode="headless")
 
@@ -273,3 +306,124 @@ def test_water_source():
         )
     finally:
         s.disconnect()
+
+
+def test_incremental_state_updates():
+    s = Simulator(mode="headless", use_incremental_state_updates=True)
+
+    try:
+        scene = EmptyScene()
+        s.import_scene(scene)
+        model_path = os.path.join(get_ig_model_path("sink", "sink_1"), "sink_1.urdf")
+
+        sink = URDFObject(
+            filename=model_path,
+            category="sink",
+            name="sink_1",
+            scale=np.array([0.8, 0.8, 0.8]),
+            abilities={"freezable": {}, "cookable": {}},
+            fixed_base=True,
+        )
+
+        s.import_object(sink)
+        sink.set_position([1, 1, 0.8])
+
+        # Let everything settle: the static sink's temperature states should stop being updated.
+        for _ in range(10):
+            s.step()
+        stats = s.state_update_scheduler.get_stats()
+        assert stats["last_num_updates_skipped"] > 0
+        assert sink.states[object_states.Temperature].get_value() == 23.0
+
+        # Setting a value from the outside wakes the state and its dependents up.
+        sink.states[object_states.Temperature].set_value(50.0)
+        s.step()
+        temperature = sink.states[object_states.Temperature].get_value()
+        assert 23.0 < temperature < 50.0
+        assert sink.states[object_states.MaxTemperature].get_value() == temperature
+        s.step()
+        assert sink.states[object_states.Temperature].get_value() < temperature
+
+        stats = s.state_update_scheduler.get_stats()
+        assert stats["num_steps"] == 12
+        assert stats["num_updates_run"] > 0
+    finally:
+        s.disconnect()
+
+
+def test_thermal_system():
+    s = Simulator(mode="headless")
+
+    try:
+        scene = EmptyScene()
+        s.import_scene(scene)
+        model_path = os.path.join(get_ig_model_path("sink", "sink_1"), "sink_1.urdf")
+
+        sinks = []
+        for i in range(3):
+            sink = URDFObject(
+                filename=model_path,
+                category="sink",
+                name="sink_{}".format(i),
+                scale=np.array([0.8, 0.8, 0.8]),
+                abilities={"freezable": {}, "cookable": {}},
+            )
+            s.import_object(sink)
+            sink.set_position([i, 1, 0.8])
+            sinks.append(sink)
+
+        # The temperature states are views into the thermal system's arrays.
+        sinks[0].states[object_states.Frozen].set_value(True)
+        sinks[1].states[object_states.Cooked].set_value(True)
+        index = sinks[0].states[object_states.Temperature].thermal_index
+        assert s.thermal_system.temperatures[index] == sinks[0].states[object_states.Temperature].get_value()
+        assert sinks[0].states[object_states.Frozen].get_value()
+        assert sinks[1].states[object_states.Cooked].get_value()
+
+        temperatures = [sink.states[object_states.Temperature].get_value() for sink in sinks]
+        s.step()
+
+        # Without heat sources, all the temperatures decay towards the ambient temperature.
+        for sink, temperature in zip(sinks, temperatures):
+            expected = temperature + (23.0 - temperature) * 0.02 * s.render_timestep
+            assert np.isclose(sink.states[object_states.Temperature].get_value(), expected)
+        assert sinks[1].states[object_states.Cooked].get_value()
+    finally:
+        s.disconnect()
+
+
+def test_batched_adjacencies():
+    s = Simulator(mode="headless")
+
+    try:
+        scene = EmptyScene()
+        s.import_scene(scene)
+
+        cabinet_0007 = os.path.join(igibson.assets_path, "models/cabinet2/cabinet_0007.urdf")
+        objs = []
+        for i in range(3):
+            obj = ArticulatedObject(filename=cabinet_0007)
+            s.import_object(obj)
+            obj.set_position([0.6 * i, 0, 0.5])
+            objs.append(obj)
+        box = YCBObject("003_cracker_box")
+        s.import_object(box)
+        box.set_position_orientation([0, 0, 1.1], [0, 0, 0, 1])
+        objs.append(box)
+        s.step()
+
+        vertical = get_vertical_adjacencies(objs)
+        horizontal = get_horizontal_adjacencies(objs)
+        for obj, obj_vertical, obj_horizontal in zip(objs, vertical, horizontal):
+            # The batched values are cached in the states and match the per-object computation.
+            assert obj.states[object_states.VerticalAdjacency].get_value() is obj_vertical
+            assert obj.states[object_states.VerticalAdjacency]._compute_value() == obj_vertical
+            assert obj.states[object_states.HorizontalAdjacency]._compute_value() == obj_horizontal
+
+        assert set(objs[0].get_body_ids()) & set(vertical[3].negative_neighbors)
+        horizontal_neighbors = [
+            body_id for axis in flatten_planes(horizontal[0]) for body_id in axis.positive_neighbors
+        ]
+        assert set(objs[1].get_body_ids()) & set(horizontal_neighbors)
+    finally:
+        s.disconnect()
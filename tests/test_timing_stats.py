@@ -0,0 +1,17 @@
+from igibson.utils.timing_stats import TimingStats
+
+
+def test_timing_stats():
+    stats = TimingStats()
+    stats.record("arm_ik", 0.5, True)
+    stats.record("arm_ik", 1.5, False)
+    stats.record("arm_motion", 2.0, True)
+    summary = stats.summary()
+    assert list(summary.keys()) == ["arm_ik", "arm_motion"]
+    assert summary["arm_ik"]["num_calls"] == 2
+    assert summary["arm_ik"]["success_rate"] == 0.5
+    assert summary["arm_ik"]["mean_time"] == 1.0
+    assert summary["arm_ik"]["max_time"] == 1.5
+
+    stats.reset()
+    assert stats.summary() == {}
@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+import pybullet as p
+
+from igibson.object_states.update_scheduler import ObjectStateUpdateScheduler
+from igibson.utils.utils import notify_bodies_moved
+
+
+class CountingState(object):
+    """
+    State that only needs to be updated when its object moves, and counts its updates.
+    """
+
+    def __init__(self):
+        self.num_updates = 0
+
+    @staticmethod
+    def requires_update_every_step():
+        return False
+
+    @staticmethod
+    def get_dependencies():
+        return []
+
+    @staticmethod
+    def get_optional_dependencies():
+        return []
+
+    def get_update_signature(self):
+        return None
+
+    def update(self):
+        self.num_updates += 1
+
+
+class BoxObject(object):
+    def __init__(self, position):
+        shape = p.createCollisionShape(p.GEOM_BOX, halfExtents=[0.1, 0.1, 0.1])
+        self.body_id = p.createMultiBody(baseMass=1.0, baseCollisionShapeIndex=shape, basePosition=position)
+        p.changeDynamics(self.body_id, -1, activationState=p.ACTIVATION_STATE_ENABLE_SLEEPING)
+        self.states = {CountingState: CountingState()}
+
+    def get_body_ids(self):
+        return [self.body_id]
+
+
+def test_sleeping_bodies_are_not_polled(monkeypatch):
+    p.connect(p.DIRECT)
+    try:
+        p.setGravity(0, 0, -9.8)
+        p.createMultiBody(baseMass=0, baseCollisionShapeIndex=p.createCollisionShape(p.GEOM_PLANE))
+        sleeping_box = BoxObject([0, 0, 0.1])
+        falling_box = BoxObject([1, 0, 100])
+        objects = [sleeping_box, falling_box]
+        scene = SimpleNamespace(get_objects=lambda: objects, get_objects_with_state=lambda state_type: objects)
+        simulator = SimpleNamespace(scene=scene, object_state_types=[CountingState])
+        scheduler = ObjectStateUpdateScheduler(simulator)
+
+        # Let the box on the ground fall asleep
+        for _ in range(1000):
+            p.stepSimulation()
+            scheduler.step()
+        assert p.getBaseVelocity(sleeping_box.body_id) == ((0.0, 0.0, 0.0), (0.0, 0.0, 0.0))
+
+        polled_bodies = []
+        get_base_position_and_orientation = p.getBasePositionAndOrientation
+
+        def counting_get_base_position_and_orientation(body_id, *args, **kwargs):
+            polled_bodies.append(body_id)
+            return get_base_position_and_orientation(body_id, *args, **kwargs)
+
+        monkeypatch.setattr(p, "getBasePositionAndOrientation", counting_get_base_position_and_orientation)
+        num_updates = sleeping_box.states[CountingState].num_updates
+        p.stepSimulation()
+        scheduler.step()
+        assert polled_bodies == [falling_box.body_id]
+        assert sleeping_box.states[CountingState].num_updates == num_updates
+        assert falling_box.states[CountingState].num_updates > num_updates
+
+        # Teleporting does not wake the body up, but the teleport is notified
+        polled_bodies.clear()
+        p.resetBasePositionAndOrientation(sleeping_box.body_id, [0, 1, 0.1], [0, 0, 0, 1])
+        notify_bodies_moved()
+        scheduler.step()
+        assert polled_bodies == [sleeping_box.body_id, falling_box.body_id]
+        assert sleeping_box.states[CountingState].num_updates == num_updates + 1
+    finally:
+        p.disconnect()
@@ -0,0 +1,78 @@
+import time
+
+import gym
+import numpy as np
+
+from igibson.envs.vector_env import iGibsonVectorEnv
+
+
+class CountingEnv(object):
+    """
+    Lightweight stand-in for iGibsonEnv: the observation is the step count, episodes last episode_length steps and
+    every step sleeps for step_time seconds.
+    """
+
+    def __init__(self, episode_length, step_time=0.0):
+        self.observation_space = gym.spaces.Dict({"count": gym.spaces.Box(0, np.inf, (2,), np.float32)})
+        self.action_space = gym.spaces.Box(-1, 1, (1,), np.float32)
+        self.episode_length = episode_length
+        self.step_time = step_time
+        self.count = 0
+
+    def get_state(self):
+        return {"count": np.full(2, self.count, dtype=np.float32)}
+
+    def reset(self):
+        self.count = 0
+        return self.get_state()
+
+    def step(self, action):
+        time.sleep(self.step_time)
+        self.count += 1
+        return self.get_state(), float(action[0]), self.count == self.episode_length, {}
+
+    def close(self):
+        pass
+
+
+def make_env(episode_length, step_time=0.0):
+    return lambda: CountingEnv(episode_length, step_time)
+
+
+def test_vector_env_step_and_auto_reset():
+    env = iGibsonVectorEnv([make_env(2), make_env(3)], cpu_affinity=True)
+    try:
+        obs = env.reset()
+        assert obs["count"].shape == (2, 2)
+        assert np.all(obs["count"] == 0)
+
+        actions = np.ones((2, 1))
+        obs, rewards, dones, infos = env.step(actions)
+        assert np.all(obs["count"][:, 0] == [1, 1])
+        assert np.all(rewards == 1) and not np.any(dones)
+
+        # The first environment finishes its episode and is reset by its worker.
+        obs, rewards, dones, infos = env.step(actions)
+        assert list(dones) == [True, False]
+        assert np.all(obs["count"][:, 0] == [0, 2])
+        assert infos[0]["terminal_observation"]["count"][0] == 2
+    finally:
+        env.close()
+
+
+def test_vector_env_async():
+    env = iGibsonVectorEnv([make_env(10, step_time=0.01), make_env(10, step_time=0.5)])
+    try:
+        env.reset()
+        env.step_async(np.ones((2, 1)))
+        env_ids, obs, rewards, dones, infos = env.step_wait(min_ready=1)
+        assert env_ids == [0]
+        assert obs["count"].shape == (1, 2)
+
+        # The fast environment can step again while the slow one is still running.
+        env.step_async(np.ones((1, 1)), env_ids=[0])
+        env_ids, obs, _, _, _ = env.step_wait()
+        assert env_ids == [0, 1]
+        assert np.all(obs["count"][:, 0] == [2, 1])
+    finally:
+        env.close()